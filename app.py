@@ -4,7 +4,6 @@ VocalLocal Web Service - Main Application
 
 import os
 import sys
-import subprocess
 import tempfile
 from flask import Flask, redirect, url_for, flash, render_template, jsonify, send_from_directory
 from config import Config
@@ -14,64 +13,15 @@ import jinja2
 from dotenv import load_dotenv
 load_dotenv()
 
-# Try to import Google Generative AI, install if missing
-GEMINI_AVAILABLE = False
-try:
-    # Try to import the module
-    print("Attempting to import google.generativeai...")
-    try:
-        import google.generativeai as genai
-        GEMINI_AVAILABLE = True
-        print("Google Generative AI module loaded successfully")
-    except ImportError as e:
-        print(f"Google Generative AI module not available: {str(e)}")
-        print("Attempting to install Google Generative AI module...")
-        try:
-            # Install the required packages
-            subprocess.check_call([sys.executable, "-m", "pip", "install", 
-                                  "google-generativeai", "google-cloud-aiplatform",
-                                  "googleapis-common-protos", "protobuf"])
-
-            # Try importing again
-            import google.generativeai as genai
-            GEMINI_AVAILABLE = True
-            print("Google Generative AI module installed and loaded successfully")
-        except Exception as install_error:
-            print(f"Failed to install Google Generative AI module: {str(install_error)}")
-            GEMINI_AVAILABLE = False
-
-            # Create a placeholder for genai
-            class GenaiPlaceholder:
-                def configure(self, **kwargs):
-                    pass
-            genai = GenaiPlaceholder()
-except Exception as outer_e:
-    print(f"Outer exception during Google Generative AI import: {str(outer_e)}")
-    GEMINI_AVAILABLE = False
-
-    # Create a placeholder for genai
-    class GenaiPlaceholder:
-        def configure(self, **kwargs):
-            pass
-    genai = GenaiPlaceholder()
-
-# Import token counter and metrics tracker
-try:
-    import tiktoken
-except ImportError:
-    # Install tiktoken if not available
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "tiktoken"])
-        import tiktoken
-    except Exception as e:
-        print(f"Failed to install tiktoken: {e}")
+# Heavy SDKs (google.generativeai, tiktoken) are imported on first use by the
+# services that need them (see utils/lazy_import.py); only check availability here.
+from utils.lazy_import import module_available
+GEMINI_AVAILABLE = module_available('google.generativeai')
+if not GEMINI_AVAILABLE:
+    print("Google Generative AI module not available - install google-generativeai to enable Gemini")
 
-# Import our custom modules
+# Import metrics tracker
 try:
-    from token_counter import (
-        count_openai_tokens, count_openai_chat_tokens, count_openai_audio_tokens,
-        count_gemini_tokens, count_gemini_audio_tokens, estimate_audio_duration
-    )
     from metrics_tracker import metrics_tracker
     METRICS_AVAILABLE = True
     print("Metrics tracking enabled")
@@ -90,6 +40,13 @@ app.secret_key = Config.SECRET_KEY
 from utils.cache_busting import cache_buster
 cache_buster.init_app(app)
 
+# Answer static requests before they reach Flask (STATIC_SERVING)
+if Config.STATIC_SERVING != 'flask':
+    from utils.static_files import StaticFiles
+    app.wsgi_app = StaticFiles(app.wsgi_app, app.static_folder, prefix=app.static_url_path + '/',
+                               mode=Config.STATIC_SERVING, accel_prefix=Config.STATIC_ACCEL_PREFIX,
+                               cache_headers=cache_buster.static_cache_headers, autorefresh=Config.DEBUG)
+
 # Configure upload settings
 app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
 # No MAX_CONTENT_LENGTH set to allow larger files
@@ -131,6 +88,29 @@ except Exception as e:
     print(f"Warning: Firebase initialization failed: {e}")
     print("Application will continue with limited functionality")
 
+# Check that the history `timestamp` indexes are deployed (off the startup path)
+def _check_history_indexes():
+    try:
+        from services.history_service import HistoryService
+        HistoryService.check_indexes()
+    except Exception as e:
+        print(f"Warning: History index check failed: {e}")
+
+import threading
+threading.Thread(target=_check_history_indexes, name='history-index-check', daemon=True).start()
+
+# Periodically reconcile Firebase subscription state against Stripe. Started on
+# a request rather than at import, so that with preload_app it runs in each
+# forked worker instead of the gunicorn master (a no-op once running)
+try:
+    from services.subscription_state import subscription_state
+
+    @app.before_request
+    def start_subscription_reconciler():
+        subscription_state.start_scheduler()
+except Exception as e:
+    print(f"Warning: Subscription reconciler not started: {e}")
+
 # Socket.IO and room cleanup service removed - Conversation Rooms feature has been removed
 
 # Initialize authentication
@@ -244,6 +224,19 @@ def api_health_check():
     """API health check endpoint."""
     return jsonify({'status': 'healthy', 'api': 'VocalLocal API'})
 
+@app.route('/api/health/memory')
+def memory_health_check():
+    """Per-worker memory budget used for transcription admission control."""
+    from flask import session
+    from flask_login import current_user
+    from services.memory_governor import memory_governor
+    status = {'status': 'over_budget' if memory_governor.is_over_budget() else 'healthy'}
+    # Health checks get the status only; the PID, RSS and queue figures are for admins
+    if session.get('special_admin_auth') == True or (
+            current_user.is_authenticated and getattr(current_user, 'role', None) == 'admin'):
+        status.update(memory_governor.get_status())
+    return jsonify(status)
+
 @app.route('/pricing')
 def pricing():
     """Pricing page."""
@@ -274,6 +267,20 @@ app.register_blueprint(usage_tracking.bp)
 app.register_blueprint(user.bp)
 app.register_blueprint(payment.bp)
 app.register_blueprint(payg.bp)
+
+# Resume webhook events and emails left pending by a previous process
+# (webhook handlers are registered by routes.payment). Like the reconciler,
+# the workers are started on a request so that with preload_app they run in
+# each forked worker instead of the gunicorn master (a no-op once running)
+from services.webhook_inbox import webhook_inbox
+from services.email_outbox import email_outbox
+
+@app.before_request
+def start_work_queues():
+    webhook_inbox.start()
+    if Config.EMAIL_OUTBOX:
+        email_outbox.start()
+
 # conversation blueprint removed - Conversation Rooms feature has been removed
 app.register_blueprint(email_bp)
 app.register_blueprint(email_verification_bp)
@@ -284,16 +291,6 @@ from auth import auth_bp
 auth_bp.url_prefix = None
 app.register_blueprint(auth_bp, name='auth_blueprint')
 
-# Import the transcription service for the status endpoint
-from services.transcription import transcription_service
-from models.firebase_models import Transcription, Translation
-
-@app.route('/api/transcription_status/<job_id>', methods=['GET'])
-def transcription_status(job_id):
-    """Check the status of a background transcription job"""
-    status = transcription_service.get_job_status(job_id)
-    return jsonify(status)
-
 # Add API route for user available models
 @app.route('/test-sandbox')
 def test_sandbox():
@@ -8,6 +8,8 @@ from flask_login import LoginManager, login_user, logout_user, current_user, log
 from werkzeug.security import generate_password_hash, check_password_hash
 from authlib.integrations.flask_client import OAuth
 from firebase_models import User, UserActivity
+from config import Config
+from services.session_user import SessionUser, load_session_user, remember_session_user, forget_session_user
 from services.password_reset_service import password_reset_service
 
 # Set up logging
@@ -28,51 +30,14 @@ google = None
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user from Firebase by email."""
+    """Load the user from the session snapshot, or from Firebase by email."""
+    if Config.USER_SESSION_SNAPSHOT:
+        return load_session_user(user_id, User.get_by_email, Config.USER_SNAPSHOT_MAX_AGE)
+
     user_data = User.get_by_email(user_id)
     if not user_data:
         return None
-
-    # Create user object compatible with Flask-Login
-    class UserObject:
-        def __init__(self, email, data):
-            self.id = email
-            self.email = email
-            self.username = data.get('username')
-            self.is_admin = data.get('is_admin', False)
-            self.role = data.get('role', 'normal_user')  # Add role support
-            self.password_hash = data.get('password_hash')
-
-        def is_authenticated(self):
-            return True
-
-        def is_active(self):
-            return True
-
-        def is_anonymous(self):
-            return False
-
-        def get_id(self):
-            return self.id
-
-        def check_password(self, password):
-            if not self.password_hash:
-                return False
-            return check_password_hash(self.password_hash, password)
-
-        def has_role(self, role):
-            """Check if user has a specific role."""
-            return self.role == role
-
-        def has_admin_privileges(self):
-            """Check if user has admin privileges."""
-            return self.role == 'admin'
-
-        def has_premium_access(self):
-            """Check if user has premium access (admin or super user)."""
-            return self.role in ['admin', 'super_user']
-
-    return UserObject(user_id, user_data)
+    return SessionUser.from_user_data(user_id, user_data)
 
 def init_app(app):
     """Initialize authentication with the Flask app."""
@@ -312,66 +277,11 @@ def login():
         user_data = User.get_by_email(email)
 
         if user_data and check_password_hash(user_data.get('password_hash', ''), password):
-            # Create user object
-            class UserObject:
-                def __init__(self, email, data):
-                    self.id = email
-                    self.email = email
-                    self.username = data.get('username')
-                    self.is_admin = data.get('is_admin', False)
-
-                    # Determine role - check role field first, then fallback to is_admin
-                    role = data.get('role')
-                    if role and role in ['admin', 'super_user', 'normal_user']:
-                        self.role = role
-                    elif data.get('is_admin', False):
-                        self.role = 'admin'
-                    else:
-                        self.role = 'normal_user'
-
-                    self._data = data  # Store the full user data
-
-                def is_authenticated(self):
-                    return True
-
-                def is_active(self):
-                    return True
-
-                def is_anonymous(self):
-                    return False
-
-                def get_id(self):
-                    return self.id
-
-                def check_password(self, password):
-                    """Check if the provided password matches the stored hash."""
-                    password_hash = self._data.get('password_hash', '')
-                    return check_password_hash(password_hash, password)
-
-                def has_role(self, role):
-                    """Check if user has a specific role."""
-                    return self.role == role
-
-                def has_admin_privileges(self):
-                    """Check if user has admin privileges."""
-                    return self.role == 'admin'
-
-                def has_premium_access(self):
-                    """Check if user has premium access (admin or super user)."""
-                    return self.role in ['admin', 'super_user']
-
-                def is_super_user(self):
-                    """Check if user is a super user."""
-                    return self.role == 'super_user'
-
-                def is_normal_user(self):
-                    """Check if user is a normal user."""
-                    return self.role == 'normal_user'
-
-            user = UserObject(email, user_data)
+            user = SessionUser.from_user_data(email, user_data)
             # Always use remember=True for 7-day session persistence
             # This provides better mobile UX by keeping users logged in
             login_user(user, remember=True, duration=current_app.config.get('REMEMBER_COOKIE_DURATION'))
+            remember_session_user(user)
 
             # Make session permanent for better mobile experience
             session.permanent = True
@@ -551,6 +461,7 @@ def verify_email():
 def logout():
     """Logout route."""
     logout_user()
+    forget_session_user()
     flash('You have been logged out.', 'info')
     return redirect(url_for('index'))
 
@@ -688,6 +599,7 @@ def google_callback():
 
         # Log the user in with 7-day persistence for better mobile UX
         login_user(user, remember=True, duration=current_app.config.get('REMEMBER_COOKIE_DURATION'))
+        remember_session_user(user)
 
         # Make session permanent for better mobile experience
         session.permanent = True
@@ -795,6 +707,7 @@ def _handle_google_callback():
 
         # Log the user in with 7-day persistence for better mobile UX
         login_user(user, remember=True, duration=current_app.config.get('REMEMBER_COOKIE_DURATION'))
+        remember_session_user(user)
 
         # Make session permanent for better mobile experience
         session.permanent = True
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Concurrency benchmark for the gunicorn worker profiles.
+
+Starts gunicorn with gunicorn_config.py against a small WSGI app that mimics a
+transcription request (a long wait on a provider HTTP call plus a short FFmpeg
+subprocess through utils.blocking_pool), fires a burst of concurrent requests
+and reports how many were in flight at the same time.
+
+Usage:
+    python benchmark_concurrency.py                      # compare gthread vs gevent
+    python benchmark_concurrency.py --profiles gthread --requests 64 --latency 2
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import urllib.request
+import concurrent.futures
+
+_inflight = 0
+_peak = 0
+_lock = threading.Lock()
+
+
+def bench_app(environ, start_response):
+    """WSGI app simulating an I/O-bound provider call."""
+    global _inflight, _peak
+    latency = float(os.environ.get('BENCH_LATENCY', '1.0'))
+
+    with _lock:
+        _inflight += 1
+        _peak = max(_peak, _inflight)
+        peak = _peak
+    try:
+        # Provider call: a socket wait (cooperative under gevent)
+        time.sleep(latency)
+        # FFmpeg-like subprocess through the bounded pool
+        from utils.blocking_pool import run_subprocess, get_pool_stats
+        run_subprocess(['sleep', '0.05'], capture_output=True)
+        body = json.dumps({'peak_inflight': peak, 'pool': get_pool_stats()}).encode()
+    finally:
+        with _lock:
+            _inflight -= 1
+
+    start_response('200 OK', [('Content-Type', 'application/json'),
+                              ('Content-Length', str(len(body)))])
+    return [body]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_profile(profile, num_requests, latency):
+    """Run one benchmark round against a freshly started gunicorn."""
+    port = _free_port()
+    env = dict(os.environ,
+               GUNICORN_WORKER_PROFILE=profile,
+               PORT=str(port),
+               BENCH_LATENCY=str(latency))
+    cmd = [sys.executable, '-m', 'gunicorn', 'benchmark_concurrency:bench_app',
+           '--config', 'gunicorn_config.py', '--log-level', 'warning',
+           '--access-logfile', '/dev/null']
+    server = subprocess.Popen(cmd, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        if not _wait_for_port(port):
+            raise RuntimeError(f"gunicorn ({profile}) did not start on port {port}")
+
+        url = f"http://127.0.0.1:{port}/"
+
+        def _one(_):
+            started = time.time()
+            with urllib.request.urlopen(url, timeout=600) as resp:
+                data = json.loads(resp.read())
+            return time.time() - started, data['peak_inflight']
+
+        start = time.time()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_requests) as executor:
+            results = list(executor.map(_one, range(num_requests)))
+        elapsed = time.time() - start
+
+        latencies = sorted(r[0] for r in results)
+        return {
+            'profile': profile,
+            'requests': num_requests,
+            'provider_latency_s': latency,
+            'wall_time_s': round(elapsed, 2),
+            'throughput_rps': round(num_requests / elapsed, 2),
+            'peak_inflight_per_worker': max(r[1] for r in results),
+            'effective_concurrency': round(num_requests * latency / elapsed, 1),
+            'p50_s': round(latencies[len(latencies) // 2], 2),
+            'p95_s': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        }
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gunicorn worker profiles')
+    parser.add_argument('--profiles', nargs='+', default=['gthread', 'gevent'])
+    parser.add_argument('--requests', type=int, default=64, help='Concurrent requests to fire')
+    parser.add_argument('--latency', type=float, default=2.0, help='Simulated provider latency (s)')
+    args = parser.parse_args()
+
+    rows = []
+    for profile in args.profiles:
+        print(f"Benchmarking profile '{profile}'...")
+        rows.append(run_profile(profile, args.requests, args.latency))
+
+    print()
+    print(f"{'profile':<10}{'wall(s)':>10}{'rps':>8}{'concurrency':>14}{'p50(s)':>9}{'p95(s)':>9}")
+    for row in rows:
+        print(f"{row['profile']:<10}{row['wall_time_s']:>10}{row['throughput_rps']:>8}"
+              f"{row['effective_concurrency']:>14}{row['p50_s']:>9}{row['p95_s']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Rendering benchmark for the email templates.
+
+Measures the one-time cost of compiling templates/emails (CSS inlining
+included) and the per-message cost of building each email with EmailService,
+without sending anything.
+
+Usage:
+    python benchmark_email_rendering.py
+    python benchmark_email_rendering.py --iterations 5000
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.email_templates import EmailTemplates, email_templates
+from services.email_service import email_service
+
+MESSAGES = {
+    'welcome': lambda: email_service.create_welcome_email('Ann', 'ann@example.com', 'basic'),
+    'verification': lambda: email_service.create_verification_email('ann@example.com', '123456', 'Ann', 'token'),
+    'payment_confirmation': lambda: email_service.create_payment_confirmation_email(
+        'Ann', 'ann@example.com', 'in_1234567890', 12.99, 'usd', datetime(2025, 1, 2, 3, 4),
+        'professional', 'Professional Plan', 'monthly'),
+}
+
+# Template variables for timing the template call alone
+CONTEXTS = {
+    'welcome': dict(username='Ann', email='ann@example.com', user_tier='basic',
+                    tier={'limits': '', 'features': []}),
+    'verification': dict(email='ann@example.com', code='123456', display_name='Ann',
+                         verification_link='https://example.com'),
+    'payment_confirmation': dict(username='Ann', email='ann@example.com', invoice_id='in_1',
+                                 amount=12.99, plan_name='Professional Plan',
+                                 formatted_date='January 02, 2025', plan={'monthly_limits': ''},
+                                 plan_display_name='Professional Plan'),
+}
+
+
+def time_call(func, iterations):
+    """Mean seconds per call after one warm-up call."""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark email rendering')
+    parser.add_argument('--iterations', type=int, default=1000, help='Messages built per email type')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    EmailTemplates()
+    print(f"Template compilation (once per process): {(time.perf_counter() - start) * 1000:.1f} ms")
+    print()
+
+    print(f"{'email':<24}{'build (us)':>12}{'render only (us)':>18}")
+    for name, build in MESSAGES.items():
+        msg = build()
+        parts = {part.get_content_type(): part for part in msg.walk()}
+        html = parts['text/html'].get_payload(decode=True)
+        build_time = time_call(build, args.iterations)
+        context = CONTEXTS[name]
+        render_time = time_call(lambda: email_templates.render(name, **context), args.iterations)
+        print(f"{name:<24}{build_time * 1e6:>12.1f}{render_time * 1e6:>18.1f}   ({len(html)} bytes HTML)")
+
+
+if __name__ == '__main__':
+    main()
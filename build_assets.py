@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+"""
+Build the static asset manifest for VocalLocal.
+
+Copies every static asset to static/dist/ under a content-hashed name
+(script.js -> dist/script.<hash>.js) and writes static/dist/manifest.json
+mapping each original path to its hashed copy. CacheBuster
+(utils/cache_busting.py) loads the manifest once at startup, so
+versioned_url_for() is a dict lookup instead of a file stat, and hashed files
+are served with immutable, year-long cache headers because their content can
+never change under the same URL.
+
+Pages are also bundled: a group of <script> or <link> tags wrapped in
+{% call asset_bundle('<name>') %} ... {% endcall %} in a template is
+concatenated, in order, into one file (dist/bundles/<name>.<hash>.js|css) and
+the block renders a single tag for it. JS and CSS are minified (rjsmin,
+rcssmin), and gzip and brotli variants are written next to every text asset
+for the static server to send to clients that accept them. Scripts that no
+template, static file or Python module mentions are left out of the build and
+reported, so dead shims stop shipping.
+
+The service worker (static/sw.js) keeps a stable URL, so it is not hashed.
+Its deployed copy, dist/sw.js, gets the URLs of every hashed asset and bundle
+as its precache list and a version derived from them, so each deploy installs
+a new worker that precaches exactly the new files (served at /sw.js by
+routes/main.py).
+
+Run at deploy time (postbuild.sh). Without a manifest, CacheBuster falls back
+to modification-time versions and the bundle blocks render their original
+tags, which is what development uses; run with --clean to drop a stale build
+while working on assets.
+
+Usage:
+    python build_assets.py
+    python build_assets.py --clean
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+
+try:
+    import rjsmin
+    import rcssmin
+    MINIFY_AVAILABLE = True
+except ImportError:
+    MINIFY_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST = 'dist'
+BUNDLE_DIR = 'bundles'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+ASSET_EXTENSIONS = ('.js', '.css', '.svg', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico', '.woff', '.woff2')
+# The service worker must keep a stable URL (its scope and update checks depend on it)
+UNHASHED = {'sw.js'}
+# Written with .gz/.br variants when compression makes them smaller
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.json')
+# Files searched for mentions of a script before it is dropped as unused
+REFERENCE_EXTENSIONS = ('.html', '.js', '.css', '.py')
+
+_BUNDLE_BLOCK = re.compile(
+    r"{%-?\s*call\s+asset_bundle\(\s*['\"]([\w.-]+)['\"]\s*\)\s*-?%}(.*?){%-?\s*endcall\s*-?%}", re.S)
+_HTML_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_ASSET_TAG = re.compile(r'<(?:script|link)\b[^>]*>', re.I)
+_STATIC_FILENAME = re.compile(r"filename=['\"]([^'\"]+)['\"]")
+_MEDIA_ATTR = re.compile(r'\smedia="([^"]*)"')
+
+SERVICE_WORKER = 'sw.js'
+STATIC_URL = '/static/'
+# The line of sw.js that build_service_worker fills in
+_SW_BUILD_LINE = re.compile(r'^const BUILD = .*;$', re.M)
+
+
+def content_hash(data):
+    """Short SHA-256 of an asset's bytes, used in its file name."""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_path(path, digest):
+    stem, ext = os.path.splitext(path)
+    return f'{DIST}/{stem}.{digest}{ext}'
+
+
+def iter_assets(static_dir):
+    """Yield (logical path, absolute path) of every hashable asset, in a stable order."""
+    for root, dirs, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == '.':
+            dirs[:] = sorted(d for d in dirs if d != DIST)
+        else:
+            dirs.sort()
+        for name in sorted(files):
+            path = name if rel_root == '.' else f"{rel_root.replace(os.sep, '/')}/{name}"
+            if name.endswith(ASSET_EXTENSIONS) and path not in UNHASHED:
+                yield path, os.path.join(root, name)
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def minify(path, data):
+    """Minified JS or CSS (other files, or everything without rjsmin/rcssmin, unchanged)."""
+    if not MINIFY_AVAILABLE:
+        return data
+    if path.endswith('.js'):
+        return rjsmin.jsmin(data.decode('utf-8')).encode('utf-8')
+    if path.endswith('.css'):
+        return rcssmin.cssmin(data.decode('utf-8')).encode('utf-8')
+    return data
+
+
+def write_compressed(path, data):
+    """Write gzip and brotli variants of a text asset next to it, where they are smaller."""
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if BROTLI_AVAILABLE:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            write_file(path + suffix, compressed)
+
+
+def iter_template_sources(template_dir):
+    for root, dirs, files in os.walk(template_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith('.html'):
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    yield os.path.relpath(os.path.join(root, name), template_dir), f.read()
+
+
+def find_bundles(template_dir):
+    """
+    Bundles declared by asset_bundle blocks in the templates.
+
+    Returns:
+        dict: Bundle name -> list of (static path, media query or None), in page order
+    """
+    bundles = {}
+    for template, source in iter_template_sources(template_dir):
+        for name, body in _BUNDLE_BLOCK.findall(source):
+            if '{%' in body:
+                raise ValueError(f"{template}: bundle '{name}' must not contain template logic")
+            files = []
+            for tag in _ASSET_TAG.findall(_HTML_COMMENT.sub('', body)):
+                filename = _STATIC_FILENAME.search(tag)
+                if not filename:
+                    raise ValueError(f"{template}: bundle '{name}' includes a non-static tag: {tag}")
+                media = _MEDIA_ATTR.search(tag)
+                files.append((filename.group(1), media.group(1) if media else None))
+            if not files or not all(path.endswith(os.path.splitext(name)[1]) for path, _ in files):
+                raise ValueError(f"{template}: bundle '{name}' must list {os.path.splitext(name)[1]} files")
+            if bundles.setdefault(name, files) != files:
+                raise ValueError(f"{template}: bundle '{name}' is declared differently elsewhere")
+    return bundles
+
+
+def find_unused_scripts(static_dir, search_dirs):
+    """
+    Scripts that no file in the search directories mentions by name.
+
+    Returns:
+        set: Static paths of unreferenced .js files
+    """
+    scripts = {path: os.path.basename(path) for path, _ in iter_assets(static_dir) if path.endswith('.js')}
+    unused = set(scripts)
+    for search_dir in search_dirs:
+        for root, dirs, files in os.walk(search_dir):
+            dirs[:] = [d for d in dirs if d not in (DIST, 'node_modules', '.git', '__pycache__')]
+            for name in files:
+                if not unused or not name.endswith(REFERENCE_EXTENSIONS):
+                    continue
+                file_path = os.path.join(root, name)
+                try:
+                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                        text = f.read()
+                except OSError:
+                    continue
+                for path in list(unused):
+                    if scripts[path] in text and os.path.abspath(file_path) != os.path.join(
+                            os.path.abspath(static_dir), path.replace('/', os.sep)):
+                        unused.discard(path)
+    return unused
+
+
+def bundle_content(static_dir, name, files):
+    """Concatenated sources of a bundle, in page order."""
+    parts = []
+    for path, media in files:
+        with open(os.path.join(static_dir, path), 'r', encoding='utf-8') as f:
+            text = f.read()
+        if media:
+            text = f'@media {media} {{\n{text}\n}}'
+        parts.append(text)
+    # A statement left open at the end of one script must not run into the next
+    separator = '\n;\n' if name.endswith('.js') else '\n'
+    return separator.join(parts).encode('utf-8')
+
+
+def build_service_worker(static_dir, urls):
+    """
+    Write dist/sw.js: the service worker with its precache list and version.
+
+    Args:
+        static_dir: Static folder holding sw.js
+        urls: URLs to precache
+
+    Returns:
+        str: Path of the built worker relative to the static folder, or None without sw.js
+    """
+    source_path = os.path.join(static_dir, SERVICE_WORKER)
+    if not os.path.exists(source_path):
+        return None
+    with open(source_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    if not _SW_BUILD_LINE.search(source):
+        raise ValueError(f"{source_path} has no 'const BUILD = ...;' line to fill in")
+
+    precache = sorted(urls)
+    version = content_hash(json.dumps(precache).encode('utf-8') + source.encode('utf-8'))
+    line = 'const BUILD = ' + json.dumps({'version': version, 'precache': precache}) + ';'
+    data = minify(SERVICE_WORKER, _SW_BUILD_LINE.sub(lambda match: line, source, count=1).encode('utf-8'))
+    path = f'{DIST}/{SERVICE_WORKER}'
+    write_file(os.path.join(static_dir, path), data)
+    write_compressed(os.path.join(static_dir, path), data)
+    return path
+
+
+def build(static_dir=STATIC_DIR, template_dir=None, search_dirs=None):
+    """
+    Rebuild static/dist and its manifest from scratch.
+
+    Args:
+        static_dir: Static folder
+        template_dir: Templates declaring asset bundles (default: templates/ next to the static folder)
+        search_dirs: Directories searched for mentions of scripts (default: the static folder's parent)
+
+    Returns:
+        dict: The manifest
+    """
+    dist_dir = os.path.join(static_dir, DIST)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    project_dir = os.path.dirname(os.path.abspath(static_dir))
+    bundle_defs = find_bundles(template_dir or os.path.join(project_dir, 'templates'))
+    unused = find_unused_scripts(static_dir, search_dirs or [project_dir])
+
+    assets, hashes = {}, {}
+    for path, source in iter_assets(static_dir):
+        if path in unused:
+            continue
+        with open(source, 'rb') as f:
+            data = minify(path, f.read())
+        digest = content_hash(data)
+        assets[path] = hashed_path(path, digest)
+        hashes[path] = digest
+        write_file(os.path.join(static_dir, assets[path]), data)
+        write_compressed(os.path.join(static_dir, assets[path]), data)
+
+    bundles = {}
+    for name, files in bundle_defs.items():
+        data = minify(name, bundle_content(static_dir, name, files))
+        bundles[name] = hashed_path(f'{BUNDLE_DIR}/{name}', content_hash(data))
+        write_file(os.path.join(static_dir, bundles[name]), data)
+        write_compressed(os.path.join(static_dir, bundles[name]), data)
+
+    service_worker = build_service_worker(
+        static_dir, [STATIC_URL + path for path in list(assets.values()) + list(bundles.values())])
+
+    manifest = {'version': MANIFEST_VERSION, 'assets': assets, 'hashes': hashes,
+                'bundles': bundles, 'unused': sorted(unused), 'service_worker': service_worker}
+    tmp_path = os.path.join(dist_dir, MANIFEST_NAME + '.tmp')
+    write_file(tmp_path, json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+    os.replace(tmp_path, os.path.join(dist_dir, MANIFEST_NAME))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build content-hashed static assets and their manifest')
+    parser.add_argument('--static-dir', default=STATIC_DIR, help='Static folder (default: ./static)')
+    parser.add_argument('--template-dir', help='Templates declaring bundles (default: templates/ next to the static folder)')
+    parser.add_argument('--clean', action='store_true', help='Remove the build output and exit')
+    args = parser.parse_args()
+
+    if args.clean:
+        shutil.rmtree(os.path.join(args.static_dir, DIST), ignore_errors=True)
+        print(f"Removed {os.path.join(args.static_dir, DIST)}")
+        return 0
+
+    if not MINIFY_AVAILABLE:
+        print("⚠️ rjsmin/rcssmin not installed - assets are not minified")
+    if not BROTLI_AVAILABLE:
+        print("⚠️ brotli not installed - only gzip variants are written")
+
+    manifest = build(args.static_dir, args.template_dir)
+    print(f"Built {len(manifest['assets'])} assets and {len(manifest['bundles'])} bundles "
+          f"into {os.path.join(args.static_dir, DIST)}")
+    for path in manifest['unused']:
+        print(f"  skipped unreferenced script: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -34,6 +34,12 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME', '')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')  # App password for Gmail
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', '')
+    # Queue emails in Firebase and deliver them from a background sender over a
+    # pooled SMTP connection; set EMAIL_OUTBOX=false to send inline
+    EMAIL_OUTBOX = os.getenv('EMAIL_OUTBOX', 'True').lower() == 'true'
+
+    # Rendered invoice PDFs, stored by content hash (re-rendered on a miss)
+    INVOICE_STORE_DIR = os.getenv('INVOICE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'invoice_store'))
 
     # Stripe payment configuration
     STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY')
@@ -44,6 +50,37 @@ class Config:
     GEMINI_AVAILABLE = True  # Will be updated at runtime
     METRICS_AVAILABLE = True  # Will be updated at runtime
 
+    # Fast start: defer heavy SDK imports and network initialization (Gemini
+    # model discovery) to first use. Set FAST_START=false to warm everything at boot.
+    FAST_START = os.getenv('FAST_START', 'True').lower() == 'true'
+
+    # History bodies are stored apart from history metadata; bodies of at least
+    # HISTORY_BODY_COMPRESS_MIN_CHARS characters are zlib-compressed
+    HISTORY_BODY_COMPRESSION = os.getenv('HISTORY_BODY_COMPRESSION', 'True').lower() == 'true'
+    HISTORY_BODY_COMPRESS_MIN_CHARS = int(os.getenv('HISTORY_BODY_COMPRESS_MIN_CHARS', '1024'))
+
+    # Usage checks and admin usage statistics are computed in process ('local');
+    # set to 'functions' to use the Firebase Cloud Functions instead
+    USAGE_BACKEND = os.getenv('USAGE_BACKEND', 'local').lower()
+
+    # Authenticated requests load the user from a signed snapshot in the session,
+    # revalidated against Firebase after USER_SNAPSHOT_MAX_AGE seconds (or sooner
+    # when this worker changes the user's role, verification or plan)
+    USER_SESSION_SNAPSHOT = os.getenv('USER_SESSION_SNAPSHOT', 'True').lower() == 'true'
+    USER_SNAPSHOT_MAX_AGE = int(os.getenv('USER_SNAPSHOT_MAX_AGE_MINUTES', '5')) * 60
+
+    # Longest a background job status request may wait for a change (?wait=N).
+    # Each waiting request holds a worker thread, so keep 0 (no long-polling)
+    # for the gthread profile and raise it under gevent
+    JOB_STATUS_MAX_WAIT = float(os.getenv('JOB_STATUS_MAX_WAIT', '0'))
+
+    # How /static/ is served (utils/static_files.py): 'index' answers from an
+    # in-memory index ahead of Flask with gzip/brotli negotiation; 'x-accel-redirect'
+    # (nginx, internal location STATIC_ACCEL_PREFIX) or 'x-sendfile' hand the body
+    # to the front-end server; 'flask' serves through Flask as before
+    STATIC_SERVING = os.getenv('STATIC_SERVING', 'index').lower()
+    STATIC_ACCEL_PREFIX = os.getenv('STATIC_ACCEL_PREFIX', '/protected-static/')
+
     # Server settings
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', 5001))
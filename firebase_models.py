@@ -1,5 +1,7 @@
 """Firebase data models for VocalLocal."""
 from firebase_config import initialize_firebase
+from services.permission_cache import permission_cache
+from services.session_user import SessionUser
 from datetime import datetime
 import json
 import re
@@ -51,6 +53,7 @@ class User(FirebaseModel):
         # Use email as unique ID (replace dots with commas for Firebase path)
         user_id = email.replace('.', ',')
         User.get_ref('users').child(user_id).set(user_data)
+        permission_cache.invalidate(email)
         return user_id
 
     @staticmethod
@@ -83,6 +86,7 @@ class User(FirebaseModel):
             'oauth_provider': oauth_provider,
             'oauth_id': oauth_id
         })
+        permission_cache.invalidate(email)
 
     @staticmethod
     def update_last_login(email):
@@ -103,24 +107,20 @@ class User(FirebaseModel):
             'role': new_role,
             'is_admin': new_role == User.ROLE_ADMIN  # Update is_admin for backward compatibility
         })
+        permission_cache.invalidate(email)
 
         return True
 
+    @staticmethod
+    def get_permissions(email):
+        """Get user's cached role, verification flag and plan (None if the user does not exist)."""
+        return permission_cache.get(email, User.get_by_email)
+
     @staticmethod
     def get_user_role(email):
         """Get user's role."""
-        user_data = User.get_by_email(email)
-        if not user_data:
-            return None
-
-        # Return role if it exists, otherwise determine from is_admin flag
-        role = user_data.get('role')
-        if role and role in User.VALID_ROLES:
-            return role
-
-        # Fallback to determining role from is_admin flag
-        is_admin = user_data.get('is_admin', False)
-        return User.ROLE_ADMIN if is_admin else User.ROLE_NORMAL_USER
+        permissions = User.get_permissions(email)
+        return permissions['role'] if permissions else None
 
     @staticmethod
     def is_admin(email):
@@ -154,15 +154,9 @@ class User(FirebaseModel):
     @staticmethod
     def is_email_verified(email):
         """Check if user's email is verified."""
-        user_data = User.get_by_email(email)
-        if not user_data:
-            return False
-
+        permissions = User.get_permissions(email)
         # OAuth users are automatically verified
-        if user_data.get('oauth_provider'):
-            return True
-
-        return user_data.get('email_verified', False)
+        return bool(permissions and permissions['email_verified'])
 
     @staticmethod
     def mark_email_verified(email):
@@ -176,6 +170,7 @@ class User(FirebaseModel):
                 'email_verified': True,
                 'email_verified_at': datetime.now().isoformat()
             })
+            permission_cache.invalidate(email)
             return True
         except Exception:
             return False
@@ -183,16 +178,12 @@ class User(FirebaseModel):
     @staticmethod
     def requires_email_verification(email):
         """Check if user requires email verification to access features."""
-        user_data = User.get_by_email(email)
-        if not user_data:
+        permissions = User.get_permissions(email)
+        if not permissions:
             return True  # New users need verification
 
-        # OAuth users don't need verification
-        if user_data.get('oauth_provider'):
-            return False
-
-        # Manual registration users need verification
-        return not user_data.get('email_verified', False)
+        # OAuth users are verified; manual registration users need verification
+        return not permissions['email_verified']
 
     @staticmethod
     def get_or_create(email, name=None, picture=None):
@@ -204,7 +195,7 @@ class User(FirebaseModel):
             picture: URL to user's profile picture (optional)
 
         Returns:
-            A UserObject instance compatible with Flask-Login
+            A SessionUser instance compatible with Flask-Login
         """
         # Check if user exists
         user_data = User.get_by_email(email)
@@ -253,75 +244,7 @@ class User(FirebaseModel):
         # Update last login time
         User.update_last_login(email)
 
-        # Create user object compatible with Flask-Login
-        class UserObject:
-            def __init__(self, email, data):
-                self.id = email
-                self.email = email
-                self.username = data.get('username')
-                self.is_admin = data.get('is_admin', False)
-                self.role = data.get('role', User.ROLE_NORMAL_USER)
-                self.email_verified = data.get('email_verified', data.get('oauth_provider') is not None)
-                self._data = data  # Store the full user data
-
-            def is_authenticated(self):
-                return True
-
-            def is_active(self):
-                return True
-
-            def is_anonymous(self):
-                return False
-
-            def get_id(self):
-                return self.id
-
-            def check_password(self, password):
-                """Check if the provided password matches the stored hash."""
-                password_hash = self._data.get('password_hash', '')
-                from werkzeug.security import check_password_hash
-                return check_password_hash(password_hash, password) if password_hash else False
-
-            def has_role(self, role):
-                """Check if user has a specific role."""
-                return self.role == role
-
-            def has_admin_privileges(self):
-                """Check if user has admin privileges."""
-                return self.role == User.ROLE_ADMIN
-
-            def has_premium_access(self):
-                """Check if user has premium access (admin or super user)."""
-                return self.role in [User.ROLE_ADMIN, User.ROLE_SUPER_USER]
-
-            def is_super_user(self):
-                """Check if user is a super user."""
-                return self.role == User.ROLE_SUPER_USER
-
-            def is_normal_user(self):
-                """Check if user is a normal user."""
-                return self.role == User.ROLE_NORMAL_USER
-
-            def is_email_verified(self):
-                """Check if user's email is verified."""
-                return self.email_verified
-
-            def requires_email_verification(self):
-                """Check if user requires email verification."""
-                # OAuth users don't need verification
-                if self._data.get('oauth_provider'):
-                    return False
-                # Manual registration users need verification
-                return not self.email_verified
-
-            def mark_email_verified(self):
-                """Mark user's email as verified."""
-                success = User.mark_email_verified(self.email)
-                if success:
-                    self.email_verified = True
-                return success
-
-        return UserObject(email, user_data)
+        return SessionUser.from_user_data(email, user_data)
 
     @staticmethod
     def get_all_users():
@@ -4,28 +4,44 @@ Gunicorn configuration file for VocalLocal
 import os
 import multiprocessing
 
+# Worker profile
+# "gthread" (default): OS threads, each request holds a thread while it waits on
+#   OpenAI/Gemini, so capacity is workers * threads concurrent requests.
+# "gevent": greenlet workers for I/O-bound provider calls. Sockets are
+#   cooperative after monkey-patching; FFmpeg subprocesses and Gemini uploads are
+#   offloaded to a bounded native pool (utils/blocking_pool.py).
+WORKER_PROFILE = os.environ.get('GUNICORN_WORKER_PROFILE', 'gthread').lower()
+
 # Worker settings
 # For paid tier with more resources, we can use better settings
-workers = 2  # Keep at 2 for stability
-worker_class = 'gthread'  # Use gthread workers for concurrent processing
-threads = 4  # Use 4 threads per worker for parallel processing
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))  # Keep at 2 for stability
 timeout = 600  # Increase from default 30 seconds to 300 seconds (5 minutes)
 graceful_timeout = 120  # Allow 2 minutes for graceful shutdown
 keepalive = 5
 
+if WORKER_PROFILE == 'gevent':
+    worker_class = 'gevent'
+    # Concurrent greenlets per worker; each one mostly waits on provider I/O
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 200))
+    # gRPC does not cooperate with gevent, so route Gemini over REST
+    os.environ.setdefault('GEMINI_TRANSPORT', 'rest')
+else:
+    worker_class = 'gthread'  # Use gthread workers for concurrent processing
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))  # Use 4 threads per worker for parallel processing
+    # Worker memory management
+    # These settings help prevent memory issues with large files
+    worker_connections = 20  # Increased for better concurrency
+
 # Server settings
 bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
 worker_tmp_dir = '/tmp'
 
 # Memory management
-# Restart workers after processing a certain number of requests to prevent memory leaks
-max_requests = 50  # Reduced to restart workers more frequently and free memory
-max_requests_jitter = 25  # Add randomness to prevent all workers from restarting at once
-
-# Worker memory management
-# These settings help prevent memory issues with large files
-worker_connections = 20  # Increased for better concurrency
-# threads = 4  # Already set above
+# Transcription requests are admitted against a per-worker RSS budget
+# (services/memory_governor.py, WORKER_RSS_BUDGET_MB), so recycling is only a
+# backstop against slow leaks rather than the primary memory control.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = 100  # Add randomness to prevent all workers from restarting at once
 
 # Logging
 accesslog = '-'  # Log to stdout
@@ -40,14 +56,16 @@ limit_request_line = 8190
 limit_request_fields = 100
 limit_request_field_size = 8190
 
-# Preload the application to save memory across workers
-preload_app = True
+# Preload the application to save memory across workers.
+# gevent must patch the stdlib before the app (and its SDK clients) is imported,
+# which only happens inside the worker, so preloading is disabled for that profile.
+preload_app = WORKER_PROFILE != 'gevent'
 
 def post_fork(server, worker):
     """
     Called just after a worker has been forked.
     """
-    server.log.info("Worker spawned (pid: %s)", worker.pid)
+    server.log.info("Worker spawned (pid: %s, profile: %s)", worker.pid, WORKER_PROFILE)
 
 def pre_fork(server, worker):
     """
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Migrate History Entries to the Metadata/Body Layout
+
+Moves the full text of existing transcriptions and translations out of the
+history index (`transcriptions/{user_id}`, `translations/{user_id}`) into the
+body store (`transcription_bodies`, `translation_bodies`), leaving metadata,
+char counts and a preview in place. Entries missing the epoch-ms `ts` field
+that the combined history merge orders by get it backfilled from their ISO
+timestamp. Entries are processed in key-ordered batches per user, and each
+entry is rewritten with one multi-path update, so the script can be
+interrupted and re-run safely.
+
+Usage:
+    python migrate_history_bodies.py --dry-run
+    python migrate_history_bodies.py --collection transcriptions --batch-size 200
+"""
+
+import sys
+import os
+import json
+import argparse
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.firebase_models import HistoryBody
+from services.history_service import HistoryService
+
+
+def _json_size(value):
+    return len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+
+def migrate_collection(collection, batch_size, dry_run):
+    """Split every inline entry of a collection. Returns migration stats."""
+    body_fields = HistoryBody.BODY_FIELDS[collection]
+    body_collection = HistoryBody.BODY_COLLECTIONS[collection]
+    stats = {'users': 0, 'entries': 0, 'migrated': 0, 'backfilled': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+    # Shallow read: only the user IDs, not their history
+    user_ids = HistoryBody.get_ref(collection).get(shallow=True) or {}
+    print(f"\n📂 {collection}: {len(user_ids)} users")
+
+    for user_id in user_ids:
+        stats['users'] += 1
+        migrated_for_user = 0
+
+        for key, entry in HistoryBody.iter_children(f'{collection}/{user_id}', batch_size):
+            stats['entries'] += 1
+            if not isinstance(entry, dict):
+                continue
+            inline = any(field in entry for field in body_fields)
+            if not inline and 'ts' in entry:
+                continue  # Already migrated
+
+            if 'ts' not in entry:
+                stats['backfilled'] += 1
+
+            if inline:
+                metadata, body = HistoryBody.split_entry(collection, entry)
+                # Backfill the epoch ms the history merge orders by
+                metadata['ts'] = HistoryService._epoch_ms(entry)
+                stats['bytes_before'] += _json_size(entry)
+                stats['bytes_after'] += _json_size(metadata)
+                updates = {
+                    f'{collection}/{user_id}/{key}': metadata,
+                    f'{body_collection}/{user_id}/{key}': HistoryBody.encode(body),
+                }
+            else:
+                updates = {f'{collection}/{user_id}/{key}/ts': HistoryService._epoch_ms(entry)}
+
+            stats['migrated'] += 1
+            migrated_for_user += 1
+
+            if not dry_run:
+                HistoryBody.get_root().update(updates)
+
+        if migrated_for_user:
+            action = 'would migrate' if dry_run else 'migrated'
+            print(f"  👤 {user_id}: {action} {migrated_for_user} entries")
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split history entries into metadata and body store')
+    parser.add_argument('--collection', choices=sorted(HistoryBody.BODY_COLLECTIONS), action='append',
+                        help='Collection to migrate (default: all)')
+    parser.add_argument('--batch-size', type=int, default=200, help='Entries read per query')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args()
+
+    print("🔧 VocalLocal History Body Migration")
+    print("=" * 60)
+    if args.dry_run:
+        print("🔍 Dry run: no data will be written")
+
+    for collection in args.collection or sorted(HistoryBody.BODY_COLLECTIONS):
+        stats = migrate_collection(collection, args.batch_size, args.dry_run)
+        saved = stats['bytes_before'] - stats['bytes_after']
+        share = saved / stats['bytes_before'] * 100 if stats['bytes_before'] else 0
+        print(f"✅ {collection}: {stats['migrated']} of {stats['entries']} entries "
+              f"{'to migrate' if args.dry_run else 'migrated'} across {stats['users']} users")
+        print(f"   History index: {stats['bytes_before'] / 1024:.1f} KB -> {stats['bytes_after'] / 1024:.1f} KB "
+              f"({share:.0f}% smaller)")
+        print(f"   Epoch timestamps backfilled: {stats['backfilled']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,25 @@
 """Firebase data models for VocalLocal."""
 from firebase_config import initialize_firebase
+from services.permission_cache import permission_cache
+from services.session_user import SessionUser
+from config import Config
 from datetime import datetime
+import base64
 import json
+import os
 import re
+import time
+import threading
+import zlib
+
+# Characters of each transcript kept inline in the history index
+PREVIEW_CHARS = 200
+
+_PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+_push_lock = threading.Lock()
+_last_push_time = 0
+_last_rand_chars = []
+
 
 class FirebaseModel:
     """Base class for Firebase models."""
@@ -13,6 +30,232 @@ class FirebaseModel:
         db_ref = initialize_firebase()
         return db_ref.child(path)
 
+    @staticmethod
+    def get_root():
+        """Get the root Firebase reference (for multi-path updates)."""
+        return initialize_firebase()
+
+    @staticmethod
+    def new_key():
+        """
+        Generate a chronologically ordered push key locally.
+
+        Same format as keys from `push()`, so a record can be written to
+        several paths in one multi-path update instead of a POST per path.
+        """
+        global _last_push_time, _last_rand_chars
+        with _push_lock:
+            now = int(time.time() * 1000)
+            if now == _last_push_time:
+                # Same millisecond: increment the random part to keep keys ordered
+                for i in range(11, -1, -1):
+                    if _last_rand_chars[i] != 63:
+                        _last_rand_chars[i] += 1
+                        break
+                    _last_rand_chars[i] = 0
+            else:
+                _last_rand_chars = [b % 64 for b in os.urandom(12)]
+            _last_push_time = now
+
+            time_chars = []
+            for _ in range(8):
+                time_chars.append(_PUSH_CHARS[now % 64])
+                now //= 64
+            return ''.join(reversed(time_chars)) + ''.join(_PUSH_CHARS[i] for i in _last_rand_chars)
+
+
+    @classmethod
+    def iter_children(cls, path, batch_size=200):
+        """
+        Yield (key, value) for the children of a path in key-ordered batches.
+
+        Pages with `order_by_key().start_at().limit_to_first()`, so large
+        collections are walked in bounded memory.
+        """
+        ref = cls.get_ref(path)
+        start_key = None
+        while True:
+            query = ref.order_by_key()
+            if start_key is not None:
+                query = query.start_at(start_key)
+            batch = query.limit_to_first(batch_size + (1 if start_key is not None else 0)).get() or {}
+
+            keys = [key for key in batch if key != start_key]
+            for key in keys:
+                yield key, batch[key]
+            if len(keys) < batch_size:
+                return
+            start_key = keys[-1]
+
+
+class HistoryBody(FirebaseModel):
+    """
+    Full transcript bodies, stored apart from the history index.
+
+    `transcriptions/{user_id}` and `translations/{user_id}` hold only metadata
+    and a short preview, so history listings and admin scans stay small. The
+    full text lives under `transcription_bodies/{user_id}/{key}` and
+    `translation_bodies/{user_id}/{key}` and is fetched on demand. Large bodies
+    are zlib-compressed (HISTORY_BODY_COMPRESSION).
+    """
+
+    BODY_COLLECTIONS = {
+        'transcriptions': 'transcription_bodies',
+        'translations': 'translation_bodies',
+    }
+
+    # Fields that move from the history entry to the body store
+    BODY_FIELDS = {
+        'transcriptions': ('text',),
+        'translations': ('original_text', 'translated_text'),
+    }
+
+    @staticmethod
+    def encode(fields):
+        """Encode body fields for storage, compressing when it pays off."""
+        size = sum(len(value or '') for value in fields.values())
+        if Config.HISTORY_BODY_COMPRESSION and size >= Config.HISTORY_BODY_COMPRESS_MIN_CHARS:
+            raw = json.dumps(fields, ensure_ascii=False).encode('utf-8')
+            return {
+                'encoding': 'zlib',
+                'data': base64.b64encode(zlib.compress(raw, 6)).decode('ascii')
+            }
+        return {'encoding': 'plain', **fields}
+
+    @staticmethod
+    def decode(stored):
+        """Decode a stored body back into its fields."""
+        if not stored:
+            return None
+        if stored.get('encoding') == 'zlib':
+            return json.loads(zlib.decompress(base64.b64decode(stored['data'])).decode('utf-8'))
+        return {key: value for key, value in stored.items() if key != 'encoding'}
+
+    @staticmethod
+    def get(collection, user_email, key):
+        """
+        Fetch the full body of a history entry.
+
+        Falls back to the inline fields of entries written before the split.
+
+        Returns:
+            Dictionary of body fields, or None if the entry does not exist
+        """
+        user_id = user_email.replace('.', ',')
+        body_collection = HistoryBody.BODY_COLLECTIONS[collection]
+        body = HistoryBody.decode(HistoryBody.get_ref(f'{body_collection}/{user_id}/{key}').get())
+        if body is not None:
+            return body
+
+        entry = HistoryBody.get_ref(f'{collection}/{user_id}/{key}').get()
+        if not entry:
+            return None
+        return {field: entry.get(field, '') for field in HistoryBody.BODY_FIELDS[collection]}
+
+    @staticmethod
+    def split_entry(collection, entry):
+        """
+        Split a full history entry into (metadata, body fields).
+
+        Used on write and by the migration script for pre-split entries.
+        """
+        fields = HistoryBody.BODY_FIELDS[collection]
+        metadata = {key: value for key, value in entry.items() if key not in fields}
+        body = {field: entry.get(field) or '' for field in fields}
+
+        if collection == 'transcriptions':
+            metadata['char_count'] = len(body['text'])
+            metadata['preview'] = body['text'][:PREVIEW_CHARS]
+        else:
+            metadata['original_chars'] = len(body['original_text'])
+            metadata['translated_chars'] = len(body['translated_text'])
+            metadata['original_preview'] = body['original_text'][:PREVIEW_CHARS]
+            metadata['translated_preview'] = body['translated_text'][:PREVIEW_CHARS]
+        return metadata, body
+
+    @staticmethod
+    def save_entry(collection, user_email, entry):
+        """
+        Write a history entry as metadata plus body in one multi-path update.
+
+        Returns:
+            The new entry key
+        """
+        user_id = user_email.replace('.', ',')
+        key = HistoryBody.new_key()
+        metadata, body = HistoryBody.split_entry(collection, entry)
+        HistoryBody.get_root().update({
+            f'{collection}/{user_id}/{key}': metadata,
+            f'{HistoryBody.BODY_COLLECTIONS[collection]}/{user_id}/{key}': HistoryBody.encode(body),
+            # The user's usage aggregate is bumped in the same atomic update
+            **UsageAggregate.increments(collection, user_email, metadata),
+        })
+        return key
+
+
+class UsageAggregate(FirebaseModel):
+    """
+    Per-user history totals under `usage_aggregates/{user_id}`.
+
+    Counts, character totals and last activity are incremented with server
+    increments as part of each history write, so the admin usage dashboard is
+    a single read instead of a scan of every user's history. The email and
+    username are written when the account is created. Use
+    rebuild_usage_aggregates.py to backfill or repair them.
+    """
+
+    # History collection -> (count field, chars field)
+    FIELDS = {
+        'transcriptions': ('transcription_count', 'transcription_chars'),
+        'translations': ('translation_count', 'translation_chars'),
+    }
+
+    @staticmethod
+    def entry_chars(collection, entry):
+        """Characters counted for an entry (metadata, or inline text for legacy entries)."""
+        if collection == 'transcriptions':
+            return entry.get('char_count', len(entry.get('text') or ''))
+        return entry.get('translated_chars', len(entry.get('translated_text') or ''))
+
+    @staticmethod
+    def increments(collection, user_email, metadata):
+        """Multi-path update entries that add one history entry to a user's aggregate."""
+        user_id = user_email.replace('.', ',')
+        count_field, chars_field = UsageAggregate.FIELDS[collection]
+        path = f'usage_aggregates/{user_id}'
+        return {
+            f'{path}/email': user_email,
+            f'{path}/{count_field}': {'.sv': {'increment': 1}},
+            f'{path}/{chars_field}': {'.sv': {'increment': UsageAggregate.entry_chars(collection, metadata)}},
+            f'{path}/last_activity': metadata.get('ts') or {'.sv': 'timestamp'},
+        }
+
+    @staticmethod
+    def profile(user_email, username):
+        """Multi-path update entries that name a user's aggregate (written with the account)."""
+        path = f"usage_aggregates/{user_email.replace('.', ',')}"
+        return {f'{path}/email': user_email, f'{path}/username': username}
+
+    @staticmethod
+    def empty(user_email):
+        """A zeroed aggregate for a user."""
+        aggregate = {'email': user_email, 'last_activity': 0}
+        for count_field, chars_field in UsageAggregate.FIELDS.values():
+            aggregate[count_field] = 0
+            aggregate[chars_field] = 0
+        return aggregate
+
+    @staticmethod
+    def get_all():
+        """All users' aggregates keyed by user ID."""
+        return UsageAggregate.get_ref('usage_aggregates').get() or {}
+
+    @staticmethod
+    def set(user_email, aggregate):
+        """Replace a user's aggregate (used by the rebuild script)."""
+        user_id = user_email.replace('.', ',')
+        UsageAggregate.get_ref(f'usage_aggregates/{user_id}').set(aggregate)
+
 class User(FirebaseModel):
     """User model for Firebase."""
 
@@ -49,7 +292,13 @@ class User(FirebaseModel):
 
         # Use email as unique ID (replace dots with commas for Firebase path)
         user_id = email.replace('.', ',')
-        User.get_ref('users').child(user_id).set(user_data)
+        # The usage aggregate is named in the same update, so the admin usage
+        # dashboard lists the user from that node alone
+        User.get_root().update({
+            f'users/{user_id}': user_data,
+            **UsageAggregate.profile(email, username),
+        })
+        permission_cache.invalidate(email)
         return user_id
 
     @staticmethod
@@ -64,11 +313,7 @@ class User(FirebaseModel):
     @staticmethod
     def get_by_oauth(provider, oauth_id):
         """Get user by OAuth provider and ID."""
-        users = User.get_ref('users').get()
-        if not users:
-            return None
-
-        for user_id, user_data in users.items():
+        for user_data in User.iter_users():
             if (user_data.get('oauth_provider') == provider and
                 user_data.get('oauth_id') == oauth_id):
                 return user_data
@@ -82,6 +327,7 @@ class User(FirebaseModel):
             'oauth_provider': oauth_provider,
             'oauth_id': oauth_id
         })
+        permission_cache.invalidate(email)
 
     @staticmethod
     def update_last_login(email):
@@ -102,24 +348,20 @@ class User(FirebaseModel):
             'role': new_role,
             'is_admin': new_role == User.ROLE_ADMIN  # Update is_admin for backward compatibility
         })
+        permission_cache.invalidate(email)
 
         return True
 
+    @staticmethod
+    def get_permissions(email):
+        """Get user's cached role, verification flag and plan (None if the user does not exist)."""
+        return permission_cache.get(email, User.get_by_email)
+
     @staticmethod
     def get_user_role(email):
         """Get user's role."""
-        user_data = User.get_by_email(email)
-        if not user_data:
-            return None
-
-        # Return role if it exists, otherwise determine from is_admin flag
-        role = user_data.get('role')
-        if role and role in User.VALID_ROLES:
-            return role
-
-        # Fallback to determining role from is_admin flag
-        is_admin = user_data.get('is_admin', False)
-        return User.ROLE_ADMIN if is_admin else User.ROLE_NORMAL_USER
+        permissions = User.get_permissions(email)
+        return permissions['role'] if permissions else None
 
     @staticmethod
     def is_admin(email):
@@ -153,15 +395,9 @@ class User(FirebaseModel):
     @staticmethod
     def is_email_verified(email):
         """Check if user's email is verified."""
-        user_data = User.get_by_email(email)
-        if not user_data:
-            return False
-
+        permissions = User.get_permissions(email)
         # OAuth users are automatically verified
-        if user_data.get('oauth_provider'):
-            return True
-
-        return user_data.get('email_verified', False)
+        return bool(permissions and permissions['email_verified'])
 
     @staticmethod
     def mark_email_verified(email):
@@ -175,6 +411,7 @@ class User(FirebaseModel):
                 'email_verified': True,
                 'email_verified_at': datetime.now().isoformat()
             })
+            permission_cache.invalidate(email)
             return True
         except Exception:
             return False
@@ -182,16 +419,12 @@ class User(FirebaseModel):
     @staticmethod
     def requires_email_verification(email):
         """Check if user requires email verification to access features."""
-        user_data = User.get_by_email(email)
-        if not user_data:
+        permissions = User.get_permissions(email)
+        if not permissions:
             return True  # New users need verification
 
-        # OAuth users don't need verification
-        if user_data.get('oauth_provider'):
-            return False
-
-        # Manual registration users need verification
-        return not user_data.get('email_verified', False)
+        # OAuth users are verified; manual registration users need verification
+        return not permissions['email_verified']
 
     @staticmethod
     def get_or_create(email, name=None, picture=None):
@@ -203,7 +436,7 @@ class User(FirebaseModel):
             picture: URL to user's profile picture (optional)
 
         Returns:
-            A UserObject instance compatible with Flask-Login
+            A SessionUser instance compatible with Flask-Login
         """
         # Check if user exists
         user_data = User.get_by_email(email)
@@ -252,72 +485,45 @@ class User(FirebaseModel):
         # Update last login time
         User.update_last_login(email)
 
-        # Create user object compatible with Flask-Login
-        class UserObject:
-            def __init__(self, email, data):
-                self.id = email
-                self.email = email
-                self.username = data.get('username')
-                self.is_admin = data.get('is_admin', False)
-                self.role = data.get('role', User.ROLE_NORMAL_USER)
-                self._data = data  # Store the full user data
-
-            def is_authenticated(self):
-                return True
-
-            def is_active(self):
-                return True
-
-            def is_anonymous(self):
-                return False
-
-            def get_id(self):
-                return self.id
-
-            def check_password(self, password):
-                """Check if the provided password matches the stored hash."""
-                password_hash = self._data.get('password_hash', '')
-                from werkzeug.security import check_password_hash
-                return check_password_hash(password_hash, password) if password_hash else False
-
-            def has_role(self, role):
-                """Check if user has a specific role."""
-                return self.role == role
-
-            def has_admin_privileges(self):
-                """Check if user has admin privileges."""
-                return self.role == User.ROLE_ADMIN
+        return SessionUser.from_user_data(email, user_data)
 
-            def has_premium_access(self):
-                """Check if user has premium access (admin or super user)."""
-                return self.role in [User.ROLE_ADMIN, User.ROLE_SUPER_USER]
+    # Fields shown in admin user listings
+    LISTING_FIELDS = ('username', 'email', 'created_at', 'oauth_provider', 'role', 'is_admin')
 
-            def is_super_user(self):
-                """Check if user is a super user."""
-                return self.role == User.ROLE_SUPER_USER
-
-            def is_normal_user(self):
-                """Check if user is a normal user."""
-                return self.role == User.ROLE_NORMAL_USER
-
-        return UserObject(email, user_data)
+    @staticmethod
+    def iter_user_ids():
+        """Yield every user ID from a shallow read (keys only, no user data)."""
+        yield from sorted(User.get_ref('users').get(shallow=True) or {})
 
     @staticmethod
-    def get_all_users():
-        """Get all users from Firebase."""
-        users_data = User.get_ref('users').get()
-        if not users_data:
-            return []
+    def iter_users(fields=None, batch_size=100):
+        """
+        Yield users one at a time, fetching `batch_size` records per query.
 
-        # Convert to list of user objects with email included
-        users = []
-        for user_id, user_data in users_data.items():
+        Args:
+            fields: Top-level fields to keep (default: the whole record). The
+                Realtime Database cannot select children server-side, so each
+                page is projected as soon as it arrives and nested usage,
+                billing and subscription data is dropped before the next page.
+            batch_size: Users fetched per query
+
+        Yields:
+            User data dicts with 'email' always present
+        """
+        for user_id, user_data in User.iter_children('users', batch_size):
+            if not isinstance(user_data, dict):
+                continue
+            if fields is not None:
+                user_data = {field: user_data[field] for field in fields if field in user_data}
             # Add email to user data if not already present
             if 'email' not in user_data and ',' in user_id:
                 user_data['email'] = user_id.replace(',', '.')
-            users.append(user_data)
+            yield user_data
 
-        return users
+    @staticmethod
+    def get_all_users(fields=None):
+        """Get all users from Firebase."""
+        return list(User.iter_users(fields))
 
 class UserActivity(FirebaseModel):
     """User activity model for Firebase."""
@@ -340,18 +546,19 @@ class Transcription(FirebaseModel):
     @staticmethod
     def save(user_email, text, language, model, audio_duration=None):
         """Save a transcription."""
+        now = datetime.now()
         transcription_data = {
             'user_email': user_email,
             'text': text,
             'language': language,
             'model': model,
             'audio_duration': audio_duration,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now.isoformat(),
+            'ts': int(now.timestamp() * 1000)  # Epoch ms, used to merge history streams
         }
 
-        # Use user email as part of the path
-        user_id = user_email.replace('.', ',')
-        Transcription.get_ref(f'transcriptions/{user_id}').push(transcription_data)
+        # Metadata goes to the history index, the full text to the body store
+        return HistoryBody.save_entry('transcriptions', user_email, transcription_data)
 
     @staticmethod
     def get_by_user(user_email, limit=10):
@@ -363,12 +570,12 @@ class Transcription(FirebaseModel):
             return transcriptions if transcriptions else {}
         except Exception as e:
             print(f"Error fetching transcriptions with ordering: {str(e)}")
-            # If index is not defined, try without ordering
+            # If index is not defined, take the latest push keys (keys sort by creation time)
             try:
-                transcriptions = Transcription.get_ref(f'transcriptions/{user_id}').get()
+                transcriptions = Transcription.get_ref(f'transcriptions/{user_id}').order_by_key().limit_to_last(limit).get()
                 return transcriptions if transcriptions else {}
             except Exception as e2:
-                print(f"Error fetching transcriptions without ordering: {str(e2)}")
+                print(f"Error fetching transcriptions by key: {str(e2)}")
                 return {}
 
 class Translation(FirebaseModel):
@@ -377,6 +584,7 @@ class Translation(FirebaseModel):
     @staticmethod
     def save(user_email, original_text, translated_text, source_language, target_language, model):
         """Save a translation."""
+        now = datetime.now()
         translation_data = {
             'user_email': user_email,
             'original_text': original_text,
@@ -384,12 +592,12 @@ class Translation(FirebaseModel):
             'source_language': source_language,
             'target_language': target_language,
             'model': model,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now.isoformat(),
+            'ts': int(now.timestamp() * 1000)  # Epoch ms, used to merge history streams
         }
 
-        # Use user email as part of the path
-        user_id = user_email.replace('.', ',')
-        Translation.get_ref(f'translations/{user_id}').push(translation_data)
+        # Metadata goes to the history index, the full texts to the body store
+        return HistoryBody.save_entry('translations', user_email, translation_data)
 
     @staticmethod
     def get_by_user(user_email, limit=10):
@@ -401,12 +609,12 @@ class Translation(FirebaseModel):
             return translations if translations else {}
         except Exception as e:
             print(f"Error fetching translations with ordering: {str(e)}")
-            # If index is not defined, try without ordering
+            # If index is not defined, take the latest push keys (keys sort by creation time)
             try:
-                translations = Translation.get_ref(f'translations/{user_id}').get()
+                translations = Translation.get_ref(f'translations/{user_id}').order_by_key().limit_to_last(limit).get()
                 return translations if translations else {}
             except Exception as e2:
-                print(f"Error fetching translations without ordering: {str(e2)}")
+                print(f"Error fetching translations by key: {str(e2)}")
                 return {}
 
 
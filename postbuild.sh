@@ -32,4 +32,8 @@ except ImportError as e:
     print(f'Failed to import google package: {e}')
 "
 
+# Build content-hashed static assets and their manifest
+echo "Building static assets..."
+python build_assets.py
+
 echo "Postbuild script completed."
@@ -101,7 +101,7 @@ def list_users():
         
         print("📋 Listing all users and their roles...")
         
-        users = User.get_all_users()
+        users = User.get_all_users(fields=('email', 'username', 'role', 'is_admin'))
         if not users:
             print("No users found in Firebase")
             return
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Rebuild Per-User Usage Aggregates
+
+Recomputes `usage_aggregates/{user_id}` (history counts, character totals and
+last activity) from the transcription and translation history, along with the
+user's email and username. New history writes keep the aggregates current
+incrementally and new accounts create theirs; run this once to backfill
+existing users, including those with no history, or to repair a user whose
+totals have drifted. History is read in key-ordered batches, one user at a time.
+
+Increments written for a user while their aggregate is being rebuilt can be
+overwritten, so run it at a quiet time or re-run it for affected users.
+
+Usage:
+    python rebuild_usage_aggregates.py --dry-run
+    python rebuild_usage_aggregates.py --user someone@example.com
+"""
+
+import sys
+import os
+import argparse
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.firebase_models import UsageAggregate, User
+from services.history_service import HistoryService
+
+
+def compute_aggregate(user_id, batch_size):
+    """Aggregate one user's history from scratch."""
+    email = user_id.replace(',', '.')
+    aggregate = UsageAggregate.empty(email)
+
+    for collection, (count_field, chars_field) in UsageAggregate.FIELDS.items():
+        for _, entry in UsageAggregate.iter_children(f'{collection}/{user_id}', batch_size):
+            if not isinstance(entry, dict):
+                continue
+            aggregate[count_field] += 1
+            aggregate[chars_field] += UsageAggregate.entry_chars(collection, entry)
+            aggregate['last_activity'] = max(aggregate['last_activity'], HistoryService._epoch_ms(entry))
+
+    username = User.get_ref(f'users/{user_id}/username').get()
+    if username:
+        aggregate['username'] = username
+    return aggregate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild per-user usage aggregates from history')
+    parser.add_argument('--user', action='append', help='Email of a user to rebuild (default: all users)')
+    parser.add_argument('--batch-size', type=int, default=500, help='History entries read per query')
+    parser.add_argument('--dry-run', action='store_true', help='Print the aggregates without writing them')
+    args = parser.parse_args()
+
+    print("🔧 VocalLocal Usage Aggregate Rebuild")
+    print("=" * 60)
+    if args.dry_run:
+        print("🔍 Dry run: no data will be written")
+
+    if args.user:
+        user_ids = [email.replace('.', ',') for email in args.user]
+    else:
+        # Shallow reads: only the user IDs, not their history
+        user_ids = {user_id for user_id in User.iter_user_ids() if ',' in user_id}
+        for collection in UsageAggregate.FIELDS:
+            user_ids.update(UsageAggregate.get_ref(collection).get(shallow=True) or {})
+        user_ids = sorted(user_ids)
+    print(f"👥 {len(user_ids)} users to rebuild")
+
+    for user_id in user_ids:
+        aggregate = compute_aggregate(user_id, args.batch_size)
+        print(f"  👤 {aggregate['email']}: {aggregate['transcription_count']} transcriptions "
+              f"({aggregate['transcription_chars']} chars), {aggregate['translation_count']} translations "
+              f"({aggregate['translation_chars']} chars)")
+        if not args.dry_run:
+            UsageAggregate.set(aggregate['email'], aggregate)
+
+    print(f"✅ {'Computed' if args.dry_run else 'Rebuilt'} aggregates for {len(user_ids)} users")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Re-render Stored Invoice PDFs
+
+Invoice PDFs are rendered once at payment time and served from the invoice
+store (services/invoice_store.py). After changing the invoice layout in
+services/pdf_invoice_service.py, run this to render every invoice in users'
+billing history again and point the billing records at the new files.
+Unchanged invoices render to the same bytes and keep their file. Users are
+read in batches.
+
+Usage:
+    python rerender_invoices.py --dry-run
+    python rerender_invoices.py --user someone@example.com
+"""
+
+import sys
+import os
+import argparse
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.firebase_models import User
+from services.invoice_store import invoice_store
+
+
+def iter_invoices(emails, batch_size):
+    """Yield (email, user_data, billing record) for the requested users, or for all users."""
+    if emails:
+        users = ({**(User.get_by_email(email) or {}), 'email': email} for email in emails)
+    else:
+        users = User.iter_users(fields=('email', 'profile', 'billing'), batch_size=batch_size)
+    for user_data in users:
+        invoices = (user_data.get('billing') or {}).get('invoices') or {}
+        for invoice_id, record in invoices.items():
+            if isinstance(record, dict) and all(key in record for key in ('amount', 'currency', 'paymentDate')):
+                yield user_data['email'], user_data, dict(record, invoiceId=record.get('invoiceId', invoice_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-render stored invoice PDFs')
+    parser.add_argument('--user', action='append', help='Email of a user to re-render (default: all users)')
+    parser.add_argument('--batch-size', type=int, default=100, help='Users read per query')
+    parser.add_argument('--dry-run', action='store_true', help='List the invoices without rendering them')
+    args = parser.parse_args()
+
+    print("🧾 VocalLocal Invoice Re-render")
+    print("=" * 60)
+    if args.dry_run:
+        print("🔍 Dry run: no invoices will be rendered")
+
+    rendered = changed = failed = 0
+    for email, user_data, record in iter_invoices(args.user, args.batch_size):
+        previous = record.get('pdfSha256')
+        if args.dry_run:
+            print(f"  📄 {email}: {record['invoiceId']} ({previous[:12] if previous else 'not stored'})")
+            rendered += 1
+            continue
+
+        if not invoice_store.render(email, record, invoice_store.customer_name(email, user_data)):
+            print(f"  ❌ {email}: {record['invoiceId']} could not be rendered")
+            failed += 1
+            continue
+        rendered += 1
+        if record['pdfSha256'] != previous:
+            changed += 1
+            print(f"  📄 {email}: {record['invoiceId']} -> {record['pdfSha256'][:12]}")
+
+    print(f"✅ {'Found' if args.dry_run else 'Rendered'} {rendered} invoices ({changed} changed, {failed} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
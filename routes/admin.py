@@ -5,10 +5,12 @@ import traceback
 from datetime import datetime
 from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for
 from flask_login import current_user
-from models.firebase_models import User, UserActivity, Transcription, Translation
+from models.firebase_models import User, UserActivity, UsageAggregate
 from services.admin_subscription_service import AdminSubscriptionService
 from services.user_account_service import UserAccountService
 from services.payment_service import PaymentService
+from services.usage_statistics_service import usage_statistics
+from config import Config
 # Import RBAC decorators (will be used as we update routes)
 try:
     from rbac import require_admin_or_special_auth, require_admin, api_require_admin, check_permission
@@ -48,39 +50,34 @@ def user_usage():
     if session.get('special_admin_auth') != True:
         return redirect(url_for('admin.users'))
 
-    # Get all users from Firebase
-    users = User.get_all_users()
-
-    # Get user transcriptions and translations
+    # One read of the per-user aggregates maintained on every history write,
+    # plus a shallow read of the user IDs for users with no aggregate yet
+    aggregates = UsageAggregate.get_all()
+    user_ids = set(aggregates) | set(User.iter_user_ids())
     user_data = {}
-    for user in users:
-        email = user.get('email')
+    for user_id in sorted(user_ids):
+        aggregate = aggregates.get(user_id)
+        if aggregate is None:
+            # No activity yet; user IDs are emails with dots replaced by commas
+            aggregate = UsageAggregate.empty(user_id.replace(',', '.')) if ',' in user_id else {}
+        email = aggregate.get('email')
         if not email:
             continue
 
-        # Get user's transcriptions
-        transcriptions = Transcription.get_by_user(email, limit=1000)
-
-        # Get user's translations
-        translations = Translation.get_by_user(email, limit=1000)
-
-        # Calculate usage statistics
-        transcription_count = len(transcriptions) if transcriptions else 0
-        translation_count = len(translations) if translations else 0
+        transcription_count = aggregate.get('transcription_count', 0)
+        translation_count = aggregate.get('translation_count', 0)
+        transcription_chars = aggregate.get('transcription_chars', 0)
+        translation_chars = aggregate.get('translation_chars', 0)
 
-        # Calculate total text length as a proxy for token usage
-        transcription_chars = sum(len(t.get('text', '')) for t in transcriptions.values()) if transcriptions else 0
-        translation_chars = sum(len(t.get('translated_text', '')) for t in translations.values()) if translations else 0
-
-        # Store user data
         user_data[email] = {
-            'username': user.get('username', email.split('@')[0]),
+            'username': aggregate.get('username', email.split('@')[0]),
             'transcription_count': transcription_count,
             'translation_count': translation_count,
             'transcription_chars': transcription_chars,
             'translation_chars': translation_chars,
             'total_operations': transcription_count + translation_count,
-            'total_chars': transcription_chars + translation_chars
+            'total_chars': transcription_chars + translation_chars,
+            'last_activity': aggregate.get('last_activity', 0)
         }
 
     return render_template('admin_user_usage.html', user_data=user_data)
@@ -182,8 +179,8 @@ def users():
     # Check if already authenticated with special admin credentials
     if session.get('special_admin_auth') == True:
         # User is authenticated with special admin credentials
-        # Get all users from Firebase
-        users = User.get_all_users()
+        # Page through users, keeping only the fields the listing shows
+        users = list(User.iter_users(fields=User.LISTING_FIELDS))
 
         # Get recent user activities
         activities = []
@@ -433,6 +430,10 @@ def get_usage_statistics():
         return jsonify({'error': 'Unauthorized'}), 401
 
     try:
+        if Config.USAGE_BACKEND != 'functions':
+            # Computed in process from cached, incrementally updated statistics
+            return jsonify(usage_statistics.get_statistics())
+
         # Import Firebase service
         from services.firebase_service import FirebaseService
 
@@ -473,6 +474,9 @@ def reset_monthly_usage():
         })
 
         if result.get('success'):
+            # Every user's usage changed outside this process
+            usage_statistics.invalidate()
+
             # Log this admin action
             if current_user.is_authenticated:
                 user_email = current_user.email
@@ -330,7 +330,7 @@ def get_user_verification_status():
             'email': current_user.email,
             'is_verified': is_verified,
             'requires_verification': requires_verification,
-            'oauth_user': hasattr(current_user, '_data') and current_user._data.get('oauth_provider') is not None
+            'oauth_user': getattr(current_user, 'oauth_user', False)
         }), 200
         
     except Exception as e:
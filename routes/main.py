@@ -6,6 +6,7 @@ from flask_login import current_user, login_required
 import logging
 from services.user_account_service import UserAccountService
 from services.usage_validation_service import UsageValidationService
+from config import Config
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -110,7 +111,10 @@ Translation = TranslationFallback
 
 def get_user_current_plan(user_email):
     """
-    Get user's current plan with enhanced accuracy by checking both Firebase and Stripe.
+    Get user's current plan from the locally served subscription state.
+
+    The state is kept current by the Stripe webhooks and a periodic
+    reconciliation against Stripe, so no Stripe call is made here.
 
     Args:
         user_email (str): User's email address
@@ -119,39 +123,12 @@ def get_user_current_plan(user_email):
         tuple: (plan_type, plan_display)
     """
     try:
-        # Import payment service for subscription checking
-        from services.payment_service import PaymentService
-
-        payment_service = PaymentService()
-
-        # Check subscription status for basic plan (we just need to know if they have any active subscription)
-        subscription_check = payment_service.check_existing_subscription(user_email, 'basic')
-
-        if subscription_check.get('error'):
-            logger.warning(f"Error checking subscription for {user_email}: {subscription_check['error']}")
-            # Fallback to Firebase only
-            return get_user_plan_from_firebase(user_email)
+        from services.subscription_state import subscription_state
 
-        if subscription_check.get('has_subscription'):
-            current_plan = subscription_check.get('plan_type') or subscription_check.get('current_plan')
-
-            if current_plan == 'professional':
-                return 'professional', 'Professional Plan'
-            elif current_plan == 'basic':
-                return 'basic', 'Basic Plan'
-
-        # If no active subscription found, check if there's a sync issue warning
-        if subscription_check.get('sync_issue'):
+        plan_type, plan_display = subscription_state.current_plan(user_email)
+        if plan_display.endswith('(Verify Billing)'):
             logger.warning(f"Subscription sync issue detected for {user_email}")
-            # Still return the Firebase plan but log the issue
-            firebase_plan = subscription_check.get('plan_type', 'free')
-            if firebase_plan == 'professional':
-                return 'professional', 'Professional Plan (Verify Billing)'
-            elif firebase_plan == 'basic':
-                return 'basic', 'Basic Plan (Verify Billing)'
-
-        # Default to free plan
-        return 'free', 'Free Plan'
+        return plan_type, plan_display
 
     except Exception as e:
         logger.error(f"Error getting current plan for {user_email}: {str(e)}")
@@ -323,10 +300,9 @@ def profile():
 @bp.route('/history')
 @login_required
 def history():
-    """History page for transcriptions and translations with improved data handling."""
+    """History page for transcriptions and translations; renders the first page, the rest loads from /api/history."""
     history_type = request.args.get('type', 'all')
     sort_order = request.args.get('sort', 'newest')  # newest or oldest
-    limit = int(request.args.get('limit', '100'))  # Number of items to fetch
 
     # Import the improved history service
     try:
@@ -338,75 +314,39 @@ def history():
     print(f"Loading history page for user: {current_user.email}, type: {history_type}, sort: {sort_order}")
 
     sort_desc = sort_order == 'newest'
+    page_size = HistoryService.clamp_page_size(request.args.get('limit', HistoryService.DEFAULT_PAGE_SIZE))
     transcriptions = {}
     translations = {}
     history_metadata = {}
+    indexing_warning = None
 
     try:
-        if history_type == 'all':
-            # Get combined history
-            combined_result = HistoryService.get_combined_history(current_user.email, limit, sort_desc)
-
-            # Separate back into transcriptions and translations for template compatibility
-            for item in combined_result['items']:
-                if item['type'] == 'transcription':
-                    transcriptions[item['id']] = item['data']
-                elif item['type'] == 'translation':
-                    translations[item['id']] = item['data']
-
-            history_metadata = {
-                'total_items': combined_result['total_count'],
-                'total_available': combined_result['total_available'],
-                'transcriptions_count': combined_result['transcriptions_count'],
-                'translations_count': combined_result['translations_count'],
-                'transcriptions_method': combined_result['transcriptions_method'],
-                'translations_method': combined_result['translations_method'],
-                'sorted': combined_result['sorted']
-            }
-
-            print(f"Combined history: {combined_result['total_count']} items "
-                  f"({combined_result['transcriptions_count']} transcriptions, "
-                  f"{combined_result['translations_count']} translations)")
-
-        elif history_type == 'transcription':
-            # Get only transcriptions
-            transcriptions_result = HistoryService.get_user_transcriptions(current_user.email, limit, sort_desc)
-            transcriptions = transcriptions_result['data']
-
-            history_metadata = {
-                'total_items': transcriptions_result['count'],
-                'transcriptions_count': transcriptions_result['count'],
-                'translations_count': 0,
-                'method': transcriptions_result['method'],
-                'sorted': transcriptions_result['sorted']
-            }
-
-            print(f"Transcriptions only: {transcriptions_result['count']} items using {transcriptions_result['method']}")
-
-        elif history_type == 'translation':
-            # Get only translations
-            translations_result = HistoryService.get_user_translations(current_user.email, limit, sort_desc)
-            translations = translations_result['data']
-
-            history_metadata = {
-                'total_items': translations_result['count'],
-                'transcriptions_count': 0,
-                'translations_count': translations_result['count'],
-                'method': translations_result['method'],
-                'sorted': translations_result['sorted']
-            }
-
-            print(f"Translations only: {translations_result['count']} items using {translations_result['method']}")
+        page = HistoryService.get_history_page(current_user.email, history_type, None, page_size, sort_desc)
+
+        # Separate back into transcriptions and translations for template compatibility
+        for item in page['items']:
+            if item['type'] == 'transcription':
+                transcriptions[item['id']] = item['data']
+            elif item['type'] == 'translation':
+                translations[item['id']] = item['data']
+
+        history_metadata = {
+            'total_items': page['count'],
+            'transcriptions_count': len(transcriptions),
+            'translations_count': len(translations),
+            'has_more': page['has_more'],
+            'next_cursor': page['next_cursor'],
+            'page_size': page_size,
+            'methods': page['methods'],
+            'sorted': page['sorted']
+        }
 
-        # Log success
-        print(f"Successfully loaded history: {len(transcriptions)} transcriptions, {len(translations)} translations")
+        print(f"History page: {page['count']} items ({len(transcriptions)} transcriptions, "
+              f"{len(translations)} translations), more available: {page['has_more']}")
 
         # Check for indexing issues and provide user feedback
-        indexing_warning = None
-        if history_metadata.get('transcriptions_method') == 'manual_sorted' or history_metadata.get('translations_method') == 'manual_sorted':
-            indexing_warning = "Database indexing is being optimized. Data is sorted manually for now."
-        elif history_metadata.get('method') == 'manual_sorted':
-            indexing_warning = "Database indexing is being optimized. Data is sorted manually for now."
+        if 'key_ordered' in page['methods'].values():
+            indexing_warning = "Database indexing is being optimized. History is ordered by creation time for now."
 
     except Exception as e:
         print(f"Error in improved history service: {str(e)}")
@@ -414,7 +354,7 @@ def history():
         traceback.print_exc()
 
         # Fallback to original method
-        return history_fallback(history_type)
+        return history_fallback(history_type, page_size)
 
     return render_template('history.html',
                           history_type=history_type,
@@ -424,64 +364,77 @@ def history():
                           indexing_warning=indexing_warning,
                           sort_order=sort_order)
 
-def history_fallback(history_type):
-    """Fallback history function using original method."""
+@bp.route('/api/history')
+@login_required
+def history_api():
+    """Cursor-paginated history: /api/history?type=all&sort=newest&cursor=<next_cursor>&limit=20"""
+    from services.history_service import HistoryService, InvalidCursor
+
+    history_type = request.args.get('type', 'all')
+    sort_desc = request.args.get('sort', 'newest') == 'newest'
+    limit = HistoryService.clamp_page_size(request.args.get('limit', HistoryService.DEFAULT_PAGE_SIZE))
+
+    try:
+        page = HistoryService.get_history_page(current_user.email, history_type,
+                                               request.args.get('cursor'), limit, sort_desc)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in history API: {str(e)}")
+        return jsonify({'error': 'Failed to load history'}), 500
+
+    return jsonify({
+        'items': page['items'],
+        'count': page['count'],
+        'next_cursor': page['next_cursor'],
+        'has_more': page['has_more']
+    })
+
+@bp.route('/api/history/<item_type>/<item_id>')
+@login_required
+def history_item_body(item_type, item_id):
+    """Full text of one history item; listings only carry a preview."""
+    from services.history_service import HistoryService
+
+    if item_type not in ('transcription', 'translation'):
+        return jsonify({'error': 'Unknown history type'}), 400
+
+    try:
+        body = HistoryService.get_item_body(current_user.email, item_type, item_id)
+    except Exception as e:
+        print(f"Error loading history item {item_type}/{item_id}: {str(e)}")
+        return jsonify({'error': 'Failed to load history item'}), 500
+
+    if body is None:
+        return jsonify({'error': 'History item not found'}), 404
+
+    response = jsonify({'id': item_id, 'type': item_type, **body})
+    # Bodies never change once written
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+def history_fallback(history_type, limit=50):
+    """Fallback history function using original method (latest items only)."""
     transcriptions = {}
     translations = {}
 
     print(f"Using fallback history method for user: {current_user.email}, type: {history_type}")
 
+    # get_by_user falls back to a bounded key-ordered query when the timestamp
+    # index is missing, so neither path downloads the user's whole history
     try:
-        # Fetch user's transcription history if needed
         if history_type in ['all', 'transcription']:
-            print(f"Attempting to fetch transcriptions for user: {current_user.email}")
-            transcriptions = Transcription.get_by_user(current_user.email, limit=50)
+            transcriptions = Transcription.get_by_user(current_user.email, limit=limit)
             print(f"Fetched transcriptions: {len(transcriptions) if transcriptions else 0} items")
-
-            # Debug: Print the first transcription if available
-            if transcriptions and len(transcriptions) > 0:
-                first_key = list(transcriptions.keys())[0]
-                print(f"First transcription: {transcriptions[first_key]}")
-            else:
-                print("No transcriptions found")
-
-                # Check if the user's transcription path exists
-                user_id = current_user.email.replace('.', ',')
-                path_exists = Transcription.get_ref(f'transcriptions/{user_id}').get() is not None
-                print(f"Transcription path exists: {path_exists}")
     except Exception as e:
         print(f"Error fetching transcriptions: {str(e)}")
-        import traceback
-        traceback.print_exc()
-
-        # Try to fetch without ordering if index is not defined
-        try:
-            user_id = current_user.email.replace('.', ',')
-            transcriptions = Transcription.get_ref(f'transcriptions/{user_id}').get()
-            print(f"Fetched transcriptions without ordering: {len(transcriptions) if transcriptions else 0} items")
-        except Exception as e2:
-            print(f"Error fetching transcriptions without ordering: {str(e2)}")
-            traceback.print_exc()
 
     try:
-        # Fetch user's translation history if needed
         if history_type in ['all', 'translation']:
-            print(f"Attempting to fetch translations for user: {current_user.email}")
-            translations = Translation.get_by_user(current_user.email, limit=50)
+            translations = Translation.get_by_user(current_user.email, limit=limit)
             print(f"Fetched translations: {len(translations) if translations else 0} items")
     except Exception as e:
         print(f"Error fetching translations: {str(e)}")
-        import traceback
-        traceback.print_exc()
-
-        # Try to fetch without ordering if index is not defined
-        try:
-            user_id = current_user.email.replace('.', ',')
-            translations = Translation.get_ref(f'translations/{user_id}').get()
-            print(f"Fetched translations without ordering: {len(translations) if translations else 0} items")
-        except Exception as e2:
-            print(f"Error fetching translations without ordering: {str(e2)}")
-            traceback.print_exc()
 
     return render_template('history.html',
                           history_type=history_type,
@@ -677,6 +630,30 @@ def get_user_available_models():
             'details': str(e)
         }), 500
 
+def _validate_usage_with_functions(service, amount):
+    """Validate usage through the Firebase Cloud Functions (USAGE_BACKEND=functions)."""
+    from services.firebase_service import FirebaseService
+
+    firebase_service = FirebaseService()
+    user_id = current_user.email.replace('.', ',')
+
+    if service == 'transcription':
+        return firebase_service.call_function('validateTranscriptionUsage', {
+            'userId': user_id,
+            'minutesRequested': amount
+        })
+    if service == 'translation':
+        return firebase_service.call_function('validateTranslationUsage', {
+            'userId': user_id,
+            'wordsRequested': amount
+        })
+    if service == 'tts':
+        return firebase_service.call_function('validateTTSUsage', {
+            'userId': user_id,
+            'minutesRequested': amount
+        })
+    return {'allowed': True, 'remaining': 0, 'planType': 'free'}
+
 @bp.route('/api/check-usage', methods=['POST'])
 @login_required
 def check_usage():
@@ -712,41 +689,28 @@ def check_usage():
                 'role': user_role
             })
 
-        # For normal users, implement proper usage checking
-        # This should integrate with the subscription system
+        # For normal users, validate against the subscription plan
         try:
-            # Import Firebase service for usage validation
-            from services.firebase_service import FirebaseService
-
-            firebase_service = FirebaseService()
-            user_id = current_user.email.replace('.', ',')
-
-            # Call appropriate validation function based on service type
-            if service == 'transcription':
-                result = firebase_service.call_function('validateTranscriptionUsage', {
-                    'userId': user_id,
-                    'minutesRequested': amount
-                })
+            if Config.USAGE_BACKEND == 'functions':
+                result = _validate_usage_with_functions(service, amount)
+            elif service == 'transcription':
+                result = UsageValidationService.validate_transcription_usage(
+                    current_user.email, amount, record_overage=False)
             elif service == 'translation':
-                result = firebase_service.call_function('validateTranslationUsage', {
-                    'userId': user_id,
-                    'wordsRequested': amount
-                })
+                result = UsageValidationService.validate_translation_usage(
+                    current_user.email, amount, record_overage=False)
             elif service == 'tts':
-                result = firebase_service.call_function('validateTTSUsage', {
-                    'userId': user_id,
-                    'minutesRequested': amount
-                })
+                result = UsageValidationService.validate_tts_usage(current_user.email, amount)
             else:
                 # Default to allowing for unknown services
-                result = {'allowed': True, 'remaining': 0, 'planType': 'free'}
+                result = {'allowed': True, 'remaining': 0, 'plan_type': 'free'}
 
             return jsonify({
                 'allowed': result.get('allowed', True),
                 'remaining': result.get('remaining', 0),
-                'planType': result.get('planType', 'free'),
-                'upgradeRequired': result.get('upgradeRequired', False),
-                'message': 'Usage validation completed',
+                'planType': result.get('plan_type', result.get('planType', 'free')),
+                'upgradeRequired': result.get('upgrade_required', result.get('upgradeRequired', False)),
+                'message': result.get('message', 'Usage validation completed'),
                 'role': user_role,
                 'service': service,
                 'amount': amount
@@ -901,6 +865,20 @@ def serve_static(path):
 
     return response
 
+@bp.route('/sw.js')
+def service_worker():
+    """Serve the service worker from the root so its scope covers every page."""
+    import os
+
+    static_folder = current_app.static_folder
+    # The build's copy carries the precache list from the asset manifest
+    path = 'dist/sw.js' if os.path.exists(os.path.join(static_folder, 'dist', 'sw.js')) else 'sw.js'
+    response = make_response(send_from_directory(static_folder, path, mimetype='application/javascript',
+                                                 max_age=0))
+    # Browsers must see a new worker as soon as it is deployed
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @bp.route('/debug_payment_fetch.html')
 def debug_payment_fetch():
     """Debug page for testing payment fetch functionality."""
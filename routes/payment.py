@@ -4,9 +4,12 @@ Handles Stripe checkout, webhooks, and customer portal
 """
 
 import logging
-from flask import Blueprint, request, jsonify, redirect, url_for, current_app
+from flask import Blueprint, request, jsonify, redirect, url_for, current_app, send_file
 from flask_login import login_required, current_user
+import stripe
 from services.payment_service import PaymentService
+from services.webhook_inbox import webhook_inbox
+from services.invoice_store import invoice_store
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +18,7 @@ bp = Blueprint('payment', __name__, url_prefix='/payment')
 
 # Initialize payment service
 payment_service = PaymentService()
+webhook_inbox.set_handler(payment_service.process_event)
 
 @bp.route('/create-checkout-session', methods=['POST'])
 @login_required
@@ -105,7 +109,9 @@ def create_checkout_session():
 def stripe_webhook():
     """
     Handle Stripe webhook events
-    This endpoint receives notifications from Stripe about payment events
+    This endpoint receives notifications from Stripe about payment events.
+    Events are verified and recorded in the webhook inbox, then acknowledged
+    immediately; their handlers run in the inbox's background worker.
     """
     try:
         # Get raw payload and signature
@@ -116,18 +122,19 @@ def stripe_webhook():
             logger.error("Missing Stripe signature in webhook request")
             return jsonify({'error': 'Missing signature'}), 400
         
-        # Process webhook event
-        result = payment_service.handle_webhook_event(payload, signature)
+        try:
+            event = payment_service.construct_event(payload, signature)
+        except stripe.error.SignatureVerificationError:
+            logger.error("Invalid webhook signature")
+            return jsonify({'error': 'Invalid signature'}), 400
         
-        if 'error' in result:
-            status_code = result.get('status_code', 400)
-            logger.error(f"Webhook processing failed: {result['error']}")
-            return jsonify({'error': result['error']}), status_code
-        
-        logger.info("Webhook processed successfully")
+        # Record the event (a redelivery of a known event ID is acknowledged as is)
+        if webhook_inbox.record(event['id'], event['type'], payload.decode('utf-8')):
+            logger.info(f"Webhook event {event['id']} ({event['type']}) queued")
         return jsonify({'success': True}), 200
         
     except Exception as e:
+        # Not recorded: let Stripe retry the delivery
         logger.error(f"Unexpected error in webhook handler: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
@@ -348,13 +355,19 @@ def billing_history():
 @login_required
 def download_invoice(invoice_id):
     """
-    Download invoice from Stripe
+    Download an invoice: the stored PDF if we rendered one, otherwise Stripe's hosted invoice
     """
     try:
         import stripe
 
-        # Verify the invoice belongs to the current user
+        # Billing records live under the user's own node, so this is ownership-checked
         user_email = current_user.email
+        pdf_path = invoice_store.invoice_path(user_email, invoice_id)
+        if pdf_path:
+            return send_file(pdf_path, mimetype='application/pdf', as_attachment=True,
+                             download_name=f"VocalLocal_Invoice_{invoice_id}.pdf", conditional=True)
+
+        # Verify the invoice belongs to the current user
         customer = payment_service.get_customer_by_email(user_email)
 
         if not customer:
@@ -3,6 +3,7 @@ Transcription routes for VocalLocal
 """
 import os
 import time
+import logging
 import traceback
 from flask import Blueprint, request, jsonify, current_app, session
 from flask_login import current_user, login_required
@@ -10,6 +11,11 @@ from werkzeug.utils import secure_filename
 
 from config import Config
 from models.firebase_models import Transcription
+from services.memory_governor import admission_required
+from services.model_registry import model_registry
+from services.payg_service import PayAsYouGoService
+
+logger = logging.getLogger(__name__)
 
 # Import RBAC and model access services
 try:
@@ -76,6 +82,21 @@ def deduplicate_overlapping_text(prev_text, current_text, overlap_seconds):
 # Use the singleton transcription service instance
 from services.transcription import transcription_service
 
+def estimate_audio_minutes(num_bytes):
+    """Rough audio duration of an upload: 1MB ≈ 1 minute of audio (varies by quality)."""
+    file_size_mb = num_bytes / (1024 * 1024)
+    return max(0.1, file_size_mb * 0.8)  # Conservative estimate
+
+def insufficient_credits_response(admission):
+    """402 response for a request whose PAYG credits could not be reserved."""
+    return jsonify({
+        'error': admission['message'],
+        'errorType': 'InsufficientCredits',
+        'details': 'Buy more credits to continue transcribing.',
+        'credits_needed': admission['credits_needed'],
+        'credits_available': admission['credits_available']
+    }), 402
+
 def safe_remove_file(filepath, max_retries=3, retry_delay=0.5):
     """Safely remove a file with retries for Windows file locking issues"""
     for attempt in range(max_retries):
@@ -92,6 +113,7 @@ def safe_remove_file(filepath, max_retries=3, retry_delay=0.5):
 
 @bp.route('/transcribe', methods=['POST'])
 @login_required
+@admission_required()
 # @requires_verified_email  # Temporarily disabled for testing model mapping
 def transcribe_audio():
     """Endpoint for transcribing audio files"""
@@ -114,23 +136,8 @@ def transcribe_audio():
         # Get model from form or use default
         requested_model = request.form.get('model', 'gemini-2.0-flash-lite')
 
-        # Fix model routing - ensure proper mapping between frontend and backend
-        # Updated November 2025: Using current working models
-        # Deprecated preview models are handled by the transcription service
-        # Updated November 2025: Map deprecated models to current working models
-        model_mapping = {
-            'gpt-4o-mini-transcribe': 'gpt-4o-mini-transcribe',
-            'gpt-4o-transcribe': 'gpt-4o-transcribe',
-            'gemini-2.5-flash-preview-04-17': 'gemini-2.5-flash',  # Map deprecated to stable
-            'gemini-2.5-flash-preview-05-20': 'gemini-2.5-flash',  # Map deprecated to stable
-            'gemini-2.5-flash-preview': 'gemini-2.5-flash',  # Map old preview to stable
-            'gemini-2.5-flash': 'gemini-2.5-flash',  # Stable model (current)
-            'gemini-2.5-flash-preview-09-2025': 'gemini-2.5-flash-preview-09-2025',  # Latest preview
-            'gemini-2.0-flash-lite': 'gemini-2.0-flash-lite'
-        }
-
-        # Map the requested model to ensure correct routing
-        mapped_model = model_mapping.get(requested_model, 'gemini-2.5-flash')  # Default to stable
+        # Resolve aliases and deprecated models through the shared model registry
+        mapped_model = model_registry.canonical_name(requested_model, 'transcription')
         if mapped_model != requested_model:
             print(f"Model mapping: {requested_model} -> {mapped_model}")
 
@@ -203,6 +210,7 @@ def transcribe_audio():
             model = 'gemini-2.0-flash-lite'
 
         # Process with the transcription service
+        reservation_id = None
         try:
             with open(filepath, 'rb') as audio_file:
                 # Log request information for debugging
@@ -213,6 +221,7 @@ def transcribe_audio():
 
                 # Estimate audio duration for usage validation (if authenticated)
                 estimated_minutes = 0
+                validation = None
                 if current_user and current_user.is_authenticated:
                     try:
                         # Ensure we have a valid user email before proceeding
@@ -220,21 +229,20 @@ def transcribe_audio():
                         if not user_email:
                             print(f"Warning: Authenticated user has no email attribute for usage validation.")
                         else:
-                            # Rough estimation: 1MB ≈ 1 minute of audio (varies by quality)
-                            file_size_mb = len(audio_content) / (1024 * 1024)
-                            estimated_minutes = max(0.1, file_size_mb * 0.8)  # Conservative estimate
+                            estimated_minutes = estimate_audio_minutes(len(audio_content))
 
                             # Fast usage validation with cross-platform timeout protection (non-blocking)
-                            validation = None
                             usage_error = None
 
                             def validate_usage():
                                 nonlocal validation, usage_error
                                 try:
                                     from services.usage_validation_service import UsageValidationService
+                                    # Overage is recorded, or paid from credits, when the request is admitted below
                                     validation = UsageValidationService.validate_transcription_usage(
                                         user_email,
-                                        estimated_minutes
+                                        estimated_minutes,
+                                        record_overage=False
                                     )
                                 except Exception as e:
                                     usage_error = e
@@ -270,6 +278,14 @@ def transcribe_audio():
                         print(f"Usage validation error: {str(validation_error)}")
                         print("Continuing with transcription due to validation service error (graceful degradation)")
 
+                # Reserve PAYG credits for any overage; settled below or when the background job finishes
+                if estimated_minutes:
+                    admission = PayAsYouGoService.reserve_for_request(current_user.email, 'transcription', validation)
+                    if not admission['allowed']:
+                        return insufficient_credits_response(admission)
+                    reservation_id = admission['reservation_id']
+                    reserved_minutes = admission['amount']
+
                 # Check if this is a free trial request (non-authenticated user)
                 if not current_user or not current_user.is_authenticated:
                     # Check file size for free trial (max 25MB)
@@ -331,6 +347,19 @@ def transcribe_audio():
 
                 # Check if this is a background processing job
                 if isinstance(transcription, dict) and transcription.get('status') == 'processing':
+                    # Save the result once, server-side, when the job finishes
+                    user_email = getattr(current_user, 'email', None) if current_user.is_authenticated else None
+                    if user_email:
+                        transcription_service.on_job_finished(
+                            transcription['job_id'],
+                            save_background_transcription(user_email, language, model)
+                        )
+                    if reservation_id:
+                        transcription_service.on_job_finished(
+                            transcription['job_id'],
+                            settle_background_credits(reservation_id, reserved_minutes)
+                        )
+                        reservation_id = None
                     # Return the job ID for background processing
                     return jsonify(transcription)
 
@@ -390,6 +419,11 @@ def transcribe_audio():
                     print(f"Error saving transcription to Firebase: {str(auth_error)}")
                     traceback.print_exc()
 
+                # Charge the minutes usage tracking records for this request
+                if reservation_id:
+                    PayAsYouGoService.settle_reservation(reservation_id, reserved_minutes)
+                    reservation_id = None
+
                 # Remove temporary file
                 safe_remove_file(filepath)
 
@@ -451,10 +485,15 @@ def transcribe_audio():
                 'errorType': type(e).__name__,
                 'details': 'See server logs for more information'
             }), 500
+        finally:
+            if reservation_id:
+                # The transcription failed: give the reserved credits back
+                PayAsYouGoService.release_reservation(reservation_id)
 
     return jsonify({'error': f'Invalid file type. Allowed types: {", ".join(Config.ALLOWED_EXTENSIONS)}'}), 400
 
 @bp.route('/transcribe_free_trial', methods=['POST'])
+@admission_required()
 def transcribe_free_trial():
     """Endpoint for Try It Free transcription without authentication requirement"""
     try:
@@ -635,8 +674,10 @@ def test_transcribe_chunk():
 @bp.route('/transcribe_chunk', methods=['POST'])
 @login_required
 @requires_verified_email
+@admission_required('chunk')
 def transcribe_chunk():
     """Process a single audio chunk for progressive transcription"""
+    reservation_id = None
     try:
         # Check if file is present
         if 'audio' not in request.files:
@@ -697,6 +738,19 @@ def transcribe_chunk():
         if current_user.is_authenticated:
             user_email = current_user.email
 
+            # Reserve PAYG credits for any overage in the chunk; settled once it is transcribed
+            from services.usage_validation_service import UsageValidationService
+            validation = UsageValidationService.validate_transcription_usage(
+                user_email,
+                estimate_audio_minutes(len(audio_data)),
+                record_overage=False
+            )
+            admission = PayAsYouGoService.reserve_for_request(user_email, 'transcription', validation)
+            if not admission['allowed']:
+                return insufficient_credits_response(admission)
+            reservation_id = admission['reservation_id']
+            reserved_minutes = admission['amount']
+
         # For unauthenticated users (free trial), check usage limits
         if not current_user.is_authenticated:
             # Initialize session tracking if not exists
@@ -732,6 +786,10 @@ def transcribe_chunk():
 
         current_app.logger.info(f"Chunk {chunk_number} transcription completed: {len(result)} characters")
 
+        if reservation_id:
+            PayAsYouGoService.settle_reservation(reservation_id, reserved_minutes)
+            reservation_id = None
+
         # Store previous chunk result for deduplication (simple session-based storage)
         if 'chunk_results' not in session:
             session['chunk_results'] = {}
@@ -767,59 +825,58 @@ def transcribe_chunk():
             'chunk_number': int(request.form.get('chunk_number', '0')),
             'status': 'error'
         }), 500
+    finally:
+        if reservation_id:
+            # The chunk failed: give the reserved credits back
+            PayAsYouGoService.release_reservation(reservation_id)
+
+def settle_background_credits(reservation_id, minutes):
+    """Completion callback that settles a background job's credit reservation."""
+    def settle(status):
+        if status.get('status') == 'completed':
+            PayAsYouGoService.settle_reservation(reservation_id, minutes)
+        else:
+            PayAsYouGoService.release_reservation(reservation_id)
+    return settle
+
+def save_background_transcription(user_email, language, model):
+    """Completion callback that saves a finished background job's transcript."""
+    def save(status):
+        result = status.get('result')
+        if status.get('status') != 'completed' or not result:
+            return
+        text_to_save = result['text'] if isinstance(result, dict) and 'text' in result else result
+        Transcription.save(
+            user_email=user_email,
+            text=text_to_save,
+            language=language,
+            model=model,
+            audio_duration=None
+        )
+        logger.info(f"Saved background transcription to Firebase for user {user_email}")
+    return save
 
 @bp.route('/transcription_status/<job_id>', methods=['GET'])
 def transcription_status(job_id):
-    """Check the status of a background transcription job"""
-    from services.transcription import transcription_service
+    """
+    Check the status of a background transcription job.
 
-    # Get the job status
+    Responses carry an ETag that changes only when the job's status does, so
+    clients polling with If-None-Match get an empty 304 until there is
+    progress. With ?wait=N the request is held for up to N seconds (capped by
+    JOB_STATUS_MAX_WAIT) waiting for a change before answering 304.
+    """
     status = transcription_service.get_job_status(job_id)
-
-    # Log the status for debugging
-    current_app.logger.info(f"Job status for {job_id}: {status}")
-
-    # Additional logging for result format debugging
-    if status.get('status') == 'completed' and status.get('result'):
-        result = status.get('result')
-        result_type = type(result).__name__
-        if isinstance(result, str):
-            current_app.logger.info(f"Job {job_id} result is string with length: {len(result)}")
-        elif isinstance(result, dict):
-            current_app.logger.info(f"Job {job_id} result is dict with keys: {list(result.keys())}")
-        else:
-            current_app.logger.info(f"Job {job_id} result is {result_type}: {result}")
-
-    # If the job is completed and the user is authenticated, save to Firebase
-    if status.get('status') == 'completed' and current_user and current_user.is_authenticated:
-        try:
-            # Ensure we have a valid user email before proceeding
-            user_email = getattr(current_user, 'email', None)
-            if not user_email:
-                current_app.logger.warning("Authenticated user has no email attribute for background transcription saving.")
-            else:
-                # Extract result from status
-                result = status.get('result')
-                if result:
-                    # Get text from result
-                    text_to_save = result
-                    if isinstance(result, dict) and 'text' in result:
-                        text_to_save = result['text']
-
-                    # Get language and model from request parameters if available
-                    language = request.args.get('language', 'en')
-                    model = request.args.get('model', 'gemini-2.0-flash-lite')
-
-                    # Save to Firebase
-                    Transcription.save(
-                        user_email=user_email,
-                        text=text_to_save,
-                        language=language,
-                        model=model,
-                        audio_duration=None
-                    )
-                    current_app.logger.info(f"Saved background transcription to Firebase for user {user_email}")
-        except Exception as e:
-            current_app.logger.error(f"Error saving background transcription to Firebase: {str(e)}")
-
-    return jsonify(status)
+    version = status.get('version')
+
+    if version is not None and request.if_none_match.contains(f"{job_id}:{version}"):
+        wait = min(request.args.get('wait', 0, type=float), Config.JOB_STATUS_MAX_WAIT)
+        if wait > 0:
+            status = transcription_service.get_job_status(job_id, wait_for_change_from=version, timeout=wait)
+            version = status.get('version')
+
+    response = jsonify(status)
+    response.headers['Cache-Control'] = 'no-cache'
+    if version is not None:
+        response.set_etag(f"{job_id}:{version}")
+    return response.make_conditional(request)
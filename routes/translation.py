@@ -8,6 +8,8 @@ from flask_login import current_user
 from services.translation import TranslationService
 from utils.language_utils import get_supported_languages
 from models.firebase_models import Translation
+from services.model_registry import model_registry
+from services.payg_service import PayAsYouGoService
 # Import RBAC and model access services
 try:
     from services.model_access_service import ModelAccessService
@@ -54,6 +56,7 @@ def translate_text():
         return jsonify({'error': 'Missing required parameters: text and target_language'}), 400
 
     # Validate usage for authenticated users (with timeout protection)
+    validation = None
     if current_user and current_user.is_authenticated:
         try:
             # Ensure we have a valid user email before proceeding
@@ -67,16 +70,17 @@ def translate_text():
 
                 # Fast usage validation with cross-platform timeout protection (non-blocking)
                 import threading
-                validation = None
                 usage_error = None
 
                 def validate_usage():
                     nonlocal validation, usage_error
                     try:
                         from services.usage_validation_service import UsageValidationService
+                        # Overage is recorded, or paid from credits, when the translation is admitted below
                         validation = UsageValidationService.validate_translation_usage(
                             user_email,
-                            word_count
+                            word_count,
+                            record_overage=False
                         )
                     except Exception as e:
                         usage_error = e
@@ -116,21 +120,8 @@ def translate_text():
     target_language = data['target_language']
     translation_model = data.get('translation_model', 'gemini-2.5-flash')  # Default to stable Gemini 2.5 Flash
 
-    # Fix model routing - ensure proper mapping between frontend and backend
-    # Updated November 2025: Using current working models from gemini_models_cache.json
-    model_mapping = {
-        'gemini-2.5-flash-preview': 'gemini-2.5-flash',  # Map old preview to stable
-        'gemini-2.5-flash-preview-05-20': 'gemini-2.5-flash',  # Map deprecated to stable
-        'gemini-2.5-flash-preview-04-17': 'gemini-2.5-flash',  # Map deprecated to stable
-        'gemini-2.5-flash': 'gemini-2.5-flash',  # Stable model (current)
-        'gemini-2.5-flash-preview-09-2025': 'gemini-2.5-flash-preview-09-2025',  # Latest preview (Sept 2025)
-        'gemini-2.5-pro': 'gemini-2.5-pro',  # Stable pro model
-        'gemini-2.0-flash-lite': 'gemini-2.0-flash-lite',  # Keep as is (still available)
-        'gpt-4.1-mini': 'gpt-4.1-mini'
-    }
-
-    # Map the requested model to ensure correct routing
-    mapped_model = model_mapping.get(translation_model, 'gemini-2.5-flash')  # Default to stable
+    # Resolve aliases and deprecated models through the shared model registry
+    mapped_model = model_registry.canonical_name(translation_model, 'translation')
     if mapped_model != translation_model:
         print(f"Translation model mapping: {translation_model} -> {mapped_model}")
 
@@ -202,6 +193,21 @@ def translate_text():
     if not text.strip():
         return jsonify({'error': 'Empty text provided'}), 400
 
+    # Reserve PAYG credits for any overage in the translation; settled once it succeeds
+    reservation_id = None
+    if current_user and current_user.is_authenticated and getattr(current_user, 'email', None):
+        admission = PayAsYouGoService.reserve_for_request(current_user.email, 'translation', validation)
+        if not admission['allowed']:
+            return jsonify({
+                'error': admission['message'],
+                'errorType': 'InsufficientCredits',
+                'details': 'Buy more credits to continue translating.',
+                'credits_needed': admission['credits_needed'],
+                'credits_available': admission['credits_available']
+            }), 402
+        reservation_id = admission['reservation_id']
+        reserved_words = admission['amount']
+
     try:
         # Use the translation service
         translated_text = translation_service.translate(text, target_language, translation_model)
@@ -239,6 +245,10 @@ def translate_text():
                     print(f"Error tracking translation usage: {str(usage_error)}")
                     # Don't fail the request if usage tracking fails
 
+        if reservation_id:
+            PayAsYouGoService.settle_reservation(reservation_id, reserved_words)
+            reservation_id = None
+
         return jsonify({
             'text': translated_text,
             'source_language': 'auto-detect',
@@ -256,6 +266,10 @@ def translate_text():
             'errorType': type(e).__name__,
             'details': 'See server logs for more information'
         }), 500
+    finally:
+        if reservation_id:
+            # The translation failed: give the reserved credits back
+            PayAsYouGoService.release_reservation(reservation_id)
 
 @bp.route('/translate_free_trial', methods=['POST'])
 def translate_free_trial():
@@ -7,6 +7,7 @@ import subprocess
 import threading
 from pathlib import Path
 from typing import List, Optional, Tuple
+from utils.blocking_pool import run_subprocess
 
 class AudioChunker:
     """
@@ -96,7 +97,7 @@ class AudioChunker:
                 ]
 
                 self.logger.info(f"Running FFmpeg chunking (attempt {attempt+1}/{self.max_retries+1})")
-                result = subprocess.run(
+                result = run_subprocess(
                     cmd,
                     check=True,
                     timeout=self.chunk_duration + 30,
@@ -150,7 +151,7 @@ class AudioChunker:
             # Validate chunk
             try:
                 self.logger.info(f"Validating chunk {i+1}/{len(chunk_files)}")
-                subprocess.run(
+                run_subprocess(
                     ["ffmpeg", "-v", "error", "-i", chunk_file, "-f", "null", "-"],
                     check=True,
                     timeout=30,
@@ -281,7 +282,7 @@ class RobustChunker:
         # Run FFmpeg
         try:
             self.logger.info(f"Running FFmpeg chunking for {self.input_path}")
-            subprocess.run(
+            run_subprocess(
                 cmd,
                 check=True,
                 timeout=self.chunk_seconds + 30,
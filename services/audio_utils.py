@@ -7,6 +7,7 @@ import subprocess
 import tempfile
 from typing import Optional, Tuple
 import logging
+from utils.blocking_pool import run_subprocess
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +24,7 @@ def get_audio_duration_ffmpeg(file_path: str) -> Optional[float]:
     """
     try:
         # Use ffprobe to get duration
-        result = subprocess.run([
+        result = run_subprocess([
             'ffprobe', '-v', 'quiet', '-show_entries', 
             'format=duration', '-of', 'csv=p=0', file_path
         ], capture_output=True, text=True, timeout=10)
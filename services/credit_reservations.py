@@ -0,0 +1,91 @@
+"""
+Credit reservations for pay-as-you-go usage.
+
+A request reserves its estimated credits when it is admitted and settles the
+actual amount when it completes. The reserved credits are moved from
+`creditsRemaining` to `creditsReserved` in Firebase by a transaction on the
+user's `billing/payAsYouGo` node, so concurrent requests (in this or any other
+worker) cannot spend the same credits twice. The reservations themselves,
+which only the admitting worker needs in order to settle, are held in this
+in-process store.
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger("credit_reservations")
+
+CreditReservation = namedtuple('CreditReservation', [
+    'id',            # Reservation ID returned to the caller
+    'user_email',
+    'service_type',  # transcription, translation, tts or interpretation
+    'credits',       # Credits held in creditsReserved
+    'created_at',    # time.monotonic() when the reservation was made
+])
+
+
+class InsufficientCredits(Exception):
+    """Raised inside a billing transaction when the user cannot cover the credits."""
+
+    def __init__(self, credits_needed, credits_available, credits_held=0):
+        super().__init__(f"{credits_needed:.2f} credits needed, {credits_available:.2f} available")
+        self.credits_needed = credits_needed
+        self.credits_available = credits_available
+        self.credits_held = credits_held  # By outstanding reservations
+
+
+class CreditReservationStore:
+    """Outstanding credit reservations held by this worker."""
+
+    def __init__(self, ttl=None):
+        """
+        Initialize the store.
+
+        Args:
+            ttl: Seconds before an unsettled reservation is released
+                (CREDIT_RESERVATION_TTL, default 3600)
+        """
+        self.ttl = float(ttl or os.environ.get('CREDIT_RESERVATION_TTL', 3600))
+        self._reservations = {}
+        self._lock = threading.Lock()
+
+    def add(self, user_email, service_type, credits):
+        """Record a reservation and return it."""
+        reservation = CreditReservation(uuid.uuid4().hex, user_email, service_type, credits, time.monotonic())
+        with self._lock:
+            self._reservations[reservation.id] = reservation
+        return reservation
+
+    def pop(self, reservation_id):
+        """Remove and return a reservation (None if unknown or already settled)."""
+        with self._lock:
+            return self._reservations.pop(reservation_id, None)
+
+    def restore(self, reservation):
+        """Put back a reservation whose settlement failed."""
+        with self._lock:
+            self._reservations[reservation.id] = reservation
+
+    def outstanding(self, user_email=None):
+        """Credits held by this worker's reservations, optionally for one user."""
+        with self._lock:
+            return sum(r.credits for r in self._reservations.values()
+                       if user_email is None or r.user_email == user_email)
+
+    def pop_expired(self):
+        """Remove and return reservations older than the TTL."""
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            expired = [r for r in self._reservations.values() if r.created_at < cutoff]
+            for reservation in expired:
+                del self._reservations[reservation.id]
+        if expired:
+            logger.warning(f"Releasing {len(expired)} expired credit reservations")
+        return expired
+
+
+# Create a singleton instance
+credit_reservations = CreditReservationStore()
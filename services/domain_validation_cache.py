@@ -0,0 +1,167 @@
+"""
+Domain validation cache for VocalLocal.
+
+EmailService.validate_email_domain resolved a domain's MX records, then its A
+records, on every call, so the same few providers were looked up over and over
+and a slow resolver stalled the request. This cache remembers each domain's
+result for as long as its DNS records say (negative results for a fixed
+time), never resolves well-known mail providers, runs the MX and A lookups
+concurrently, and stops waiting after a hard deadline. A lookup that misses
+the deadline still fills the cache when it finishes.
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import dns.resolver
+
+logger = logging.getLogger(__name__)
+
+# Major providers accepted without a lookup
+KNOWN_PROVIDERS = (
+    'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com',
+    'msn.com', 'yahoo.com', 'ymail.com', 'icloud.com', 'me.com', 'mac.com',
+    'aol.com', 'protonmail.com', 'proton.me', 'gmx.com', 'gmx.net', 'mail.com',
+    'yandex.com', 'zoho.com', 'fastmail.com',
+)
+
+VALID = (True, "")
+UNAVAILABLE = (True, "DNS validation unavailable - email format appears valid")
+
+
+class _Lookup:
+    """MX and A lookups in flight for one domain, shared by concurrent callers."""
+
+    def __init__(self):
+        self.answers = {}  # record type -> ('ok', answer) | ('none', None) | ('error', exception)
+        self.result = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+
+class DomainValidationCache:
+    """Positive and negative TTL cache of whether a domain can receive email."""
+
+    def __init__(self, deadline=None, negative_ttl=None, min_ttl=60, max_ttl=86400,
+                 max_entries=10000, known_providers=KNOWN_PROVIDERS, resolve=None):
+        """
+        Initialize the cache.
+
+        Args:
+            deadline: Seconds a caller waits for DNS (DNS_VALIDATION_DEADLINE, default 2)
+            negative_ttl: Seconds a missing domain is remembered (DNS_NEGATIVE_TTL, default 300)
+            min_ttl, max_ttl: Bounds applied to record TTLs
+            max_entries: Least recently used entries are evicted beyond this
+            known_providers: Domains accepted without a lookup
+            resolve: Called with (domain, record type, lifetime); defaults to dns.resolver.resolve
+        """
+        self.deadline = float(deadline if deadline is not None else os.environ.get('DNS_VALIDATION_DEADLINE', 2))
+        self.negative_ttl = float(negative_ttl if negative_ttl is not None
+                                  else os.environ.get('DNS_NEGATIVE_TTL', 300))
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.max_entries = max_entries
+        self.known_providers = frozenset(known_providers)
+        self._resolve = resolve or (lambda domain, rdtype, lifetime: dns.resolver.resolve(
+            domain, rdtype, lifetime=lifetime))
+        self._entries = OrderedDict()  # domain -> (expires at, (is_valid, message))
+        self._inflight = {}  # domain -> _Lookup
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    def _pool(self):
+        # Checked by PID: the pool's threads do not survive a fork
+        if self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dns-validation')
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def check(self, domain):
+        """
+        Whether a domain can receive email, from the cache or DNS.
+
+        Args:
+            domain (str): Domain part of an email address
+
+        Returns:
+            Tuple[bool, str]: (is_valid, error_message), as validate_email_domain
+        """
+        domain = domain.strip().lower().rstrip('.')
+        if domain in self.known_providers:
+            return VALID
+
+        start = False
+        with self._lock:
+            cached = self._entries.get(domain)
+            if cached and cached[0] > time.monotonic():
+                self._entries.move_to_end(domain)
+                return cached[1]
+            lookup = self._inflight.get(domain)
+            if lookup is None:
+                lookup = self._inflight[domain] = _Lookup()
+                start = True
+
+        if start:
+            pool = self._pool()
+            for rdtype in ('MX', 'A'):
+                pool.submit(self._lookup, domain, rdtype, lookup)
+
+        if lookup.done.wait(self.deadline):
+            return lookup.result
+        logger.warning(f"DNS validation for {domain} exceeded {self.deadline}s")
+        return UNAVAILABLE
+
+    def _lookup(self, domain, rdtype, lookup):
+        try:
+            answer = ('ok', self._resolve(domain, rdtype, self.deadline))
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            answer = ('none', None)
+        except Exception as e:
+            answer = ('error', e)
+        self._settle(domain, rdtype, answer, lookup)
+
+    def _settle(self, domain, rdtype, answer, lookup):
+        """Decide the domain once either record type answers, or both have failed."""
+        with lookup.lock:
+            if lookup.done.is_set():
+                return
+            lookup.answers[rdtype] = answer
+            status, records = answer
+            if status == 'ok':
+                # MX records, or an A record that can still receive email
+                result, ttl = VALID, self._record_ttl(records)
+            elif len(lookup.answers) < 2:
+                return
+            elif all(status == 'none' for status, _ in lookup.answers.values()):
+                result, ttl = (False, f"Domain '{domain}' does not exist or cannot receive emails"), self.negative_ttl
+            else:
+                logger.warning(f"DNS validation failed for {domain}: "
+                               f"{[str(e) for status, e in lookup.answers.values() if status == 'error']}")
+                result, ttl = UNAVAILABLE, 0
+
+            with self._lock:
+                if ttl:
+                    self._entries[domain] = (time.monotonic() + ttl, result)
+                    self._entries.move_to_end(domain)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                self._inflight.pop(domain, None)
+            lookup.result = result
+            lookup.done.set()
+
+    def _record_ttl(self, answer):
+        rrset = getattr(answer, 'rrset', None)
+        ttl = getattr(rrset, 'ttl', None) or self.min_ttl
+        return max(self.min_ttl, min(ttl, self.max_ttl))
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Create a singleton instance
+domain_validation_cache = DomainValidationCache()
@@ -0,0 +1,109 @@
+"""
+Email Outbox for VocalLocal
+
+EmailService.send_email used to open a new SMTP connection (STARTTLS and
+login included) for every message, inline in registration, verification,
+password reset and payment confirmation requests, and slept between retries
+in the request thread. Messages are now stored in `email_outbox/{key}` and
+delivered by a background sender (services/work_queue.py) that keeps one
+authenticated SMTP connection open and sends queued messages over it in
+batches. Failed deliveries are retried with backoff by the queue; the
+requesting thread never waits on SMTP.
+"""
+
+import time
+import smtplib
+import socket
+import logging
+from models.firebase_models import FirebaseModel
+from services.work_queue import FirebaseWorkQueue, PermanentError
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutbox(FirebaseWorkQueue):
+    """Durable email queue delivered over a pooled SMTP connection."""
+
+    ROOT = 'email_outbox'
+    BATCH_SIZE = 20
+    RETRY_DELAYS = (10, 60, 300, 1800)
+    # The message body (with any attachment) is not kept once it is sent
+    DONE_CLEAR_FIELDS = ('raw',)
+    # A pooled connection idle for longer is checked with NOOP before reuse
+    CONNECTION_CHECK_AFTER = 30
+
+    def __init__(self, email_service=None):
+        super().__init__()
+        self._email_service = email_service
+        self._smtp = None
+        self._smtp_used_at = 0
+
+    @property
+    def email_service(self):
+        if self._email_service is None:
+            from services.email_service import email_service
+            self._email_service = email_service
+        return self._email_service
+
+    def enqueue(self, msg):
+        """
+        Store a message for background delivery.
+
+        Args:
+            msg: The email message (its From and To headers are used as the envelope)
+
+        Returns:
+            str: Outbox key of the message
+        """
+        key = FirebaseModel.new_key()
+        self._add(key, {'from': msg['From'], 'to': msg['To'], 'subject': str(msg['Subject'] or ''),
+                        'raw': msg.as_string()})
+        logger.info(f"Queued email to {msg['To']} ({key})")
+        return key
+
+    def _connection(self):
+        """The pooled SMTP connection, reconnecting if it was closed or went stale."""
+        if self._smtp is not None and time.monotonic() - self._smtp_used_at > self.CONNECTION_CHECK_AFTER:
+            try:
+                self._smtp.noop()
+            except (smtplib.SMTPException, socket.error):
+                self._close()
+        if self._smtp is None:
+            self._smtp = self.email_service.connect()
+        return self._smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, socket.error):
+                pass
+            self._smtp = None
+
+    def _handle(self, key, item):
+        try:
+            try:
+                self._connection().sendmail(item['from'], item['to'], item['raw'])
+            except smtplib.SMTPServerDisconnected:
+                # The pooled connection was closed by the server; reconnect once
+                self._smtp = None
+                self._connection().sendmail(item['from'], item['to'], item['raw'])
+        except smtplib.SMTPAuthenticationError as e:
+            self._close()
+            raise PermanentError(f'SMTP Authentication failed: {str(e)}')
+        except smtplib.SMTPRecipientsRefused as e:
+            raise PermanentError(f'Recipient refused: {str(e)}')
+        except (smtplib.SMTPServerDisconnected, socket.error):
+            # Drop the dead connection; the retry reconnects
+            self._smtp = None
+            raise
+        self._smtp_used_at = time.monotonic()
+        logger.info(f"Email sent successfully to {item['to']} ({key})")
+
+    def _idle(self):
+        # Do not hold the SMTP session open while there is nothing to send
+        self._close()
+
+
+# Create a singleton instance
+email_outbox = EmailOutbox()
@@ -0,0 +1,127 @@
+"""
+Email templates for VocalLocal.
+
+The welcome, verification and payment confirmation emails used to be built
+from large f-strings on every call. Their bodies now live in templates/emails
+as Jinja templates (an .html and a .txt per email). They are compiled once
+when this module is imported. The CSS in each HTML template's <style> block is
+copied into the matching elements' style attributes at the same time, because
+many mail clients ignore <style>. Rules that cannot be inlined (media queries,
+pseudo-classes, descendant selectors) stay in the <style> block; media query
+rules are marked !important in the templates so they still win over the
+inlined styles. Rendering a message is then a single template call.
+"""
+import os
+import re
+import logging
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates', 'emails')
+
+_STYLE_BLOCK = re.compile(r'<style[^>]*>(.*?)</style>', re.S | re.I)
+_MEDIA_BLOCK = re.compile(r'@media[^{]*\{(?:[^{}]*\{[^{}]*\})*[^{}]*\}', re.S)
+_CSS_RULE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+_TAG = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)(\s[^<>]*?)?(/?)>')
+_CLASS_ATTR = re.compile(r'\sclass="([^"]*)"')
+_STYLE_ATTR = re.compile(r'\sstyle="([^"]*)"')
+
+
+def _inlinable_rules(css):
+    """Declarations per bare tag name and per single class selector, in source order."""
+    tags, classes = {}, {}
+    for selectors, declarations in _CSS_RULE.findall(_MEDIA_BLOCK.sub('', css)):
+        declarations = '; '.join(d.strip() for d in declarations.split(';') if d.strip())
+        if not declarations:
+            continue
+        for selector in selectors.split(','):
+            selector = selector.strip()
+            if re.fullmatch(r'\.[\w-]+', selector):
+                classes.setdefault(selector[1:], []).append(declarations)
+            elif re.fullmatch(r'[a-z][a-z0-9]*', selector):
+                tags.setdefault(selector, []).append(declarations)
+    return tags, classes
+
+
+def inline_css(html):
+    """
+    Copy simple <style> rules into the style attributes of the elements they match.
+
+    Tag rules come first, then class rules in the order of the element's
+    classes, then the element's own style, so the usual precedence holds.
+    """
+    styles = ''.join(_STYLE_BLOCK.findall(html))
+    tags, classes = _inlinable_rules(styles)
+    if not (tags or classes):
+        return html
+
+    def apply(match):
+        tag, attrs, closing = match.group(1), match.group(2) or '', match.group(3)
+        declarations = list(tags.get(tag.lower(), []))
+        class_attr = _CLASS_ATTR.search(attrs)
+        for name in (class_attr.group(1).split() if class_attr else []):
+            declarations.extend(classes.get(name, []))
+        if not declarations:
+            return match.group(0)
+        own = _STYLE_ATTR.search(attrs)
+        if own:
+            declarations.append(own.group(1).strip().rstrip(';'))
+            attrs = _STYLE_ATTR.sub('', attrs, count=1)
+        style = '; '.join(declarations).replace('"', "'")
+        return f'<{tag}{attrs} style="{style}"{closing}>'
+
+    head, separator, body = html.partition('<body')
+    if not separator:
+        return html
+    return head + _TAG.sub(apply, separator + body)
+
+
+class _InliningLoader(FileSystemLoader):
+    """Loads email templates, inlining the CSS of HTML templates as they are compiled."""
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        if template.endswith('.html'):
+            source = inline_css(source)
+        return source, filename, uptodate
+
+
+class EmailTemplates:
+    """Compiled email templates, rendered to (text, html) pairs."""
+
+    def __init__(self, template_dir=TEMPLATE_DIR):
+        """
+        Compile every template in the directory.
+
+        Args:
+            template_dir: Directory holding <name>.html and <name>.txt pairs
+        """
+        self.env = Environment(
+            loader=_InliningLoader(template_dir),
+            autoescape=select_autoescape(['html']),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+        )
+        self._templates = {name: self.env.get_template(name) for name in self.env.list_templates()}
+        logger.debug(f"Compiled {len(self._templates)} email templates")
+
+    def render(self, name, **context):
+        """
+        Render an email's plain text and HTML bodies.
+
+        Args:
+            name: Template name without extension (e.g. 'welcome')
+            **context: Template variables
+
+        Returns:
+            Tuple[str, str]: (text, html)
+        """
+        return (self._templates[f'{name}.txt'].render(context),
+                self._templates[f'{name}.html'].render(context))
+
+
+# Create a singleton instance
+email_templates = EmailTemplates()
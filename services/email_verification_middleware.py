@@ -23,7 +23,7 @@ class EmailVerificationMiddleware:
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # Skip verification for OAuth users
-            if hasattr(current_user, '_data') and current_user._data.get('oauth_provider'):
+            if getattr(current_user, 'oauth_user', False):
                 return f(*args, **kwargs)
             
             # Check if user's email is verified
@@ -55,7 +55,7 @@ class EmailVerificationMiddleware:
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # Skip verification for OAuth users
-            if hasattr(current_user, '_data') and current_user._data.get('oauth_provider'):
+            if getattr(current_user, 'oauth_user', False):
                 return f(*args, **kwargs)
             
             # Check if user's email is verified
@@ -83,23 +83,21 @@ class EmailVerificationMiddleware:
             dict: Verification status information
         """
         try:
-            # OAuth users are automatically verified
-            user_data = User.get_by_email(email)
-            if user_data and user_data.get('oauth_provider'):
+            # One cached lookup covers OAuth and manual registration users
+            permissions = User.get_permissions(email)
+            if permissions and permissions['oauth_user']:
                 return {
                     'verified': True,
                     'oauth_user': True,
                     'requires_verification': False
                 }
             
-            # Check manual registration users
-            is_verified = User.is_email_verified(email)
-            requires_verification = User.requires_email_verification(email)
+            is_verified = bool(permissions and permissions['email_verified'])
             
             return {
                 'verified': is_verified,
                 'oauth_user': False,
-                'requires_verification': requires_verification
+                'requires_verification': not is_verified
             }
             
         except Exception as e:
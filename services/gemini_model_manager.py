@@ -4,28 +4,46 @@ Gemini Model Manager
 This module provides dynamic model discovery and fallback management for Gemini API.
 It automatically queries available models and provides intelligent fallback when models
 become deprecated or unavailable.
+
+A single catalog is shared per API key (see get_shared_model_manager) so that the
+transcription and interpretation services do not each keep and refresh their own
+copy. Expired data is served immediately while a background thread refreshes it
+(stale-while-revalidate), and the persistent cache file is written atomically
+under a file lock because every gunicorn worker shares it.
 """
 
 import os
 import json
 import time
+import tempfile
+import threading
 import requests
 import logging
+from contextlib import contextmanager
 from typing import Dict, List, Tuple, Optional, Set
 from datetime import datetime, timedelta
 
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows development machines: fall back to in-process locking only
+    FCNTL_AVAILABLE = False
+
 
 class GeminiModelManager:
     """
     Centralized manager for Gemini model discovery and fallback handling.
-    
+
     Features:
     - Dynamic model discovery via Gemini API
     - Intelligent fallback based on model capabilities
     - Two-tier caching (memory + persistent file)
+    - Stale-while-revalidate background refresh
+    - Precomputed capability -> best model indexes
     - Automatic model family detection
     """
-    
+
     def __init__(self, api_key: str, logger: logging.Logger, cache_duration_hours: int = 24):
         """
         Initialize the Gemini Model Manager.
@@ -43,12 +61,23 @@ class GeminiModelManager:
         self._models_cache: Optional[Dict] = None
         self._cache_timestamp: Optional[datetime] = None
 
+        # Precomputed lookups, rebuilt whenever the cache changes
+        self._models_by_name: Dict[str, Dict] = {}
+        self._capable_models: Dict[str, Set[str]] = {}
+        self._best_models: Dict[str, Tuple[str, str]] = {}
+
+        # Background refresh state
+        self._lock = threading.RLock()
+        self._fetch_lock = threading.Lock()  # Only one API fetch at a time
+        self._refresh_thread: Optional[threading.Thread] = None
+
         # Persistent cache file - use absolute path relative to this file's directory
         # This ensures it works in both development and deployment environments
         current_dir = os.path.dirname(os.path.abspath(__file__))
         self.cache_file = os.path.join(current_dir, "gemini_models_cache.json")
+        self.lock_file = self.cache_file + ".lock"
         self.logger.debug(f"Gemini models cache file path: {self.cache_file}")
-        
+
         # Model capability mappings
         self.capability_requirements = {
             'transcription': ['generateContent'],
@@ -56,135 +85,236 @@ class GeminiModelManager:
             'tts': ['generateContent'],  # TTS models have special naming
             'interpretation': ['generateContent']
         }
-        
+
         # Model family preferences (best to worst)
         self.model_family_preferences = [
             'gemini-2.5-flash',
-            'gemini-2.5-pro', 
+            'gemini-2.5-pro',
             'gemini-2.0-flash',
             'gemini-2.0-flash-lite',
             'gemini-1.5-flash'
         ]
-        
+
         self.logger.info("GeminiModelManager initialized with dynamic fallback support")
-    
+
     def get_available_models(self, force_refresh: bool = False) -> Dict:
         """
         Get available Gemini models with caching.
-        
+
+        Fresh data is returned from memory. Expired data is still returned
+        immediately while a background refresh is started; the caller only
+        blocks on the API when there is no data at all (or force_refresh).
+
         Args:
             force_refresh: Force refresh from API instead of using cache
-            
+
         Returns:
             Dictionary containing model information
         """
-        # Check if we can use cached data
-        if not force_refresh and self._is_cache_valid():
-            if self._models_cache:
-                self.logger.debug("Using in-memory cached models")
-                return self._models_cache
-            
-            # Try loading from persistent cache
-            cached_data = self._load_persistent_cache()
-            if cached_data:
-                self.logger.debug("Using persistent cached models")
-                self._models_cache = cached_data
-                self._cache_timestamp = datetime.now()
-                return cached_data
-        
+        if not force_refresh:
+            with self._lock:
+                if self._models_cache is None:
+                    # Cold start: load the shared file even if it is stale
+                    cached_data, fetched_at = self._load_persistent_cache(allow_stale=True)
+                    if cached_data:
+                        self.logger.debug("Using persistent cached models")
+                        self._set_cache(cached_data, fetched_at)
+
+                if self._models_cache is not None:
+                    if not self._is_cache_valid():
+                        self._start_background_refresh()
+                    return self._models_cache
+
         # Fetch fresh data from API
+        return self._refresh_models(force=force_refresh)
+
+    def _refresh_models(self, force: bool = False) -> Dict:
+        """Fetch models from the API and update both caches."""
+        with self._fetch_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not force:
+                with self._lock:
+                    if self._models_cache is not None and self._is_cache_valid():
+                        return self._models_cache
+            return self._fetch_and_store()
+
+    def _fetch_and_store(self) -> Dict:
+        """Fetch from the API, falling back to stale data on failure (fetch lock held)."""
         self.logger.info("Fetching fresh model data from Gemini API")
         try:
             models_data = self._fetch_models_from_api()
-            
+
             # Update caches
-            self._models_cache = models_data
-            self._cache_timestamp = datetime.now()
+            with self._lock:
+                self._set_cache(models_data, datetime.now())
             self._save_persistent_cache(models_data)
-            
+
             return models_data
-            
+
         except Exception as e:
             self.logger.error(f"Failed to fetch models from API: {e}")
-            
+
+            with self._lock:
+                if self._models_cache is not None:
+                    self.logger.warning("Using stale cached data due to API failure")
+                    # Back off for a while instead of retrying on every call
+                    self._cache_timestamp = datetime.now() - self.cache_duration + timedelta(minutes=5)
+                    return self._models_cache
+
             # Try to use stale cache as fallback
-            cached_data = self._load_persistent_cache()
+            cached_data, fetched_at = self._load_persistent_cache(allow_stale=True)
             if cached_data:
                 self.logger.warning("Using stale cached data due to API failure")
+                with self._lock:
+                    self._set_cache(cached_data, fetched_at)
+                    self._cache_timestamp = datetime.now() - self.cache_duration + timedelta(minutes=5)
                 return cached_data
-            
+
             # Return empty dict if all else fails
             self.logger.error("No cached data available, returning empty model list")
             return {"models": []}
-    
+
+    def _start_background_refresh(self) -> None:
+        """Refresh the catalog on a daemon thread unless one is already running."""
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._background_refresh,
+                name="gemini-model-refresh",
+                daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _background_refresh(self) -> None:
+        """Background refresh that prefers data another worker already fetched."""
+        try:
+            cached_data, fetched_at = self._load_persistent_cache()
+            if cached_data:
+                self.logger.debug("Another worker refreshed the model cache; reusing it")
+                with self._lock:
+                    self._set_cache(cached_data, fetched_at)
+                return
+            self._refresh_models()
+        except Exception as e:
+            self.logger.warning(f"Background model refresh failed: {e}")
+
+    def _set_cache(self, data: Dict, fetched_at: Optional[datetime]) -> None:
+        """Replace the in-memory cache and rebuild the lookup indexes (lock held)."""
+        self._models_cache = data
+        self._cache_timestamp = fetched_at or datetime.now()
+        self._build_indexes(data.get("models", []))
+
+    def _build_indexes(self, available_models: List[Dict]) -> None:
+        """Precompute name, capability and best-model lookups."""
+        models_by_name = {}
+        for model in available_models:
+            models_by_name[model.get("name", "").replace("models/", "")] = model
+
+        capable_models = {}
+        best_models = {}
+        for capability in self.capability_requirements:
+            capable_models[capability] = {
+                name for name, model in models_by_name.items()
+                if self._supports(model, capability)
+            }
+            best_models[capability] = self._find_best_model(capability, available_models)
+
+        self._models_by_name = models_by_name
+        self._capable_models = capable_models
+        self._best_models = best_models
+
+    def _supports(self, model: Dict, capability: str) -> bool:
+        required_methods = self.capability_requirements.get(capability, [])
+        supported_methods = model.get("supportedGenerationMethods", [])
+        return all(method in supported_methods for method in required_methods)
+
     def get_best_model_for_capability(self, capability: str, preferred_model: Optional[str] = None) -> Tuple[str, bool, str]:
         """
         Get the best available model for a specific capability.
-        
+
         Args:
             capability: Required capability ('transcription', 'translation', 'tts', 'interpretation')
             preferred_model: Preferred model name (optional)
-            
+
         Returns:
             Tuple of (model_name, is_fallback, reason)
         """
-        models_data = self.get_available_models()
-        available_models = models_data.get("models", [])
-        
-        # If preferred model is specified and available, use it
-        if preferred_model:
-            for model in available_models:
-                model_name = model.get("name", "").replace("models/", "")
-                if model_name == preferred_model:
-                    required_methods = self.capability_requirements.get(capability, [])
-                    supported_methods = model.get("supportedGenerationMethods", [])
-                    
-                    if all(method in supported_methods for method in required_methods):
-                        self.logger.debug(f"Preferred model {preferred_model} is available")
-                        return preferred_model, False, "Preferred model available"
-        
-        # Find best fallback model
-        return self._find_best_fallback(capability, available_models, preferred_model)
+        self.get_available_models()
 
-    def _find_best_fallback(self, capability: str, available_models: List[Dict], preferred_model: Optional[str]) -> Tuple[str, bool, str]:
-        """Find the best fallback model for a capability."""
-        required_methods = self.capability_requirements.get(capability, [])
+        with self._lock:
+            # If preferred model is specified and available, use it
+            if preferred_model and preferred_model in self._capable_models.get(capability, ()):
+                self.logger.debug(f"Preferred model {preferred_model} is available")
+                return preferred_model, False, "Preferred model available"
+
+            best = self._best_models.get(capability)
+
+        if best is None:
+            # Unknown capability: compute on demand
+            with self._lock:
+                available_models = (self._models_cache or {}).get("models", [])
+            best = self._find_best_model(capability, available_models)
 
+        return self._describe_fallback(capability, best, preferred_model)
+
+    def _find_best_model(self, capability: str, available_models: List[Dict]) -> Tuple[str, str]:
+        """
+        Find the best model for a capability.
+
+        Returns:
+            Tuple of (model_name, selection_kind)
+        """
         # Special handling for TTS models
         if capability == 'tts':
             tts_models = [m for m in available_models if 'tts' in m.get("name", "").lower()]
             if tts_models:
-                best_tts = tts_models[0].get("name", "").replace("models/", "")
-                reason = f"TTS fallback from {preferred_model}" if preferred_model else "Best TTS model"
-                return best_tts, bool(preferred_model), reason
+                return tts_models[0].get("name", "").replace("models/", ""), 'tts'
 
         # Find models that support required capabilities
-        compatible_models = []
-        for model in available_models:
-            supported_methods = model.get("supportedGenerationMethods", [])
-            if all(method in supported_methods for method in required_methods):
-                model_name = model.get("name", "").replace("models/", "")
-                compatible_models.append(model_name)
+        compatible_models = [
+            model.get("name", "").replace("models/", "")
+            for model in available_models
+            if self._supports(model, capability)
+        ]
 
         if not compatible_models:
             # Emergency fallback - use first available model
             if available_models:
-                fallback = available_models[0].get("name", "").replace("models/", "")
-                return fallback, True, "Emergency fallback - no compatible models found"
-            else:
-                return "gemini-2.5-flash", True, "No models available - using hardcoded fallback"
+                return available_models[0].get("name", "").replace("models/", ""), 'emergency'
+            return "gemini-2.5-flash", 'hardcoded'
 
         # Select best model based on family preferences
         for preferred_family in self.model_family_preferences:
             for model_name in compatible_models:
                 if preferred_family in model_name:
-                    reason = f"Fallback from {preferred_model}" if preferred_model else f"Best available for {capability}"
-                    return model_name, bool(preferred_model), reason
+                    return model_name, 'family'
 
         # Use first compatible model if no family preference matches
-        fallback = compatible_models[0]
+        return compatible_models[0], 'first'
+
+    def _describe_fallback(self, capability: str, best: Tuple[str, str], preferred_model: Optional[str]) -> Tuple[str, bool, str]:
+        """Turn a precomputed selection into the (model, is_fallback, reason) tuple."""
+        model_name, kind = best
+
+        if kind == 'tts':
+            reason = f"TTS fallback from {preferred_model}" if preferred_model else "Best TTS model"
+            return model_name, bool(preferred_model), reason
+        if kind == 'emergency':
+            return model_name, True, "Emergency fallback - no compatible models found"
+        if kind == 'hardcoded':
+            return model_name, True, "No models available - using hardcoded fallback"
+        if kind == 'family':
+            reason = f"Fallback from {preferred_model}" if preferred_model else f"Best available for {capability}"
+            return model_name, bool(preferred_model), reason
+
         reason = f"Fallback from {preferred_model}" if preferred_model else f"First compatible for {capability}"
-        return fallback, bool(preferred_model), reason
+        return model_name, bool(preferred_model), reason
+
+    def _find_best_fallback(self, capability: str, available_models: List[Dict], preferred_model: Optional[str]) -> Tuple[str, bool, str]:
+        """Find the best fallback model for a capability."""
+        best = self._find_best_model(capability, available_models)
+        return self._describe_fallback(capability, best, preferred_model)
 
     def _fetch_models_from_api(self) -> Dict:
         """Fetch model list from Gemini API."""
@@ -209,35 +339,75 @@ class GeminiModelManager:
             return False
         return datetime.now() - self._cache_timestamp < self.cache_duration
 
-    def _load_persistent_cache(self) -> Optional[Dict]:
-        """Load models from persistent cache file."""
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Cross-process lock on a sidecar file (no-op where fcntl is unavailable)."""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+
+        with open(self.lock_file, 'a') as lock_handle:
+            fcntl.flock(lock_handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_handle, fcntl.LOCK_UN)
+
+    def _load_persistent_cache(self, allow_stale: bool = False) -> Tuple[Optional[Dict], Optional[datetime]]:
+        """
+        Load models from persistent cache file.
+
+        Args:
+            allow_stale: Return the data even if it is older than cache_duration
+
+        Returns:
+            Tuple of (data, fetched_at) or (None, None)
+        """
         try:
             if not os.path.exists(self.cache_file):
-                return None
+                return None, None
 
-            with open(self.cache_file, 'r') as f:
-                data = json.load(f)
+            with self._file_lock(exclusive=False):
+                with open(self.cache_file, 'r') as f:
+                    data = json.load(f)
 
             # Check if cache is still valid
             fetched_at = datetime.fromisoformat(data.get("fetched_at", "1970-01-01"))
-            if datetime.now() - fetched_at < self.cache_duration:
-                return data
+            if allow_stale or datetime.now() - fetched_at < self.cache_duration:
+                return data, fetched_at
             else:
                 self.logger.debug("Persistent cache expired")
-                return None
+                return None, None
 
         except Exception as e:
             self.logger.warning(f"Failed to load persistent cache: {e}")
-            return None
+            return None, None
 
     def _save_persistent_cache(self, data: Dict) -> None:
-        """Save models to persistent cache file."""
+        """Save models to persistent cache file atomically."""
+        temp_path = None
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with self._file_lock(exclusive=True):
+                fd, temp_path = tempfile.mkstemp(
+                    dir=os.path.dirname(self.cache_file),
+                    prefix=".gemini_models_cache.",
+                    suffix=".tmp"
+                )
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.cache_file)
+                temp_path = None
             self.logger.debug(f"Saved model cache to {self.cache_file}")
         except Exception as e:
             self.logger.warning(f"Failed to save persistent cache: {e}")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
 
     def register_fallback(self, original_model: str, fallback_model: str, reason: str) -> None:
         """Register a fallback mapping for future use."""
@@ -246,23 +416,50 @@ class GeminiModelManager:
 
     def clear_cache(self) -> None:
         """Clear both in-memory and persistent caches."""
-        self._models_cache = None
-        self._cache_timestamp = None
+        with self._lock:
+            self._models_cache = None
+            self._cache_timestamp = None
+            self._models_by_name = {}
+            self._capable_models = {}
+            self._best_models = {}
 
         try:
-            if os.path.exists(self.cache_file):
-                os.remove(self.cache_file)
+            with self._file_lock(exclusive=True):
+                if os.path.exists(self.cache_file):
+                    os.remove(self.cache_file)
             self.logger.info("Model cache cleared")
         except Exception as e:
             self.logger.warning(f"Failed to clear persistent cache: {e}")
 
     def get_model_info(self, model_name: str) -> Optional[Dict]:
         """Get detailed information about a specific model."""
-        models_data = self.get_available_models()
-        available_models = models_data.get("models", [])
+        self.get_available_models()
+        with self._lock:
+            return self._models_by_name.get(model_name)
+
+
+_shared_managers: Dict[str, GeminiModelManager] = {}
+_shared_managers_lock = threading.Lock()
 
-        for model in available_models:
-            if model.get("name", "").replace("models/", "") == model_name:
-                return model
 
-        return None
+def get_shared_model_manager(api_key: str, cache_duration_hours: int = 24) -> GeminiModelManager:
+    """
+    Get the process-wide model catalog for an API key.
+
+    Args:
+        api_key: Gemini API key
+        cache_duration_hours: How long model data stays fresh
+
+    Returns:
+        GeminiModelManager shared by every service in this process
+    """
+    with _shared_managers_lock:
+        manager = _shared_managers.get(api_key)
+        if manager is None:
+            manager = GeminiModelManager(
+                api_key=api_key,
+                logger=logging.getLogger("gemini_model_manager"),
+                cache_duration_hours=cache_duration_hours
+            )
+            _shared_managers[api_key] = manager
+        return manager
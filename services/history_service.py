@@ -5,19 +5,25 @@ Provides improved data retrieval for transcriptions and translations
 with better error handling, sorting, and pagination.
 """
 
+import json
+import heapq
+import base64
+import binascii
+import itertools
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
 
 # Try different import paths for Firebase models
 try:
-    from firebase_models import Transcription, Translation
+    from models.firebase_models import Transcription, Translation, HistoryBody
 except ImportError:
     try:
-        from models.firebase_models import Transcription, Translation
+        from firebase_models import Transcription, Translation
+        HistoryBody = None
     except ImportError:
         try:
-            from vocallocal.models.firebase_models import Transcription, Translation
+            from vocallocal.models.firebase_models import Transcription, Translation, HistoryBody
         except ImportError:
             # Create fallback classes if imports fail
             class Transcription:
@@ -36,6 +42,15 @@ except ImportError:
                         @staticmethod
                         def limit_to_first(limit):
                             return RefObj()
+                        @staticmethod
+                        def order_by_key():
+                            return RefObj()
+                        @staticmethod
+                        def end_at(value):
+                            return RefObj()
+                        @staticmethod
+                        def start_at(value):
+                            return RefObj()
                     return RefObj()
 
             class Translation:
@@ -54,112 +69,303 @@ except ImportError:
                         @staticmethod
                         def limit_to_first(limit):
                             return RefObj()
+                        @staticmethod
+                        def order_by_key():
+                            return RefObj()
+                        @staticmethod
+                        def end_at(value):
+                            return RefObj()
+                        @staticmethod
+                        def start_at(value):
+                            return RefObj()
                     return RefObj()
 
+            HistoryBody = None
+
 logger = logging.getLogger(__name__)
 
+# Collections shown on the history page, by history type
+HISTORY_COLLECTIONS = {
+    'transcription': ('transcriptions', Transcription),
+    'translation': ('translations', Translation),
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a history cursor cannot be decoded."""
+
+
 class HistoryService:
     """Service for managing user history data with improved error handling."""
 
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+
+    # Whether the `timestamp` index is deployed per collection (None = not checked yet)
+    _index_status = {name: None for name, _ in HISTORY_COLLECTIONS.values()}
+
     @staticmethod
-    def get_user_transcriptions(user_email: str, limit: int = 100, sort_desc: bool = True) -> Dict[str, Any]:
+    def encode_cursor(timestamp: str, key: str, ts: int) -> str:
+        """Encode the (timestamp, key, epoch ms) position of the last item on a page."""
+        raw = json.dumps([timestamp, key, ts], separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str, int]]:
+        """Decode a cursor produced by encode_cursor (None for the first page)."""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            timestamp, key, ts = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            return str(timestamp), str(key), int(ts)
+        except (ValueError, TypeError, binascii.Error) as e:
+            raise InvalidCursor(f"Invalid history cursor: {cursor}") from e
+
+    @staticmethod
+    def _epoch_ms(item: Dict[str, Any]) -> int:
+        """Epoch milliseconds of an item, stored on write as `ts` (parsed for older entries)."""
+        ts = item.get('ts')
+        if isinstance(ts, (int, float)):
+            return int(ts)
+        return int(HistoryService._parse_timestamp(item.get('timestamp', '')).timestamp() * 1000)
+
+    @staticmethod
+    def clamp_page_size(limit: Any) -> int:
+        """Parse a requested page size and keep it within 1..MAX_PAGE_SIZE."""
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return HistoryService.DEFAULT_PAGE_SIZE
+        return max(1, min(limit, HistoryService.MAX_PAGE_SIZE))
+
+    @staticmethod
+    def _is_index_error(error: Exception) -> bool:
+        message = str(error).lower()
+        return "index not defined" in message or "indexon" in message
+
+    @staticmethod
+    def check_indexes() -> Dict[str, bool]:
         """
-        Get user transcriptions with improved error handling and sorting.
+        Check that the `timestamp` index is deployed for every history collection.
+
+        Runs a one-item ordered query against each collection. Without the
+        `.indexOn` rule Firebase rejects the query, and history falls back to
+        paging by push key.
+
+        Returns:
+            Dictionary of collection name -> index deployed
+        """
+        for collection, model in HISTORY_COLLECTIONS.values():
+            try:
+                model.get_ref(f'{collection}/__index_check__').order_by_child('timestamp').limit_to_last(1).get()
+                HistoryService._index_status[collection] = True
+                logger.info(f"History index check passed for '{collection}'")
+            except Exception as e:
+                if HistoryService._is_index_error(e):
+                    HistoryService._index_status[collection] = False
+                    logger.warning(f"Missing Firebase index for '{collection}': add "
+                                   f"\"{collection}\": {{\"$userId\": {{\".indexOn\": \"timestamp\"}}}} "
+                                   f"to the database rules (see firebase-rules.json). "
+                                   f"History will page by key until it is deployed.")
+                else:
+                    logger.warning(f"History index check for '{collection}' failed: {str(e)}")
+        return dict(HistoryService._index_status)
+
+    @staticmethod
+    def _query_window(ref, order_by_timestamp: bool, cursor: Optional[Tuple[str, str, int]],
+                      size: int, sort_desc: bool) -> Dict[str, Any]:
+        """Run one bounded query starting at the cursor (inclusive)."""
+        query = ref.order_by_child('timestamp') if order_by_timestamp else ref.order_by_key()
+        if cursor:
+            boundary = cursor[0] if order_by_timestamp else cursor[1]
+            query = query.end_at(boundary) if sort_desc else query.start_at(boundary)
+        query = query.limit_to_last(size) if sort_desc else query.limit_to_first(size)
+        return query.get() or {}
+
+    @staticmethod
+    def _fetch_page(model, collection: str, user_id: str, cursor: Optional[Tuple[str, str, int]],
+                    limit: int, sort_desc: bool = True) -> Dict[str, Any]:
+        """
+        Fetch up to `limit` items strictly after the cursor using keyset pagination.
+
+        Items are ordered by (timestamp, key). With the index deployed this is
+        `order_by_child('timestamp').end_at(timestamp)`; without it, push keys
+        (which are chronological) are used instead, so a page never downloads
+        more than a bounded window of the user's history. Firebase returns the
+        window already ordered, so items are only reversed for newest-first.
+
+        Returns:
+            Dictionary with 'items' (list of (key, item, epoch ms)) and 'method'
+        """
+        ref = model.get_ref(f'{collection}/{user_id}')
+        use_index = HistoryService._index_status.get(collection) is not False
+
+        def after_cursor(key, ts):
+            if not cursor:
+                return True
+            # Compare on the same ordering the query used
+            current, boundary = ((ts, key), (cursor[2], cursor[1])) if use_index else (key, cursor[1])
+            return current < boundary if sort_desc else current > boundary
+
+        size = limit
+        while True:
+            try:
+                raw = HistoryService._query_window(ref, use_index, cursor, size, sort_desc)
+            except Exception as e:
+                if use_index and HistoryService._is_index_error(e):
+                    logger.warning(f"Firebase index missing for '{collection}', paging by key instead")
+                    HistoryService._index_status[collection] = False
+                    use_index = False
+                    continue
+                raise
+
+            entries = [(key, item, HistoryService._epoch_ms(item))
+                       for key, item in raw.items() if isinstance(item, dict)]
+            items = [entry for entry in entries if after_cursor(entry[0], entry[2])]
+            exhausted = len(raw) < size
+
+            # Items tied with the cursor's timestamp fill the window without
+            # advancing; widen the window until a full page is past the cursor.
+            if len(items) >= limit or exhausted:
+                break
+            size += len(entries) - len(items) or limit
+
+        if sort_desc:
+            items.reverse()
+        return {
+            'items': items[:limit],
+            'method': 'firebase_ordered' if use_index else 'key_ordered',
+        }
+
+    @staticmethod
+    def _iter_history(item_type: str, user_id: str, cursor: Optional[Tuple[str, str, int]],
+                      chunk_size: int, sort_desc: bool, methods: Dict[str, str]):
+        """
+        Lazily yield one collection's items past the cursor, fetching `chunk_size` at a time.
+
+        Used as an input stream of the k-way merge, so a collection is only
+        read as far as the merged page actually needs.
+        """
+        collection, model = HISTORY_COLLECTIONS[item_type]
+        while True:
+            page = HistoryService._fetch_page(model, collection, user_id, cursor, chunk_size, sort_desc)
+            methods[collection] = page['method']
+            for key, item, ts in page['items']:
+                yield {
+                    'id': key,
+                    'type': item_type,
+                    'data': item,
+                    'timestamp': item.get('timestamp', ''),
+                    'ts': ts,
+                }
+            if len(page['items']) < chunk_size:
+                return
+            key, item, ts = page['items'][-1]
+            cursor = (item.get('timestamp', '') or '', key, ts)
+
+    @staticmethod
+    def get_history_page(user_email: str, history_type: str = 'all', cursor: Optional[str] = None,
+                         limit: int = DEFAULT_PAGE_SIZE, sort_desc: bool = True) -> Dict[str, Any]:
+        """
+        Get one page of a user's history.
 
         Args:
             user_email: User's email address
-            limit: Maximum number of items to retrieve
+            history_type: 'all', 'transcription' or 'translation'
+            cursor: Cursor returned with the previous page (None for the first page)
+            limit: Page size (clamped to MAX_PAGE_SIZE)
             sort_desc: Sort in descending order (newest first)
 
         Returns:
-            Dictionary of transcriptions with metadata
+            Dictionary with 'items', 'next_cursor' and 'has_more'
+
+        Raises:
+            InvalidCursor: If the cursor cannot be decoded
         """
         user_id = user_email.replace('.', ',')
-        transcriptions = {}
-        error_info = None
+        limit = HistoryService.clamp_page_size(limit)
+        position = HistoryService.decode_cursor(cursor)
+
+        if history_type in HISTORY_COLLECTIONS:
+            types = [history_type]
+        else:
+            types = list(HISTORY_COLLECTIONS)
+
+        # k-way merge of the already ordered per-collection streams; stops
+        # after limit + 1 items (the extra one tells whether another page exists)
+        methods = {}
+        chunk_size = limit + 1 if len(types) == 1 else max(5, (limit + 1) // len(types) + 1)
+        streams = [HistoryService._iter_history(item_type, user_id, position, chunk_size, sort_desc, methods)
+                   for item_type in types]
+        merged = heapq.merge(*streams, key=lambda x: (x['ts'], x['id']), reverse=sort_desc)
+        window = list(itertools.islice(merged, limit + 1))
+
+        has_more = len(window) > limit
+        items = window[:limit]
+
+        next_cursor = None
+        if has_more and items:
+            last = items[-1]
+            next_cursor = HistoryService.encode_cursor(last['timestamp'] or '', last['id'], last['ts'])
 
-        try:
-            # First attempt: Try with Firebase ordering (requires index)
-            logger.info(f"Attempting to fetch transcriptions with ordering for user: {user_email}")
+        return {
+            'items': items,
+            'count': len(items),
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'methods': methods,
+            'sorted': True
+        }
 
-            if sort_desc:
-                transcriptions = Transcription.get_ref(f'transcriptions/{user_id}').order_by_child('timestamp').limit_to_last(limit).get()
-            else:
-                transcriptions = Transcription.get_ref(f'transcriptions/{user_id}').order_by_child('timestamp').limit_to_first(limit).get()
-
-            if transcriptions:
-                logger.info(f"Successfully fetched {len(transcriptions)} transcriptions with ordering")
-                return {
-                    'data': transcriptions,
-                    'sorted': True,
-                    'method': 'firebase_ordered',
-                    'count': len(transcriptions)
-                }
+    @staticmethod
+    def get_item_body(user_email: str, item_type: str, item_id: str) -> Optional[Dict[str, str]]:
+        """
+        Fetch the full text of one history item on demand.
 
-        except Exception as e:
-            error_info = str(e)
-            logger.warning(f"Firebase ordering failed: {error_info}")
+        Args:
+            user_email: User's email address
+            item_type: 'transcription' or 'translation'
+            item_id: History entry key
 
-            # Check if it's an indexing error
-            if "index not defined" in error_info.lower() or "indexon" in error_info.lower():
-                logger.warning("Indexing error detected - falling back to manual sorting")
+        Returns:
+            Dictionary of body fields, or None if the item does not exist
+        """
+        if item_type not in HISTORY_COLLECTIONS or HistoryBody is None:
+            return None
+        collection, _ = HISTORY_COLLECTIONS[item_type]
+        return HistoryBody.get(collection, user_email, item_id)
 
-        try:
-            # Second attempt: Fetch all data without ordering and sort manually
-            logger.info("Attempting to fetch transcriptions without ordering")
-            transcriptions = Transcription.get_ref(f'transcriptions/{user_id}').get()
-
-            if transcriptions:
-                # Convert to list for sorting
-                transcription_list = []
-                for key, item in transcriptions.items():
-                    item['_key'] = key
-                    transcription_list.append(item)
-
-                # Sort by timestamp
-                transcription_list.sort(
-                    key=lambda x: HistoryService._parse_timestamp(x.get('timestamp', '')),
-                    reverse=sort_desc
-                )
-
-                # Convert back to dictionary and limit results
-                sorted_transcriptions = {}
-                for i, item in enumerate(transcription_list[:limit]):
-                    key = item.pop('_key')
-                    sorted_transcriptions[key] = item
-
-                logger.info(f"Successfully fetched and sorted {len(sorted_transcriptions)} transcriptions manually")
-                return {
-                    'data': sorted_transcriptions,
-                    'sorted': True,
-                    'method': 'manual_sorted',
-                    'count': len(sorted_transcriptions),
-                    'total_available': len(transcription_list)
-                }
-            else:
-                logger.info("No transcriptions found for user")
-                return {
-                    'data': {},
-                    'sorted': True,
-                    'method': 'empty',
-                    'count': 0
-                }
+    @staticmethod
+    def _get_user_items(item_type: str, user_email: str, limit: int, sort_desc: bool) -> Dict[str, Any]:
+        """Fetch the newest (or oldest) `limit` items of one type as a key -> item dict."""
+        collection, model = HISTORY_COLLECTIONS[item_type]
+        user_id = user_email.replace('.', ',')
 
-        except Exception as e2:
-            logger.error(f"Failed to fetch transcriptions without ordering: {str(e2)}")
+        try:
+            page = HistoryService._fetch_page(model, collection, user_id, None, limit, sort_desc)
+            data = {key: item for key, item, _ in page['items']}
+            logger.info(f"Fetched {len(data)} {collection} for user {user_email} using {page['method']}")
+            return {
+                'data': data,
+                'sorted': True,
+                'method': page['method'] if data else 'empty',
+                'count': len(data)
+            }
+        except Exception as e:
+            logger.error(f"Failed to fetch {collection}: {str(e)}")
             return {
                 'data': {},
                 'sorted': False,
                 'method': 'failed',
                 'count': 0,
-                'error': str(e2),
-                'original_error': error_info
+                'error': str(e)
             }
 
     @staticmethod
-    def get_user_translations(user_email: str, limit: int = 100, sort_desc: bool = True) -> Dict[str, Any]:
+    def get_user_transcriptions(user_email: str, limit: int = 100, sort_desc: bool = True) -> Dict[str, Any]:
         """
-        Get user translations with improved error handling and sorting.
+        Get user transcriptions with improved error handling and sorting.
 
         Args:
             user_email: User's email address
@@ -167,85 +373,24 @@ class HistoryService:
             sort_desc: Sort in descending order (newest first)
 
         Returns:
-            Dictionary of translations with metadata
+            Dictionary of transcriptions with metadata
         """
-        user_id = user_email.replace('.', ',')
-        translations = {}
-        error_info = None
-
-        try:
-            # First attempt: Try with Firebase ordering (requires index)
-            logger.info(f"Attempting to fetch translations with ordering for user: {user_email}")
+        return HistoryService._get_user_items('transcription', user_email, limit, sort_desc)
 
-            if sort_desc:
-                translations = Translation.get_ref(f'translations/{user_id}').order_by_child('timestamp').limit_to_last(limit).get()
-            else:
-                translations = Translation.get_ref(f'translations/{user_id}').order_by_child('timestamp').limit_to_first(limit).get()
-
-            if translations:
-                logger.info(f"Successfully fetched {len(translations)} translations with ordering")
-                return {
-                    'data': translations,
-                    'sorted': True,
-                    'method': 'firebase_ordered',
-                    'count': len(translations)
-                }
-
-        except Exception as e:
-            error_info = str(e)
-            logger.warning(f"Firebase ordering failed: {error_info}")
+    @staticmethod
+    def get_user_translations(user_email: str, limit: int = 100, sort_desc: bool = True) -> Dict[str, Any]:
+        """
+        Get user translations with improved error handling and sorting.
 
-        try:
-            # Second attempt: Fetch all data without ordering and sort manually
-            logger.info("Attempting to fetch translations without ordering")
-            translations = Translation.get_ref(f'translations/{user_id}').get()
-
-            if translations:
-                # Convert to list for sorting
-                translation_list = []
-                for key, item in translations.items():
-                    item['_key'] = key
-                    translation_list.append(item)
-
-                # Sort by timestamp
-                translation_list.sort(
-                    key=lambda x: HistoryService._parse_timestamp(x.get('timestamp', '')),
-                    reverse=sort_desc
-                )
-
-                # Convert back to dictionary and limit results
-                sorted_translations = {}
-                for i, item in enumerate(translation_list[:limit]):
-                    key = item.pop('_key')
-                    sorted_translations[key] = item
-
-                logger.info(f"Successfully fetched and sorted {len(sorted_translations)} translations manually")
-                return {
-                    'data': sorted_translations,
-                    'sorted': True,
-                    'method': 'manual_sorted',
-                    'count': len(sorted_translations),
-                    'total_available': len(translation_list)
-                }
-            else:
-                logger.info("No translations found for user")
-                return {
-                    'data': {},
-                    'sorted': True,
-                    'method': 'empty',
-                    'count': 0
-                }
+        Args:
+            user_email: User's email address
+            limit: Maximum number of items to retrieve
+            sort_desc: Sort in descending order (newest first)
 
-        except Exception as e2:
-            logger.error(f"Failed to fetch translations without ordering: {str(e2)}")
-            return {
-                'data': {},
-                'sorted': False,
-                'method': 'failed',
-                'count': 0,
-                'error': str(e2),
-                'original_error': error_info
-            }
+        Returns:
+            Dictionary of translations with metadata
+        """
+        return HistoryService._get_user_items('translation', user_email, limit, sort_desc)
 
     @staticmethod
     def get_combined_history(user_email: str, limit: int = 100, sort_desc: bool = True) -> Dict[str, Any]:
@@ -260,47 +405,18 @@ class HistoryService:
         Returns:
             Combined and sorted history data
         """
-        # Get transcriptions and translations
-        transcriptions_result = HistoryService.get_user_transcriptions(user_email, limit, sort_desc)
-        translations_result = HistoryService.get_user_translations(user_email, limit, sort_desc)
-
-        # Combine data
-        combined_items = []
-
-        # Add transcriptions
-        for key, item in transcriptions_result['data'].items():
-            combined_items.append({
-                'id': key,
-                'type': 'transcription',
-                'data': item,
-                'timestamp': item.get('timestamp', ''),
-                'parsed_timestamp': HistoryService._parse_timestamp(item.get('timestamp', ''))
-            })
-
-        # Add translations
-        for key, item in translations_result['data'].items():
-            combined_items.append({
-                'id': key,
-                'type': 'translation',
-                'data': item,
-                'timestamp': item.get('timestamp', ''),
-                'parsed_timestamp': HistoryService._parse_timestamp(item.get('timestamp', ''))
-            })
-
-        # Sort combined items
-        combined_items.sort(key=lambda x: x['parsed_timestamp'], reverse=sort_desc)
-
-        # Limit results
-        limited_items = combined_items[:limit]
+        page = HistoryService.get_history_page(user_email, 'all', None, limit, sort_desc)
+        items = page['items']
 
         return {
-            'items': limited_items,
-            'transcriptions_count': transcriptions_result['count'],
-            'translations_count': translations_result['count'],
-            'total_count': len(limited_items),
-            'total_available': len(combined_items),
-            'transcriptions_method': transcriptions_result['method'],
-            'translations_method': translations_result['method'],
+            'items': items,
+            'transcriptions_count': sum(1 for item in items if item['type'] == 'transcription'),
+            'translations_count': sum(1 for item in items if item['type'] == 'translation'),
+            'total_count': len(items),
+            'has_more': page['has_more'],
+            'next_cursor': page['next_cursor'],
+            'transcriptions_method': page['methods'].get('transcriptions'),
+            'translations_method': page['methods'].get('translations'),
             'sorted': True
         }
 
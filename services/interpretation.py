@@ -1,11 +1,12 @@
 import logging
 import os
-import google.generativeai as genai
 from openai import OpenAI
 import json
 import re
 import logging
-from .gemini_model_manager import GeminiModelManager
+from .gemini_model_manager import get_shared_model_manager
+from utils.lazy_import import genai
+from .model_registry import model_registry
 
 class InterpretationService:
     """Enhanced service for interpreting text using AI models with contextual understanding and rephrasing capabilities"""
@@ -16,15 +17,11 @@ class InterpretationService:
         # Initialize Gemini
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         if self.gemini_api_key:
-            genai.configure(api_key=self.gemini_api_key)
+            # genai is imported and configured on first use
             self.logger.info("Gemini API initialized")
 
             # Initialize Gemini Model Manager for dynamic fallback
-            self.gemini_model_manager = GeminiModelManager(
-                api_key=self.gemini_api_key,
-                logger=self.logger,
-                cache_duration_hours=24
-            )
+            self.gemini_model_manager = get_shared_model_manager(self.gemini_api_key, cache_duration_hours=24)
         else:
             self.gemini_model_manager = None
 
@@ -81,6 +78,9 @@ class InterpretationService:
             # Extract original text from prompt for fallback purposes
             original_text = self._extract_text_from_prompt(prompt)
 
+            # Resolve aliases before asking the model manager for the best available model
+            model_name = model_registry.canonical_name(model_name, 'interpretation')
+
             # Use dynamic model mapping with intelligent fallback
             if self.gemini_model_manager:
                 try:
@@ -171,21 +171,11 @@ class InterpretationService:
             raise
 
     def _static_model_mapping(self, model_name):
-        """Static fallback model mapping for interpretation."""
-        model_id = model_name
-        if model_name == "gemini-2.5-flash-preview":
-            model_id = "gemini-2.5-flash"
-        elif model_name in ["gemini-2.5-flash-preview-05-20", "gemini-2.5-flash-preview-04-17"]:
-            model_id = "gemini-2.5-flash"
-            self.logger.warning(f"Static mapping: deprecated model {model_name} to stable gemini-2.5-flash")
-        elif model_name == "gemini-2.0-flash-lite":
-            model_id = "gemini-2.0-flash-lite"
-        elif model_name == "gemini-2.5-flash":
-            model_id = "gemini-2.5-flash"
-        elif model_name in ["gemini-2.5-pro-preview", "gemini-2.5-pro-preview-03-25"]:
-            model_id = "gemini-2.5-pro"
-            self.logger.warning(f"Static mapping: preview model {model_name} to stable gemini-2.5-pro")
-        return model_id
+        """Static fallback model mapping for interpretation, resolved through the model registry."""
+        resolution = model_registry.resolve(model_name, 'interpretation')
+        if resolution.deprecated:
+            self.logger.warning(f"Static mapping: deprecated model {model_name} to {resolution.name}")
+        return resolution.provider_id
 
     def _interpret_with_openai(self, prompt, model_name):
         """Use OpenAI model for enhanced interpretation with optimized parameters"""
@@ -0,0 +1,155 @@
+"""
+Invoice Store for VocalLocal
+
+Invoice PDFs are rendered once, when the payment is processed by the webhook
+worker, and written to INVOICE_STORE_DIR under the SHA-256 of their bytes. The
+invoice's billing record (`users/{user_id}/billing/invoices/{invoice_id}`)
+keeps the hash as `pdfSha256`, so a download is a file read. Rendering is
+deterministic (services/pdf_invoice_service.py), so re-rendering an unchanged
+invoice maps to the same file. A billing record whose file is missing (a new
+instance, a cleared disk) is rendered again from the record on first download.
+After a change to the invoice layout, rerender_invoices.py re-renders every
+stored invoice.
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+from datetime import datetime
+from config import Config
+from services.user_account_service import UserAccountService
+
+logger = logging.getLogger(__name__)
+
+
+class InvoiceStore:
+    """Content-addressed store of rendered invoice PDFs."""
+
+    def __init__(self, root=None):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding the PDFs (INVOICE_STORE_DIR)
+        """
+        self.root = root or Config.INVOICE_STORE_DIR
+
+    @staticmethod
+    def _record_ref(user_email, invoice_id):
+        user_id = user_email.replace('.', ',')
+        return UserAccountService.get_ref(f'users/{user_id}/billing/invoices/{invoice_id}')
+
+    def path(self, digest):
+        """File path of the PDF with the given SHA-256."""
+        return os.path.join(self.root, digest[:2], f'{digest}.pdf')
+
+    def put(self, pdf_content):
+        """
+        Store PDF bytes under their SHA-256 (no-op if already stored).
+
+        Returns:
+            str: Hex SHA-256 of the content
+        """
+        digest = hashlib.sha256(pdf_content).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial PDF
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(pdf_content)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return digest
+
+    def get(self, digest):
+        """Stored PDF bytes, or None if the file is missing."""
+        try:
+            with open(self.path(digest), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def customer_name(user_email, user_data=None):
+        """The user's display name for invoices, falling back to their email prefix."""
+        try:
+            if user_data is None:
+                user_data = UserAccountService.get_user_account(user_email.replace('.', ','))
+            display_name = ((user_data or {}).get('profile') or {}).get('displayName')
+            if display_name:
+                return display_name
+        except Exception:
+            pass  # Use fallback display name
+        return user_email.split('@')[0]
+
+    @staticmethod
+    def invoice_data(user_email, record, customer_name):
+        """Invoice data for PDFInvoiceService from a billing record."""
+        return {
+            'invoice_id': record['invoiceId'],
+            'customer_name': customer_name,
+            'customer_email': user_email,
+            'amount': record['amount'],
+            'currency': record['currency'],
+            'payment_date': datetime.fromtimestamp(record['paymentDate'] / 1000),
+            'plan_name': record.get('planName', 'Unknown Plan'),
+            'plan_type': record.get('planType', 'unknown'),
+            'billing_cycle': record.get('billingCycle', 'monthly'),
+            'payment_method': 'Credit Card',
+            'transaction_id': record['invoiceId']  # Use invoice ID as transaction reference
+        }
+
+    def render(self, user_email, record, customer_name=None):
+        """
+        Render an invoice from its billing record, store it and link it from the record.
+
+        Args:
+            user_email (str): Invoice owner
+            record (dict): Billing record (invoiceId, amount, currency, paymentDate, plan fields)
+            customer_name (str, optional): Name printed on the invoice (looked up if omitted)
+
+        Returns:
+            bytes: PDF content, or None if it could not be rendered
+        """
+        from services.pdf_invoice_service import pdf_invoice_service
+
+        if customer_name is None:
+            customer_name = self.customer_name(user_email)
+        pdf_content = pdf_invoice_service.generate_invoice_pdf(self.invoice_data(user_email, record, customer_name))
+        if not pdf_content:
+            return None
+
+        digest = self.put(pdf_content)
+        if record.get('pdfSha256') != digest:
+            self._record_ref(user_email, record['invoiceId']).update({'pdfSha256': digest})
+            record['pdfSha256'] = digest
+        logger.info(f"Stored invoice {record['invoiceId']} for {user_email} as {digest[:12]}")
+        return pdf_content
+
+    def invoice_path(self, user_email, invoice_id):
+        """
+        Path of a user's invoice PDF, rendering it first on a miss.
+
+        Returns:
+            str: File path, or None if the user has no such invoice
+        """
+        record = self._record_ref(user_email, invoice_id).get()
+        if not isinstance(record, dict) or not all(key in record for key in ('amount', 'currency', 'paymentDate')):
+            return None
+        digest = record.get('pdfSha256')
+        if digest and os.path.exists(self.path(digest)):
+            return self.path(digest)
+        record.setdefault('invoiceId', invoice_id)
+        if not self.render(user_email, record):
+            return None
+        return self.path(record['pdfSha256'])
+
+
+# Create a singleton instance
+invoice_store = InvoiceStore()
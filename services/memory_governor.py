@@ -0,0 +1,253 @@
+"""
+Memory governor for VocalLocal workers.
+
+Estimates the memory footprint of each transcription request from its upload
+size and the pipeline it will take, and admits work against a per-worker RSS
+budget. Requests that do not fit wait for running work to finish instead of
+pushing the worker into the OOM killer, which is what `max_requests` worker
+recycling used to paper over.
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from functools import wraps
+
+import psutil
+
+logger = logging.getLogger("memory_governor")
+
+MB = 1024 * 1024
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a request cannot be admitted within the admission timeout."""
+
+    def __init__(self, message, retry_after=30):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+class MemoryGovernor:
+    """Per-worker admission control based on estimated request footprint."""
+
+    # Peak bytes held per uploaded byte, by pipeline.
+    # direct:     request bytes + file copy + provider upload buffer
+    # chunked:    whole-file bytes + list of chunk bytes (+ pydub segment on fallback)
+    # background: same as chunked but the bytes outlive the request in a thread
+    # chunk:      progressive ~60s chunk, WebM -> MP3 conversion for OpenAI
+    PIPELINE_MULTIPLIERS = {
+        'direct': 3.0,
+        'chunked': 3.5,
+        'background': 3.5,
+        'chunk': 2.5,
+    }
+
+    # Fixed per-request overhead (SDK response objects, JSON, temp buffers)
+    REQUEST_OVERHEAD_BYTES = 8 * MB
+
+    # Thresholds mirror TranscriptionService.transcribe_with_gemini
+    BACKGROUND_THRESHOLD_MB = 30
+    CHUNKING_THRESHOLD_MB = 25
+
+    def __init__(self, budget_mb=None, admission_timeout=None):
+        """
+        Initialize the governor.
+
+        Args:
+            budget_mb: Per-worker RSS budget in MB (WORKER_RSS_BUDGET_MB, default 450)
+            admission_timeout: Seconds a request may wait for budget (MEMORY_ADMISSION_TIMEOUT, default 60)
+        """
+        self.budget_bytes = int(float(budget_mb or os.environ.get('WORKER_RSS_BUDGET_MB', 450)) * MB)
+        self.admission_timeout = float(admission_timeout or os.environ.get('MEMORY_ADMISSION_TIMEOUT', 60))
+        self._reservations = {}
+        self._condition = threading.Condition()
+        self._waiting = 0
+        self._admitted_total = 0
+        self._rejected_total = 0
+        self._process = psutil.Process(os.getpid())
+        # RSS last measured while no request held a reservation (None until then)
+        self._baseline_rss = None
+
+    def _current_rss(self):
+        """Resident set size of this worker process in bytes."""
+        # The pid changes after gunicorn forks a preloaded app
+        if self._process.pid != os.getpid():
+            self._process = psutil.Process(os.getpid())
+        return self._process.memory_info().rss
+
+    def _reserved_bytes(self):
+        return sum(r['bytes'] for r in self._reservations.values())
+
+    def pipeline_for_size(self, upload_bytes):
+        """Pick the pipeline the transcription service will use for an upload size."""
+        size_mb = upload_bytes / MB
+        if size_mb > self.BACKGROUND_THRESHOLD_MB:
+            return 'background'
+        if size_mb > self.CHUNKING_THRESHOLD_MB:
+            return 'chunked'
+        return 'direct'
+
+    def estimate_footprint(self, upload_bytes, pipeline=None):
+        """
+        Estimate peak bytes a request will hold.
+
+        Args:
+            upload_bytes: Size of the uploaded audio in bytes
+            pipeline: 'direct', 'chunked', 'background' or 'chunk' (derived from size if omitted)
+
+        Returns:
+            int: Estimated footprint in bytes
+        """
+        pipeline = pipeline or self.pipeline_for_size(upload_bytes)
+        multiplier = self.PIPELINE_MULTIPLIERS.get(pipeline, self.PIPELINE_MULTIPLIERS['chunked'])
+        return int(upload_bytes * multiplier) + self.REQUEST_OVERHEAD_BYTES
+
+    def _projected_bytes(self, estimate):
+        """
+        Memory the worker would hold with another request of `estimate` bytes.
+
+        Current RSS already includes whatever the running requests have
+        allocated, so their reservations are added to the idle baseline rather
+        than to it. RSS stays near its peak after a large job (allocator
+        fragmentation), which is why it is only a lower bound here.
+        """
+        rss = self._current_rss()
+        baseline = rss if self._baseline_rss is None else self._baseline_rss
+        return max(rss, baseline + self._reserved_bytes()) + estimate
+
+    def _fits(self, estimate):
+        # Always let one request through so a single large upload is never starved
+        if not self._reservations:
+            return True
+        return self._projected_bytes(estimate) <= self.budget_bytes
+
+    def admit(self, upload_bytes, pipeline=None, timeout=None, wait=True):
+        """
+        Reserve budget for a request, waiting for room if necessary.
+
+        Args:
+            upload_bytes: Size of the uploaded audio in bytes
+            pipeline: Pipeline name (derived from size if omitted)
+            timeout: Seconds to wait (defaults to admission_timeout)
+            wait: If False, reserve immediately without checking the budget
+                  (used for work that was already accepted, e.g. background jobs)
+
+        Returns:
+            str: Reservation ticket to pass to release()
+
+        Raises:
+            MemoryBudgetExceeded: If budget did not free up within the timeout
+        """
+        pipeline = pipeline or self.pipeline_for_size(upload_bytes)
+        estimate = self.estimate_footprint(upload_bytes, pipeline)
+        timeout = self.admission_timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+
+        with self._condition:
+            if not self._reservations:
+                # Idle: remember what the worker holds without any request
+                self._baseline_rss = self._current_rss()
+            if wait:
+                self._waiting += 1
+                try:
+                    while not self._fits(estimate):
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            self._rejected_total += 1
+                            logger.warning(f"Rejected {pipeline} request of {upload_bytes / MB:.1f}MB: "
+                                           f"estimated {estimate / MB:.1f}MB does not fit in budget")
+                            raise MemoryBudgetExceeded(
+                                "Server is busy processing other audio. Please retry shortly.",
+                                retry_after=max(5, int(timeout / 2))
+                            )
+                        self._condition.wait(timeout=min(remaining, 5.0))
+                finally:
+                    self._waiting -= 1
+
+            ticket = str(uuid.uuid4())
+            self._reservations[ticket] = {
+                'bytes': estimate,
+                'pipeline': pipeline,
+                'upload_bytes': upload_bytes,
+                'since': time.time()
+            }
+            self._admitted_total += 1
+
+        logger.debug(f"Admitted {pipeline} request ({upload_bytes / MB:.1f}MB upload, "
+                     f"{estimate / MB:.1f}MB estimated)")
+        return ticket
+
+    def release(self, ticket):
+        """Release a reservation and wake queued requests."""
+        if not ticket:
+            return
+        with self._condition:
+            if self._reservations.pop(ticket, None) is not None:
+                self._condition.notify_all()
+
+    def is_over_budget(self):
+        """True when the worker's RSS alone exceeds the budget."""
+        return self._current_rss() > self.budget_bytes
+
+    def get_status(self):
+        """Snapshot of the current budget for the health endpoint."""
+        with self._condition:
+            rss = self._current_rss()
+            reserved = self._reserved_bytes()
+            by_pipeline = {}
+            for reservation in self._reservations.values():
+                by_pipeline[reservation['pipeline']] = by_pipeline.get(reservation['pipeline'], 0) + 1
+
+            return {
+                'pid': os.getpid(),
+                'budget_mb': round(self.budget_bytes / MB, 1),
+                'rss_mb': round(rss / MB, 1),
+                'baseline_rss_mb': round((self._baseline_rss or rss) / MB, 1),
+                'reserved_mb': round(reserved / MB, 1),
+                'available_mb': round(max(0, self.budget_bytes - self._projected_bytes(0)) / MB, 1),
+                'active_requests': len(self._reservations),
+                'active_by_pipeline': by_pipeline,
+                'queued_requests': self._waiting,
+                'admitted_total': self._admitted_total,
+                'rejected_total': self._rejected_total,
+            }
+
+
+def admission_required(pipeline=None):
+    """
+    Route decorator that admits the request against the memory budget using
+    the request's Content-Length, before the upload body is read.
+
+    Args:
+        pipeline: Fixed pipeline name, or None to derive it from the upload size
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            from flask import request, jsonify
+
+            upload_bytes = request.content_length or 0
+            try:
+                ticket = memory_governor.admit(upload_bytes, pipeline)
+            except MemoryBudgetExceeded as e:
+                response = jsonify({
+                    'error': e.message,
+                    'errorType': 'ServerBusy',
+                    'details': 'The server is at its memory budget. Your request was not processed.'
+                })
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 503
+
+            try:
+                return f(*args, **kwargs)
+            finally:
+                memory_governor.release(ticket)
+        return decorated_function
+    return decorator
+
+
+# Create a singleton instance (one per worker process)
+memory_governor = MemoryGovernor()
@@ -6,34 +6,16 @@ This service handles model access restrictions based on user roles and subscript
 
 from flask_login import current_user
 from models.firebase_models import User
+from services.model_registry import model_registry
 
 
 class ModelAccessService:
     """Service to manage AI model access based on user roles and subscriptions."""
 
-    # Define model categories
-    FREE_MODELS = [
-        'gemini-2.5-flash-preview'
-    ]
+    # Model categories come from the tiers in the shared model registry
+    FREE_MODELS = model_registry.models_by_tier(free=True)
 
-    PREMIUM_MODELS = [
-        # OpenAI Transcription Models
-        'gpt-4o-mini-transcribe',
-        'gpt-4o-transcribe',
-
-        # OpenAI Translation Models
-        'gpt-4.1-mini',
-
-        # OpenAI TTS Models
-        'gpt4o-mini',
-        'openai',  # OpenAI TTS-1
-
-        # Gemini Premium Models
-        'gemini-2.5-flash-preview-04-17',  # Kept for UI compatibility (maps to 05-20 in service)
-        'gemini-2.5-flash-preview-05-20',  # Working model - direct access
-        'gemini-2.5-flash',
-        'gemini-2.5-flash-tts'
-    ]
+    PREMIUM_MODELS = model_registry.models_by_tier(free=False)
 
     ALL_MODELS = FREE_MODELS + PREMIUM_MODELS
 
@@ -79,8 +61,10 @@ class ModelAccessService:
 
         # Normal users - check model restrictions
         if user_role == User.ROLE_NORMAL_USER:
-            # Free models are always accessible
-            if model_name in ModelAccessService.FREE_MODELS:
+            model = model_registry.get_model(model_name)
+
+            # Free models (and their aliases) are always accessible
+            if model and model['tier'] == 'free':
                 return {
                     'allowed': True,
                     'reason': 'Free model access',
@@ -88,7 +72,7 @@ class ModelAccessService:
                 }
 
             # Premium models require subscription check
-            if model_name in ModelAccessService.PREMIUM_MODELS:
+            if model:
                 # This will integrate with existing subscription validation
                 # For now, return upgrade required
                 return {
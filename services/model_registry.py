@@ -0,0 +1,298 @@
+"""
+Central model registry for VocalLocal.
+
+One declarative table describes every model the app exposes: its provider and
+provider model ID, the names it is still accepted under (aliases and
+deprecated preview IDs), what it can be used for and the lowest plan that
+includes it. The table is compiled once at import into lookup dicts, so
+resolving a requested model name is a single dict lookup and every service,
+route and access check agrees on what a name means.
+"""
+from collections import namedtuple
+
+# Plans in ascending order; a model is available to its tier and every plan above it
+PLAN_ORDER = ('free', 'basic', 'professional')
+
+CAPABILITIES = ('transcription', 'translation', 'interpretation', 'tts')
+
+# Model used when a requested name is unknown, per capability
+DEFAULT_MODELS = {
+    'transcription': 'gemini-2.5-flash',
+    'translation': 'gemini-2.5-flash',
+    'interpretation': 'gemini-2.5-flash',
+    'tts': 'gpt4o-mini',
+}
+
+# Updated November 2025.
+#   aliases:    names still accepted and offered for backward compatibility
+#   deprecated: retired names that are silently mapped to this model
+#   listed:     False for internal fallback models that are never offered for selection
+MODEL_TABLE = [
+    {
+        'name': 'gemini-2.5-flash',
+        'provider': 'gemini',
+        'provider_id': 'gemini-2.5-flash',
+        'display_name': 'Gemini 2.5 Flash (Stable)',
+        'description': 'Fast and efficient stable model',
+        'tier': 'free',
+        'capabilities': ('transcription', 'translation', 'interpretation'),
+        'aliases': ('gemini-2.5-flash-preview',),
+        'deprecated': ('gemini-2.5-flash-preview-04-17', 'gemini-2.5-flash-preview-05-20'),
+    },
+    {
+        'name': 'gemini-2.5-flash-preview-09-2025',
+        'provider': 'gemini',
+        'provider_id': 'gemini-2.5-flash-preview-09-2025',
+        'display_name': 'Gemini 2.5 Flash Preview (Sept 2025)',
+        'description': 'Latest preview model with enhanced capabilities',
+        'tier': 'basic',
+        'capabilities': ('transcription', 'translation', 'interpretation'),
+    },
+    {
+        'name': 'gemini-2.5-pro',
+        'provider': 'gemini',
+        'provider_id': 'gemini-2.5-pro',
+        'display_name': 'Gemini 2.5 Pro',
+        'description': 'Most capable Gemini model for complex tasks',
+        'tier': 'professional',
+        'capabilities': ('transcription', 'translation', 'interpretation'),
+        'deprecated': ('gemini-2.5-pro-preview', 'gemini-2.5-pro-preview-03-25'),
+    },
+    {
+        'name': 'gemini-2.0-flash-lite',
+        'provider': 'gemini',
+        'provider_id': 'gemini-2.0-flash-lite',
+        'display_name': 'Gemini 2.0 Flash Lite',
+        'description': 'Lightweight fallback model',
+        'tier': 'free',
+        'capabilities': ('transcription', 'translation', 'interpretation'),
+        'deprecated': ('gemini', 'gemini-1.5-flash'),
+        'listed': False,
+    },
+    {
+        'name': 'gemini-2.0-flash',
+        'provider': 'gemini',
+        'provider_id': 'gemini-2.0-flash',
+        'display_name': 'Gemini 2.0 Flash',
+        'description': 'Previous generation Flash model',
+        'tier': 'free',
+        'capabilities': ('transcription', 'translation', 'interpretation'),
+        'listed': False,
+    },
+    {
+        'name': 'gpt-4o-mini-transcribe',
+        'provider': 'openai',
+        'provider_id': 'gpt-4o-mini-transcribe',
+        'display_name': 'OpenAI GPT-4o Mini',
+        'description': 'High-quality transcription with OpenAI',
+        'tier': 'basic',
+        'capabilities': ('transcription',),
+    },
+    {
+        'name': 'gpt-4o-transcribe',
+        'provider': 'openai',
+        'provider_id': 'gpt-4o-transcribe',
+        'display_name': 'OpenAI GPT-4o',
+        'description': 'Premium transcription with latest OpenAI model (available to Basic Plan users)',
+        'tier': 'basic',
+        'capabilities': ('transcription',),
+    },
+    {
+        'name': 'gpt-4.1-mini',
+        'provider': 'openai',
+        'provider_id': 'gpt-4.1-mini',
+        'display_name': 'GPT-4.1 Mini',
+        'description': 'OpenAI translation model with enhanced capabilities',
+        'tier': 'basic',
+        'capabilities': ('translation',),
+    },
+    {
+        'name': 'gemini-2.5-flash-tts',
+        'provider': 'gemini',
+        'provider_id': 'gemini-2.5-flash-preview-tts',
+        'display_name': 'Gemini 2.5 Flash TTS',
+        'description': 'High-quality text-to-speech',
+        'tier': 'basic',
+        'capabilities': ('tts',),
+    },
+    {
+        'name': 'gpt4o-mini',
+        'provider': 'openai',
+        'provider_id': 'gpt-4o-mini-tts',
+        'display_name': 'GPT-4o Mini TTS',
+        'description': 'Premium TTS with OpenAI',
+        'tier': 'basic',
+        'capabilities': ('tts',),
+    },
+    {
+        'name': 'openai',
+        'provider': 'openai',
+        'provider_id': 'tts-1',
+        'display_name': 'OpenAI TTS-1',
+        'description': 'Professional-grade TTS',
+        'tier': 'basic',
+        'capabilities': ('tts',),
+    },
+]
+
+ModelResolution = namedtuple('ModelResolution', [
+    'requested',    # Name as passed in
+    'name',         # Canonical model name
+    'provider',     # 'gemini' or 'openai'
+    'provider_id',  # Model ID to send to the provider API
+    'known',        # False if the requested name was not in the table
+    'deprecated',   # True if the requested name is a retired alias
+])
+
+
+class ModelRegistry:
+    """Lookup tables compiled from MODEL_TABLE."""
+
+    def __init__(self, table=None, defaults=None):
+        self._table = table or MODEL_TABLE
+        self._defaults = defaults or DEFAULT_MODELS
+
+        self._models = {}         # canonical name -> entry
+        self._names = {}          # any accepted name -> canonical name
+        self._deprecated = set()  # retired names
+        self._access = {}         # plan -> capability -> offered names (canonical + aliases)
+
+        for raw in self._table:
+            entry = {
+                'aliases': (),
+                'deprecated': (),
+                'listed': True,
+                **raw,
+            }
+            name = entry['name']
+            if entry['tier'] not in PLAN_ORDER:
+                raise ValueError(f"Model '{name}' has unknown tier '{entry['tier']}'")
+            self._models[name] = entry
+            for accepted in (name,) + tuple(entry['aliases']) + tuple(entry['deprecated']):
+                if accepted in self._names:
+                    raise ValueError(f"Model name '{accepted}' is defined twice")
+                self._names[accepted] = name
+            self._deprecated.update(entry['deprecated'])
+
+        for plan_index, plan in enumerate(PLAN_ORDER):
+            by_capability = {capability: [] for capability in CAPABILITIES}
+            for entry in self._models.values():
+                if not entry['listed'] or PLAN_ORDER.index(entry['tier']) > plan_index:
+                    continue
+                for capability in entry['capabilities']:
+                    by_capability[capability].append(entry['name'])
+                    by_capability[capability].extend(entry['aliases'])
+            self._access[plan] = by_capability
+
+        self._resolutions = {}
+
+    def resolve(self, model_name, capability=None):
+        """
+        Resolve a requested model name.
+
+        Args:
+            model_name: Name from the client, a route or a service default
+            capability: Used to pick the default model for unknown names
+
+        Returns:
+            ModelResolution for the model to use
+        """
+        key = (model_name, capability)
+        resolution = self._resolutions.get(key)
+        if resolution is None:
+            canonical = self._names.get(model_name)
+            known = canonical is not None
+            if not known:
+                canonical = self._defaults.get(capability, self._defaults['transcription'])
+            entry = self._models[canonical]
+            resolution = ModelResolution(
+                requested=model_name,
+                name=canonical,
+                provider=entry['provider'],
+                provider_id=entry['provider_id'],
+                known=known,
+                deprecated=model_name in self._deprecated,
+            )
+            # Unknown names come from clients, so only cache the bounded set of known ones
+            if known:
+                self._resolutions[key] = resolution
+        return resolution
+
+    def canonical_name(self, model_name, capability=None):
+        """Canonical model name for a requested name."""
+        return self.resolve(model_name, capability).name
+
+    def is_known(self, model_name):
+        """True if the name is a model, alias or deprecated alias in the table."""
+        return model_name in self._names
+
+    def get_model(self, model_name):
+        """Table entry for a model or any of its aliases, or None."""
+        canonical = self._names.get(model_name)
+        return self._models.get(canonical) if canonical else None
+
+    def get_model_info(self, model_name):
+        """Display name, description and tier for a model (empty dict if unknown)."""
+        entry = self.get_model(model_name)
+        if not entry:
+            return {}
+        return {
+            'name': entry['display_name'],
+            'description': entry['description'],
+            'tier': entry['tier'],
+        }
+
+    def supports(self, model_name, capability):
+        """True if the model can be used for a capability."""
+        entry = self.get_model(model_name)
+        return bool(entry) and capability in entry['capabilities']
+
+    def accessible_models(self, capability, plan):
+        """Names offered to a plan for a capability (canonical names and compatible aliases)."""
+        return self._access.get(plan, {}).get(capability, [])
+
+    def is_accessible(self, model_name, capability, plan):
+        """True if a plan may use a model (or any of its aliases) for a capability."""
+        entry = self.get_model(model_name)
+        if not entry or not entry['listed'] or plan not in PLAN_ORDER:
+            return False
+        if capability not in entry['capabilities']:
+            return False
+        return PLAN_ORDER.index(entry['tier']) <= PLAN_ORDER.index(plan)
+
+    def required_plan(self, model_name, capability=None):
+        """Lowest plan that includes a model, or None if no plan offers it."""
+        entry = self.get_model(model_name)
+        if not entry or not entry['listed']:
+            return None
+        if capability and capability not in entry['capabilities']:
+            return None
+        return entry['tier']
+
+    def plan_access_matrix(self):
+        """Plan -> capability -> model names, in the shape PlanAccessControl exposes."""
+        return {plan: {capability: list(models) for capability, models in by_capability.items()}
+                for plan, by_capability in self._access.items()}
+
+    def model_info_table(self):
+        """Model name -> info for every offered name, in the shape PlanAccessControl exposes."""
+        info = {}
+        for entry in self._models.values():
+            if not entry['listed']:
+                continue
+            for name in (entry['name'],) + tuple(entry['aliases']):
+                info[name] = self.get_model_info(entry['name'])
+        return info
+
+    def models_by_tier(self, free):
+        """Offered names whose tier is (or is not) the free plan."""
+        names = []
+        for entry in self._models.values():
+            if entry['listed'] and (entry['tier'] == 'free') == free:
+                names.append(entry['name'])
+                names.extend(entry['aliases'])
+        return names
+
+
+# Create a singleton instance
+model_registry = ModelRegistry()
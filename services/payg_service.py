@@ -8,6 +8,7 @@ import time
 from datetime import datetime, timedelta
 from services.user_account_service import UserAccountService
 from services.payment_service import PaymentService
+from services.credit_reservations import credit_reservations, InsufficientCredits
 import stripe
 import os
 
@@ -164,70 +165,280 @@ class PayAsYouGoService:
                 'message': 'Error validating credit usage'
             }
     
+    @staticmethod
+    def _billing_ref(user_email):
+        """Reference to the user's billing/payAsYouGo node (credit changes touch only this node)."""
+        user_id = user_email.replace('.', ',')
+        return UserAccountService.get_ref(f'users/{user_id}/billing/payAsYouGo')
+
+    @staticmethod
+    def get_user_credits(user_email):
+        """
+        Get a user's credit balance
+
+        Args:
+            user_email (str): User's email address
+
+        Returns:
+            dict: Spendable, reserved and used credits
+        """
+        billing = PayAsYouGoService._billing_ref(user_email).get() or {}
+        return {
+            'credits': billing.get('creditsRemaining', 0),
+            'credits_reserved': billing.get('creditsReserved', 0),
+            'credits_used': billing.get('creditsUsed', 0)
+        }
+
     @staticmethod
     def deduct_credits(user_email, service_type, amount):
         """
-        Deduct credits from user's account
-        
+        Deduct credits from user's account in one transaction
+
         Args:
             user_email (str): User's email address
             service_type (str): Type of service
             amount (float): Amount of service used
-            
+
         Returns:
             dict: Deduction result
         """
         try:
             credits_needed = PayAsYouGoService.calculate_credits_needed(service_type, amount)
-            user_id = user_email.replace('.', ',')
-            
-            # Get current user data
-            user_ref = UserAccountService.get_ref(f'users/{user_id}')
-            user_data = user_ref.get()
-            
-            if not user_data:
-                return {'success': False, 'error': 'User not found'}
-            
-            # Get current credits
-            current_credits = user_data.get('billing', {}).get('payAsYouGo', {}).get('creditsRemaining', 0)
-            current_used = user_data.get('billing', {}).get('payAsYouGo', {}).get('creditsUsed', 0)
-            
-            if current_credits < credits_needed:
-                return {
-                    'success': False,
-                    'error': 'Insufficient credits',
-                    'credits_needed': credits_needed,
-                    'credits_available': current_credits
-                }
-            
-            # Update credits
-            new_credits = current_credits - credits_needed
-            new_used = current_used + credits_needed
-            
-            # Prepare update data
-            update_data = {
-                f'billing/payAsYouGo/creditsRemaining': new_credits,
-                f'billing/payAsYouGo/creditsUsed': new_used,
-                f'billing/payAsYouGo/lastUsed': int(time.time() * 1000)
-            }
-            
-            # Apply update
-            user_ref.update(update_data)
-            
+
+            def deduct(billing):
+                billing = dict(billing or {})
+                current_credits = billing.get('creditsRemaining', 0)
+                if current_credits < credits_needed:
+                    raise InsufficientCredits(credits_needed, current_credits)
+                billing['creditsRemaining'] = current_credits - credits_needed
+                billing['creditsUsed'] = billing.get('creditsUsed', 0) + credits_needed
+                billing['lastUsed'] = int(time.time() * 1000)
+                return billing
+
+            billing = PayAsYouGoService._billing_ref(user_email).transaction(deduct)
+
             logger.info(f"Deducted {credits_needed:.2f} credits from {user_email} for {service_type}")
-            
+
             return {
                 'success': True,
                 'credits_deducted': credits_needed,
-                'credits_remaining': new_credits,
+                'credits_remaining': billing['creditsRemaining'],
                 'service_type': service_type,
                 'amount': amount
             }
-            
+
+        except InsufficientCredits as e:
+            return {
+                'success': False,
+                'error': 'Insufficient credits',
+                'credits_needed': e.credits_needed,
+                'credits_available': e.credits_available
+            }
         except Exception as e:
             logger.error(f"Error deducting credits: {str(e)}")
             return {'success': False, 'error': str(e)}
-    
+
+    @staticmethod
+    def reserve_credits(user_email, service_type, estimated_amount):
+        """
+        Reserve credits for a request at admission
+
+        Moves the estimated credits from creditsRemaining to creditsReserved in
+        a transaction; settle_reservation charges the actual amount afterwards.
+
+        Args:
+            user_email (str): User's email address
+            service_type (str): Type of service
+            estimated_amount (float): Estimated amount of service (minutes, words, requests)
+
+        Returns:
+            dict: Reservation result with 'reservation_id' on success
+        """
+        PayAsYouGoService.release_expired_reservations()
+
+        try:
+            credits_needed = PayAsYouGoService.calculate_credits_needed(service_type, estimated_amount)
+
+            def reserve(billing):
+                billing = dict(billing or {})
+                current_credits = billing.get('creditsRemaining', 0)
+                if current_credits < credits_needed:
+                    raise InsufficientCredits(credits_needed, current_credits, billing.get('creditsReserved', 0))
+                billing['creditsRemaining'] = current_credits - credits_needed
+                billing['creditsReserved'] = billing.get('creditsReserved', 0) + credits_needed
+                return billing
+
+            billing = PayAsYouGoService._billing_ref(user_email).transaction(reserve)
+            reservation = credit_reservations.add(user_email, service_type, credits_needed)
+
+            return {
+                'success': True,
+                'reservation_id': reservation.id,
+                'credits_reserved': credits_needed,
+                'credits_remaining': billing['creditsRemaining']
+            }
+
+        except InsufficientCredits as e:
+            return {
+                'success': False,
+                'error': 'Insufficient credits',
+                'credits_needed': e.credits_needed,
+                'credits_available': e.credits_available,
+                'credits_held': e.credits_held
+            }
+        except Exception as e:
+            logger.error(f"Error reserving credits: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def reserve_for_request(user_email, service_type, validation):
+        """
+        Admit a transcription or translation request against the user's credits
+
+        Only the part of a request that is paid from pay-as-you-go is charged:
+        when the usage validation reports an overage beyond the plan allowance,
+        that overage is reserved from the user's credits and the route settles
+        it when the request or its background job finishes, or releases it on
+        failure. Overage paid from credits is not also recorded as outstanding
+        charges. Users without credits have the overage recorded for invoicing
+        instead, and requests within the allowance (or whose validation did not
+        finish) are admitted with nothing reserved.
+
+        Args:
+            user_email (str): User's email address
+            service_type (str): Type of service
+            validation (dict): Result of the route's usage validation, run with
+                record_overage=False (None if it did not finish)
+
+        Returns:
+            dict: 'allowed', 'reservation_id' (None if nothing was reserved)
+                and 'amount' (the overage reserved, in service units)
+        """
+        overage = (validation or {}).get('overage')
+        if not overage:
+            return {'allowed': True, 'reservation_id': None, 'amount': 0}
+
+        result = PayAsYouGoService.reserve_credits(user_email, service_type, overage['amount'])
+        if result['success']:
+            return {'allowed': True, 'reservation_id': result['reservation_id'], 'amount': overage['amount']}
+
+        holds_credits = result.get('credits_available', 0) > 0 or result.get('credits_held', 0) > 0
+        if result.get('error') == 'Insufficient credits' and holds_credits:
+            return {
+                'allowed': False,
+                'reservation_id': None,
+                'amount': 0,
+                'credits_needed': result['credits_needed'],
+                'credits_available': result['credits_available'],
+                'message': f"✗ {result['credits_needed']:.1f} credits needed, "
+                           f"{result['credits_available']:.1f} available"
+            }
+
+        try:
+            from services.overage_tracking_service import OverageTrackingService
+            OverageTrackingService.record_overage_usage(user_email, service_type, overage['amount'])
+        except Exception as e:
+            logger.error(f"Failed to record {service_type} overage: {str(e)}")
+        return {'allowed': True, 'reservation_id': None, 'amount': 0}
+
+    @staticmethod
+    def _settle(reservation, actual_credits):
+        """Release a reservation and charge the actual credits in one transaction."""
+        charged = {}
+
+        def settle(billing):
+            billing = dict(billing or {})
+            # Reserved credits come back first; anything above the estimate must be covered
+            available = billing.get('creditsRemaining', 0) + reservation.credits
+            charged['credits'] = min(actual_credits, available)
+            billing['creditsRemaining'] = available - charged['credits']
+            billing['creditsReserved'] = max(0, billing.get('creditsReserved', 0) - reservation.credits)
+            if charged['credits']:
+                billing['creditsUsed'] = billing.get('creditsUsed', 0) + charged['credits']
+                billing['lastUsed'] = int(time.time() * 1000)
+            return billing
+
+        billing = PayAsYouGoService._billing_ref(reservation.user_email).transaction(settle)
+        return charged['credits'], billing
+
+    @staticmethod
+    def settle_reservation(reservation_id, actual_amount):
+        """
+        Charge the actual usage of a reserved request
+
+        Args:
+            reservation_id (str): ID returned by reserve_credits
+            actual_amount (float): Amount of service actually used
+
+        Returns:
+            dict: Settlement result
+        """
+        reservation = credit_reservations.pop(reservation_id)
+        if reservation is None:
+            return {'success': False, 'error': 'Unknown or expired reservation'}
+
+        try:
+            actual_credits = PayAsYouGoService.calculate_credits_needed(reservation.service_type, actual_amount)
+            charged, billing = PayAsYouGoService._settle(reservation, actual_credits)
+
+            if charged < actual_credits:
+                logger.warning(f"Credit shortfall for {reservation.user_email}: charged {charged:.2f} "
+                               f"of {actual_credits:.2f} credits")
+            logger.info(f"Settled {charged:.2f} credits for {reservation.user_email} ({reservation.service_type}), "
+                        f"reserved {reservation.credits:.2f}")
+
+            return {
+                'success': True,
+                'credits_deducted': charged,
+                'credits_reserved': reservation.credits,
+                'credits_shortfall': actual_credits - charged,
+                'credits_remaining': billing['creditsRemaining'],
+                'service_type': reservation.service_type,
+                'amount': actual_amount
+            }
+
+        except Exception as e:
+            # Keep the reservation so it can be settled again or expire
+            credit_reservations.restore(reservation)
+            logger.error(f"Error settling credit reservation {reservation_id}: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def release_reservation(reservation_id):
+        """
+        Release a reservation without charging (the request failed or was cancelled)
+
+        Args:
+            reservation_id (str): ID returned by reserve_credits
+
+        Returns:
+            dict: Release result
+        """
+        reservation = credit_reservations.pop(reservation_id)
+        if reservation is None:
+            return {'success': False, 'error': 'Unknown or expired reservation'}
+
+        try:
+            _, billing = PayAsYouGoService._settle(reservation, 0)
+            return {
+                'success': True,
+                'credits_released': reservation.credits,
+                'credits_remaining': billing['creditsRemaining']
+            }
+        except Exception as e:
+            credit_reservations.restore(reservation)
+            logger.error(f"Error releasing credit reservation {reservation_id}: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def release_expired_reservations():
+        """Return the credits of reservations that were never settled."""
+        for reservation in credit_reservations.pop_expired():
+            try:
+                PayAsYouGoService._settle(reservation, 0)
+            except Exception as e:
+                logger.error(f"Error releasing expired reservation {reservation.id}: {str(e)}")
+
     @staticmethod
     def get_available_packages():
         """
@@ -336,9 +547,14 @@ class PayAsYouGoService:
             if not user_data:
                 return {'success': False, 'error': 'User not found'}
 
-            # Get current credits
-            current_credits = user_data.get('billing', {}).get('payAsYouGo', {}).get('creditsRemaining', 0)
-            new_credits = current_credits + credits_to_add
+            # Add the credits in a transaction so a concurrent deduction is not lost
+            def add_credits(billing):
+                billing = dict(billing or {})
+                billing['creditsRemaining'] = billing.get('creditsRemaining', 0) + credits_to_add
+                billing['lastPurchase'] = int(time.time() * 1000)
+                return billing
+
+            new_credits = PayAsYouGoService._billing_ref(user_email).transaction(add_credits)['creditsRemaining']
 
             # Create purchase record
             purchase_record = {
@@ -352,8 +568,6 @@ class PayAsYouGoService:
 
             # Update user account
             update_data = {
-                'billing/payAsYouGo/creditsRemaining': new_credits,
-                'billing/payAsYouGo/lastPurchase': int(time.time() * 1000),
                 'subscription/payAsYouGo/enabled': True
             }
 
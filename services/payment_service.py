@@ -4,17 +4,24 @@ Handles Stripe integration for subscription management
 """
 
 import os
+import time
 import stripe
 import logging
 from datetime import datetime, timedelta
 from flask import current_app
 from services.user_account_service import UserAccountService
 from services.email_service import email_service
+from services.permission_cache import permission_cache
+from services.subscription_state import subscription_state
 
 logger = logging.getLogger(__name__)
 
 class PaymentService:
     """Service for handling Stripe payments and subscriptions"""
+
+    # A confirmation email claim older than this is assumed lost (the worker
+    # died while sending) and can be taken over by a retry
+    CONFIRMATION_EMAIL_LEASE_SECONDS = 600
     
     def __init__(self):
         """Initialize Stripe with API key"""
@@ -120,9 +127,18 @@ class PaymentService:
             logger.error(f"Error managing customer: {str(e)}")
             raise
     
+    def construct_event(self, payload, signature):
+        """
+        Verify a webhook request's signature and parse its event.
+
+        Raises:
+            stripe.error.SignatureVerificationError: If the signature is invalid
+        """
+        return stripe.Webhook.construct_event(payload, signature, self.webhook_secret)
+
     def handle_webhook_event(self, payload, signature):
         """
-        Handle Stripe webhook events
+        Verify and handle a Stripe webhook event synchronously
         
         Args:
             payload (bytes): Raw webhook payload
@@ -132,11 +148,27 @@ class PaymentService:
             dict: Processing result
         """
         try:
-            # Verify webhook signature
-            event = stripe.Webhook.construct_event(
-                payload, signature, self.webhook_secret
-            )
+            event = self.construct_event(payload, signature)
+        except stripe.error.SignatureVerificationError:
+            logger.error("Invalid webhook signature")
+            return {'error': 'Invalid signature', 'status_code': 400}
+        except Exception as e:
+            logger.error(f"Error processing webhook: {str(e)}")
+            return {'error': str(e), 'status_code': 500}
+
+        return self.process_event(event)
+
+    def process_event(self, event):
+        """
+        Run the handler for a verified webhook event (called by the webhook inbox worker)
+        
+        Args:
+            event (dict): Stripe event
             
+        Returns:
+            dict: Processing result ('error' makes the inbox retry the event)
+        """
+        try:
             logger.info(f"Processing webhook event: {event['type']}")
             
             # Handle different event types
@@ -168,9 +200,6 @@ class PaymentService:
                 logger.info(f"Unhandled webhook event type: {event['type']}")
                 return {'success': True, 'message': 'Event type not handled'}
             
-        except stripe.error.SignatureVerificationError:
-            logger.error("Invalid webhook signature")
-            return {'error': 'Invalid signature', 'status_code': 400}
         except Exception as e:
             logger.error(f"Error processing webhook: {str(e)}")
             return {'error': str(e), 'status_code': 500}
@@ -205,6 +234,10 @@ class PaymentService:
 
             # Update additional Stripe fields directly
             UserAccountService.get_ref(f'users/{user_id}/subscription').update(additional_data)
+            # After the write, so a request in between cannot cache the old plan
+            permission_cache.invalidate(user_email)
+            subscription_state.record(user_email, plan_type, 'active',
+                                      session.get('subscription'), session.get('customer'))
 
             logger.info(f"Updated subscription for {user_email} to {plan_type}")
             return {'success': True, 'message': 'Subscription activated'}
@@ -242,7 +275,10 @@ class PaymentService:
             if status == 'canceled':
                 update_data['planType'] = 'free'
             
-            UserAccountService.update_subscription(user_id, update_data)
+            UserAccountService.get_ref(f'users/{user_id}/subscription').update(update_data)
+            permission_cache.invalidate(user_email)
+            subscription_state.record(user_email, subscription.get('metadata', {}).get('plan_type'), status,
+                                      subscription['id'], subscription.get('customer'))
             
             logger.info(f"Updated subscription status for {user_email}: {status}")
             return {'success': True}
@@ -268,7 +304,10 @@ class PaymentService:
                 'endDate': int(datetime.now().timestamp() * 1000)
             }
             
-            UserAccountService.update_subscription(user_id, subscription_data)
+            UserAccountService.get_ref(f'users/{user_id}/subscription').update(subscription_data)
+            permission_cache.invalidate(user_email)
+            subscription_state.record(user_email, subscription.get('metadata', {}).get('plan_type'), 'canceled',
+                                      subscription['id'], subscription.get('customer'))
             
             logger.info(f"Downgraded {user_email} to free plan due to subscription cancellation")
             return {'success': True}
@@ -364,35 +403,49 @@ class PaymentService:
                 'stripeSubscriptionId': subscription_id
             })
 
-            # Generate PDF invoice
-            pdf_invoice = self._generate_pdf_invoice(
-                user_email=user_email,
-                invoice_id=invoice_id,
-                amount=amount_paid,
-                currency=currency,
-                payment_date=payment_date,
-                plan_type=plan_type,
-                plan_name=plan_name,
-                billing_cycle=billing_cycle
-            )
+            # Retried and redelivered events reach this point again; only the
+            # first one to claim the invoice's confirmation email sends it
+            if not self._claim_confirmation_email(user_email, invoice_id):
+                logger.info(f"Confirmation email for invoice {invoice_id} already sent or in progress")
+                return {'success': True, 'message': 'Payment processed, email already sent'}
 
-            # Send payment confirmation email with PDF attachment
-            email_result = self._send_payment_confirmation_email(
-                user_email=user_email,
-                invoice_id=invoice_id,
-                amount=amount_paid,
-                currency=currency,
-                payment_date=payment_date,
-                plan_type=plan_type,
-                plan_name=plan_name,
-                billing_cycle=billing_cycle,
-                pdf_attachment=pdf_invoice
-            )
+            try:
+                # Generate PDF invoice
+                pdf_invoice = self._generate_pdf_invoice(
+                    user_email=user_email,
+                    invoice_id=invoice_id,
+                    amount=amount_paid,
+                    currency=currency,
+                    payment_date=payment_date,
+                    plan_type=plan_type,
+                    plan_name=plan_name,
+                    billing_cycle=billing_cycle
+                )
 
-            if email_result.get('success'):
-                logger.info(f"Payment confirmation email sent successfully to {user_email}")
-            else:
+                # Send payment confirmation email with PDF attachment
+                email_result = self._send_payment_confirmation_email(
+                    user_email=user_email,
+                    invoice_id=invoice_id,
+                    amount=amount_paid,
+                    currency=currency,
+                    payment_date=payment_date,
+                    plan_type=plan_type,
+                    plan_name=plan_name,
+                    billing_cycle=billing_cycle,
+                    pdf_attachment=pdf_invoice
+                )
+            except Exception:
+                self._release_confirmation_email(user_email, invoice_id)
+                raise
+
+            if not email_result.get('success'):
+                # Release the claim so the retry sends it
+                self._release_confirmation_email(user_email, invoice_id)
                 logger.error(f"Failed to send payment confirmation email to {user_email}: {email_result.get('message')}")
+                return {'error': f"Confirmation email not sent: {email_result.get('message')}"}
+
+            self._confirmation_email_ref(user_email, invoice_id).set('sent')
+            logger.info(f"Payment confirmation email sent successfully to {user_email}")
 
             return {'success': True, 'message': 'Payment processed and email sent'}
 
@@ -637,9 +690,10 @@ class PaymentService:
         try:
             user_id = user_email.replace('.', ',')
 
-            # Add to billing history
+            # Add to billing history, keyed by invoice so a retried event
+            # rewrites the same record instead of adding a duplicate
             billing_ref = UserAccountService.get_ref(f'users/{user_id}/billing/invoices')
-            billing_ref.push(billing_data)
+            billing_ref.child(billing_data['invoiceId']).update(billing_data)
 
             logger.info(f"Stored billing history for {user_email}, invoice: {billing_data['invoiceId']}")
 
@@ -647,6 +701,36 @@ class PaymentService:
             logger.error(f"Error storing billing history for {user_email}: {str(e)}")
             raise
 
+    @staticmethod
+    def _confirmation_email_ref(user_email, invoice_id):
+        user_id = user_email.replace('.', ',')
+        return UserAccountService.get_ref(f'users/{user_id}/billing/invoices/{invoice_id}/confirmationEmail')
+
+    def _claim_confirmation_email(self, user_email, invoice_id):
+        """Claim sending an invoice's confirmation email; False if it was already sent or is being sent."""
+        now = int(time.time() * 1000)
+        outcome = {}
+
+        def claim(current):
+            # May run more than once if the transaction is retried
+            if current == 'sent':
+                outcome['claimed'] = False
+            elif isinstance(current, dict) and current.get('state') == 'sending':
+                outcome['claimed'] = current.get('until', 0) <= now
+            else:
+                # Unclaimed, released, or a bare 'sending' left without a lease
+                outcome['claimed'] = True
+            if not outcome['claimed']:
+                return current
+            return {'state': 'sending', 'until': now + self.CONFIRMATION_EMAIL_LEASE_SECONDS * 1000}
+
+        self._confirmation_email_ref(user_email, invoice_id).transaction(claim)
+        return outcome['claimed']
+
+    def _release_confirmation_email(self, user_email, invoice_id):
+        """Drop a claim whose send failed so a retry can send the email."""
+        self._confirmation_email_ref(user_email, invoice_id).delete()
+
     def _handle_payment_intent_succeeded(self, payment_intent):
         """Handle successful payment intent (for PAYG overage payments)"""
         try:
@@ -688,40 +772,19 @@ class PaymentService:
 
     def _generate_pdf_invoice(self, user_email, invoice_id, amount, currency,
                             payment_date, plan_type, plan_name, billing_cycle):
-        """Generate PDF invoice for the payment"""
+        """Render the invoice PDF and keep it in the invoice store for later downloads"""
         try:
-            from services.pdf_invoice_service import PDFInvoiceService
-
-            # Get user's display name (fallback to email prefix)
-            display_name = user_email.split('@')[0]
+            from services.invoice_store import invoice_store
 
-            # Try to get actual display name from Firebase
-            try:
-                user_id = user_email.replace('.', ',')
-                user_data = UserAccountService.get_user_account(user_id)
-                if user_data and user_data.get('profile', {}).get('displayName'):
-                    display_name = user_data['profile']['displayName']
-            except Exception:
-                pass  # Use fallback display name
-
-            # Prepare invoice data
-            invoice_data = {
-                'invoice_id': invoice_id,
-                'customer_name': display_name,
-                'customer_email': user_email,
+            pdf_content = invoice_store.render(user_email, {
+                'invoiceId': invoice_id,
                 'amount': amount,
                 'currency': currency,
-                'payment_date': payment_date,
-                'plan_name': plan_name,
-                'plan_type': plan_type,
-                'billing_cycle': billing_cycle,
-                'payment_method': 'Credit Card',
-                'transaction_id': invoice_id  # Use invoice ID as transaction reference
-            }
-
-            # Generate PDF
-            pdf_service = PDFInvoiceService()
-            pdf_content = pdf_service.generate_invoice_pdf(invoice_data)
+                'paymentDate': int(payment_date.timestamp() * 1000),
+                'planType': plan_type,
+                'planName': plan_name,
+                'billingCycle': billing_cycle
+            })
 
             if pdf_content:
                 logger.info(f"Generated PDF invoice for {user_email}, size: {len(pdf_content)} bytes")
@@ -1,11 +1,16 @@
 """
 PDF Invoice Generation Service for VocalLocal
 Generates professional PDF invoices for payment confirmations
+
+Paragraph and table styles are built once per process (_invoice_styles) and
+documents are rendered in ReportLab's invariant mode, so the same invoice
+always produces the same bytes (see services/invoice_store.py).
 """
 
 import os
 import io
 import logging
+import functools
 from datetime import datetime
 from typing import Dict, Any, Optional
 
@@ -23,6 +28,58 @@ except ImportError:
     logger.warning("ReportLab not available. PDF invoice generation will be disabled.")
     REPORTLAB_AVAILABLE = False
 
+@functools.lru_cache(maxsize=1)
+def _invoice_styles():
+    """Paragraph and table styles shared by every invoice in this process."""
+    styles = getSampleStyleSheet()
+    return {
+        'normal': styles['Normal'],
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.HexColor('#2c3e50'),
+            alignment=TA_CENTER
+        ),
+        'header': ParagraphStyle(
+            'CustomHeader',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceAfter=12,
+            textColor=colors.HexColor('#34495e')
+        ),
+        'details_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+        'services_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),  # Right align amount column
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ]),
+        'total_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (0, -2), 'Helvetica'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('LINEBELOW', (0, -1), (-1, -1), 2, colors.black),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+    }
+
+
 class PDFInvoiceService:
     """Service for generating PDF invoices"""
     
@@ -68,41 +125,26 @@ class PDFInvoiceService:
             # Create a BytesIO buffer to hold the PDF
             buffer = io.BytesIO()
             
-            # Create the PDF document
+            # Create the PDF document (invariant: no timestamps or random IDs in the output)
             doc = SimpleDocTemplate(
                 buffer,
                 pagesize=letter,
                 rightMargin=72,
                 leftMargin=72,
                 topMargin=72,
-                bottomMargin=18
+                bottomMargin=18,
+                invariant=1
             )
-            
+
             # Build the PDF content
             story = []
-            styles = getSampleStyleSheet()
-            
-            # Add custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                textColor=colors.HexColor('#2c3e50'),
-                alignment=TA_CENTER
-            )
-            
-            header_style = ParagraphStyle(
-                'CustomHeader',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceAfter=12,
-                textColor=colors.HexColor('#34495e')
-            )
-            
+            styles = _invoice_styles()
+            title_style = styles['title']
+            header_style = styles['header']
+
             # Company header
             story.append(Paragraph(self.company_info['name'], title_style))
-            story.append(Paragraph(self.company_info['tagline'], styles['Normal']))
+            story.append(Paragraph(self.company_info['tagline'], styles['normal']))
             story.append(Spacer(1, 20))
             
             # Invoice title and number
@@ -122,13 +164,7 @@ class PDFInvoiceService:
                 invoice_details.append(['Transaction ID:', invoice_data['transaction_id']])
             
             details_table = Table(invoice_details, colWidths=[2*inch, 4*inch])
-            details_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            details_table.setStyle(styles['details_table'])
             
             story.append(details_table)
             story.append(Spacer(1, 30))
@@ -150,19 +186,7 @@ class PDFInvoiceService:
             ]
             
             services_table = Table(services_data, colWidths=[2*inch, 2.5*inch, 1*inch, 1*inch])
-            services_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),  # Right align amount column
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ]))
+            services_table.setStyle(styles['services_table'])
             
             story.append(services_table)
             story.append(Spacer(1, 20))
@@ -175,14 +199,7 @@ class PDFInvoiceService:
             ]
             
             total_table = Table(total_data, colWidths=[4.5*inch, 1.5*inch])
-            total_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (0, -2), 'Helvetica'),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('LINEBELOW', (0, -1), (-1, -1), 2, colors.black),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            total_table.setStyle(styles['total_table'])
             
             story.append(total_table)
             story.append(Spacer(1, 30))
@@ -194,7 +211,7 @@ class PDFInvoiceService:
             You can access all premium features immediately.
             """
             
-            story.append(Paragraph(confirmation_text, styles['Normal']))
+            story.append(Paragraph(confirmation_text, styles['normal']))
             story.append(Spacer(1, 20))
             
             # Footer
@@ -205,7 +222,7 @@ class PDFInvoiceService:
             Thank you for choosing VocalLocal!
             """
             
-            story.append(Paragraph(footer_text, styles['Normal']))
+            story.append(Paragraph(footer_text, styles['normal']))
             
             # Build the PDF
             doc.build(story)
@@ -259,3 +276,7 @@ class PDFInvoiceService:
         except Exception as e:
             logger.error(f"Error saving PDF invoice: {str(e)}")
             raise
+
+
+# Create a singleton instance
+pdf_invoice_service = PDFInvoiceService()
@@ -0,0 +1,131 @@
+"""
+Permission cache for VocalLocal.
+
+Role checks, email verification checks and model access checks all need the
+same few facts about a user, and each used to read the user's node from
+Firebase, often several times in one request. This cache holds those facts per
+user for a short TTL, so repeated checks are a dict lookup. Writes that change
+them (role updates, email verification, subscription changes) invalidate the
+user's entry explicitly.
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Mirrors User.ROLE_* (models/firebase_models.py)
+ROLE_ADMIN = 'admin'
+ROLE_NORMAL_USER = 'normal_user'
+VALID_ROLES = ('admin', 'super_user', 'normal_user')
+
+_MISSING = object()
+
+
+def permissions_from_user(user_data):
+    """
+    Derive the cached permission facts from a user's node.
+
+    Returns:
+        dict: role, email_verified, oauth_user and plan, or None for unknown users
+    """
+    if not user_data:
+        return None
+
+    role = user_data.get('role')
+    if role not in VALID_ROLES:
+        # Fallback to determining role from is_admin flag
+        role = ROLE_ADMIN if user_data.get('is_admin', False) else ROLE_NORMAL_USER
+
+    # OAuth users are automatically verified
+    oauth_user = bool(user_data.get('oauth_provider'))
+    return {
+        'role': role,
+        'email_verified': oauth_user or bool(user_data.get('email_verified', False)),
+        'oauth_user': oauth_user,
+        'plan': (user_data.get('subscription') or {}).get('planType', 'free'),
+    }
+
+
+class PermissionCache:
+    """Per-user role, verification flag and plan with a short TTL."""
+
+    def __init__(self, ttl=None, max_entries=10000):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry is trusted (PERMISSION_CACHE_TTL, default 60)
+            max_entries: Least recently used entries are evicted beyond this
+        """
+        self.ttl = float(ttl if ttl is not None else os.environ.get('PERMISSION_CACHE_TTL', 60))
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # email -> (expires at, permissions or None)
+        self._invalidated = OrderedDict()  # email -> time.time() of the last invalidation
+        self._lock = threading.Lock()
+
+    def get(self, email, load_user):
+        """
+        Cached permissions for a user.
+
+        Args:
+            email: User's email address
+            load_user: Called with the email on a miss; returns the user's node or None
+
+        Returns:
+            dict: See permissions_from_user (None if the user does not exist)
+        """
+        if not email:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(email, _MISSING)
+            if cached is not _MISSING and cached[0] > now:
+                self._entries.move_to_end(email)
+                return cached[1]
+
+        permissions = permissions_from_user(load_user(email))
+
+        with self._lock:
+            self._entries[email] = (now + self.ttl, permissions)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return permissions
+
+    def invalidate(self, email):
+        """Drop a user's entry after a write that changes their permissions."""
+        if not email:
+            return
+        with self._lock:
+            self._entries.pop(email, None)
+            self._invalidated.pop(email, None)
+            self._invalidated[email] = time.time()
+            while len(self._invalidated) > self.max_entries:
+                self._invalidated.popitem(last=False)
+        logger.debug(f"Permission cache invalidated for {email}")
+
+    def invalidated_at(self, email):
+        """
+        Wall-clock time this worker last invalidated a user's permissions.
+
+        Session snapshots taken before this time are stale (see services/session_user.py).
+
+        Returns:
+            float: Epoch seconds, or 0 if the user has not been invalidated
+        """
+        with self._lock:
+            return self._invalidated.get(email, 0)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+
+
+# Create a singleton instance
+permission_cache = PermissionCache()
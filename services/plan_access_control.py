@@ -6,129 +6,16 @@ import logging
 from typing import Dict, List, Optional, Tuple
 from flask_login import current_user
 
+from services.model_registry import model_registry
+
 logger = logging.getLogger(__name__)
 
 class PlanAccessControl:
     """Service for managing plan-based access control."""
 
-    # Model access matrix by plan type (Updated November 2025)
-    PLAN_MODEL_ACCESS = {
-        'free': {
-            'transcription': ['gemini-2.5-flash', 'gemini-2.5-flash-preview'],  # Allow both for backward compatibility
-            'translation': ['gemini-2.5-flash', 'gemini-2.5-flash-preview'],
-            'tts': [],  # No free TTS models - all require upgrade
-            'interpretation': ['gemini-2.5-flash', 'gemini-2.5-flash-preview']
-        },
-        'basic': {
-            'transcription': [
-                'gemini-2.5-flash',  # Stable model (current)
-                'gemini-2.5-flash-preview',  # Backward compatibility
-                'gpt-4o-mini-transcribe',
-                'gpt-4o-transcribe',
-                'gemini-2.5-flash-preview-09-2025'  # Latest preview (Sept 2025)
-            ],
-            'translation': [
-                'gemini-2.5-flash',  # Stable model (current)
-                'gemini-2.5-flash-preview',  # Backward compatibility
-                'gpt-4.1-mini'
-            ],
-            'tts': [
-                'gemini-2.5-flash-tts',
-                'gpt4o-mini',
-                'openai'
-            ],
-            'interpretation': [
-                'gemini-2.5-flash',  # Stable model (current)
-                'gemini-2.5-flash-preview',  # Backward compatibility
-                'gemini-2.5-flash-preview-09-2025'
-            ]
-        },
-        'professional': {
-            'transcription': [
-                'gemini-2.5-flash',  # Stable model (current)
-                'gemini-2.5-flash-preview',  # Backward compatibility
-                'gpt-4o-mini-transcribe',
-                'gpt-4o-transcribe',
-                'gemini-2.5-flash-preview-09-2025',  # Latest preview (Sept 2025)
-                'gemini-2.5-pro'  # Pro model
-            ],
-            'translation': [
-                'gemini-2.5-flash',  # Stable model (current)
-                'gemini-2.5-flash-preview',  # Backward compatibility
-                'gpt-4.1-mini'
-            ],
-            'tts': [
-                'gemini-2.5-flash-tts',
-                'gpt4o-mini',
-                'openai'
-            ],
-            'interpretation': [
-                'gemini-2.5-flash',  # Stable model (current)
-                'gemini-2.5-flash-preview',  # Backward compatibility
-                'gemini-2.5-flash-preview-09-2025',
-                'gemini-2.5-pro'
-            ]
-        }
-    }
-
-    # Model display names and descriptions (Updated November 2025)
-    MODEL_INFO = {
-        'gemini-2.5-flash': {
-            'name': 'Gemini 2.5 Flash (Stable)',
-            'description': 'Fast and efficient stable model',
-            'tier': 'free'
-        },
-        'gemini-2.5-flash-preview': {
-            'name': 'Gemini 2.5 Flash Preview (Legacy)',
-            'description': 'Legacy preview model - use gemini-2.5-flash instead',
-            'tier': 'free'
-        },
-        'gpt-4o-mini-transcribe': {
-            'name': 'OpenAI GPT-4o Mini',
-            'description': 'High-quality transcription with OpenAI',
-            'tier': 'basic'
-        },
-        'gpt-4o-transcribe': {
-            'name': 'OpenAI GPT-4o',
-            'description': 'Premium transcription with latest OpenAI model (available to Basic Plan users)',
-            'tier': 'basic'
-        },
-        'gemini-2.5-flash-preview-09-2025': {
-            'name': 'Gemini 2.5 Flash Preview (Sept 2025)',
-            'description': 'Latest preview model with enhanced capabilities',
-            'tier': 'basic'
-        },
-        'gemini-2.5-pro': {
-            'name': 'Gemini 2.5 Pro',
-            'description': 'Most capable Gemini model for complex tasks',
-            'tier': 'professional'
-        },
-        'gemini-2.5-flash': {
-            'name': 'Gemini 2.5 Flash Preview',
-            'description': 'Advanced AI interpretation with Gemini 2.5',
-            'tier': 'basic'
-        },
-        'gpt-4.1-mini': {
-            'name': 'GPT-4.1 Mini',
-            'description': 'OpenAI translation model with enhanced capabilities',
-            'tier': 'basic'
-        },
-        'gemini-2.5-flash-tts': {
-            'name': 'Gemini 2.5 Flash TTS',
-            'description': 'High-quality text-to-speech',
-            'tier': 'basic'
-        },
-        'gpt4o-mini': {
-            'name': 'GPT-4o Mini TTS',
-            'description': 'Premium TTS with OpenAI',
-            'tier': 'basic'
-        },
-        'openai': {
-            'name': 'OpenAI TTS-1',
-            'description': 'Professional-grade TTS',
-            'tier': 'professional'
-        }
-    }
+    # Model access matrix and model info are compiled from the shared model registry
+    PLAN_MODEL_ACCESS = model_registry.plan_access_matrix()
+    MODEL_INFO = model_registry.model_info_table()
 
     @classmethod
     def get_user_plan(cls) -> str:
@@ -170,8 +57,7 @@ class PlanAccessControl:
         if user_plan is None:
             user_plan = cls.get_user_plan()
 
-        accessible_models = cls.get_accessible_models(service_type, user_plan)
-        return model in accessible_models
+        return model_registry.is_accessible(model, service_type, user_plan)
 
     @classmethod
     def get_model_restriction_info(cls, model: str, service_type: str, user_plan: str = None) -> Dict:
@@ -180,7 +66,7 @@ class PlanAccessControl:
             user_plan = cls.get_user_plan()
 
         is_accessible = cls.is_model_accessible(model, service_type, user_plan)
-        model_info = cls.MODEL_INFO.get(model, {})
+        model_info = model_registry.get_model_info(model)
 
         if is_accessible:
             return {
@@ -191,11 +77,7 @@ class PlanAccessControl:
             }
 
         # Determine required plan
-        required_plan = None
-        for plan, services in cls.PLAN_MODEL_ACCESS.items():
-            if model in services.get(service_type, []):
-                required_plan = plan
-                break
+        required_plan = model_registry.required_plan(model, service_type)
 
         plan_names = {
             'basic': 'Basic Plan ($4.99/month)',
@@ -212,7 +94,7 @@ class PlanAccessControl:
     @classmethod
     def get_model_info(cls, model: str) -> Dict:
         """Get model information including name, description, and tier."""
-        return cls.MODEL_INFO.get(model, {})
+        return model_registry.get_model_info(model)
 
     @classmethod
     def validate_model_access(cls, model: str, service_type: str, user_plan: str = None) -> Tuple[bool, Dict]:
@@ -16,6 +16,7 @@ from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional, Tuple, Union
 import psutil
+from utils.blocking_pool import run_subprocess
 
 # Configure logging
 logging.basicConfig(
@@ -102,10 +103,14 @@ class RobustChunker:
 
     def _check_memory_usage(self):
         """Monitor memory usage during chunking process"""
-        
+        from services.memory_governor import memory_governor
+
         memory_percent = psutil.virtual_memory().percent
         if memory_percent > 85:  # Warning threshold
             self.logger.warning(f"High memory usage detected: {memory_percent}%")
+        if memory_governor.is_over_budget():
+            status = memory_governor.get_status()
+            self.logger.warning(f"Worker RSS {status['rss_mb']}MB exceeds budget of {status['budget_mb']}MB")
         return memory_percent
 
     def prepare_output_directory(self) -> bool:
@@ -167,7 +172,7 @@ class RobustChunker:
         for attempt in range(self.max_retries + 1):
             try:
                 logger.info(f"Running FFmpeg chunking (attempt {attempt+1}/{self.max_retries+1})")
-                result = subprocess.run(
+                result = run_subprocess(
                     cmd,
                     check=True,
                     timeout=self.chunk_seconds + 10,
@@ -224,7 +229,7 @@ class RobustChunker:
         for i, chunk_file in enumerate(chunk_files):
             try:
                 logger.info(f"Validating chunk {i+1}/{len(chunk_files)}: {os.path.basename(chunk_file)}")
-                result = subprocess.run(
+                result = run_subprocess(
                     ["ffmpeg", "-v", "error", "-i", chunk_file, "-f", "null", "-"],
                     check=True,
                     timeout=30,
@@ -0,0 +1,189 @@
+"""
+Session-backed user loading for VocalLocal.
+
+Flask-Login calls the user loader on every authenticated request, including
+the background job polls. Instead of reading the user's node from Firebase
+each time, the loader keeps a compact snapshot of the user (ID, username,
+role, verification, plan) in the session, which Flask signs with SECRET_KEY.
+The snapshot is trusted until it is older than the configured maximum age, or
+until this worker has invalidated the user's permissions (role, verification
+or subscription changes) after the snapshot was taken; then it is revalidated
+against Firebase and rewritten.
+"""
+import time
+import logging
+from flask import session
+from werkzeug.security import check_password_hash
+from services.permission_cache import permission_cache, permissions_from_user
+
+logger = logging.getLogger(__name__)
+
+# Session key holding the snapshot
+SNAPSHOT_KEY = 'user_snapshot'
+
+# Bump when the snapshot layout changes so old snapshots are revalidated
+SNAPSHOT_VERSION = 1
+
+
+class SessionUser:
+    """User object compatible with Flask-Login, built from a user node or a session snapshot."""
+
+    def __init__(self, email, username=None, role='normal_user', is_admin=False,
+                 email_verified=False, oauth_user=False, plan='free', checked_at=None):
+        self.id = email
+        self.email = email
+        self.username = username
+        self.role = role
+        self.is_admin = is_admin
+        self.email_verified = email_verified
+        self.oauth_user = oauth_user
+        self.plan = plan
+        self.checked_at = checked_at if checked_at is not None else time.time()
+
+    @classmethod
+    def from_user_data(cls, email, data):
+        """Build the user from their Firebase node."""
+        permissions = permissions_from_user(data)
+        return cls(
+            email,
+            username=data.get('username'),
+            role=permissions['role'],
+            is_admin=data.get('is_admin', False),
+            email_verified=permissions['email_verified'],
+            oauth_user=permissions['oauth_user'],
+            plan=permissions['plan'],
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Build the user from a session snapshot."""
+        return cls(
+            snapshot['id'],
+            username=snapshot.get('username'),
+            role=snapshot['role'],
+            is_admin=snapshot.get('is_admin', False),
+            email_verified=snapshot.get('verified', False),
+            oauth_user=snapshot.get('oauth', False),
+            plan=snapshot.get('plan', 'free'),
+            checked_at=snapshot['checked'],
+        )
+
+    def snapshot(self):
+        """Compact dict stored in the session."""
+        return {
+            'v': SNAPSHOT_VERSION,
+            'id': self.id,
+            'username': self.username,
+            'role': self.role,
+            'is_admin': self.is_admin,
+            'verified': self.email_verified,
+            'oauth': self.oauth_user,
+            'plan': self.plan,
+            'checked': self.checked_at,
+        }
+
+    def is_authenticated(self):
+        return True
+
+    def is_active(self):
+        return True
+
+    def is_anonymous(self):
+        return False
+
+    def get_id(self):
+        return self.id
+
+    def check_password(self, password):
+        """Check if the provided password matches the stored hash."""
+        from models.firebase_models import User
+        # The hash is never kept in the session; read it for the rare password check
+        user_data = User.get_by_email(self.email) or {}
+        password_hash = user_data.get('password_hash', '')
+        return check_password_hash(password_hash, password) if password_hash else False
+
+    def has_role(self, role):
+        """Check if user has a specific role."""
+        return self.role == role
+
+    def has_admin_privileges(self):
+        """Check if user has admin privileges."""
+        return self.role == 'admin'
+
+    def has_premium_access(self):
+        """Check if user has premium access (admin or super user)."""
+        return self.role in ['admin', 'super_user']
+
+    def is_super_user(self):
+        """Check if user is a super user."""
+        return self.role == 'super_user'
+
+    def is_normal_user(self):
+        """Check if user is a normal user."""
+        return self.role == 'normal_user'
+
+    def is_email_verified(self):
+        """Check if user's email is verified."""
+        return self.email_verified
+
+    def requires_email_verification(self):
+        """Check if user requires email verification."""
+        # OAuth users don't need verification
+        return not self.oauth_user and not self.email_verified
+
+    def mark_email_verified(self):
+        """Mark user's email as verified."""
+        from models.firebase_models import User
+        success = User.mark_email_verified(self.email)
+        if success:
+            self.email_verified = True
+        return success
+
+
+def _is_fresh(snapshot, user_id, max_age):
+    if not isinstance(snapshot, dict) or snapshot.get('v') != SNAPSHOT_VERSION:
+        return False
+    if snapshot.get('id') != user_id:
+        return False
+    checked_at = snapshot.get('checked', 0)
+    if time.time() - checked_at > max_age:
+        return False
+    # Permissions changed in this worker after the snapshot was taken
+    return checked_at >= permission_cache.invalidated_at(user_id)
+
+
+def load_session_user(user_id, load_user_data, max_age):
+    """
+    Load the current user from the session snapshot, revalidating when stale.
+
+    Args:
+        user_id: Email stored by Flask-Login
+        load_user_data: Called with the email to read the user's node; returns None if missing
+        max_age: Seconds a snapshot is trusted before it is revalidated
+
+    Returns:
+        SessionUser, or None if the user no longer exists
+    """
+    snapshot = session.get(SNAPSHOT_KEY)
+    if _is_fresh(snapshot, user_id, max_age):
+        return SessionUser.from_snapshot(snapshot)
+
+    user_data = load_user_data(user_id)
+    if not user_data:
+        session.pop(SNAPSHOT_KEY, None)
+        return None
+
+    user = SessionUser.from_user_data(user_id, user_data)
+    remember_session_user(user)
+    return user
+
+
+def remember_session_user(user):
+    """Store a freshly loaded user's snapshot in the session (e.g. right after login)."""
+    if isinstance(user, SessionUser):
+        session[SNAPSHOT_KEY] = user.snapshot()
+
+
+def forget_session_user():
+    """Drop the snapshot (on logout)."""
+    session.pop(SNAPSHOT_KEY, None)
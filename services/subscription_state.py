@@ -0,0 +1,216 @@
+"""
+Subscription State Store for VocalLocal
+
+The dashboard used to ask Stripe for a user's subscriptions on every page view
+(PaymentService.check_existing_subscription). This store answers from the
+user's `subscription` node in Firebase instead. The Stripe webhook handlers
+mirror Stripe's view of the subscription into that node as they process
+events (`stripeStatus`, `stripePlanType`, `stripeSyncedAt`), and a background
+reconciler periodically pages through the active Stripe subscriptions and
+flags users whose Firebase plan disagrees with Stripe (`syncIssue`).
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from models.firebase_models import FirebaseModel, User
+from services.permission_cache import permission_cache
+
+logger = logging.getLogger(__name__)
+
+PAID_PLANS = ('basic', 'professional')
+PLAN_DISPLAY = {
+    'free': 'Free Plan',
+    'basic': 'Basic Plan',
+    'professional': 'Professional Plan',
+}
+
+
+class _LeaseHeld(Exception):
+    """Raised inside the lease transaction when another worker reconciled recently."""
+
+
+class SubscriptionStateStore:
+    """Locally served subscription state, kept current by webhooks and a reconciler."""
+
+    # Firebase node used so that only one worker reconciles per interval
+    LEASE_PATH = 'system/subscriptionReconciler'
+
+    def __init__(self, reconcile_interval=None):
+        """
+        Initialize the store.
+
+        Args:
+            reconcile_interval: Seconds between reconciliations
+                (SUBSCRIPTION_RECONCILE_INTERVAL, default 21600; 0 disables the scheduler)
+        """
+        self.reconcile_interval = int(reconcile_interval if reconcile_interval is not None
+                                      else os.environ.get('SUBSCRIPTION_RECONCILE_INTERVAL', 21600))
+        self._scheduler = None
+        self._scheduler_pid = None
+        self._scheduler_lock = threading.Lock()
+
+    @staticmethod
+    def _subscription_ref(user_email):
+        return FirebaseModel.get_ref(f"users/{user_email.replace('.', ',')}/subscription")
+
+    def record(self, user_email, plan_type, status, subscription_id=None, customer_id=None):
+        """
+        Mirror a Stripe subscription's state from a webhook event.
+
+        Args:
+            user_email (str): User's email address
+            plan_type (str): Plan in the subscription metadata
+            status (str): Stripe subscription status (active, past_due, canceled, ...)
+            subscription_id (str, optional): Stripe subscription ID
+            customer_id (str, optional): Stripe customer ID
+        """
+        state = {
+            'stripeStatus': status,
+            'stripePlanType': plan_type,
+            'stripeSyncedAt': int(time.time() * 1000),
+            'syncIssue': False
+        }
+        if subscription_id:
+            state['stripeSubscriptionId'] = subscription_id
+        if customer_id:
+            state['stripeCustomerId'] = customer_id
+
+        self._subscription_ref(user_email).update(state)
+        permission_cache.invalidate(user_email)
+
+    def get(self, user_email):
+        """The user's subscription node (an empty dict if there is none)."""
+        return self._subscription_ref(user_email).get() or {}
+
+    @staticmethod
+    def plan_from_state(subscription):
+        """
+        Resolve the plan to show for a subscription node.
+
+        Stripe's state, as last mirrored, wins when it shows an active paid
+        plan. Otherwise an active paid plan in Firebase is shown, marked for
+        billing verification when the reconciler found no matching Stripe
+        subscription.
+
+        Returns:
+            tuple: (plan_type, plan_display)
+        """
+        stripe_plan = subscription.get('stripePlanType')
+        if subscription.get('stripeStatus') == 'active' and stripe_plan in PAID_PLANS:
+            return stripe_plan, PLAN_DISPLAY[stripe_plan]
+
+        firebase_plan = subscription.get('planType', 'free')
+        if subscription.get('status') == 'active' and firebase_plan in PAID_PLANS:
+            if subscription.get('syncIssue'):
+                return firebase_plan, f"{PLAN_DISPLAY[firebase_plan]} (Verify Billing)"
+            return firebase_plan, PLAN_DISPLAY[firebase_plan]
+
+        return 'free', PLAN_DISPLAY['free']
+
+    def current_plan(self, user_email):
+        """
+        The user's current plan, from Firebase only (no Stripe call).
+
+        Returns:
+            tuple: (plan_type, plan_display)
+        """
+        return self.plan_from_state(self.get(user_email))
+
+    def reconcile(self, page_size=100):
+        """
+        Diff Firebase subscription state against Stripe and record the differences.
+
+        Active Stripe subscriptions are listed `page_size` at a time and users
+        are read in pages of the same size, so memory stays bounded by the
+        number of paying customers.
+
+        Returns:
+            dict: Counts of users checked, Stripe-active users, sync issues and updates
+        """
+        import stripe
+        stripe.api_key = stripe.api_key or os.getenv('STRIPE_SECRET_KEY')
+
+        active = {}
+        for subscription in stripe.Subscription.list(status='active', limit=page_size).auto_paging_iter():
+            metadata = subscription.get('metadata') or {}
+            if metadata.get('user_email'):
+                active[metadata['user_email']] = (metadata.get('plan_type'), subscription.id, subscription.get('customer'))
+
+        stats = {'checked': 0, 'stripe_active': len(active), 'sync_issues': 0, 'updated': 0}
+        now = int(time.time() * 1000)
+        for user_data in User.iter_users(fields=('email', 'subscription'), batch_size=page_size):
+            email = user_data['email']
+            subscription = user_data.get('subscription') or {}
+            stats['checked'] += 1
+
+            if email in active:
+                plan_type, subscription_id, customer_id = active.pop(email)
+                state = {'stripeStatus': 'active', 'stripePlanType': plan_type,
+                         'stripeSubscriptionId': subscription_id, 'syncIssue': False}
+                if customer_id:
+                    state['stripeCustomerId'] = customer_id
+            else:
+                paid_in_firebase = subscription.get('status') == 'active' and subscription.get('planType') in PAID_PLANS
+                state = {'syncIssue': paid_in_firebase}
+                if subscription.get('stripeStatus') == 'active':
+                    # The cancellation webhook was missed
+                    state['stripeStatus'] = 'none'
+
+            stats['sync_issues'] += 1 if state['syncIssue'] else 0
+            current = {'syncIssue': False, **subscription}
+            if any(current.get(key) != value for key, value in state.items()):
+                state['stripeSyncedAt'] = now
+                self._subscription_ref(email).update(state)
+                permission_cache.invalidate(email)
+                stats['updated'] += 1
+
+        if active:
+            logger.warning(f"{len(active)} active Stripe subscriptions have no matching user")
+        logger.info(f"Subscription reconciliation finished: {stats}")
+        return stats
+
+    def _claim_lease(self):
+        """Claim this interval's reconciliation; False if another worker already has."""
+        now = int(time.time() * 1000)
+
+        def claim(current):
+            if current and now - current.get('startedAt', 0) < self.reconcile_interval * 1000:
+                raise _LeaseHeld()
+            return {'startedAt': now, 'pid': os.getpid()}
+
+        try:
+            FirebaseModel.get_ref(self.LEASE_PATH).transaction(claim)
+            return True
+        except _LeaseHeld:
+            return False
+
+    def _run_scheduler(self):
+        # Spread workers out so they do not all race for the lease at boot
+        time.sleep(random.uniform(60, 300))
+        while True:
+            try:
+                if self._claim_lease():
+                    self.reconcile()
+            except Exception as e:
+                logger.error(f"Subscription reconciliation failed: {str(e)}")
+            time.sleep(self.reconcile_interval)
+
+    def start_scheduler(self):
+        """Start the background reconciler in this process (no-op if it is running or disabled)."""
+        # Checked by PID: the thread does not survive a fork (gunicorn preload_app)
+        if self._scheduler_pid == os.getpid() or self.reconcile_interval <= 0 or not os.getenv('STRIPE_SECRET_KEY'):
+            return
+        with self._scheduler_lock:
+            if self._scheduler_pid == os.getpid():
+                return
+            self._scheduler_pid = os.getpid()
+            self._scheduler = threading.Thread(target=self._run_scheduler, name='subscription-reconciler',
+                                               daemon=True)
+            self._scheduler.start()
+
+
+# Create a singleton instance
+subscription_state = SubscriptionStateStore()
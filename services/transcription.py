@@ -10,13 +10,17 @@ import logging
 import threading
 import uuid  # Add this import for UUID generation
 import openai
-import google.generativeai as genai
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from services.base_service import BaseService
 from services.audio_chunker import AudioChunker
 from services.robust_chunker import RobustChunker
-from services.gemini_model_manager import GeminiModelManager
+from services.gemini_model_manager import get_shared_model_manager
+from services.memory_governor import memory_governor
+from services.model_registry import model_registry
+from utils.blocking_pool import run_blocking, run_subprocess
+from utils.lazy_import import genai
+from config import Config
 from metrics_tracker import track_transcription_metrics
 
 # Try to import pydub for audio chunking, but make it optional
@@ -71,51 +75,28 @@ class TranscriptionService(BaseService):
             self.logger.warning("OpenAI API key not found. OpenAI transcription will not be available.")
 
         # Configure Gemini
+        # The SDK itself is imported and configured on first use (utils.lazy_import);
+        # model discovery runs on first use too unless FAST_START is disabled.
         if self.gemini_api_key:
-            try:
-                self.logger.info("🔧 Configuring Gemini API...")
-                genai.configure(api_key=self.gemini_api_key)
-                self.logger.info("✅ Google Generative AI configured successfully for transcription service")
-                self.logger.info(f"Gemini API Key present: {self.gemini_api_key[:10]}...{self.gemini_api_key[-4:]}")
-
-                # Initialize Gemini Model Manager for dynamic fallback
-                self.logger.info("🔧 Initializing Gemini Model Manager...")
-                self.gemini_model_manager = GeminiModelManager(
-                    api_key=self.gemini_api_key,
-                    logger=self.logger,
-                    cache_duration_hours=24
-                )
-                self.logger.info("✅ Gemini Model Manager initialized successfully")
+            self.gemini_model_manager = get_shared_model_manager(self.gemini_api_key, cache_duration_hours=24)
+            self.gemini_available = True
+            self.logger.info("Gemini configured for transcription (SDK loads on first use)")
 
-                # Test that we can actually use Gemini by checking available models
-                self.logger.info("🔧 Testing Gemini availability by fetching models...")
-                try:
-                    models_data = self.gemini_model_manager.get_available_models()
-                    total_models = models_data.get("total_models", 0)
-                    self.logger.info(f"✅ Gemini is fully operational - {total_models} models available")
-                    self.gemini_available = True
-                except Exception as model_fetch_error:
-                    self.logger.error(f"❌ Gemini API configured but model fetch failed: {str(model_fetch_error)}")
-                    self.logger.error(f"Error type: {type(model_fetch_error).__name__}")
-                    import traceback
-                    self.logger.error(f"Traceback: {traceback.format_exc()}")
-                    self.gemini_available = False
-                    self.gemini_model_manager = None
-
-            except Exception as gemini_init_error:
-                self.gemini_available = False
-                self.gemini_model_manager = None
-                self.logger.error(f"❌ Failed to initialize Gemini: {str(gemini_init_error)}")
-                self.logger.error(f"Error type: {type(gemini_init_error).__name__}")
-                import traceback
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
-                self.logger.error(f"Gemini will not be available for transcription")
+            if not Config.FAST_START:
+                self._warm_gemini()
         else:
             self.gemini_available = False
             self.gemini_model_manager = None
             self.logger.warning("❌ Gemini API key not found in environment variables (GEMINI_API_KEY)")
             self.logger.warning("Gemini transcription will not be available - only OpenAI will work")
 
+        # Background job state: job ID -> status dict (with a version that is
+        # bumped on every change), guarded by a condition so status requests
+        # can wait for a change, plus callbacks to run once a job finishes
+        self.job_statuses = {}
+        self._job_condition = threading.Condition()
+        self._job_callbacks = {}
+
         # Initialize the audio chunkers
         self.audio_chunker = AudioChunker(
             max_retries=2,
@@ -131,6 +112,19 @@ class TranscriptionService(BaseService):
             transcription_service=self
         )
 
+    def _warm_gemini(self):
+        """Import the Gemini SDK and fetch the model list eagerly (FAST_START=false)."""
+        self.logger.info("🔧 Testing Gemini availability by fetching models...")
+        try:
+            genai.GenerativeModel  # Triggers the SDK import and configure
+            models_data = self.gemini_model_manager.get_available_models()
+            total_models = models_data.get("total_models", 0)
+            self.logger.info(f"✅ Gemini is fully operational - {total_models} models available")
+        except Exception as model_fetch_error:
+            self.logger.error(f"❌ Gemini API configured but model fetch failed: {str(model_fetch_error)}")
+            self.gemini_available = False
+            self.gemini_model_manager = None
+
     def _extract_text_from_gemini_response(self, response, context=""):
         """
         Extract text from Gemini response with proper error handling
@@ -327,7 +321,7 @@ class TranscriptionService(BaseService):
                         ]
 
                         self.logger.info(f"Running ffmpeg command: {' '.join(cmd)}")
-                        result = subprocess.run(cmd, capture_output=True, text=True)
+                        result = run_subprocess(cmd, capture_output=True, text=True)
 
                         if result.returncode != 0:
                             self.logger.warning(f"FFmpeg extraction failed: {result.stderr}")
@@ -494,7 +488,7 @@ class TranscriptionService(BaseService):
             ]
 
             self.logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = run_subprocess(cmd, capture_output=True, text=True)
 
             if result.returncode != 0:
                 self.logger.error(f"FFmpeg segmentation failed: {result.stderr}")
@@ -1011,7 +1005,7 @@ class TranscriptionService(BaseService):
             self.logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
 
             # Run FFmpeg with timeout
-            result = subprocess.run(
+            result = run_subprocess(
                 cmd,
                 capture_output=True,
                 text=True,
@@ -1150,7 +1144,13 @@ class TranscriptionService(BaseService):
         Helper method to map model names to Gemini model IDs with dynamic fallback.
 
         Updated November 2025: Using dynamic model discovery with intelligent fallback.
+        Aliases and deprecated names are resolved through the model registry first.
         """
+        resolution = model_registry.resolve(model_name, 'transcription')
+        if resolution.name != model_name:
+            self.logger.info(f"Model registry mapping: '{model_name}' -> '{resolution.name}'")
+        model_name = resolution.name
+
         # If Gemini Model Manager is available, use dynamic fallback
         if self.gemini_model_manager:
             try:
@@ -1171,31 +1171,8 @@ class TranscriptionService(BaseService):
             except Exception as e:
                 self.logger.error(f"Dynamic model selection failed: {e}, falling back to static mapping")
 
-        # Fallback to static mapping if dynamic fails
-        gemini_model_id = 'gemini-2.5-flash'  # Safe default
-
-        if model_name == 'gemini-2.5-flash-preview' or model_name == 'gemini-2.5-flash':
-            gemini_model_id = 'gemini-2.5-flash'
-        elif model_name == 'gemini-2.0-flash-lite':
-            gemini_model_id = 'gemini-2.0-flash-lite'
-        elif model_name in ['gemini-2.5-flash-preview-04-17', 'gemini-2.5-flash-preview-05-20']:
-            gemini_model_id = 'gemini-2.5-flash'
-            self.logger.info(f"Deprecated model {model_name} mapped to stable gemini-2.5-flash")
-        elif model_name in ['gemini-2.5-pro-preview', 'gemini-2.5-pro-preview-03-25']:
-            gemini_model_id = 'gemini-2.5-pro'
-            self.logger.info(f"Preview model {model_name} mapped to stable gemini-2.5-pro")
-        elif model_name == 'gemini-2.5-pro':
-            gemini_model_id = 'gemini-2.5-pro'
-        elif model_name == 'gemini-2.0-flash':
-            gemini_model_id = 'gemini-2.0-flash'
-        elif model_name == 'gemini' or model_name == 'gemini-1.5-flash':
-            gemini_model_id = 'gemini-2.0-flash-lite'
-
-        # Log the mapping for debugging
-        if model_name != gemini_model_id:
-            self.logger.info(f"Static model mapping: '{model_name}' -> '{gemini_model_id}'")
-
-        return gemini_model_id
+        # Fallback to the registry's provider ID if dynamic selection fails
+        return resolution.provider_id
 
     def _transcribe_with_files_api_improved(self, temp_file_path, model, generation_config, language, file_size_mb):
         """
@@ -1204,7 +1181,7 @@ class TranscriptionService(BaseService):
         try:
             # Upload the file using the Files API
             self.logger.info(f"Uploading file to Gemini Files API: {temp_file_path}")
-            file_obj = genai.upload_file(path=temp_file_path)
+            file_obj = run_blocking(genai.upload_file, path=temp_file_path)
             self.logger.info(f"File uploaded successfully with name: {file_obj.name}")
 
             # Improved file state management with exponential backoff
@@ -1346,24 +1323,19 @@ class TranscriptionService(BaseService):
             # Return a job ID and process in background
             job_id = str(uuid.uuid4())
 
-            # Initialize job storage immediately to avoid "not_found" errors
-            if not hasattr(self, 'job_statuses'):
-                self.job_statuses = {}
-
-            # Store initial job status immediately
-            self.job_statuses[job_id] = {
-                "status": "processing",
-                "progress": 0,
-                "result": None,
-                "error": None
-            }
+            # Store initial job status immediately to avoid "not_found" errors
+            self._set_job_status(job_id, "processing", progress=0)
 
             self.logger.info(f"Created background job {job_id} for {file_size_mb:.2f}MB file. Job stored in memory.")
 
+            # The audio bytes outlive the request, so hold a memory reservation
+            # for the job until the background thread finishes
+            memory_ticket = memory_governor.admit(len(audio_data), 'background', wait=False)
+
             # Start background processing
             threading.Thread(
                 target=self._background_transcribe,
-                args=(job_id, audio_data, language, model_name),
+                args=(job_id, audio_data, language, model_name, memory_ticket),
                 daemon=True
             ).start()
 
@@ -1498,7 +1470,7 @@ class TranscriptionService(BaseService):
                             try:
                                 # Upload the file using the Files API
                                 self.logger.info(f"Uploading temporary file: {temp_file_path}")
-                                file_obj = genai.upload_file(path=temp_file_path)
+                                file_obj = run_blocking(genai.upload_file, path=temp_file_path)
                                 self.logger.info(f"File uploaded successfully with name: {file_obj.name}")
 
                                 # Wait for file to be processed (reach ACTIVE state)
@@ -1658,7 +1630,7 @@ class TranscriptionService(BaseService):
                                 try:
                                     # Upload the file using the Files API
                                     self.logger.info(f"Uploading temporary file: {temp_file_path}")
-                                    file_obj = genai.upload_file(path=temp_file_path)
+                                    file_obj = run_blocking(genai.upload_file, path=temp_file_path)
                                     self.logger.info(f"File uploaded successfully with name: {file_obj.name}")
 
                                     # Wait for file to be processed (reach ACTIVE state)
@@ -1906,7 +1878,7 @@ class TranscriptionService(BaseService):
                 ffmpeg_cmd = [ffmpeg_executable, '-i', temp_file_path, '-vn', '-ar', '44100', '-ac', '2', '-b:a', '192k', mp3_file_path]
                 self.logger.info(f"FFmpeg command: {' '.join(ffmpeg_cmd)}")
 
-                result = subprocess.run(
+                result = run_subprocess(
                     ffmpeg_cmd,
                     capture_output=True,
                     text=True,
@@ -1991,7 +1963,7 @@ class TranscriptionService(BaseService):
                 except Exception as cleanup_error:
                     self.logger.warning(f"Failed to remove temporary MP3 file: {str(cleanup_error)}")
 
-    def _background_transcribe(self, job_id, audio_data, language, model_name):
+    def _background_transcribe(self, job_id, audio_data, language, model_name, memory_ticket=None):
         """
         Background processing method for large audio files.
         This runs in a separate thread to avoid timeouts.
@@ -1999,17 +1971,6 @@ class TranscriptionService(BaseService):
         try:
             self.logger.info(f"Starting background transcription job {job_id}")
 
-            # Store job status
-            if not hasattr(self, 'job_statuses'):
-                self.job_statuses = {}
-
-            self.job_statuses[job_id] = {
-                "status": "processing",
-                "progress": 0,
-                "result": None,
-                "error": None
-            }
-
             # Process with chunking
             file_size_mb = len(audio_data) / (1024 * 1024)
             self.logger.info(f"Background processing file of size {file_size_mb:.2f} MB")
@@ -2023,12 +1984,7 @@ class TranscriptionService(BaseService):
 
                 # Store the result directly as text
                 # This ensures consistent format with regular transcription
-                self.job_statuses[job_id] = {
-                    "status": "completed",
-                    "progress": 100,
-                    "result": result,  # Store the text directly
-                    "error": None
-                }
+                self._set_job_status(job_id, "completed", progress=100, result=result)
 
                 self.logger.info(f"Background transcription job {job_id} completed successfully. Result length: {len(result) if result else 0} characters")
 
@@ -2036,48 +1992,92 @@ class TranscriptionService(BaseService):
                 self.logger.error(f"Error in background transcription: {str(e)}")
 
                 # Update job status
-                self.job_statuses[job_id] = {
-                    "status": "failed",
-                    "progress": 0,
-                    "result": None,
-                    "error": str(e)
-                }
+                self._set_job_status(job_id, "failed", error=str(e))
 
         except Exception as e:
             self.logger.error(f"Unhandled error in background transcription: {str(e)}")
 
             # Update job status if possible
-            if hasattr(self, 'job_statuses'):
-                self.job_statuses[job_id] = {
-                    "status": "failed",
-                    "progress": 0,
-                    "result": None,
-                    "error": str(e)
-                }
+            self._set_job_status(job_id, "failed", error=str(e))
+
+        finally:
+            # Release the job's memory reservation
+            memory_governor.release(memory_ticket)
+
+    def _set_job_status(self, job_id, status, progress=0, result=None, error=None):
+        """
+        Record a background job's status, wake waiting status requests and,
+        when the job has finished, run its completion callbacks (once).
+        """
+        with self._job_condition:
+            previous = self.job_statuses.get(job_id)
+            self.job_statuses[job_id] = {
+                "status": status,
+                "progress": progress,
+                "result": result,
+                "error": error,
+                "version": previous["version"] + 1 if previous else 1
+            }
+            self._job_condition.notify_all()
+            callbacks = self._job_callbacks.pop(job_id, []) if status in ("completed", "failed") else []
+
+        for callback in callbacks:
+            self._run_job_callback(job_id, callback)
 
-    def get_job_status(self, job_id):
+    def _run_job_callback(self, job_id, callback):
+        try:
+            callback(self.job_statuses[job_id])
+        except Exception as e:
+            self.logger.error(f"Completion callback for job {job_id} failed: {str(e)}")
+
+    def on_job_finished(self, job_id, callback):
+        """
+        Run a callback once when a background job completes or fails.
+
+        The callback receives the final status dict. If the job has already
+        finished it runs immediately, in the caller's thread; otherwise it runs
+        in the job's background thread.
+
+        Args:
+            job_id (str): The job ID returned by transcribe()
+            callback (callable): Called with the final job status
+        """
+        with self._job_condition:
+            status = self.job_statuses.get(job_id)
+            if status is None or status["status"] not in ("completed", "failed"):
+                self._job_callbacks.setdefault(job_id, []).append(callback)
+                return
+        self._run_job_callback(job_id, callback)
+
+    def get_job_status(self, job_id, wait_for_change_from=None, timeout=0):
         """
         Get the status of a background transcription job.
 
         Args:
             job_id (str): The job ID to check
+            wait_for_change_from (int): If given, wait until the job's version
+                differs from this one (long-polling)
+            timeout (float): Maximum seconds to wait
 
         Returns:
             dict: The job status information
         """
-        if not hasattr(self, 'job_statuses'):
-            self.job_statuses = {}
-            self.logger.warning(f"Job statuses not initialized when checking job {job_id}")
+        with self._job_condition:
+            if wait_for_change_from is not None and timeout > 0:
+                self._job_condition.wait_for(
+                    lambda: (self.job_statuses.get(job_id) or {}).get("version") != wait_for_change_from,
+                    timeout=timeout
+                )
+            status = self.job_statuses.get(job_id)
 
-        if job_id not in self.job_statuses:
-            self.logger.warning(f"Job {job_id} not found. Available jobs: {list(self.job_statuses.keys())}")
+        if status is None:
+            self.logger.warning(f"Job {job_id} not found")
             return {
                 "status": "not_found",
                 "error": "Job ID not found"
             }
 
-        status = self.job_statuses[job_id]
-        self.logger.info(f"Retrieved status for job {job_id}: {status['status']}")
+        self.logger.debug(f"Retrieved status for job {job_id}: {status['status']}")
         return status
 
     def transcribe_simple_chunk(self, audio_data, language, model):
@@ -2165,7 +2165,7 @@ class TranscriptionService(BaseService):
             ffmpeg_executable = getattr(self, 'ffmpeg_path', 'ffmpeg')
             ffmpeg_cmd = [ffmpeg_executable, '-i', temp_file_path, '-vn', '-ar', '44100', '-ac', '2', '-b:a', '192k', mp3_file_path]
 
-            result = subprocess.run(
+            result = run_subprocess(
                 ffmpeg_cmd,
                 capture_output=True,
                 text=True,
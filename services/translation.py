@@ -6,6 +6,8 @@ import openai
 from services.base_service import BaseService
 from utils.language_utils import get_language_name_from_code
 from config import Config
+from utils.lazy_import import genai, module_available
+from services.model_registry import model_registry
 
 class TranslationService(BaseService):
     """Service for handling text translation"""
@@ -15,14 +17,12 @@ class TranslationService(BaseService):
         super().__init__()
         self.gemini_available = False
         
-        # Try to import Google Generative AI
-        try:
-            import google.generativeai as genai
+        # Google Generative AI is imported and configured on first use
+        if module_available('google.generativeai'):
             self.genai = genai
             self.gemini_available = True
-            print("Google Generative AI module loaded successfully for translation service")
-        except ImportError as e:
-            print(f"Google Generative AI module not available for translation service: {str(e)}")
+        else:
+            print("Google Generative AI module not available for translation service")
             self.genai = None
     
     def translate(self, text, target_language, model="gemini-2.0-flash-lite"):
@@ -96,11 +96,6 @@ class TranslationService(BaseService):
         print(f"  - Prompt: {prompt}")
         print(f"  - Requested model: {translation_model}")
         
-        # Handle legacy model name
-        if translation_model == 'gemini':
-            translation_model = 'gemini-2.0-flash-lite'
-            print(f"  - Converting legacy model name 'gemini' to '{translation_model}'")
-        
         # Check if Gemini is available
         if not self.gemini_available:
             print("Google Generative AI module is not available. Falling back to OpenAI for translation.")
@@ -115,41 +110,13 @@ class TranslationService(BaseService):
                 "max_output_tokens": 8192,
             }
             
-            # Select the appropriate model based on the translation_model parameter
-            model_name = "models/gemini-2.0-flash-lite"  # Default model
-            display_model = translation_model  # For metrics tracking
+            # Resolve aliases and deprecated preview models through the model registry
+            resolution = model_registry.resolve(translation_model, 'translation')
+            model_name = f"models/{resolution.provider_id}"
+            display_model = resolution.name  # For metrics tracking
+            if resolution.name != translation_model:
+                print(f"  - Model mapping: '{translation_model}' -> '{resolution.name}'")
 
-            # Map deprecated models to current working models (November 2025)
-            if translation_model in ['gemini-2.5-flash-preview-04-17', 'gemini-2.5-flash-preview-05-20']:
-                # Deprecated preview models - use stable gemini-2.5-flash
-                model_name = "models/gemini-2.5-flash"
-                display_model = "gemini-2.5-flash"
-                print(f"Mapping deprecated model '{translation_model}' to stable 'gemini-2.5-flash'")
-            elif translation_model == 'gemini-2.5-flash-preview-09-2025':
-                # Latest preview model (September 2025)
-                model_name = "models/gemini-2.5-flash-preview-09-2025"
-                display_model = "gemini-2.5-flash-preview-09-2025"
-                print(f"Using Gemini 2.5 Flash Preview (September 2025) model for translation")
-            elif 'gemini-2.5-flash' in translation_model or translation_model == 'gemini-2.5-flash':
-                # Use stable gemini-2.5-flash
-                model_name = "models/gemini-2.5-flash"
-                display_model = "gemini-2.5-flash"
-                print(f"Using stable Gemini 2.5 Flash model for translation")
-            elif 'gemini-2.5-pro' in translation_model:
-                # Use stable gemini-2.5-pro
-                model_name = "models/gemini-2.5-pro"
-                display_model = "gemini-2.5-pro"
-                print(f"Using Gemini 2.5 Pro Preview model for translation")
-            elif translation_model == 'gemini-2.0-flash-lite' or translation_model == 'gemini':
-                model_name = "models/gemini-2.0-flash-lite"
-                display_model = "gemini-2.0-flash-lite"
-                print(f"Using Gemini 2.0 Flash Lite model for translation")
-            else:
-                # For any other model name, default to Gemini 2.0 Flash Lite
-                model_name = "models/gemini-2.0-flash-lite"
-                display_model = "gemini-2.0-flash-lite"
-                print(f"Unknown model '{translation_model}', defaulting to Gemini 2.0 Flash Lite for translation")
-            
             # Initialize the Gemini model
             model = self.genai.GenerativeModel(
                 model_name=model_name,
@@ -14,6 +14,8 @@ import uuid
 import json
 from typing import List, Optional, Dict, Any, Union, BinaryIO
 from services.base_service import BaseService
+from utils.blocking_pool import run_subprocess
+from utils.lazy_import import genai, module_available
 from config import Config
 
 # Configure logging
@@ -43,21 +45,19 @@ class TTSService(BaseService):
         else:
             self.logger.warning("OpenAI API key not found. OpenAI TTS services will not be available.")
 
-        # Try to import Google Generative AI
-        try:
-            import google.generativeai as genai
+        # Google Generative AI is imported and configured on first use
+        if module_available('google.generativeai'):
             self.genai = genai
 
             # Check Gemini API key
             self.gemini_api_key = os.getenv('GEMINI_API_KEY')
             if self.gemini_api_key:
-                genai.configure(api_key=self.gemini_api_key)
                 self.gemini_available = True
-                self.logger.info("Google Generative AI module loaded successfully for TTS service")
+                self.logger.info("Google Generative AI available for TTS service")
             else:
                 self.logger.warning("Gemini API key not found. Google TTS will not be available.")
-        except ImportError as e:
-            self.logger.warning(f"Google Generative AI module not available for TTS service: {str(e)}")
+        else:
+            self.logger.warning("Google Generative AI module not available for TTS service")
             self.genai = None
 
     def synthesize(self, text, language, model="gpt4o-mini"):
@@ -579,7 +579,7 @@ class TTSService(BaseService):
 
             # Run the command
             self.logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_subprocess(cmd, check=True, capture_output=True)
 
             # Return the path to the combined file
             return output_path
@@ -0,0 +1,190 @@
+"""
+Usage Statistics Service for VocalLocal
+
+Answers plan-limit lookups and the admin usage statistics in process instead
+of through the getUsageStatistics / validate*Usage Cloud Functions, which
+re-read user data remotely on every call. Plan data is cached with a TTL.
+Statistics are built once from a paged scan of the users tree and then kept
+current from the user snapshots the app already reads and writes, so a
+request never triggers a full scan unless the statistics are stale.
+
+The statistics are per process: a worker only observes the users whose
+snapshots it reads itself, and changes made elsewhere (other workers, Cloud
+Functions) are picked up by the next rebuild. Two workers can therefore report
+different totals, by at most the changes of the last REBUILD_INTERVAL seconds;
+every worker agrees with a fresh scan once its interval has passed.
+"""
+
+import os
+import logging
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class UsageStatisticsService:
+    """In-process plan cache and incrementally maintained usage statistics."""
+
+    USAGE_FIELDS = ('transcriptionMinutes', 'translationWords', 'ttsMinutes', 'aiCredits')
+    PLAN_TYPES = ('free', 'basic', 'professional')
+
+    # Seconds a subscriptionPlans entry is reused before it is read again
+    PLAN_CACHE_TTL = 300
+
+    # Seconds before statistics are rebuilt from a full scan, to pick up
+    # changes made outside this process (Cloud Functions, other workers). This
+    # bounds how stale, and how far apart between workers, the statistics are
+    REBUILD_INTERVAL = 300
+
+    def __init__(self, plan_cache_ttl=None, rebuild_interval=None):
+        """
+        Initialize the service.
+
+        Args:
+            plan_cache_ttl: Seconds plan data is cached (default PLAN_CACHE_TTL)
+            rebuild_interval: Seconds between full rebuilds of the statistics
+                (USAGE_STATISTICS_REBUILD_INTERVAL, default REBUILD_INTERVAL)
+        """
+        self.plan_cache_ttl = plan_cache_ttl if plan_cache_ttl is not None else self.PLAN_CACHE_TTL
+        if rebuild_interval is None:
+            rebuild_interval = float(os.environ.get('USAGE_STATISTICS_REBUILD_INTERVAL', self.REBUILD_INTERVAL))
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._plans = {}            # plan type -> (expires at, plan data or None)
+        self._contributions = {}    # user ID -> (plan type, usage tuple, reset date)
+        self._totals = dict.fromkeys(self.USAGE_FIELDS, 0)
+        self._plan_counts = Counter()
+        self._built_at = None
+
+    @staticmethod
+    def _get_ref(path):
+        from models.firebase_models import FirebaseModel
+        return FirebaseModel.get_ref(path)
+
+    def get_plan_data(self, plan_type):
+        """
+        Plan limits from `subscriptionPlans/{plan_type}`, cached for PLAN_CACHE_TTL.
+
+        Returns:
+            dict: Plan data, or None if the plan is not defined in Firebase
+        """
+        now = time.monotonic()
+        cached = self._plans.get(plan_type)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        try:
+            plan_data = self._get_ref(f'subscriptionPlans/{plan_type}').get() or None
+        except Exception as e:
+            logger.warning(f"Error reading plan data for '{plan_type}': {str(e)}")
+            # Keep serving a stale entry rather than failing the check
+            return cached[1] if cached else None
+
+        self._plans[plan_type] = (now + self.plan_cache_ttl, plan_data)
+        return plan_data
+
+    def invalidate_plans(self):
+        """Drop cached plan data (after editing subscriptionPlans)."""
+        self._plans.clear()
+
+    def _contribution(self, user_data):
+        subscription = user_data.get('subscription') or {}
+        current_period = (user_data.get('usage') or {}).get('currentPeriod') or {}
+        return (
+            subscription.get('planType', 'free'),
+            tuple(current_period.get(field, 0) or 0 for field in self.USAGE_FIELDS),
+            current_period.get('resetDate', 0) or 0,
+        )
+
+    def _apply(self, user_id, contribution):
+        """Replace a user's contribution to the running totals. Caller holds the lock."""
+        previous = self._contributions.get(user_id)
+        if previous:
+            self._plan_counts[previous[0]] -= 1
+            for field, value in zip(self.USAGE_FIELDS, previous[1]):
+                self._totals[field] -= value
+        if contribution:
+            self._plan_counts[contribution[0]] += 1
+            for field, value in zip(self.USAGE_FIELDS, contribution[1]):
+                self._totals[field] += value
+            self._contributions[user_id] = contribution
+        else:
+            self._contributions.pop(user_id, None)
+
+    def observe(self, user_id, user_data):
+        """
+        Update the statistics from a user snapshot the caller already has.
+
+        Args:
+            user_id (str): Encoded user ID (email with dots replaced by commas)
+            user_data (dict): The user's node, or None if it was deleted
+        """
+        if self._built_at is None:
+            return  # Nothing to keep current until the first build
+        contribution = self._contribution(user_data) if user_data else None
+        with self._lock:
+            self._apply(user_id, contribution)
+
+    def rebuild(self):
+        """Recompute the statistics from a paged scan of the users tree."""
+        from models.firebase_models import User
+
+        contributions = {}
+        skipped = 0
+        for user_data in User.iter_users(fields=('email', 'usage', 'subscription')):
+            email = user_data.get('email')
+            if not email:
+                skipped += 1
+                continue
+            contributions[email.replace('.', ',')] = self._contribution(user_data)
+        if skipped:
+            logger.warning(f"Usage statistics skipped {skipped} user records without an email")
+
+        with self._lock:
+            self._contributions = {}
+            self._totals = dict.fromkeys(self.USAGE_FIELDS, 0)
+            self._plan_counts = Counter()
+            for user_id, contribution in contributions.items():
+                self._apply(user_id, contribution)
+            self._built_at = time.monotonic()
+        logger.info(f"Usage statistics rebuilt for {len(contributions)} users")
+
+    def invalidate(self):
+        """Force a rebuild on the next request (after bulk changes such as a usage reset)."""
+        self._built_at = None
+
+    def get_statistics(self):
+        """
+        Usage statistics in the shape returned by the getUsageStatistics function.
+
+        Rebuilt from a full scan when older than rebuild_interval, so they may
+        miss changes made outside this process for up to that long.
+
+        Returns:
+            dict: totalUsers, currentPeriodUsage, usersNeedingReset,
+                planDistribution and nextResetDate
+        """
+        if self._built_at is None or time.monotonic() - self._built_at > self.rebuild_interval:
+            self.rebuild()
+
+        now = int(time.time() * 1000)
+        with self._lock:
+            reset_dates = [contribution[2] for contribution in self._contributions.values()]
+            plan_counts = dict(self._plan_counts)
+            totals = dict(self._totals)
+            total_users = len(self._contributions)
+
+        upcoming = [reset_date for reset_date in reset_dates if reset_date > now]
+        return {
+            'totalUsers': total_users,
+            'currentPeriodUsage': totals,
+            'usersNeedingReset': sum(1 for reset_date in reset_dates if now > reset_date),
+            'planDistribution': {plan: plan_counts.get(plan, 0) for plan in self.PLAN_TYPES},
+            'nextResetDate': min(upcoming) if upcoming else None,
+        }
+
+
+# Create a singleton instance
+usage_statistics = UsageStatisticsService()
@@ -7,8 +7,8 @@ usage validation before allowing transcription, translation, TTS, and AI operati
 
 import time
 from datetime import datetime
-from services.firebase_service import FirebaseService
 from services.user_account_service import UserAccountService
+from services.usage_statistics_service import usage_statistics
 
 
 class UsageValidationService:
@@ -68,6 +68,9 @@ class UsageValidationService:
                 )
                 user_data = user_ref.get()
 
+            # Keep the admin usage statistics current from this snapshot
+            usage_statistics.observe(user_id, user_data)
+
             # Extract subscription and usage data
             subscription = user_data.get('subscription', {})
             usage = user_data.get('usage', {})
@@ -76,20 +79,9 @@ class UsageValidationService:
             # Get subscription plan details
             plan_type = subscription.get('planType', 'free')
 
-            try:
-                # Get plan details from Firebase
-                firebase_service = FirebaseService()
-                plan_ref = firebase_service.get_ref(f'subscriptionPlans/{plan_type}')
-                plan_data = plan_ref.get()
-
-                if not plan_data:
-                    # Fallback to default limits
-                    plan_data = UsageValidationService.DEFAULT_PLAN_LIMITS.get(
-                        plan_type,
-                        UsageValidationService.DEFAULT_PLAN_LIMITS['free']
-                    )
-            except Exception as e:
-                print(f"Error getting plan data from Firebase: {str(e)}")
+            # Plan details come from the in-process plan cache
+            plan_data = usage_statistics.get_plan_data(plan_type)
+            if not plan_data:
                 # Fallback to default limits
                 plan_data = UsageValidationService.DEFAULT_PLAN_LIMITS.get(
                     plan_type,
@@ -135,7 +127,7 @@ class UsageValidationService:
             }
 
     @staticmethod
-    def validate_transcription_usage(user_email, minutes_requested):
+    def validate_transcription_usage(user_email, minutes_requested, record_overage=True):
         """
         Validate if user can perform transcription for the requested minutes.
         Now supports pay-as-you-go overage for Basic/Professional users.
@@ -143,6 +135,7 @@ class UsageValidationService:
         Args:
             user_email (str): User's email address
             minutes_requested (float): Minutes of transcription requested
+            record_overage (bool): Record pay-as-you-go overage (False for pre-checks)
 
         Returns:
             dict: Validation result with allowed status and details
@@ -197,11 +190,12 @@ class UsageValidationService:
                     overage_cost = overage_amount * OverageTrackingService.PAYG_PRICING['transcription']
 
                     # Record the overage usage immediately for real-time billing
-                    try:
-                        OverageTrackingService.record_overage_usage(user_email, 'transcription', overage_amount)
-                        logger.info(f"Recorded transcription overage: {overage_amount} minutes for {user_email}")
-                    except Exception as e:
-                        logger.error(f"Failed to record transcription overage: {str(e)}")
+                    if record_overage:
+                        try:
+                            OverageTrackingService.record_overage_usage(user_email, 'transcription', overage_amount)
+                            logger.info(f"Recorded transcription overage: {overage_amount} minutes for {user_email}")
+                        except Exception as e:
+                            logger.error(f"Failed to record transcription overage: {str(e)}")
 
                     return {
                         'allowed': True,
@@ -257,13 +251,14 @@ class UsageValidationService:
             }
 
     @staticmethod
-    def validate_translation_usage(user_email, words_requested):
+    def validate_translation_usage(user_email, words_requested, record_overage=True):
         """
         Validate if user can perform translation for the requested words.
 
         Args:
             user_email (str): User's email address
             words_requested (int): Number of words to translate
+            record_overage (bool): Record pay-as-you-go overage (False for pre-checks)
 
         Returns:
             dict: Validation result with allowed status and details
@@ -318,11 +313,12 @@ class UsageValidationService:
                     overage_cost = overage_amount * OverageTrackingService.PAYG_PRICING['translation']
 
                     # Record the overage usage immediately for real-time billing
-                    try:
-                        OverageTrackingService.record_overage_usage(user_email, 'translation', overage_amount)
-                        logger.info(f"Recorded translation overage: {overage_amount} words for {user_email}")
-                    except Exception as e:
-                        logger.error(f"Failed to record translation overage: {str(e)}")
+                    if record_overage:
+                        try:
+                            OverageTrackingService.record_overage_usage(user_email, 'translation', overage_amount)
+                            logger.info(f"Recorded translation overage: {overage_amount} words for {user_email}")
+                        except Exception as e:
+                            logger.error(f"Failed to record translation overage: {str(e)}")
 
                     return {
                         'allowed': True,
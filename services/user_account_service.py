@@ -10,6 +10,7 @@ import time
 from datetime import datetime, timedelta
 from firebase_config import initialize_firebase
 from models.firebase_models import FirebaseModel
+from services.permission_cache import permission_cache
 
 class UserAccountService(FirebaseModel):
     """Service for managing user account data in Firebase."""
@@ -155,6 +156,7 @@ class UserAccountService(FirebaseModel):
 
         # Update in Firebase
         UserAccountService.get_ref(f'users/{user_id}/subscription').update(subscription_data)
+        permission_cache.invalidate(user_id.replace(',', '.'))
 
         return subscription_data
 
@@ -0,0 +1,62 @@
+"""
+Webhook Inbox for VocalLocal
+
+Stripe webhook requests used to run their handlers (billing history, PDF
+invoice, confirmation email) inside the HTTP request, so slow SMTP or PDF
+generation made Stripe time out and redeliver the event, producing duplicate
+invoices and emails. The webhook route now only verifies the signature,
+records the event here keyed by its Stripe event ID, and answers 200 at once.
+The inbox's background worker (services/work_queue.py) runs the handlers,
+retrying failures with backoff. A redelivered event ID is acknowledged
+without being processed again.
+"""
+
+import json
+import logging
+from services.work_queue import FirebaseWorkQueue
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookInbox(FirebaseWorkQueue):
+    """Durable, idempotent queue of webhook events processed in the background."""
+
+    ROOT = 'webhook_events'
+    # Keep a small tombstone for idempotency; the payload is no longer needed
+    DONE_CLEAR_FIELDS = ('payload',)
+
+    def __init__(self):
+        super().__init__()
+        self.handler = None
+
+    def set_handler(self, handler):
+        """Set the callable that processes an event dict; it returns a dict with 'error' on failure."""
+        self.handler = handler
+
+    def record(self, event_id, event_type, payload):
+        """
+        Persist a verified event and queue it for processing.
+
+        Args:
+            event_id (str): Stripe event ID (the idempotency key)
+            event_type (str): Stripe event type
+            payload (str): Raw JSON body of the event
+
+        Returns:
+            bool: True if the event was new, False if it was already recorded
+        """
+        if not self._add(event_id, {'type': event_type, 'payload': payload}):
+            logger.info(f"Webhook event {event_id} already recorded, ignoring redelivery")
+            return False
+        return True
+
+    def _handle(self, event_id, event):
+        result = self.handler(json.loads(event['payload']))
+        error = result.get('error') if isinstance(result, dict) else None
+        if not error:
+            logger.info(f"Processed webhook event {event_id} ({event['type']})")
+        return error
+
+
+# Create a singleton instance
+webhook_inbox = WebhookInbox()
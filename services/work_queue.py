@@ -0,0 +1,196 @@
+"""
+Durable background work queue backed by Firebase.
+
+Items live in `{ROOT}/{key}` with a status of pending, processing, done or
+failed. A background worker per process claims items through Firebase
+transactions, so several workers can share a queue. Failures are retried with
+backoff up to MAX_ATTEMPTS. A claim that is not completed within
+LEASE_SECONDS (the worker died) is taken over by the next sweep, which also
+picks up due retries and items left behind by a previous process.
+
+Subclasses set ROOT and implement _handle(); see services/webhook_inbox.py and
+services/email_outbox.py.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from models.firebase_models import FirebaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentError(Exception):
+    """Raised by a handler for failures that retrying cannot fix."""
+
+
+class _Exists(Exception):
+    """Raised inside the add transaction when the key is already present."""
+
+
+class _NotClaimable(Exception):
+    """Raised inside the claim transaction when the item is not due or is held."""
+
+
+class FirebaseWorkQueue:
+    """Base class for durable queues processed by a background worker thread."""
+
+    ROOT = None
+    MAX_ATTEMPTS = 5
+    # Seconds to wait before the 2nd, 3rd, ... attempt
+    RETRY_DELAYS = (30, 120, 600, 1800)
+    # A claim older than this is assumed lost and can be taken over
+    LEASE_SECONDS = 600
+    # Seconds between scans for due retries and abandoned items
+    SWEEP_INTERVAL = 60
+    # Items claimed and handled together once the worker wakes up
+    BATCH_SIZE = 1
+    # Fields dropped once an item is done (large payloads no longer needed)
+    DONE_CLEAR_FIELDS = ()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._worker_pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _now_ms():
+        return int(time.time() * 1000)
+
+    def _ref(self, key=None):
+        return FirebaseModel.get_ref(f'{self.ROOT}/{key}' if key else self.ROOT)
+
+    def _add(self, key, fields):
+        """
+        Persist a new item and queue it for this process's worker.
+
+        Returns:
+            bool: True if the item was added, False if the key already existed
+        """
+        now = self._now_ms()
+
+        def create(current):
+            if current:
+                raise _Exists()
+            return dict(fields, status='pending', attempts=0, createdAt=now, nextAttemptAt=now)
+
+        try:
+            self._ref(key).transaction(create)
+        except _Exists:
+            return False
+
+        self.start()
+        self._queue.put(key)
+        return True
+
+    def _claim(self, key):
+        """Mark a due item as processing by this worker; None if it is not claimable."""
+        now = self._now_ms()
+
+        def claim(current):
+            if not current:
+                raise _NotClaimable()
+            status = current.get('status')
+            due = status == 'pending' and current.get('nextAttemptAt', 0) <= now
+            abandoned = status == 'processing' and now - current.get('claimedAt', 0) > self.LEASE_SECONDS * 1000
+            if not (due or abandoned):
+                raise _NotClaimable()
+            current.update(status='processing', claimedAt=now, attempts=current.get('attempts', 0) + 1)
+            return current
+
+        try:
+            return self._ref(key).transaction(claim)
+        except _NotClaimable:
+            return None
+
+    def _handle(self, key, item):
+        """Process a claimed item; return an error message (or raise) on failure."""
+        raise NotImplementedError
+
+    def _complete(self, key, item, error=None, permanent=False):
+        """Record the outcome of an attempt: done, a scheduled retry, or failed."""
+        now = self._now_ms()
+        if not error:
+            update = {'status': 'done', 'completedAt': now, 'lastError': None}
+            update.update(dict.fromkeys(self.DONE_CLEAR_FIELDS))
+            self._ref(key).update(update)
+        elif permanent or item['attempts'] >= self.MAX_ATTEMPTS:
+            self._ref(key).update({'status': 'failed', 'completedAt': now, 'lastError': error})
+            logger.error(f"{self.ROOT}/{key} failed after {item['attempts']} attempts: {error}")
+        else:
+            delay = self.RETRY_DELAYS[min(item['attempts'], len(self.RETRY_DELAYS)) - 1]
+            self._ref(key).update({'status': 'pending', 'nextAttemptAt': now + delay * 1000, 'lastError': error})
+            logger.warning(f"{self.ROOT}/{key} attempt {item['attempts']} failed, retrying in {delay}s: {error}")
+
+    def process(self, key):
+        """Claim an item and handle it, recording success or scheduling a retry."""
+        item = self._claim(key)
+        if item is None:
+            return
+        try:
+            self._complete(key, item, self._handle(key, item))
+        except PermanentError as e:
+            self._complete(key, item, str(e), permanent=True)
+        except Exception as e:
+            self._complete(key, item, str(e))
+
+    def _process_batch(self, keys):
+        for key in keys:
+            self.process(key)
+
+    def _idle(self):
+        """Called when the worker has had nothing to do for SWEEP_INTERVAL seconds."""
+
+    def sweep(self):
+        """Queue items that are due: retries, and items left behind by a stopped worker."""
+        now = self._now_ms()
+        due = []
+        for status in ('pending', 'processing'):
+            items = self._ref().order_by_child('status').equal_to(status).get() or {}
+            for key, item in items.items():
+                if status == 'pending' and item.get('nextAttemptAt', 0) <= now:
+                    due.append(key)
+                elif status == 'processing' and now - item.get('claimedAt', 0) > self.LEASE_SECONDS * 1000:
+                    due.append(key)
+        for key in due:
+            self._queue.put(key)
+        return due
+
+    def _run(self):
+        last_sweep = 0
+        while True:
+            if time.monotonic() - last_sweep >= self.SWEEP_INTERVAL:
+                last_sweep = time.monotonic()
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"{self.ROOT} sweep failed: {str(e)}")
+            try:
+                keys = [self._queue.get(timeout=self.SWEEP_INTERVAL)]
+            except queue.Empty:
+                self._idle()
+                continue
+            while len(keys) < self.BATCH_SIZE:
+                try:
+                    keys.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._process_batch(list(dict.fromkeys(keys)))
+            except Exception as e:
+                logger.error(f"Error processing {self.ROOT} batch: {str(e)}")
+
+    def start(self):
+        """Start the background worker for this process (no-op if it is running)."""
+        # Checked by PID: a worker thread does not survive a fork. Called on
+        # every request, so the common case does not take the lock
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._worker_pid = os.getpid()
+            self._queue = queue.Queue()
+            threading.Thread(target=self._run, name=self.ROOT, daemon=True).start()
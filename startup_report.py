@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Startup profiling report for VocalLocal.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+summarises where boot time goes: total wall time, the slowest top-level
+packages and the slowest individual modules (self time).
+
+Usage:
+    python startup_report.py                 # profile `import app`
+    python startup_report.py --module app --top 25
+    python startup_report.py --no-fast-start # compare with eager initialization
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+
+def run_importtime(module, extra_env=None):
+    """
+    Import a module in a subprocess with -X importtime.
+
+    Returns:
+        Tuple of (wall_seconds, list of (self_us, cumulative_us, depth, name), returncode)
+    """
+    env = dict(os.environ, **(extra_env or {}))
+    cmd = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+
+    start = time.time()
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    wall = time.time() - start
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.replace('import time:', '', 1).split('|', 2)
+            # Nested imports are indented by two spaces per level after the separator
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+        except ValueError:
+            continue
+
+    if result.returncode != 0:
+        errors = [l for l in result.stderr.splitlines() if not l.startswith('import time:')]
+        print("⚠️  Import finished with errors (timings up to the failure are still reported):")
+        for line in errors[-5:]:
+            print(f"    {line}")
+
+    return wall, entries, result.returncode
+
+
+def summarize(entries, top):
+    """Aggregate self time per top-level package and pick slow modules."""
+    packages = {}
+    for self_us, cumulative_us, depth, name in entries:
+        root = name.split('.')[0]
+        packages[root] = packages.get(root, 0) + self_us
+
+    slow_packages = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    slow_modules = sorted(entries, key=lambda entry: entry[0], reverse=True)[:top]
+    return slow_packages, slow_modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report where VocalLocal spends its startup time')
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--top', type=int, default=15, help='Number of rows per table')
+    parser.add_argument('--no-fast-start', action='store_true',
+                        help='Profile with FAST_START=false (eager SDK and model initialization)')
+    args = parser.parse_args()
+
+    extra_env = {'FAST_START': 'false' if args.no_fast_start else 'true'}
+    print(f"Profiling `import {args.module}` (FAST_START={extra_env['FAST_START']})...")
+
+    wall, entries, _ = run_importtime(args.module, extra_env)
+    if not entries:
+        print("❌ No import timings captured")
+        return 1
+
+    total_us = sum(cumulative for _, cumulative, depth, _ in entries if depth == 0)
+    slow_packages, slow_modules = summarize(entries, args.top)
+
+    print()
+    print(f"Wall time:           {wall:.2f}s")
+    print(f"Total import time:   {total_us / 1e6:.2f}s across {len(entries)} modules")
+
+    print()
+    print("Slowest top-level packages (self time of all their modules):")
+    for name, cumulative_us in slow_packages:
+        share = cumulative_us / total_us * 100 if total_us else 0
+        print(f"  {cumulative_us / 1000:9.1f} ms  {share:5.1f}%  {name}")
+
+    print()
+    print("Slowest modules (self time):")
+    for self_us, cumulative_us, _, name in slow_modules:
+        print(f"  {self_us / 1000:9.1f} ms  {name}")
+
+    heavy = [name for name in ('google.generativeai', 'tiktoken', 'grpc')
+             if any(entry[3] == name for entry in entries)]
+    print()
+    if heavy:
+        print(f"⚠️  Imported at startup: {', '.join(heavy)}")
+    else:
+        print("✅ google.generativeai, tiktoken and grpc are not imported at startup")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -72,6 +72,11 @@ document.addEventListener('DOMContentLoaded', function() {
     const maxAttempts = 60; // 5 minutes (5s intervals)
     let attempts = 0;
 
+    // The server answers 304 (after waiting up to `wait` seconds, if enabled)
+    // while the job's ETag is unchanged, so unchanged polls carry no body
+    let etag = null;
+    let lastStatus = null;
+
     const statusElement = document.getElementById('status');
     if (statusElement) {
       statusElement.textContent = 'Processing large file in background...';
@@ -81,12 +86,18 @@ document.addEventListener('DOMContentLoaded', function() {
     function checkStatus() {
       console.log(`Checking status for job ${jobId}, attempt ${attempts + 1}`);
 
-      fetch(`/api/transcription_status/${jobId}`)
+      fetch(`/api/transcription_status/${jobId}?wait=25`, {
+        headers: etag ? { 'If-None-Match': etag } : {}
+      })
         .then(response => {
+          if (response.status === 304 && lastStatus) {
+            return lastStatus;
+          }
           if (!response.ok) {
             throw new Error(`Server error: ${response.status}`);
           }
-          return response.json();
+          etag = response.headers.get('ETag');
+          return response.json().then(status => (lastStatus = status));
         })
         .then(status => {
           console.log(`Job ${jobId} status:`, status);
@@ -26,8 +26,23 @@ class CacheManager {
 
   async registerServiceWorker() {
     try {
-      this.swRegistration = await navigator.serviceWorker.register('/static/sw.js');
+      // Earlier versions registered /static/sw.js, whose scope did not cover the pages
+      const registrations = await navigator.serviceWorker.getRegistrations();
+      for (const registration of registrations) {
+        const worker = registration.active || registration.waiting || registration.installing;
+        if (worker && new URL(worker.scriptURL).pathname === '/static/sw.js') {
+          await registration.unregister();
+        }
+      }
+
+      this.swRegistration = await navigator.serviceWorker.register('/sw.js', { scope: '/' });
       console.log('Cache Manager: Service worker registered successfully');
+
+      // An update that installed while no page was open is still waiting
+      if (this.swRegistration.waiting && navigator.serviceWorker.controller) {
+        this.updateAvailable = true;
+        this.showUpdateNotification();
+      }
       
       // Check for updates immediately
       this.swRegistration.addEventListener('updatefound', () => {
@@ -38,7 +53,7 @@ class CacheManager {
       // Check for updates periodically
       setInterval(() => {
         this.swRegistration.update();
-      }, 60000); // Check every minute
+      }, 60 * 60 * 1000); // Check every hour
       
     } catch (error) {
       console.error('Cache Manager: Service worker registration failed:', error);
@@ -153,11 +168,9 @@ class CacheManager {
 
   async applyUpdate() {
     if (this.swRegistration && this.swRegistration.waiting) {
-      // Tell the waiting service worker to skip waiting
+      // Tell the waiting service worker to skip waiting; the page reloads
+      // when it takes control (controllerchange)
       this.swRegistration.waiting.postMessage({ type: 'SKIP_WAITING' });
-      
-      // Reload the page to get the new version
-      window.location.reload();
     }
   }
 
@@ -169,7 +182,13 @@ class CacheManager {
   }
 
   setupUpdateListener() {
+    // The first worker taking control of an uncontrolled page is not an update
+    let hadController = !!navigator.serviceWorker.controller;
     navigator.serviceWorker.addEventListener('controllerchange', () => {
+      if (!hadController) {
+        hadController = true;
+        return;
+      }
       console.log('Cache Manager: New service worker took control');
       window.location.reload();
     });
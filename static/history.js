@@ -11,8 +11,16 @@ document.addEventListener('DOMContentLoaded', function() {
   let filteredItems = [];
   let currentTypeFilter = currentType;
 
+  // Items are loaded a page at a time from /api/history
+  const historyList = document.getElementById('history-list');
+  const historyType = historyList.dataset.historyType || 'all';
+  const serverSort = historyList.dataset.sort || 'newest';
+  const serverPageSize = parseInt(historyList.dataset.pageSize, 10) || 20;
+  let nextCursor = historyList.dataset.nextCursor || null;
+  let isLoadingMore = false;
+
   // Get all history items and initialize
-  const historyItems = Array.from(document.querySelectorAll('.history-item'));
+  let historyItems = Array.from(document.querySelectorAll('.history-item'));
   console.log('Found history items:', historyItems.length);
 
   // Define type filter functions first
@@ -34,6 +42,12 @@ document.addEventListener('DOMContentLoaded', function() {
         currentTypeFilter = this.dataset.type;
         console.log('Current type filter set to:', currentTypeFilter);
 
+        // The server filters by type, so reload when more pages exist
+        if (nextCursor || historyType !== 'all') {
+          reloadWithParams({ type: currentTypeFilter });
+          return;
+        }
+
         // Apply the filter
         applyTypeFilter(currentTypeFilter);
 
@@ -90,8 +104,8 @@ document.addEventListener('DOMContentLoaded', function() {
   // Apply initial type filter
   applyTypeFilter(currentTypeFilter);
 
-  // Sort items by timestamp (newest first by default)
-  sortItems('newest');
+  // Sort items by timestamp in the order the server returned them
+  sortItems(serverSort);
 
   // Initialize pagination
   updatePagination();
@@ -109,6 +123,14 @@ document.addEventListener('DOMContentLoaded', function() {
     if (currentPage < totalPages) {
       currentPage++;
       updatePagination();
+    } else if (nextCursor) {
+      // Past the loaded items: fetch the next page from the server
+      loadMoreItems().then(loaded => {
+        if (loaded && currentPage < Math.ceil(filteredItems.length / itemsPerPage)) {
+          currentPage++;
+        }
+        updatePagination();
+      });
     }
   });
 
@@ -127,48 +149,51 @@ document.addEventListener('DOMContentLoaded', function() {
   // Handle sort selection
   const sortSelect = document.getElementById('sort-select');
   sortSelect.addEventListener('change', function() {
+    // Only a fully loaded history can be re-sorted in the browser
+    if (nextCursor || this.value !== serverSort) {
+      reloadWithParams({ sort: this.value });
+      return;
+    }
     sortItems(this.value);
   });
 
-  // Handle view full text buttons
-  document.querySelectorAll('.view-full-text').forEach(button => {
-    button.addEventListener('click', function() {
-      const text = this.dataset.text;
-      const originalText = this.dataset.original;
-      const translatedText = this.dataset.translated;
+  // Handle view full text buttons (delegated so pages loaded later work too)
+  historyList.addEventListener('click', function(event) {
+    const button = event.target.closest('.view-full-text');
+    if (!button) {
+      return;
+    }
 
+    loadItemBody(button.closest('.history-item')).then(body => {
       // Create modal for viewing full text
       const modal = document.createElement('div');
       modal.className = 'modal';
 
-      let modalContent = '';
-      if (originalText && translatedText) {
-        // Translation view
-        modalContent = `
-          <div class="modal-content">
-            <span class="close-modal">&times;</span>
-            <h3>Original Text</h3>
-            <div class="full-text-container">${originalText}</div>
-            <h3>Translated Text</h3>
-            <div class="full-text-container">${translatedText}</div>
-          </div>
-        `;
-      } else {
-        // Transcription view
-        modalContent = `
-          <div class="modal-content">
-            <span class="close-modal">&times;</span>
-            <h3>Full Transcription</h3>
-            <div class="full-text-container">${text}</div>
-          </div>
-        `;
-      }
+      const modalContent = document.createElement('div');
+      modalContent.className = 'modal-content';
+      const closeButton = document.createElement('span');
+      closeButton.className = 'close-modal';
+      closeButton.innerHTML = '&times;';
+      modalContent.appendChild(closeButton);
+
+      const sections = body.translated_text !== undefined
+        ? [['Original Text', body.original_text], ['Translated Text', body.translated_text]]  // Translation view
+        : [['Full Transcription', body.text]];  // Transcription view
+      sections.forEach(([title, text]) => {
+        const heading = document.createElement('h3');
+        heading.textContent = title;
+        const container = document.createElement('div');
+        container.className = 'full-text-container';
+        container.textContent = text || '';
+        modalContent.appendChild(heading);
+        modalContent.appendChild(container);
+      });
 
-      modal.innerHTML = modalContent;
+      modal.appendChild(modalContent);
       document.body.appendChild(modal);
 
       // Handle close button
-      modal.querySelector('.close-modal').addEventListener('click', function() {
+      closeButton.addEventListener('click', function() {
         document.body.removeChild(modal);
       });
 
@@ -178,14 +203,21 @@ document.addEventListener('DOMContentLoaded', function() {
           document.body.removeChild(modal);
         }
       });
+    }).catch(error => {
+      console.error('Error loading full text:', error);
     });
   });
 
   // Handle copy text buttons
-  document.querySelectorAll('.copy-text').forEach(button => {
-    button.addEventListener('click', function() {
-      const text = this.dataset.text;
-      navigator.clipboard.writeText(text).then(() => {
+  historyList.addEventListener('click', function(event) {
+    const button = event.target.closest('.copy-text');
+    if (!button) {
+      return;
+    }
+
+    loadItemBody(button.closest('.history-item'))
+      .then(body => navigator.clipboard.writeText(body.translated_text !== undefined ? body.translated_text : body.text))
+      .then(() => {
         // Show copy success notification
         const notification = document.createElement('div');
         notification.className = 'notification success';
@@ -196,10 +228,47 @@ document.addEventListener('DOMContentLoaded', function() {
         setTimeout(() => {
           document.body.removeChild(notification);
         }, 2000);
+      })
+      .catch(error => {
+        console.error('Error copying text:', error);
       });
-    });
   });
 
+  // Full texts are fetched on demand; listings only carry a preview
+  const bodyCache = new Map();
+
+  function loadItemBody(itemElement) {
+    const viewButton = itemElement.querySelector('.view-full-text');
+
+    // Entries written before the metadata/body split carry their text inline
+    if (viewButton.dataset.translated !== undefined) {
+      return Promise.resolve({
+        original_text: viewButton.dataset.original,
+        translated_text: viewButton.dataset.translated
+      });
+    }
+    if (viewButton.dataset.text !== undefined) {
+      return Promise.resolve({ text: viewButton.dataset.text });
+    }
+
+    const cacheKey = `${itemElement.dataset.type}/${itemElement.dataset.id}`;
+    if (!bodyCache.has(cacheKey)) {
+      const request = fetch(`/api/history/${cacheKey}`, { credentials: 'same-origin' })
+        .then(response => {
+          if (!response.ok) {
+            throw new Error(`History item request failed with status ${response.status}`);
+          }
+          return response.json();
+        })
+        .catch(error => {
+          bodyCache.delete(cacheKey);
+          throw error;
+        });
+      bodyCache.set(cacheKey, request);
+    }
+    return bodyCache.get(cacheKey);
+  }
+
   // Replay functionality has been removed
 
   // Helper functions
@@ -212,7 +281,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Update button states
     document.getElementById('prev-page').disabled = currentPage === 1;
-    document.getElementById('next-page').disabled = currentPage === totalPages || totalPages === 0;
+    document.getElementById('next-page').disabled = (currentPage >= totalPages || totalPages === 0) && !nextCursor;
 
     // First, hide ALL history items
     console.log('Hiding all', historyItems.length, 'history items');
@@ -310,6 +379,145 @@ document.addEventListener('DOMContentLoaded', function() {
     updatePagination();
   }
 
+  function reloadWithParams(params) {
+    const url = new URL(window.location.href);
+    Object.keys(params).forEach(key => url.searchParams.set(key, params[key]));
+    window.location.href = url.toString();
+  }
+
+  function loadMoreItems() {
+    if (!nextCursor || isLoadingMore) {
+      return Promise.resolve(false);
+    }
+    isLoadingMore = true;
+    document.getElementById('next-page').disabled = true;
+
+    const params = new URLSearchParams({
+      type: historyType,
+      sort: serverSort,
+      limit: serverPageSize,
+      cursor: nextCursor
+    });
+
+    return fetch(`/api/history?${params.toString()}`, { credentials: 'same-origin' })
+      .then(response => {
+        if (!response.ok) {
+          throw new Error(`History request failed with status ${response.status}`);
+        }
+        return response.json();
+      })
+      .then(page => {
+        page.items.forEach(item => {
+          historyList.appendChild(renderHistoryItem(item));
+        });
+        nextCursor = page.has_more ? page.next_cursor : null;
+
+        historyItems = Array.from(historyList.querySelectorAll('.history-item'));
+        const searchTerm = searchInput.value.toLowerCase().trim();
+        filteredItems = getTypeFilteredItems().filter(item =>
+          searchTerm === '' || item.textContent.toLowerCase().includes(searchTerm)
+        );
+        sortItems(sortSelect.value);
+        updateStatusText();
+        return page.items.length > 0;
+      })
+      .catch(error => {
+        console.error('Error loading more history:', error);
+        return false;
+      })
+      .finally(() => {
+        isLoadingMore = false;
+      });
+  }
+
+  function renderHistoryItem(entry) {
+    const item = entry.data || {};
+    const isTranscription = entry.type === 'transcription';
+    const timestamp = item.timestamp || '';
+    const [datePart, timePart = ''] = timestamp.split('T');
+
+    const element = document.createElement('div');
+    element.className = `history-item ${entry.type}-item`;
+    element.dataset.id = entry.id;
+    element.dataset.timestamp = timestamp;
+    element.dataset.type = entry.type;
+    element.style.display = 'none';
+
+    const header = document.createElement('div');
+    header.className = 'history-item-header';
+    header.innerHTML = isTranscription
+      ? '<div class="history-item-type"><i class="fas fa-microphone"></i> Transcription</div>'
+      : '<div class="history-item-type"><i class="fas fa-language"></i> Translation</div>';
+
+    const meta = document.createElement('div');
+    meta.className = 'history-item-meta';
+    const metaFields = [
+      ['history-item-date', datePart],
+      ['history-item-time', timePart.split('.')[0]],
+      ['history-item-lang', isTranscription ? item.language : `${item.source_language} → ${item.target_language}`],
+      ['history-item-model', item.model]
+    ];
+    metaFields.forEach(([className, value]) => {
+      const span = document.createElement('span');
+      span.className = className;
+      span.textContent = value || '';
+      meta.appendChild(span);
+    });
+    header.appendChild(meta);
+    element.appendChild(header);
+
+    const content = document.createElement('div');
+    content.className = 'history-item-content';
+    const actions = document.createElement('div');
+    actions.className = 'history-item-actions';
+    const viewButton = document.createElement('button');
+    viewButton.className = 'button button-small view-full-text';
+    viewButton.textContent = 'View Full';
+    const copyButton = document.createElement('button');
+    copyButton.className = 'button button-small copy-text';
+    copyButton.textContent = 'Copy';
+
+    if (isTranscription) {
+      const inline = item.preview === undefined;
+      const text = inline ? (item.text || '') : item.preview;
+      const paragraph = document.createElement('p');
+      paragraph.textContent = text ? truncate(text, 150, item.char_count) : 'No text available';
+      content.appendChild(paragraph);
+      if (inline) {
+        viewButton.dataset.text = text;
+      }
+    } else {
+      const inline = item.translated_preview === undefined;
+      const originalText = inline ? (item.original_text || '') : item.original_preview;
+      const translatedText = inline ? (item.translated_text || '') : item.translated_preview;
+      const wrapper = document.createElement('div');
+      wrapper.className = 'translation-content';
+      const original = document.createElement('p');
+      original.className = 'original-text';
+      original.textContent = originalText ? truncate(originalText, 100, item.original_chars) : 'No original text';
+      const translated = document.createElement('p');
+      translated.className = 'translated-text';
+      translated.textContent = translatedText ? truncate(translatedText, 100, item.translated_chars) : 'No translation';
+      wrapper.appendChild(original);
+      wrapper.appendChild(translated);
+      content.appendChild(wrapper);
+      if (inline) {
+        viewButton.dataset.original = originalText;
+        viewButton.dataset.translated = translatedText;
+      }
+    }
+
+    actions.appendChild(viewButton);
+    actions.appendChild(copyButton);
+    element.appendChild(content);
+    element.appendChild(actions);
+    return element;
+  }
+
+  function truncate(text, length, fullLength) {
+    return Math.max(text.length, fullLength || 0) > length ? `${text.slice(0, length)}...` : text;
+  }
+
   // Debounce function to limit how often a function is called
   function debounce(func, wait) {
     let timeout;
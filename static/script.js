@@ -3130,14 +3130,27 @@ function updateModelDropdown(selectElement, models, modelType) {
     const maxAttempts = 60; // 5 minutes (5s intervals)
     let attempts = 0;
 
+    // The server answers 304 (after waiting up to `wait` seconds, if enabled)
+    // while the job's ETag is unchanged, so unchanged polls carry no body
+    let etag = null;
+    let lastStatus = null;
+
     showStatus('Processing large file in background...', 'info', true);
 
     const checkStatus = async () => {
       try {
         console.log(`📡 Checking status for job ${jobId}, attempt ${attempts + 1}/${maxAttempts}`);
 
-        const response = await fetch(`/api/transcription_status/${jobId}`);
-        const status = await response.json();
+        const response = await fetch(`/api/transcription_status/${jobId}?wait=25`, {
+          headers: etag ? { 'If-None-Match': etag } : {}
+        });
+        let status;
+        if (response.status === 304 && lastStatus) {
+          status = lastStatus;
+        } else {
+          etag = response.headers.get('ETag');
+          status = lastStatus = await response.json();
+        }
 
         console.log(`📋 Received status for job ${jobId}:`, status);
 
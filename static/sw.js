@@ -1,64 +1,65 @@
 /**
  * Service Worker for VocalLocal
  * Handles caching strategies and ensures users get the latest version of assets
+ *
+ * Served at /sw.js so it controls every page. build_assets.py writes the
+ * deployed copy (static/dist/sw.js) with BUILD filled in from the asset
+ * manifest: every content-hashed asset and bundle is precached on install,
+ * and the version changes whenever any of them does.
+ *
+ * - Hashed assets (/static/dist/): cache first, they never change
+ * - Other JS/CSS: stale-while-revalidate
+ * - Pages: network first; the recording UI (/) is kept for offline use,
+ *   with /static/offline.html as the last resort
+ * - API requests and other origins are not intercepted
  */
 
-const CACHE_NAME = 'vocallocal-v1';
-const STATIC_CACHE_NAME = 'vocallocal-static-v1';
-const DYNAMIC_CACHE_NAME = 'vocallocal-dynamic-v1';
-
-// Assets to cache immediately
-const STATIC_ASSETS = [
-  '/static/styles.css',
-  '/static/auth.css',
-  '/static/home.css',
-  '/static/history.css',
-  '/static/script.js',
-  '/static/auth.js',
-  '/static/common.js',
-  '/static/home.js',
-  '/static/history.js',
-  '/static/favicon.ico'
-];
-
-// Install event - cache static assets
+// Filled in by build_assets.py; nothing is precached in development
+const BUILD = {"version": "dev", "precache": []};
+
+const CACHE_PREFIX = 'vocallocal-';
+const PRECACHE_NAME = `${CACHE_PREFIX}precache-${BUILD.version}`;
+const RUNTIME_CACHE_NAME = `${CACHE_PREFIX}runtime`;
+const SHELL_CACHE_NAME = `${CACHE_PREFIX}shell`;
+const RUNTIME_MAX_ENTRIES = 150;
+
+// Pages kept for offline use (the recording UI), and the fallback page
+const SHELL_PATHS = ['/'];
+const OFFLINE_PAGE = '/static/offline.html';
+
+// Install event - precache the build
 self.addEventListener('install', event => {
-  console.log('Service Worker: Installing...');
-  
+  console.log('Service Worker: Installing', BUILD.version);
+
   event.waitUntil(
-    caches.open(STATIC_CACHE_NAME)
-      .then(cache => {
-        console.log('Service Worker: Caching static assets');
-        return cache.addAll(STATIC_ASSETS);
-      })
+    caches.open(PRECACHE_NAME)
+      .then(cache => cache.addAll([OFFLINE_PAGE, ...BUILD.precache]))
       .then(() => {
-        console.log('Service Worker: Static assets cached');
-        return self.skipWaiting();
-      })
-      .catch(error => {
-        console.error('Service Worker: Error caching static assets:', error);
+        console.log('Service Worker: Precached', BUILD.precache.length, 'assets');
+        // The first install takes over at once; an update waits until the page
+        // asks for it (SKIP_WAITING) so a recording is never reloaded mid-way
+        if (!self.registration.active) {
+          return self.skipWaiting();
+        }
       })
   );
 });
 
-// Activate event - clean up old caches
+// Activate event - drop the caches of previous versions
 self.addEventListener('activate', event => {
   console.log('Service Worker: Activating...');
-  
+
   event.waitUntil(
     caches.keys()
-      .then(cacheNames => {
-        return Promise.all(
-          cacheNames.map(cacheName => {
-            if (cacheName !== STATIC_CACHE_NAME && 
-                cacheName !== DYNAMIC_CACHE_NAME &&
-                cacheName !== CACHE_NAME) {
-              console.log('Service Worker: Deleting old cache:', cacheName);
-              return caches.delete(cacheName);
-            }
+      .then(cacheNames => Promise.all(
+        cacheNames
+          .filter(cacheName => cacheName.startsWith(CACHE_PREFIX) &&
+                               ![PRECACHE_NAME, RUNTIME_CACHE_NAME, SHELL_CACHE_NAME].includes(cacheName))
+          .map(cacheName => {
+            console.log('Service Worker: Deleting old cache:', cacheName);
+            return caches.delete(cacheName);
           })
-        );
-      })
+      ))
       .then(() => {
         console.log('Service Worker: Activated');
         return self.clients.claim();
@@ -70,100 +71,107 @@ self.addEventListener('activate', event => {
 self.addEventListener('fetch', event => {
   const { request } = event;
   const url = new URL(request.url);
-  
-  // Skip non-GET requests
-  if (request.method !== 'GET') {
-    return;
-  }
-  
-  // Skip external requests
-  if (url.origin !== location.origin) {
-    return;
-  }
-  
-  // Handle static assets with version parameter (cache first)
-  if (url.pathname.startsWith('/static/') && url.searchParams.has('v')) {
-    event.respondWith(
-      caches.match(request)
-        .then(response => {
-          if (response) {
-            console.log('Service Worker: Serving versioned asset from cache:', url.pathname);
-            return response;
-          }
-          
-          return fetch(request)
-            .then(fetchResponse => {
-              if (fetchResponse.ok) {
-                const responseClone = fetchResponse.clone();
-                caches.open(STATIC_CACHE_NAME)
-                  .then(cache => {
-                    cache.put(request, responseClone);
-                  });
-              }
-              return fetchResponse;
-            });
-        })
-    );
+
+  // Skip non-GET and external requests
+  if (request.method !== 'GET' || url.origin !== location.origin) {
     return;
   }
-  
-  // Handle static assets without version (network first, fallback to cache)
-  if (url.pathname.startsWith('/static/')) {
-    event.respondWith(
-      fetch(request)
-        .then(response => {
-          if (response.ok) {
-            const responseClone = response.clone();
-            caches.open(DYNAMIC_CACHE_NAME)
-              .then(cache => {
-                cache.put(request, responseClone);
-              });
-          }
-          return response;
-        })
-        .catch(() => {
-          console.log('Service Worker: Network failed, serving static asset from cache:', url.pathname);
-          return caches.match(request);
-        })
-    );
+
+  if (request.mode === 'navigate') {
+    event.respondWith(handleNavigation(event, url));
     return;
   }
-  
-  // Handle HTML pages (network first)
-  if (request.headers.get('accept').includes('text/html')) {
-    event.respondWith(
-      fetch(request)
-        .then(response => {
-          if (response.ok) {
-            const responseClone = response.clone();
-            caches.open(DYNAMIC_CACHE_NAME)
-              .then(cache => {
-                cache.put(request, responseClone);
-              });
-          }
-          return response;
-        })
-        .catch(() => {
-          console.log('Service Worker: Network failed, serving HTML from cache:', url.pathname);
-          return caches.match(request);
-        })
-    );
+
+  if (url.pathname.startsWith('/static/dist/')) {
+    event.respondWith(cacheFirst(request));
     return;
   }
-  
-  // Handle API requests (network only)
-  if (url.pathname.startsWith('/api/')) {
-    event.respondWith(fetch(request));
+
+  if (url.pathname.startsWith('/static/') && /\.(js|css)$/.test(url.pathname)) {
+    event.respondWith(staleWhileRevalidate(event, request));
     return;
   }
+
+  // Everything else (API requests, uploads, images) goes to the network as usual
 });
 
+function cacheFirst(request) {
+  return caches.match(request).then(cached => {
+    if (cached) {
+      return cached;
+    }
+    return fetch(request).then(response => {
+      if (response.ok) {
+        const responseClone = response.clone();
+        caches.open(RUNTIME_CACHE_NAME).then(cache => cache.put(request, responseClone));
+      }
+      return response;
+    });
+  });
+}
+
+function staleWhileRevalidate(event, request) {
+  return caches.open(RUNTIME_CACHE_NAME).then(cache =>
+    cache.match(request).then(cached => {
+      const network = fetch(request).then(response => {
+        if (response.ok) {
+          return cache.put(request, response.clone())
+            .then(() => trimCache(cache))
+            .then(() => response);
+        }
+        return response;
+      });
+
+      if (cached) {
+        // Serve the cached copy now and refresh it for next time
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+      }
+      return network;
+    })
+  );
+}
+
+function trimCache(cache) {
+  return cache.keys().then(keys => Promise.all(
+    keys.slice(0, Math.max(0, keys.length - RUNTIME_MAX_ENTRIES)).map(key => cache.delete(key))
+  ));
+}
+
+function handleNavigation(event, url) {
+  if (url.pathname.endsWith('/logout')) {
+    // Do not keep a signed-in page once the user signs out
+    event.waitUntil(caches.delete(SHELL_CACHE_NAME));
+    return fetch(event.request);
+  }
+
+  return fetch(event.request)
+    .then(response => {
+      if (response.ok && !response.redirected && SHELL_PATHS.includes(url.pathname)) {
+        const responseClone = response.clone();
+        event.waitUntil(caches.open(SHELL_CACHE_NAME).then(cache => cache.put(url.pathname, responseClone)));
+      }
+      return response;
+    })
+    .catch(() => {
+      console.log('Service Worker: Network failed, serving offline shell for:', url.pathname);
+      return caches.open(SHELL_CACHE_NAME)
+        .then(cache => cache.match(url.pathname).then(page => page || cache.match('/')))
+        .then(page => page || caches.match(OFFLINE_PAGE));
+    });
+}
+
 // Message event - handle cache updates
 self.addEventListener('message', event => {
   if (event.data && event.data.type === 'SKIP_WAITING') {
     self.skipWaiting();
   }
-  
+
+  if (event.data && event.data.type === 'CHECK_UPDATE') {
+    // Force update check
+    self.registration.update();
+  }
+
   if (event.data && event.data.type === 'CLEAR_CACHE') {
     event.waitUntil(
       caches.keys()
@@ -186,11 +194,3 @@ self.addEventListener('message', event => {
     );
   }
 });
-
-// Handle updates
-self.addEventListener('message', event => {
-  if (event.data && event.data.type === 'CHECK_UPDATE') {
-    // Force update check
-    self.registration.update();
-  }
-});
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test script for the static asset manifest
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, render_template_string
+import build_assets
+from utils.cache_busting import CacheBuster
+
+
+PAGE = """<html><head>
+{% call asset_bundle('page.css') %}
+<link rel="stylesheet" href="{{ versioned_url_for('static', filename='styles.css') }}">
+<link rel="stylesheet" href="{{ versioned_url_for('static', filename='mobile.css') }}" media="(max-width: 768px)">
+{% endcall %}
+</head><body>
+{% call asset_bundle('page.js') %}
+<!-- Payment -->
+<script src="{{ versioned_url_for('static', filename='js/payment.js') }}"></script>
+<script src="{{ versioned_url_for('static', filename='script.js') }}"></script>
+{% endcall %}
+</body></html>
+"""
+
+
+SERVICE_WORKER = """// Filled in by build_assets.py
+const BUILD = {"version": "dev", "precache": []};
+self.addEventListener('install', () => caches.open(BUILD.version));
+"""
+
+
+def _static_dir():
+    """A project with static/ and a templates/index.html that uses its assets; returns static/"""
+    project_dir = tempfile.mkdtemp()
+    static_dir = os.path.join(project_dir, 'static')
+    os.makedirs(os.path.join(static_dir, 'js'))
+    os.makedirs(os.path.join(project_dir, 'templates'))
+    for path, content in {'static/script.js': 'var a = 1;\n', 'static/js/payment.js': 'var b = 2;\n',
+                          'static/styles.css': 'body { color: red; }\n',
+                          'static/mobile.css': 'body { margin: 0; }\n', 'static/sw.js': SERVICE_WORKER,
+                          'static/js/old-fix.js': 'var unused = true;\n',
+                          'static/notes.txt': 'not an asset', 'templates/index.html': PAGE}.items():
+        with open(os.path.join(project_dir, path), 'w') as f:
+            f.write(content)
+    return static_dir
+
+
+def _app(static_dir):
+    app = Flask(__name__, static_folder=static_dir, static_url_path='/static')
+    buster = CacheBuster(app)
+    return app, buster
+
+
+def test_build_manifest():
+    """Assets are copied under content-hashed names; the service worker is left alone"""
+    print("Testing manifest build...")
+    static_dir = _static_dir()
+    manifest = build_assets.build(static_dir)
+    assert set(manifest['assets']) == {'script.js', 'js/payment.js', 'styles.css', 'mobile.css'}
+    hashed = manifest['assets']['js/payment.js']
+    assert hashed.startswith('dist/js/payment.') and hashed.endswith('.js')
+    with open(os.path.join(static_dir, hashed)) as f:
+        assert f.read() == ('var b=2;' if build_assets.MINIFY_AVAILABLE else 'var b = 2;\n')
+
+    # Same content, same names
+    assert build_assets.build(static_dir)['assets'] == manifest['assets']
+    print("✅ Manifest built")
+
+
+def test_versioned_urls_use_manifest():
+    """Templates get hashed URLs without touching the disk, served as immutable"""
+    print("Testing versioned URLs...")
+    static_dir = _static_dir()
+    manifest = build_assets.build(static_dir)
+    app, buster = _app(static_dir)
+
+    with app.test_request_context():
+        url = render_template_string("{{ versioned_url_for('static', filename='script.js') }}")
+        assert url == f"/static/{manifest['assets']['script.js']}"
+        assert buster.get_file_version('script.js') == manifest['hashes']['script.js']
+
+    os.remove(os.path.join(static_dir, 'script.js'))
+    with app.test_request_context():
+        assert buster.versioned_url_for('static', filename='script.js') == url
+
+    response = app.test_client().get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    print("✅ Hashed URLs served")
+
+
+def test_bundles():
+    """Bundle blocks are built into one minified, compressed file per bundle"""
+    print("Testing bundles...")
+    static_dir = _static_dir()
+    manifest = build_assets.build(static_dir)
+    assert manifest['unused'] == ['js/old-fix.js']
+    assert 'js/old-fix.js' not in manifest['assets']
+
+    assert set(manifest['bundles']) == {'page.css', 'page.js'}
+    bundle = manifest['bundles']['page.js']
+    assert bundle.startswith('dist/bundles/page.') and bundle.endswith('.js')
+    with open(os.path.join(static_dir, bundle)) as f:
+        content = f.read()
+    assert content.index('var b') < content.index('var a')  # page order
+    with open(os.path.join(static_dir, manifest['bundles']['page.css'])) as f:
+        css = f.read().replace(' ', '').replace('\n', '')
+    assert css.index('color:red') < css.index('@media(max-width:768px){body{margin:0')
+
+    app, buster = _app(static_dir)
+    with app.test_request_context():
+        html = render_template_string(PAGE)
+    assert html.count('<script') == 1 and f'<script src="/static/{bundle}"></script>' in html
+    assert html.count('<link') == 1 and 'payment.js' not in html
+    print("✅ Bundles built")
+
+
+def test_compressed_variants():
+    """Text assets get gzip variants (and brotli where installed) that decompress to the asset"""
+    print("Testing compressed variants...")
+    import gzip
+    static_dir = _static_dir()
+    with open(os.path.join(static_dir, 'script.js'), 'w') as f:
+        f.write('var message = "hello";\n' * 200)
+    manifest = build_assets.build(static_dir)
+    path = os.path.join(static_dir, manifest['assets']['script.js'])
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path + '.gz', 'rb') as f:
+        assert gzip.decompress(f.read()) == data
+    if build_assets.BROTLI_AVAILABLE:
+        import brotli
+        with open(path + '.br', 'rb') as f:
+            assert brotli.decompress(f.read()) == data
+    # Tiny files are not worth compressing
+    assert not os.path.exists(os.path.join(static_dir, manifest['assets']['styles.css']) + '.gz')
+    print("✅ Compressed variants written")
+
+
+def test_service_worker():
+    """The built service worker precaches every hashed asset and changes version with them"""
+    print("Testing service worker build...")
+    import json
+    import re
+    static_dir = _static_dir()
+
+    def built_worker():
+        manifest = build_assets.build(static_dir)
+        assert manifest['service_worker'] == 'dist/sw.js'
+        with open(os.path.join(static_dir, 'dist', 'sw.js')) as f:
+            worker = f.read()
+        assert 'addEventListener' in worker
+        return manifest, json.loads(re.search(r'const BUILD\s*=\s*(\{.*?\});', worker).group(1))
+
+    manifest, worker_build = built_worker()
+    expected = {'/static/' + path for path in list(manifest['assets'].values()) + list(manifest['bundles'].values())}
+    assert set(worker_build['precache']) == expected
+    assert '/static/' + manifest['bundles']['page.js'] in worker_build['precache']
+
+    # Unchanged assets keep the version; a changed one gets a new worker
+    assert built_worker()[1]['version'] == worker_build['version']
+    with open(os.path.join(static_dir, 'script.js'), 'w') as f:
+        f.write('var a = 2;\n')
+    assert built_worker()[1]['version'] != worker_build['version']
+
+    # The source is left alone for development
+    with open(os.path.join(static_dir, 'sw.js')) as f:
+        assert f.read() == SERVICE_WORKER
+    print("✅ Service worker built")
+
+
+def test_fallback_without_manifest():
+    """Without a build, URLs keep the modification-time version"""
+    print("Testing fallback...")
+    app, buster = _app(_static_dir())
+    with app.test_request_context():
+        url = buster.versioned_url_for('static', filename='script.js')
+        html = render_template_string(PAGE)
+    assert url.startswith('/static/script.js?v=')
+    assert html.count('<script') == 2 and '/static/js/payment.js?v=' in html
+    print("✅ Fallback works")
+
+
+if __name__ == "__main__":
+    test_build_manifest()
+    test_versioned_urls_use_manifest()
+    test_bundles()
+    test_compressed_variants()
+    test_service_worker()
+    test_fallback_without_manifest()
+    print("\n🎉 All asset manifest tests passed!")
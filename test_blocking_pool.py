@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded blocking pool used by the gevent worker profile
+"""
+
+import os
+import sys
+import time
+import threading
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import blocking_pool
+
+
+def test_run_subprocess_returns_completed_process():
+    """run_subprocess behaves like subprocess.run"""
+    print("Testing run_subprocess...")
+    result = blocking_pool.run_subprocess([sys.executable, '-c', 'print("ok")'],
+                                          capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout.strip() == 'ok'
+    print("✅ run_subprocess returned the child's output")
+
+
+def test_run_blocking_propagates_exceptions():
+    """Exceptions raised by the callable reach the caller"""
+    print("Testing exception propagation...")
+
+    def _boom():
+        raise ValueError("boom")
+
+    try:
+        blocking_pool.run_blocking(_boom)
+    except ValueError as e:
+        assert str(e) == "boom"
+        print("✅ Exception propagated")
+    else:
+        raise AssertionError("run_blocking swallowed the exception")
+
+
+def _peak_concurrency(call, count):
+    """Peak number of calls running at once when `count` threads make them together"""
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+
+    def _work(*args, **kwargs):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.05)
+        with lock:
+            state['active'] -= 1
+
+    threads = [threading.Thread(target=call, args=(_work,)) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return state['peak']
+
+
+def test_threaded_workers_are_not_capped():
+    """Under gthread, blocking work runs inline as before; the thread count is the bound"""
+    print("Testing threaded mode...")
+    count = blocking_pool.BLOCKING_POOL_SIZE * 3
+    assert blocking_pool.get_pool_stats()['mode'] == 'threaded'
+    assert _peak_concurrency(blocking_pool.run_blocking, count) > blocking_pool.BLOCKING_POOL_SIZE
+
+    original_run = blocking_pool.subprocess.run
+    blocking_pool.subprocess.run = lambda cmd, **kwargs: cmd()
+    try:
+        assert _peak_concurrency(blocking_pool.run_subprocess, count) > blocking_pool.BLOCKING_POOL_SIZE
+    finally:
+        blocking_pool.subprocess.run = original_run
+    print("✅ No cap under gthread")
+
+
+def test_subprocesses_are_bounded_under_gevent():
+    """Under gevent, no more than BLOCKING_POOL_SIZE subprocesses run at once"""
+    print("Testing gevent bound...")
+    original_run, original_active = blocking_pool.subprocess.run, blocking_pool.gevent_active
+    blocking_pool.subprocess.run = lambda cmd, **kwargs: cmd()
+    blocking_pool.gevent_active = lambda: True
+    try:
+        peak = _peak_concurrency(blocking_pool.run_subprocess, blocking_pool.BLOCKING_POOL_SIZE * 3)
+    finally:
+        blocking_pool.subprocess.run, blocking_pool.gevent_active = original_run, original_active
+    assert peak <= blocking_pool.BLOCKING_POOL_SIZE
+    print(f"✅ Peak concurrency {peak} <= {blocking_pool.BLOCKING_POOL_SIZE}")
+
+
+if __name__ == "__main__":
+    test_run_subprocess_returns_completed_process()
+    test_run_blocking_propagates_exceptions()
+    test_threaded_workers_are_not_capped()
+    test_subprocesses_are_bounded_under_gevent()
+    print("\n🎉 All blocking pool tests passed!")
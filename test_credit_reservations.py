@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Test script for pay-as-you-go credit reservations
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.payg_service import PayAsYouGoService
+from services.user_account_service import UserAccountService
+from services.credit_reservations import credit_reservations
+
+
+class FakeBillingRef:
+    """Billing node whose transactions behave like Firebase's compare-and-set retries"""
+
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+
+    def get(self):
+        return self.store.get(self.path)
+
+    def transaction(self, update):
+        while True:
+            current = self.store.get(self.path)
+            new_value = update(dict(current) if current else current)
+            time.sleep(0.001)  # Widen the race window between read and write
+            with FakeBillingRef.lock:
+                if self.store.get(self.path) == current:
+                    self.store[self.path] = new_value
+                    return new_value
+
+
+FakeBillingRef.lock = threading.Lock()
+
+
+def _install_billing(credits):
+    store = {'users/user@example,com/billing/payAsYouGo': {'creditsRemaining': credits}}
+    paths = []
+
+    def get_ref(path):
+        paths.append(path)
+        return FakeBillingRef(store, path)
+
+    UserAccountService.get_ref = staticmethod(get_ref)
+    return store, paths
+
+
+def _billing(store):
+    return store['users/user@example,com/billing/payAsYouGo']
+
+
+def test_concurrent_reservations_do_not_overspend():
+    """Only as many reservations succeed as the balance covers"""
+    print("Testing concurrent reservations...")
+    store, paths = _install_billing(100)
+    results = []
+
+    def reserve():
+        results.append(PayAsYouGoService.reserve_credits('user@example.com', 'transcription', 10))
+
+    threads = [threading.Thread(target=reserve) for _ in range(25)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    succeeded = [r for r in results if r['success']]
+    assert len(succeeded) == 10
+    assert _billing(store) == {'creditsRemaining': 0, 'creditsReserved': 100}
+    assert all(path.endswith('/billing/payAsYouGo') for path in paths)
+
+    for result in succeeded:
+        PayAsYouGoService.release_reservation(result['reservation_id'])
+    assert _billing(store)['creditsRemaining'] == 100 and _billing(store)['creditsReserved'] == 0
+    print(f"✅ {len(succeeded)} of {len(results)} reservations admitted")
+
+
+def test_settle_charges_actual_usage():
+    """Settling returns unused credits and charges overruns only from what is left"""
+    print("Testing settlement...")
+    store, _ = _install_billing(30)
+    reservation = PayAsYouGoService.reserve_credits('user@example.com', 'transcription', 10)
+    result = PayAsYouGoService.settle_reservation(reservation['reservation_id'], 6)
+    assert result['credits_deducted'] == 6 and result['credits_remaining'] == 24
+    assert _billing(store)['creditsUsed'] == 6 and _billing(store)['creditsReserved'] == 0
+
+    reservation = PayAsYouGoService.reserve_credits('user@example.com', 'transcription', 20)
+    result = PayAsYouGoService.settle_reservation(reservation['reservation_id'], 30)
+    assert result['credits_deducted'] == 24 and result['credits_shortfall'] == 6
+    assert _billing(store)['creditsRemaining'] == 0
+
+    assert not PayAsYouGoService.settle_reservation(reservation['reservation_id'], 1)['success']
+    assert not PayAsYouGoService.reserve_credits('user@example.com', 'transcription', 1)['success']
+    print("✅ Actual usage settled")
+
+
+def test_expired_reservations_are_released():
+    """Reservations that are never settled give their credits back"""
+    print("Testing expired reservations...")
+    store, _ = _install_billing(10)
+    reservation = PayAsYouGoService.reserve_credits('user@example.com', 'translation', 500)
+    assert _billing(store)['creditsRemaining'] == 5
+
+    ttl = credit_reservations.ttl
+    credit_reservations.ttl = -1
+    try:
+        PayAsYouGoService.release_expired_reservations()
+    finally:
+        credit_reservations.ttl = ttl
+    assert _billing(store)['creditsRemaining'] == 10
+    assert credit_reservations.pop(reservation['reservation_id']) is None
+
+    result = PayAsYouGoService.deduct_credits('user@example.com', 'translation', 300)
+    assert result['success'] and result['credits_remaining'] == 7
+    print("✅ Expired reservations released")
+
+
+def _translation_app(translate, allowance_words=0):
+    """The translation blueprint for a signed-in PAYG user, with the model calls stubbed
+
+    Usage validation reports the words beyond ``allowance_words`` as overage;
+    overage recorded for invoicing is collected in the returned list.
+    """
+    from types import SimpleNamespace
+    from flask import Flask
+    from flask_login import LoginManager, UserMixin
+    import routes.translation as translation_routes
+    from services.usage_validation_service import UsageValidationService
+    from services.overage_tracking_service import OverageTrackingService
+
+    class SignedInUser(UserMixin):
+        id = 'user@example.com'
+        email = 'user@example.com'
+        oauth_user = True
+
+    app = Flask(__name__)
+    login_manager = LoginManager(app)
+    login_manager.request_loader(lambda request: SignedInUser())
+    app.register_blueprint(translation_routes.bp)
+    recorded_overage = []
+
+    def validate_translation_usage(user_email, words, record_overage=True):
+        assert not record_overage
+        validation = {'allowed': True, 'message': 'ok'}
+        if words > allowance_words:
+            validation['overage'] = {'amount': words - allowance_words, 'cost': 0, 'rate': 0}
+        return validation
+
+    patches = [
+        (translation_routes, 'ModelAccessService', SimpleNamespace(
+            validate_model_request=lambda model, user_email=None: {'valid': True})),
+        (translation_routes, 'Translation', SimpleNamespace(save=lambda **kwargs: None)),
+        (translation_routes.translation_service, 'translate', translate),
+        (UsageValidationService, 'validate_translation_usage', staticmethod(validate_translation_usage)),
+        (OverageTrackingService, 'record_overage_usage',
+         staticmethod(lambda user_email, service_type, amount: recorded_overage.append(amount))),
+        (UserAccountService, 'track_usage', staticmethod(lambda **kwargs: None)),
+    ]
+    originals = [(target, name, target.__dict__[name]) for target, name, _ in patches
+                 if name in target.__dict__]
+
+    def restore():
+        for target, name, _ in patches:
+            delattr(target, name)
+        for target, name, value in originals:
+            setattr(target, name, value)
+
+    for target, name, value in patches:
+        setattr(target, name, value)
+    return app, restore, recorded_overage
+
+
+def test_concurrent_translations_do_not_overspend():
+    """Two translations admitted together cannot spend the same credits"""
+    print("Testing credits through the translate route...")
+    store, _ = _install_billing(10)
+    release_translation = threading.Event()
+    responses = []
+
+    def translate(text, target_language, model):
+        release_translation.wait(5)
+        return 'hola'
+
+    app, restore, recorded_overage = _translation_app(translate)
+    # 1000 words = 10 credits, the whole balance
+    body = {'text': 'hello ' * 1000, 'target_language': 'es'}
+
+    def post():
+        response = app.test_client().post('/api/translate', json=body)
+        responses.append(response.status_code)
+
+    try:
+        threads = [threading.Thread(target=post) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        # The rejected request returns while the admitted one is still translating
+        deadline = time.time() + 5
+        while not responses and time.time() < deadline:
+            time.sleep(0.01)
+        release_translation.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        restore()
+
+    assert sorted(responses) == [200, 402]
+    assert _billing(store)['creditsRemaining'] == 0 and _billing(store)['creditsUsed'] == 10
+    assert _billing(store)['creditsReserved'] == 0
+    # Overage paid from credits is not billed again
+    assert recorded_overage == []
+    print("✅ Second translation refused")
+
+
+def test_translation_within_allowance_keeps_credits():
+    """Only the overage beyond the plan allowance is paid from credits"""
+    print("Testing credits for translations within the allowance...")
+    store, _ = _install_billing(10)
+
+    app, restore, recorded_overage = _translation_app(lambda text, target_language, model: 'hola',
+                                                      allowance_words=400)
+    try:
+        within = app.test_client().post('/api/translate', json={'text': 'hello ' * 400, 'target_language': 'es'})
+        assert within.status_code == 200
+        assert _billing(store)['creditsRemaining'] == 10
+        assert _billing(store).get('creditsUsed', 0) == 0
+
+        # 600 of the 1000 words are beyond the allowance: 6 credits
+        beyond = app.test_client().post('/api/translate', json={'text': 'hello ' * 1000, 'target_language': 'es'})
+    finally:
+        restore()
+
+    assert beyond.status_code == 200
+    assert _billing(store)['creditsRemaining'] == 4 and _billing(store)['creditsUsed'] == 6
+    assert recorded_overage == []
+    print("✅ Allowance used before credits")
+
+
+def test_overage_without_credits_is_recorded():
+    """Users without credits are admitted and invoiced for the overage"""
+    print("Testing overage for users without credits...")
+    store, _ = _install_billing(0)
+
+    app, restore, recorded_overage = _translation_app(lambda text, target_language, model: 'hola')
+    try:
+        response = app.test_client().post('/api/translate', json={'text': 'hello ' * 300, 'target_language': 'es'})
+    finally:
+        restore()
+
+    assert response.status_code == 200
+    assert recorded_overage == [300]
+    assert _billing(store)['creditsRemaining'] == 0 and _billing(store).get('creditsReserved', 0) == 0
+    print("✅ Overage recorded")
+
+
+def test_failed_translation_releases_credits():
+    """A translation that fails gives its reserved credits back"""
+    print("Testing credit release on failure...")
+    store, _ = _install_billing(10)
+
+    def translate(text, target_language, model):
+        assert _billing(store)['creditsReserved'] == 5
+        raise RuntimeError('model unavailable')
+
+    app, restore, _ = _translation_app(translate)
+    try:
+        response = app.test_client().post('/api/translate', json={'text': 'hello ' * 500, 'target_language': 'es'})
+    finally:
+        restore()
+
+    assert response.status_code == 500
+    assert _billing(store)['creditsRemaining'] == 10 and _billing(store)['creditsReserved'] == 0
+    assert credit_reservations.outstanding('user@example.com') == 0
+    print("✅ Credits released")
+
+
+if __name__ == "__main__":
+    test_concurrent_reservations_do_not_overspend()
+    test_settle_charges_actual_usage()
+    test_expired_reservations_are_released()
+    test_concurrent_translations_do_not_overspend()
+    test_translation_within_allowance_keeps_credits()
+    test_overage_without_credits_is_recorded()
+    test_failed_translation_releases_credits()
+    print("\n🎉 All credit reservation tests passed!")
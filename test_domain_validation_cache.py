@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for the domain validation cache
+"""
+
+import os
+import sys
+import time
+import threading
+import dns.resolver
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.domain_validation_cache import DomainValidationCache, UNAVAILABLE
+
+
+class FakeAnswer:
+    def __init__(self, ttl):
+        self.rrset = type('RRset', (), {'ttl': ttl})()
+
+
+class FakeResolver:
+    """Answers from a table of (domain, record type) -> TTL or exception, counting lookups"""
+
+    def __init__(self, records, delay=0):
+        self.records = records
+        self.delay = delay
+        self.lookups = []
+        self.lock = threading.Lock()
+
+    def __call__(self, domain, rdtype, lifetime):
+        with self.lock:
+            self.lookups.append((domain, rdtype))
+        time.sleep(self.delay)
+        answer = self.records.get((domain, rdtype), dns.resolver.NXDOMAIN())
+        if isinstance(answer, Exception):
+            raise answer
+        return FakeAnswer(answer)
+
+
+def test_known_providers_and_positive_cache():
+    """Major providers are never resolved; other domains are resolved once per TTL"""
+    print("Testing positive cache...")
+    resolver = FakeResolver({('example.org', 'MX'): 3600, ('example.org', 'A'): 3600})
+    cache = DomainValidationCache(resolve=resolver)
+
+    assert cache.check('Gmail.com') == (True, "")
+    assert resolver.lookups == []
+
+    for _ in range(5):
+        assert cache.check('example.org') == (True, "")
+    assert len([lookup for lookup in resolver.lookups if lookup[1] == 'MX']) == 1
+    assert cache._record_ttl(FakeAnswer(3600)) == 3600
+    assert cache._record_ttl(FakeAnswer(5)) == cache.min_ttl
+    print("✅ Positive results cached")
+
+
+def test_negative_and_a_fallback():
+    """A domain without MX but with A is valid; a missing domain is remembered"""
+    print("Testing negative cache...")
+    resolver = FakeResolver({('a-only.org', 'MX'): dns.resolver.NoAnswer(), ('a-only.org', 'A'): 300})
+    cache = DomainValidationCache(resolve=resolver)
+
+    assert cache.check('a-only.org') == (True, "")
+    valid, message = cache.check('missing.invalid')
+    assert not valid and 'missing.invalid' in message
+    lookups = len(resolver.lookups)
+    assert cache.check('missing.invalid')[0] is False
+    assert len(resolver.lookups) == lookups
+    print("✅ Negative results cached")
+
+
+def test_deadline_and_errors():
+    """Slow or failing DNS does not block or reject, and late answers fill the cache"""
+    print("Testing deadline...")
+    resolver = FakeResolver({('slow.org', 'MX'): 600, ('slow.org', 'A'): 600}, delay=0.3)
+    cache = DomainValidationCache(deadline=0.05, resolve=resolver)
+    started = time.monotonic()
+    assert cache.check('slow.org') == UNAVAILABLE
+    assert time.monotonic() - started < 0.25
+    time.sleep(0.4)
+    assert cache.check('slow.org') == (True, "")
+    assert len(resolver.lookups) == 2
+
+    resolver = FakeResolver({('broken.org', 'MX'): dns.resolver.NoNameservers(),
+                             ('broken.org', 'A'): dns.resolver.NoNameservers()})
+    cache = DomainValidationCache(resolve=resolver)
+    assert cache.check('broken.org') == UNAVAILABLE
+    assert cache.check('broken.org') == UNAVAILABLE
+    assert len(resolver.lookups) == 4
+    print("✅ Deadline and errors handled")
+
+
+if __name__ == "__main__":
+    test_known_providers_and_positive_cache()
+    test_negative_and_a_fallback()
+    test_deadline_and_errors()
+    print("\n🎉 All domain validation cache tests passed!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for the email outbox
+"""
+
+import os
+import sys
+import smtplib
+from email.mime.text import MIMEText
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.email_outbox import EmailOutbox
+from test_helpers import use_database
+
+
+class FakeSMTP:
+    """SMTP connection that records messages and can fail on demand"""
+
+    def __init__(self, server):
+        self.server = server
+
+    def sendmail(self, sender, to, raw):
+        if self.server.failures:
+            raise self.server.failures.pop(0)
+        self.server.sent.append(to)
+
+    def noop(self):
+        return (250, b'OK')
+
+    def quit(self):
+        self.server.closed += 1
+
+
+class FakeEmailService:
+    """Stands in for EmailService; counts the connections it opens"""
+
+    def __init__(self, failures=None):
+        self.failures = list(failures or [])
+        self.sent = []
+        self.connections = 0
+        self.closed = 0
+
+    def connect(self):
+        self.connections += 1
+        return FakeSMTP(self)
+
+
+def _outbox(failures=None):
+    """Outbox without a worker thread"""
+    service = FakeEmailService(failures)
+    outbox = EmailOutbox(email_service=service)
+    outbox._worker_pid = os.getpid()
+    return outbox, service
+
+
+def _message(to):
+    msg = MIMEText('Hello')
+    msg['From'] = 'noreply@vocallocal.test'
+    msg['To'] = to
+    msg['Subject'] = 'Welcome'
+    return msg
+
+
+def test_batch_reuses_connection():
+    """A batch of messages is sent over one SMTP connection"""
+    print("Testing pooled connection...")
+    database = use_database()
+    outbox, service = _outbox()
+    keys = [outbox.enqueue(_message(f'user{i}@example.com')) for i in range(3)]
+
+    outbox._process_batch(keys)
+    assert service.sent == ['user0@example.com', 'user1@example.com', 'user2@example.com']
+    assert service.connections == 1
+    for key in keys:
+        item = database.tree['email_outbox'][key]
+        assert item['status'] == 'done' and 'raw' not in item
+
+    outbox._idle()
+    assert service.closed == 1
+    print("✅ Connection reused")
+
+
+def test_reconnects_after_disconnect():
+    """A connection closed by the server is replaced without losing the message"""
+    print("Testing reconnect...")
+    database = use_database()
+    outbox, service = _outbox([smtplib.SMTPServerDisconnected('gone')])
+    key = outbox.enqueue(_message('user@example.com'))
+
+    outbox.process(key)
+    assert service.sent == ['user@example.com']
+    assert service.connections == 2
+    assert database.tree['email_outbox'][key]['status'] == 'done'
+    print("✅ Reconnected")
+
+
+def test_failures_retry_or_fail():
+    """Transient failures are retried later; refused recipients fail at once"""
+    print("Testing failures...")
+    database = use_database()
+    outbox, service = _outbox([ConnectionRefusedError('smtp down')])
+    key = outbox.enqueue(_message('user@example.com'))
+    outbox.process(key)
+    item = database.tree['email_outbox'][key]
+    assert item['status'] == 'pending' and item['attempts'] == 1 and item['raw']
+
+    database.tree['email_outbox'][key]['nextAttemptAt'] = 0
+    outbox.process(key)
+    assert database.tree['email_outbox'][key]['status'] == 'done'
+
+    service.failures.append(smtplib.SMTPRecipientsRefused({'bad@example.com': (550, b'No such user')}))
+    key = outbox.enqueue(_message('bad@example.com'))
+    outbox.process(key)
+    item = database.tree['email_outbox'][key]
+    assert item['status'] == 'failed' and item['attempts'] == 1
+    print("✅ Failures handled")
+
+
+if __name__ == "__main__":
+    test_batch_reuses_connection()
+    test_reconnects_after_disconnect()
+    test_failures_retry_or_fail()
+    print("\n🎉 All email outbox tests passed!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled email templates
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.email_service import email_service
+from services.email_templates import inline_css
+
+
+def _parts(msg):
+    parts = {}
+    for part in msg.walk():
+        if part.get_content_maintype() != 'multipart':
+            parts.setdefault(part.get_content_type(), part.get_payload(decode=True))
+    return parts
+
+
+def test_inline_css():
+    """Simple rules are inlined before the element's own style; the rest stay in <style>"""
+    print("Testing CSS inlining...")
+    html = inline_css(
+        '<html><head><style>p { color: red; } .a { margin: 0; } .b .c { color: blue; }'
+        '@media (max-width: 600px) { .a { margin: 4px !important; } }</style></head>'
+        '<body><p class="a" style="color: green;">x</p><span class="c">y</span></body></html>')
+    assert '<p class="a" style="color: red; margin: 0; color: green">' in html
+    assert '<span class="c">' in html
+    assert '@media (max-width: 600px)' in html
+    print("✅ CSS inlined")
+
+
+def test_messages_render():
+    """Each email has text and HTML parts with its details, escaped in HTML"""
+    print("Testing rendering...")
+    welcome = _parts(email_service.create_welcome_email('Ann <b>', 'ann@example.com', 'basic'))
+    html = welcome['text/html'].decode()
+    assert 'Hello Ann &lt;b&gt;!' in html and '✓ Premium AI models access' in html
+    assert 'class="header" style="background: linear-gradient' in html
+    assert 'Monthly Limits: 280 minutes' in welcome['text/plain'].decode()
+
+    verification = email_service.create_verification_email('ann@example.com', '123456', 'Ann', 'tok')
+    html = _parts(verification)['text/html'].decode()
+    assert '123456' in html and 'Verify Email Instantly' in html and 'token=tok' in html
+    assert 'Two Ways to Verify' in html
+    text = _parts(email_service.create_verification_email('ann@example.com', '654321'))['text/plain'].decode()
+    assert 'Hello ann!' in text and 'Quick Verification Link' not in text
+
+    receipt = email_service.create_payment_confirmation_email(
+        'Ann', 'ann@example.com', 'in_1234567890', 4.99, 'usd', datetime(2025, 1, 2, 3, 4),
+        'basic', 'Unknown Plan', 'monthly', pdf_attachment=b'%PDF-1.4')
+    assert receipt['Subject'] == 'Your receipt from VocalLocal, Receipt #34567890'
+    parts = _parts(receipt)
+    html = parts['text/html'].decode()
+    assert '$4.99' in html and 'Basic Plan' in html and 'January 02, 2025' in html
+    assert parts['application/pdf'] == b'%PDF-1.4'
+    print("✅ Messages rendered")
+
+
+if __name__ == "__main__":
+    test_inline_css()
+    test_messages_render()
+    print("\n🎉 All email template tests passed!")
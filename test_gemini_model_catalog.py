@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared Gemini model catalog
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.gemini_model_manager import GeminiModelManager, get_shared_model_manager
+
+CACHE_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'services', 'gemini_models_cache.json')
+
+
+def _manager(tmp_dir, fetch=None):
+    """Create a manager that uses a temporary cache file and a fake API"""
+    manager = GeminiModelManager(api_key='test', logger=logging.getLogger('test'), cache_duration_hours=1)
+    manager.cache_file = os.path.join(tmp_dir, 'gemini_models_cache.json')
+    manager.lock_file = manager.cache_file + '.lock'
+    if fetch:
+        manager._fetch_models_from_api = fetch
+    return manager
+
+
+def _fixture(fetched_at):
+    with open(CACHE_FIXTURE) as f:
+        data = json.load(f)
+    data['fetched_at'] = fetched_at.isoformat()
+    return data
+
+
+def _rescan(manager, capability, preferred, models):
+    """Reference implementation: the original linear scan"""
+    required = manager.capability_requirements.get(capability, [])
+    if preferred:
+        for model in models:
+            if model.get('name', '').replace('models/', '') == preferred:
+                if all(m in model.get('supportedGenerationMethods', []) for m in required):
+                    return preferred, False, "Preferred model available"
+    return manager._find_best_fallback(capability, models, preferred)
+
+
+def test_indexed_lookup_matches_linear_scan():
+    """Precomputed indexes give the same answers as rescanning the list"""
+    print("Testing indexed lookups...")
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        data = _fixture(datetime.now())
+        manager = _manager(tmp_dir)
+        manager._set_cache(data, datetime.now())
+        models = data['models']
+
+        for capability in ['transcription', 'translation', 'tts', 'interpretation']:
+            for preferred in [None, 'gemini-2.5-flash', 'gemini-2.0-flash-lite', 'gemini-1.0-pro', 'embedding-001']:
+                assert manager.get_best_model_for_capability(capability, preferred) == \
+                    _rescan(manager, capability, preferred, models), (capability, preferred)
+
+        assert manager.get_model_info('gemini-2.5-flash')['name'] == 'models/gemini-2.5-flash'
+        print("✅ Indexed lookups match the linear scan")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_stale_data_served_while_refreshing():
+    """Expired data returns immediately and a background refresh updates it"""
+    print("Testing stale-while-revalidate...")
+    tmp_dir = tempfile.mkdtemp()
+    release = threading.Event()
+
+    def _slow_fetch():
+        release.wait(5)
+        return {'models': [{'name': 'models/gemini-9.0-flash',
+                            'supportedGenerationMethods': ['generateContent']}],
+                'fetched_at': datetime.now().isoformat(), 'total_models': 1}
+
+    try:
+        manager = _manager(tmp_dir, fetch=_slow_fetch)
+        stale = _fixture(datetime.now() - timedelta(hours=3))
+        manager._save_persistent_cache(stale)
+
+        started = time.time()
+        data = manager.get_available_models()
+        assert time.time() - started < 1.0
+        assert data['total_models'] == stale['total_models']
+
+        release.set()
+        manager._refresh_thread.join(5)
+        assert manager.get_available_models()['total_models'] == 1
+        with open(manager.cache_file) as f:
+            assert json.load(f)['total_models'] == 1
+        print("✅ Stale data served, refreshed in background and persisted")
+    finally:
+        release.set()
+        shutil.rmtree(tmp_dir)
+
+
+def test_failed_refresh_keeps_stale_data():
+    """API failures fall back to the stale catalog"""
+    print("Testing refresh failure...")
+    tmp_dir = tempfile.mkdtemp()
+
+    def _failing_fetch():
+        raise RuntimeError("network down")
+
+    try:
+        manager = _manager(tmp_dir, fetch=_failing_fetch)
+        manager._save_persistent_cache(_fixture(datetime.now() - timedelta(hours=3)))
+        manager.get_available_models()
+        manager._refresh_thread.join(5)
+        assert manager.get_best_model_for_capability('transcription')[0]
+        assert manager._is_cache_valid()  # backed off instead of retrying every call
+        print("✅ Stale catalog kept after refresh failure")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_shared_manager_per_api_key():
+    """Services share one catalog per API key"""
+    print("Testing shared manager...")
+    assert get_shared_model_manager('key-a') is get_shared_model_manager('key-a')
+    assert get_shared_model_manager('key-a') is not get_shared_model_manager('key-b')
+    print("✅ One catalog per API key")
+
+
+if __name__ == "__main__":
+    test_indexed_lookup_matches_linear_scan()
+    test_stale_data_served_while_refreshing()
+    test_failed_refresh_keeps_stale_data()
+    test_shared_manager_per_api_key()
+    print("\n🎉 All model catalog tests passed!")
@@ -0,0 +1,108 @@
+"""
+In-memory stand-ins for the Firebase Realtime Database, shared by the test scripts
+"""
+
+import copy
+from collections import OrderedDict
+
+from models.firebase_models import FirebaseModel, HistoryBody, UsageAggregate, User
+
+
+class FakeDatabase:
+    """In-memory Realtime Database tree that understands server increments"""
+
+    def __init__(self):
+        self.tree = {}
+        self.updates = 0
+
+    def _node(self, path, create=False):
+        node = self.tree
+        for part in [p for p in path.split('/') if p]:
+            if part not in node:
+                if not create:
+                    return None
+                node[part] = {}
+            node = node[part]
+        return node
+
+    def update(self, values):
+        self.updates += 1
+        for path, value in values.items():
+            parent_path, _, name = path.rpartition('/')
+            parent = self._node(parent_path, create=True)
+            if value is None:
+                parent.pop(name, None)
+                continue
+            if isinstance(value, dict) and '.sv' in value:
+                server_value = value['.sv']
+                value = parent.get(name, 0) + server_value['increment'] if isinstance(server_value, dict) else 0
+            parent[name] = value
+
+    def child(self, path):
+        return FakeRef(self, path)
+
+
+class FakeRef:
+    def __init__(self, database, path):
+        self.database = database
+        self.path = path
+        self.start = self.first = None
+        self.child_field = self.equal = None
+
+    def get(self, shallow=False):
+        node = self.database._node(self.path)
+        if node is None or not isinstance(node, dict):
+            return node
+        rows = sorted(node.items())
+        if self.child_field is not None:
+            rows = [row for row in rows if isinstance(row[1], dict) and row[1].get(self.child_field) == self.equal]
+        if self.start is not None:
+            rows = [row for row in rows if row[0] >= self.start]
+        if self.first is not None:
+            rows = rows[:self.first]
+        return OrderedDict((key, True if shallow else value) for key, value in rows)
+
+    def child(self, path):
+        return type(self)(self.database, f'{self.path}/{path}')
+
+    def set(self, value):
+        self.database.update({self.path: value})
+
+    def update(self, values):
+        self.database.update({f'{self.path}/{key}': value for key, value in values.items()})
+
+    def delete(self):
+        self.database.update({self.path: None})
+
+    def transaction(self, fn):
+        value = fn(copy.deepcopy(self.get()))
+        self.set(value)
+        return value
+
+    def order_by_child(self, field):
+        self.child_field = field
+        return self
+
+    def equal_to(self, value):
+        self.equal = value
+        return self
+
+    def order_by_key(self):
+        return self
+
+    def start_at(self, key):
+        self.start = key
+        return self
+
+    def limit_to_first(self, n):
+        self.first = n
+        return self
+
+
+def use_database():
+    """Point the models at a new empty FakeDatabase and return it"""
+    database = FakeDatabase()
+    for model in (FirebaseModel, HistoryBody, UsageAggregate, User):
+        model.get_root = staticmethod(lambda: database)
+        model.get_ref = staticmethod(database.child)
+    return database
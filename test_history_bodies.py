@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the history metadata/body split
+"""
+
+import os
+import sys
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.firebase_models import HistoryBody, Transcription, Translation, PREVIEW_CHARS
+
+
+class FakeDatabase:
+    """In-memory stand-in for the Realtime Database root"""
+
+    def __init__(self):
+        self.data = {}
+        self.updates = 0
+
+    def update(self, values):
+        self.updates += 1
+        self.data.update(values)
+
+    def child(self, path):
+        database = self
+
+        class Ref:
+            @staticmethod
+            def get():
+                return database.data.get(path)
+        return Ref()
+
+
+def _use_database(database):
+    HistoryBody.get_root = staticmethod(lambda: database)
+    HistoryBody.get_ref = staticmethod(database.child)
+
+
+def test_encode_roundtrip():
+    """Small bodies stay plain, large ones are compressed"""
+    print("Testing body encoding...")
+    small = HistoryBody.encode({'text': 'hello'})
+    assert small == {'encoding': 'plain', 'text': 'hello'}
+
+    text = 'The quick brown fox jumps over the lazy dog. ' * 200
+    large = HistoryBody.encode({'text': text})
+    assert large['encoding'] == 'zlib' and len(large['data']) < len(text) / 4
+    assert HistoryBody.decode(large) == {'text': text}
+    assert HistoryBody.decode(small) == {'text': 'hello'}
+    print(f"✅ {len(text)} chars stored as {len(large['data'])}")
+
+
+def test_save_writes_metadata_and_body():
+    """save() writes a small index entry and a separate body in one update"""
+    print("Testing save...")
+    database = FakeDatabase()
+    _use_database(database)
+
+    text = 'word ' * 500
+    key = Transcription.save('user@example.com', text, 'en', 'gemini-2.5-flash', 12.5)
+    metadata = database.data[f'transcriptions/user@example,com/{key}']
+    assert database.updates == 1
+    assert 'text' not in metadata
+    assert metadata['char_count'] == len(text) and metadata['preview'] == text[:PREVIEW_CHARS]
+    assert isinstance(metadata['ts'], int)
+    assert HistoryBody.get('transcriptions', 'user@example.com', key) == {'text': text}
+
+    key = Translation.save('user@example.com', 'hola', 'hello', 'es', 'en', 'gemini-2.5-flash')
+    metadata = database.data[f'translations/user@example,com/{key}']
+    assert metadata['translated_preview'] == 'hello' and metadata['original_chars'] == 4
+    assert HistoryBody.get('translations', 'user@example.com', key) == {
+        'original_text': 'hola', 'translated_text': 'hello'}
+    print("✅ Metadata and body stored separately")
+
+
+def test_legacy_entries_read_inline():
+    """Entries written before the split are read from the index entry"""
+    print("Testing legacy entries...")
+    database = FakeDatabase()
+    _use_database(database)
+    database.data['transcriptions/user@example,com/-old'] = {'text': 'legacy text', 'language': 'en'}
+    assert HistoryBody.get('transcriptions', 'user@example.com', '-old') == {'text': 'legacy text'}
+    assert HistoryBody.get('transcriptions', 'user@example.com', '-missing') is None
+    print("✅ Legacy entries still readable")
+
+
+if __name__ == "__main__":
+    test_encode_roundtrip()
+    test_save_writes_metadata_and_body()
+    test_legacy_entries_read_inline()
+    print("\n🎉 All history body tests passed!")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Test script for cursor-based history pagination
+"""
+
+import os
+import sys
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import services.history_service as history_service
+from services.history_service import HistoryService, InvalidCursor
+
+
+class FakeQuery:
+    """Minimal in-memory stand-in for a Firebase Realtime Database query"""
+
+    def __init__(self, store, path, indexed=True):
+        self.store = store
+        self.path = path
+        self.indexed = indexed
+        self.order = None
+        self.start = self.end = None
+        self.first = self.last = None
+
+    def _copy(self, **changes):
+        query = FakeQuery(self.store, self.path, self.indexed)
+        query.__dict__.update({k: v for k, v in self.__dict__.items() if k not in ('store',)})
+        query.__dict__.update(changes)
+        return query
+
+    def order_by_child(self, field):
+        if not self.indexed:
+            raise Exception('Index not defined, add ".indexOn": "timestamp"')
+        return self._copy(order='timestamp')
+
+    def order_by_key(self):
+        return self._copy(order='key')
+
+    def end_at(self, value):
+        return self._copy(end=value)
+
+    def start_at(self, value):
+        return self._copy(start=value)
+
+    def limit_to_last(self, n):
+        return self._copy(last=n)
+
+    def limit_to_first(self, n):
+        return self._copy(first=n)
+
+    def get(self):
+        data = self.store.get(self.path, {})
+        if self.order is None:
+            FakeQuery.full_downloads += 1
+            return dict(data)
+
+        def sort_key(entry):
+            return (entry[1]['timestamp'], entry[0]) if self.order == 'timestamp' else entry[0]
+
+        def value(entry):
+            return entry[1]['timestamp'] if self.order == 'timestamp' else entry[0]
+
+        rows = sorted(data.items(), key=sort_key)
+        if self.start is not None:
+            rows = [r for r in rows if value(r) >= self.start]
+        if self.end is not None:
+            rows = [r for r in rows if value(r) <= self.end]
+        if self.last is not None:
+            rows = rows[-self.last:]
+        if self.first is not None:
+            rows = rows[:self.first]
+        FakeQuery.rows_read += len(rows)
+        return OrderedDict(rows)
+
+
+FakeQuery.full_downloads = 0
+FakeQuery.rows_read = 0
+
+
+def _install_fake_store(indexed=True, transcriptions=25, translations=15):
+    store = {'transcriptions/user@example,com': {}, 'translations/user@example,com': {}}
+    start = datetime(2025, 1, 1)
+    for i in range(transcriptions):
+        # Push keys start with the creation time, so they sort chronologically across collections
+        store['transcriptions/user@example,com'][f'-{2 * i:05d}T'] = {
+            'text': f'transcription {i}', 'timestamp': (start + timedelta(minutes=2 * i)).isoformat()}
+    for i in range(translations):
+        store['translations/user@example,com'][f'-{2 * i + 1:05d}L'] = {
+            'translated_text': f'translation {i}', 'timestamp': (start + timedelta(minutes=2 * i + 1)).isoformat()}
+
+    class FakeModel:
+        @staticmethod
+        def get_ref(path):
+            return FakeQuery(store, path, indexed)
+
+    history_service.HISTORY_COLLECTIONS = {
+        'transcription': ('transcriptions', FakeModel),
+        'translation': ('translations', FakeModel),
+    }
+    HistoryService._index_status = {'transcriptions': None, 'translations': None}
+    FakeQuery.full_downloads = 0
+    FakeQuery.rows_read = 0
+    return store
+
+
+def _walk(history_type='all', limit=7, sort_desc=True):
+    pages, cursor = [], None
+    while True:
+        page = HistoryService.get_history_page('user@example.com', history_type, cursor, limit, sort_desc)
+        pages.append(page)
+        if not page['has_more']:
+            return pages
+        cursor = page['next_cursor']
+
+
+def test_pages_cover_history_in_order():
+    """Walking the cursor returns every item exactly once, newest first"""
+    print("Testing keyset pagination...")
+    _install_fake_store()
+    pages = _walk()
+    ids = [item['id'] for page in pages for item in page['items']]
+    timestamps = [item['timestamp'] for page in pages for item in page['items']]
+    assert len(ids) == 40 and len(set(ids)) == 40
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert all(page['count'] <= 7 for page in pages)
+    assert FakeQuery.full_downloads == 0
+    print(f"✅ {len(ids)} items over {len(pages)} pages")
+
+
+def test_oldest_first_and_single_type():
+    """Ascending order and type filters page the same way"""
+    print("Testing ascending single-type pagination...")
+    _install_fake_store()
+    pages = _walk('translation', limit=4, sort_desc=False)
+    ids = [item['id'] for page in pages for item in page['items']]
+    assert ids == [f'-{2 * i + 1:05d}L' for i in range(15)]
+    print("✅ Oldest-first translations page correctly")
+
+
+def test_missing_index_pages_by_key():
+    """Without the index, pages are fetched by push key instead of downloading everything"""
+    print("Testing missing index fallback...")
+    _install_fake_store(indexed=False)
+    pages = _walk(limit=10)
+    ids = [item['id'] for page in pages for item in page['items']]
+    assert len(ids) == 40 and len(set(ids)) == 40
+    assert FakeQuery.full_downloads == 0
+    assert HistoryService._index_status['transcriptions'] is False
+    assert pages[0]['methods']['transcriptions'] == 'key_ordered'
+
+    assert HistoryService.check_indexes() == {'transcriptions': False, 'translations': False}
+    print("✅ Missing index detected and key paging used")
+
+
+def test_timestamp_ties():
+    """Items sharing a timestamp are not skipped or repeated"""
+    print("Testing timestamp ties...")
+    store = _install_fake_store(transcriptions=0, translations=0)
+    for i in range(12):
+        store['transcriptions/user@example,com'][f'-{2 * i:05d}T'] = {'text': str(i), 'timestamp': '2025-01-01T00:00:00'}
+    pages = _walk('transcription', limit=5)
+    ids = [item['id'] for page in pages for item in page['items']]
+    assert sorted(ids) == sorted(store['transcriptions/user@example,com']) and len(ids) == 12
+    print("✅ Tied timestamps page correctly")
+
+
+def test_merge_reads_only_what_the_page_needs():
+    """The combined merge stops once the page is full and prefers stored epoch ms"""
+    print("Testing merged history...")
+    store = _install_fake_store(transcriptions=40, translations=40)
+    page = HistoryService.get_history_page('user@example.com', 'all', None, 10, True)
+    assert [item['type'] for item in page['items']] == ['translation', 'transcription'] * 5
+    single_rows = FakeQuery.rows_read
+    assert single_rows <= 2 * (10 // 2 + 2)
+
+    # Stored `ts` wins over the ISO string, so entries need no parsing
+    transcriptions = store['transcriptions/user@example,com']
+    transcriptions['-00000T']['ts'] = 1
+    assert HistoryService._epoch_ms(transcriptions['-00000T']) == 1
+    assert HistoryService._epoch_ms(transcriptions['-00002T']) == \
+        int(datetime(2025, 1, 1, 0, 2).timestamp() * 1000)
+
+    # A skewed history pulls more chunks from one stream only as needed
+    _install_fake_store(transcriptions=30, translations=1)
+    page = HistoryService.get_history_page('user@example.com', 'all', None, 10, True)
+    assert all(item['type'] == 'transcription' for item in page['items']) and page['has_more']
+    assert FakeQuery.rows_read < 30
+    print(f"✅ Merged page read {single_rows} rows for 10 items")
+
+
+def test_cursor_validation():
+    """Cursors round-trip and malformed cursors are rejected"""
+    print("Testing cursors...")
+    cursor = HistoryService.encode_cursor('2025-01-01T00:00:00', '-Tabc', 1735689600000)
+    assert HistoryService.decode_cursor(cursor) == ('2025-01-01T00:00:00', '-Tabc', 1735689600000)
+    try:
+        HistoryService.decode_cursor('not a cursor')
+        assert False, "invalid cursor accepted"
+    except InvalidCursor:
+        pass
+    assert HistoryService.clamp_page_size('5000') == HistoryService.MAX_PAGE_SIZE
+    assert HistoryService.clamp_page_size('abc') == HistoryService.DEFAULT_PAGE_SIZE
+    print("✅ Cursor handling works")
+
+
+def test_fallback_page_is_bounded():
+    """The fallback history page reads the latest items only, even without the index"""
+    print("Testing fallback history page...")
+    from types import SimpleNamespace
+    import routes.main as main_routes
+    from models.firebase_models import Transcription, Translation
+
+    store = _install_fake_store(indexed=False)
+    originals = (main_routes.current_user, main_routes.render_template,
+                 main_routes.Transcription, main_routes.Translation)
+    for model in (Transcription, Translation):
+        model.get_ref = staticmethod(lambda path: FakeQuery(store, path, indexed=False))
+    main_routes.Transcription, main_routes.Translation = Transcription, Translation
+    main_routes.current_user = SimpleNamespace(email='user@example.com')
+    main_routes.render_template = lambda template, **context: context
+    try:
+        context = main_routes.history_fallback('all', limit=5)
+    finally:
+        # get_ref is inherited from FirebaseModel
+        del Transcription.get_ref, Translation.get_ref
+        (main_routes.current_user, main_routes.render_template,
+         main_routes.Transcription, main_routes.Translation) = originals
+
+    assert list(context['transcriptions']) == [f'-{2 * i:05d}T' for i in range(20, 25)]
+    assert list(context['translations']) == [f'-{2 * i + 1:05d}L' for i in range(10, 15)]
+    assert FakeQuery.full_downloads == 0
+    print("✅ Fallback page bounded")
+
+
+if __name__ == "__main__":
+    test_pages_cover_history_in_order()
+    test_oldest_first_and_single_type()
+    test_missing_index_pages_by_key()
+    test_timestamp_ties()
+    test_merge_reads_only_what_the_page_needs()
+    test_cursor_validation()
+    test_fallback_page_is_bounded()
+    print("\n🎉 All history pagination tests passed!")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the invoice store
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.invoice_store import InvoiceStore
+from services.pdf_invoice_service import _invoice_styles
+from services.user_account_service import UserAccountService
+from test_helpers import use_database
+
+RECORD = {'invoiceId': 'in_1', 'amount': 4.99, 'currency': 'USD', 'paymentDate': 1735787040000,
+          'planType': 'basic', 'planName': 'Basic Plan', 'billingCycle': 'month', 'status': 'paid'}
+
+
+def _store():
+    database = use_database()
+    UserAccountService.get_ref = staticmethod(database.child)
+    database.tree['users'] = {'ann@example,com': {
+        'profile': {'displayName': 'Ann'}, 'billing': {'invoices': {'in_1': dict(RECORD)}}}}
+    return InvoiceStore(root=tempfile.mkdtemp()), database
+
+
+def test_render_is_content_addressed():
+    """Rendering stores the PDF by hash and links it from the billing record"""
+    print("Testing rendering...")
+    store, database = _store()
+    pdf = store.render('ann@example.com', dict(RECORD))
+    assert pdf.startswith(b'%PDF')
+
+    digest = database.tree['users']['ann@example,com']['billing']['invoices']['in_1']['pdfSha256']
+    assert store.get(digest) == pdf
+    # Deterministic output: rendering again maps to the same file
+    assert store.render('ann@example.com', dict(RECORD)) == pdf
+    assert _invoice_styles() is _invoice_styles()
+    print("✅ Stored by content hash")
+
+
+def test_invoice_path():
+    """Downloads read the stored file and re-render on a miss; other users' invoices are not found"""
+    print("Testing downloads...")
+    store, database = _store()
+    path = store.invoice_path('ann@example.com', 'in_1')
+    assert path and os.path.exists(path)
+    assert store.invoice_path('ann@example.com', 'in_1') == path
+
+    os.remove(path)
+    assert store.invoice_path('ann@example.com', 'in_1') == path
+    assert os.path.exists(path)
+
+    assert store.invoice_path('bob@example.com', 'in_1') is None
+    assert store.invoice_path('ann@example.com', 'in_missing') is None
+    print("✅ Downloads served from the store")
+
+
+if __name__ == "__main__":
+    test_render_is_content_addressed()
+    test_invoice_path()
+    print("\n🎉 All invoice store tests passed!")
@@ -175,7 +175,8 @@ def test_billing_history_storage():
             
             # Verify Firebase was called correctly
             mock_ref.assert_called_with('users/test@example,com/billing/invoices')
-            mock_billing_ref.push.assert_called_once_with(test_billing_data)
+            mock_billing_ref.child.assert_called_once_with(test_billing_data['invoiceId'])
+            mock_billing_ref.child.return_value.update.assert_called_once_with(test_billing_data)
             
             print("✅ Billing history storage working correctly")
             return True
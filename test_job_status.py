@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for background job status and completion callbacks
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from config import Config
+from services.transcription import TranscriptionService
+import routes.transcription as transcription_routes
+
+
+def _service():
+    service = TranscriptionService()
+    service._set_job_status('job', 'processing', progress=0)
+    return service
+
+
+def test_callback_runs_once():
+    """Completion callbacks run exactly once, even when added after the job finished"""
+    print("Testing completion callbacks...")
+    service = _service()
+    calls = []
+    service.on_job_finished('job', calls.append)
+    service._set_job_status('job', 'processing', progress=50)
+    assert calls == []
+
+    service._set_job_status('job', 'completed', progress=100, result='hello')
+    service._set_job_status('job', 'completed', progress=100, result='hello')
+    assert [status['result'] for status in calls] == ['hello']
+
+    late = []
+    service.on_job_finished('job', late.append)
+    assert len(late) == 1
+    print("✅ Callbacks run once")
+
+
+def test_wait_for_change():
+    """A waiting status request returns as soon as the job changes"""
+    print("Testing long-poll wait...")
+    service = _service()
+    version = service.get_job_status('job')['version']
+
+    started = time.monotonic()
+    assert service.get_job_status('job', wait_for_change_from=version, timeout=0.05)['version'] == version
+    assert time.monotonic() - started >= 0.05
+
+    threading.Timer(0.05, service._set_job_status, args=('job', 'completed'),
+                    kwargs={'progress': 100, 'result': 'done'}).start()
+    status = service.get_job_status('job', wait_for_change_from=version, timeout=5)
+    assert status['status'] == 'completed' and status['version'] == version + 1
+    print("✅ Waiters wake on change")
+
+
+def test_status_endpoint_etag():
+    """Unchanged status polls get an empty 304"""
+    print("Testing status endpoint ETag...")
+    service = _service()
+    transcription_routes.transcription_service = service
+    app = Flask(__name__)
+    app.register_blueprint(transcription_routes.bp)
+    client = app.test_client()
+
+    first = client.get('/api/transcription_status/job')
+    assert first.status_code == 200 and first.json['status'] == 'processing'
+    etag = first.headers['ETag']
+
+    unchanged = client.get('/api/transcription_status/job', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304 and not unchanged.data
+
+    Config.JOB_STATUS_MAX_WAIT = 5
+    threading.Timer(0.05, service._set_job_status, args=('job', 'completed'),
+                    kwargs={'progress': 100, 'result': 'done'}).start()
+    changed = client.get('/api/transcription_status/job?wait=5', headers={'If-None-Match': etag})
+    Config.JOB_STATUS_MAX_WAIT = 0
+    assert changed.status_code == 200 and changed.json['result'] == 'done'
+    assert changed.headers['ETag'] != etag
+
+    assert client.get('/api/transcription_status/missing').json['status'] == 'not_found'
+    print("✅ 304 until the status changes")
+
+
+if __name__ == "__main__":
+    test_callback_runs_once()
+    test_wait_for_change()
+    test_status_endpoint_etag()
+    print("\n🎉 All job status tests passed!")
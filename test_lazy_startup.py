@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test script for lazy SDK imports and fast-start initialization
+"""
+
+import os
+import sys
+import subprocess
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.lazy_import import LazyModule, module_available
+
+
+def test_lazy_module_defers_import():
+    """The real module is imported on first attribute access only"""
+    print("Testing LazyModule...")
+    calls = []
+    lazy = LazyModule('json', on_import=lambda module: calls.append(module.__name__))
+    assert not lazy.is_loaded
+    assert lazy.dumps({'a': 1}) == '{"a": 1}'
+    assert lazy.is_loaded
+    lazy.loads('{}')
+    assert calls == ['json']
+    print("✅ Import deferred and on_import called once")
+
+
+def test_module_available():
+    """Availability is checked without importing"""
+    print("Testing module_available...")
+    assert module_available('json')
+    assert not module_available('definitely_not_a_vocallocal_module')
+    print("✅ module_available works")
+
+
+def test_transcription_service_does_not_import_gemini_sdk():
+    """Importing the transcription service leaves google.generativeai unloaded"""
+    print("Testing transcription service import...")
+    code = (
+        "import sys; import services.transcription as t; "
+        "print('google.generativeai' in sys.modules, t.transcription_service.gemini_available)"
+    )
+    env = dict(os.environ, GEMINI_API_KEY='test-key', FAST_START='true')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'False True'
+    print("✅ Gemini SDK not imported at startup, service still reports Gemini available")
+
+
+if __name__ == "__main__":
+    test_lazy_module_defers_import()
+    test_module_available()
+    test_transcription_service_does_not_import_gemini_sdk()
+    print("\n🎉 All lazy startup tests passed!")
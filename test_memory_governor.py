@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for memory-aware admission control
+"""
+
+import os
+import sys
+import time
+import threading
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.memory_governor import MemoryGovernor, MemoryBudgetExceeded, MB
+
+
+def _governor_with_headroom(headroom_mb, timeout=0.5):
+    """Create a governor whose budget is the current RSS plus some headroom"""
+    probe = MemoryGovernor(budget_mb=1)
+    rss_mb = probe._current_rss() / MB
+    return MemoryGovernor(budget_mb=rss_mb + headroom_mb, admission_timeout=timeout)
+
+
+def test_pipeline_selection_and_estimates():
+    """Pipeline and footprint follow upload size"""
+    print("Testing pipeline selection...")
+    governor = MemoryGovernor(budget_mb=500)
+    assert governor.pipeline_for_size(2 * MB) == 'direct'
+    assert governor.pipeline_for_size(28 * MB) == 'chunked'
+    assert governor.pipeline_for_size(40 * MB) == 'background'
+
+    direct = governor.estimate_footprint(10 * MB, 'direct')
+    chunk = governor.estimate_footprint(10 * MB, 'chunk')
+    assert direct > 10 * MB
+    assert chunk < direct
+    print("✅ Pipelines and estimates look sane")
+
+
+def test_first_request_always_admitted():
+    """A single oversized request is not starved"""
+    print("Testing single oversized request...")
+    governor = _governor_with_headroom(1)
+    ticket = governor.admit(200 * MB, 'direct', timeout=0)
+    assert governor.get_status()['active_requests'] == 1
+    governor.release(ticket)
+    assert governor.get_status()['active_requests'] == 0
+    print("✅ Oversized request admitted when worker is idle")
+
+
+def test_request_rejected_when_budget_full():
+    """A second request that does not fit times out with MemoryBudgetExceeded"""
+    print("Testing rejection...")
+    governor = _governor_with_headroom(50, timeout=0.2)
+    ticket = governor.admit(10 * MB, 'direct')
+    try:
+        governor.admit(20 * MB, 'direct')
+    except MemoryBudgetExceeded as e:
+        assert e.retry_after >= 5
+        print("✅ Second request rejected")
+    else:
+        raise AssertionError("Request should not fit in the budget")
+    finally:
+        governor.release(ticket)
+    assert governor.get_status()['rejected_total'] == 1
+
+
+def test_queued_request_admitted_after_release():
+    """A queued request proceeds once running work releases its reservation"""
+    print("Testing queueing...")
+    governor = _governor_with_headroom(50, timeout=5)
+    ticket = governor.admit(10 * MB, 'direct')
+    admitted = []
+
+    def _second():
+        admitted.append(governor.admit(10 * MB, 'direct'))
+
+    worker = threading.Thread(target=_second)
+    worker.start()
+    time.sleep(0.2)
+    assert governor.get_status()['queued_requests'] == 1
+    assert not admitted
+
+    governor.release(ticket)
+    worker.join(timeout=5)
+    assert admitted
+    governor.release(admitted[0])
+    print("✅ Queued request admitted after release")
+
+
+def test_background_reservation_skips_budget_check():
+    """Already accepted work can always reserve"""
+    print("Testing forced reservation...")
+    governor = _governor_with_headroom(1)
+    first = governor.admit(5 * MB, 'direct')
+    second = governor.admit(100 * MB, 'background', wait=False)
+    status = governor.get_status()
+    assert status['active_by_pipeline'] == {'direct': 1, 'background': 1}
+    governor.release(first)
+    governor.release(second)
+    print("✅ Background reservation recorded")
+
+
+def test_running_requests_are_not_counted_twice():
+    """Memory a running request has allocated is in RSS and its reservation only once"""
+    print("Testing concurrent mid-size requests...")
+    governor = _governor_with_headroom(100, timeout=0.2)
+    baseline = governor._current_rss()
+    first = governor.admit(10 * MB, 'direct')
+    # The first request's buffers are now resident
+    governor._current_rss = lambda: baseline + governor.estimate_footprint(10 * MB, 'direct')
+    second = governor.admit(10 * MB, 'direct')
+    assert governor.get_status()['active_requests'] == 2
+    governor.release(first)
+    governor.release(second)
+    print("✅ Both requests fit the budget")
+
+
+if __name__ == "__main__":
+    test_pipeline_selection_and_estimates()
+    test_first_request_always_admitted()
+    test_request_rejected_when_budget_full()
+    test_queued_request_admitted_after_release()
+    test_background_reservation_skips_budget_check()
+    test_running_requests_are_not_counted_twice()
+    print("\n🎉 All memory governor tests passed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the central model registry
+"""
+
+import os
+import sys
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.model_registry import ModelRegistry, model_registry
+from services.plan_access_control import PlanAccessControl
+
+
+def test_aliases_and_deprecations_resolve():
+    """Aliases and retired preview IDs resolve to the same canonical model"""
+    print("Testing alias resolution...")
+    for name in ('gemini-2.5-flash', 'gemini-2.5-flash-preview',
+                 'gemini-2.5-flash-preview-04-17', 'gemini-2.5-flash-preview-05-20'):
+        assert model_registry.canonical_name(name, 'transcription') == 'gemini-2.5-flash'
+
+    resolution = model_registry.resolve('gemini-2.5-pro-preview-03-25', 'interpretation')
+    assert resolution.name == 'gemini-2.5-pro' and resolution.deprecated and resolution.known
+
+    assert model_registry.canonical_name('gemini', 'translation') == 'gemini-2.0-flash-lite'
+    assert model_registry.resolve('gpt4o-mini', 'tts').provider_id == 'gpt-4o-mini-tts'
+    print("✅ Aliases resolve consistently")
+
+
+def test_unknown_models_use_capability_default():
+    """Unknown names fall back to the capability default and are not cached"""
+    print("Testing unknown models...")
+    registry = ModelRegistry()
+    resolution = registry.resolve('not-a-model', 'translation')
+    assert resolution.name == 'gemini-2.5-flash' and not resolution.known
+    assert registry.resolve('not-a-model', 'tts').name == 'gpt4o-mini'
+    assert ('not-a-model', 'translation') not in registry._resolutions
+    print("✅ Unknown models use the capability default")
+
+
+def test_plan_matrix_compiled_from_table():
+    """Plan access follows tiers and capabilities"""
+    print("Testing plan access...")
+    assert PlanAccessControl.get_accessible_models('transcription', 'free') == \
+        ['gemini-2.5-flash', 'gemini-2.5-flash-preview']
+    assert PlanAccessControl.get_accessible_models('tts', 'free') == []
+    assert 'gpt-4o-transcribe' in PlanAccessControl.get_accessible_models('transcription', 'basic')
+    assert 'gemini-2.5-pro' not in PlanAccessControl.get_accessible_models('transcription', 'basic')
+    assert 'gemini-2.5-pro' in PlanAccessControl.get_accessible_models('interpretation', 'professional')
+
+    assert PlanAccessControl.is_model_accessible('gemini-2.5-flash-preview-05-20', 'translation', 'free')
+    assert not PlanAccessControl.is_model_accessible('gpt-4.1-mini', 'transcription', 'professional')
+    assert not PlanAccessControl.is_model_accessible('gemini-2.0-flash-lite', 'transcription', 'professional')
+
+    info = PlanAccessControl.get_model_restriction_info('gemini-2.5-pro', 'transcription', 'basic')
+    assert info['required_plan'] == 'professional'
+    assert PlanAccessControl.get_model_info('gemini-2.5-flash')['tier'] == 'free'
+    print("✅ Plan matrix matches the registry")
+
+
+def test_duplicate_names_rejected():
+    """A name can only belong to one model"""
+    print("Testing duplicate names...")
+    table = [
+        {'name': 'a', 'provider': 'gemini', 'provider_id': 'a', 'display_name': 'A', 'description': '',
+         'tier': 'free', 'capabilities': ('transcription',)},
+        {'name': 'b', 'provider': 'gemini', 'provider_id': 'b', 'display_name': 'B', 'description': '',
+         'tier': 'free', 'capabilities': ('transcription',), 'aliases': ('a',)},
+    ]
+    try:
+        ModelRegistry(table, {'transcription': 'a'})
+        assert False, "duplicate name was accepted"
+    except ValueError:
+        pass
+    print("✅ Duplicate names rejected")
+
+
+if __name__ == "__main__":
+    test_aliases_and_deprecations_resolve()
+    test_unknown_models_use_capability_default()
+    test_plan_matrix_compiled_from_table()
+    test_duplicate_names_rejected()
+    print("\n🎉 All model registry tests passed!")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for the permission cache
+"""
+
+import os
+import sys
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.firebase_models import User
+from services.permission_cache import PermissionCache, permission_cache, permissions_from_user
+
+
+class FakeUsersRef:
+    """`users` reference backed by a dict, counting reads"""
+
+    def __init__(self, users):
+        self.users = users
+        self.reads = 0
+
+    def child(self, user_id):
+        ref = self
+
+        class Child:
+            @staticmethod
+            def get():
+                ref.reads += 1
+                return ref.users.get(user_id)
+
+            @staticmethod
+            def update(values):
+                ref.users.setdefault(user_id, {}).update(values)
+        return Child()
+
+
+def _install_users(users):
+    ref = FakeUsersRef(users)
+    User.get_ref = staticmethod(lambda path: ref)
+    permission_cache.clear()
+    return ref
+
+
+def test_repeated_checks_read_once():
+    """Role, verification and plan checks for one user share one read"""
+    print("Testing cached checks...")
+    ref = _install_users({'user@example,com': {
+        'role': 'normal_user', 'email_verified': True, 'subscription': {'planType': 'basic'}}})
+    for _ in range(5):
+        assert User.get_user_role('user@example.com') == 'normal_user'
+        assert User.is_email_verified('user@example.com')
+        assert not User.is_admin('user@example.com')
+        assert not User.requires_email_verification('user@example.com')
+    assert User.get_permissions('user@example.com')['plan'] == 'basic'
+    assert ref.reads == 1
+
+    assert User.get_user_role('missing@example.com') is None
+    assert User.requires_email_verification('missing@example.com')
+    assert ref.reads == 2
+    print("✅ One read for repeated checks")
+
+
+def test_writes_invalidate():
+    """Role updates and email verification are visible immediately"""
+    print("Testing invalidation...")
+    ref = _install_users({'user@example,com': {'role': 'normal_user'}})
+    assert not User.is_email_verified('user@example.com')
+
+    User.mark_email_verified('user@example.com')
+    assert User.is_email_verified('user@example.com')
+
+    User.update_user_role('user@example.com', User.ROLE_SUPER_USER)
+    assert User.has_premium_access('user@example.com')
+    assert ref.reads == 3
+    print("✅ Writes invalidate cached permissions")
+
+
+def test_ttl_and_derivation():
+    """Entries expire, and legacy records derive role from is_admin"""
+    print("Testing TTL and derivation...")
+    loads = []
+    cache = PermissionCache(ttl=0)
+    cache.get('a@example.com', lambda email: loads.append(email) or {'is_admin': True})
+    cache.get('a@example.com', lambda email: loads.append(email) or {'is_admin': True})
+    assert len(loads) == 2
+
+    assert permissions_from_user({'is_admin': True})['role'] == 'admin'
+    assert permissions_from_user({'oauth_provider': 'google'})['email_verified']
+    assert permissions_from_user({'email': 'b@example.com'})['plan'] == 'free'
+    assert permissions_from_user(None) is None
+    print("✅ TTL and role fallback work")
+
+
+def test_webhook_invalidates_after_write():
+    """A request racing a subscription webhook cannot keep the old plan cached"""
+    print("Testing invalidation order in webhooks...")
+    os.environ.setdefault('STRIPE_SECRET_KEY', 'sk_test_permissions')
+    from types import SimpleNamespace
+    import services.payment_service as payment_module
+    from services.user_account_service import UserAccountService
+    from test_helpers import FakeRef, use_database
+
+    database = use_database()
+    database.update({'users/user@example,com': {'email': 'user@example.com',
+                                                 'subscription': {'planType': 'basic'}}})
+    permission_cache.clear()
+
+    class RacingRef(FakeRef):
+        def update(self, values):
+            # Another request loads the user just before the write lands
+            User.get_permissions('user@example.com')
+            super().update(values)
+
+    originals = (UserAccountService.__dict__.get('get_ref'), payment_module.subscription_state)
+    UserAccountService.get_ref = staticmethod(lambda path: RacingRef(database, path))
+    payment_module.subscription_state = SimpleNamespace(record=lambda *args, **kwargs: None)
+    try:
+        service = payment_module.PaymentService()
+        service._handle_subscription_deleted({'id': 'sub_1', 'metadata': {'user_email': 'user@example.com'}})
+    finally:
+        if originals[0] is None:
+            del UserAccountService.get_ref
+        else:
+            UserAccountService.get_ref = originals[0]
+        payment_module.subscription_state = originals[1]
+
+    assert User.get_permissions('user@example.com')['plan'] == 'free'
+    print("✅ Old plan not cached")
+
+
+if __name__ == "__main__":
+    test_repeated_checks_read_once()
+    test_writes_invalidate()
+    test_ttl_and_derivation()
+    test_webhook_invalidates_after_write()
+    print("\n🎉 All permission cache tests passed!")
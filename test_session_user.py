@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for session-backed user loading
+"""
+
+import os
+import sys
+import time
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, session
+from services.permission_cache import permission_cache
+from services.session_user import SNAPSHOT_KEY, SessionUser, load_session_user
+
+app = Flask(__name__)
+app.secret_key = 'test'
+
+USERS = {'user@example.com': {
+    'username': 'someone', 'role': 'super_user', 'email_verified': True,
+    'subscription': {'planType': 'basic'}, 'password_hash': 'secret'}}
+
+
+class CountingLoader:
+    def __init__(self):
+        self.reads = 0
+
+    def __call__(self, email):
+        self.reads += 1
+        return USERS.get(email)
+
+
+def test_snapshot_skips_database():
+    """Requests after the first are served from the session snapshot"""
+    print("Testing snapshot reuse...")
+    loader = CountingLoader()
+    with app.test_request_context():
+        first = load_session_user('user@example.com', loader, max_age=300)
+        assert 'password_hash' not in session[SNAPSHOT_KEY]
+        for _ in range(10):
+            user = load_session_user('user@example.com', loader, max_age=300)
+        assert loader.reads == 1
+        assert user.username == 'someone' and user.plan == 'basic'
+        assert user.has_premium_access() and not user.requires_email_verification()
+        assert user.checked_at == first.checked_at
+    print("✅ One read for many requests")
+
+
+def test_revalidation():
+    """Old snapshots, invalidated users and other user IDs are reloaded"""
+    print("Testing revalidation...")
+    loader = CountingLoader()
+    with app.test_request_context():
+        load_session_user('user@example.com', loader, max_age=300)
+
+        # Older than the maximum age
+        session[SNAPSHOT_KEY]['checked'] = time.time() - 301
+        load_session_user('user@example.com', loader, max_age=300)
+        assert loader.reads == 2
+
+        # Role changed in this worker after the snapshot was taken
+        time.sleep(0.01)
+        permission_cache.invalidate('user@example.com')
+        load_session_user('user@example.com', loader, max_age=300)
+        assert loader.reads == 3
+        load_session_user('user@example.com', loader, max_age=300)
+        assert loader.reads == 3
+
+        # A snapshot for a different user is never trusted
+        assert load_session_user('gone@example.com', loader, max_age=300) is None
+        assert SNAPSHOT_KEY not in session
+        assert loader.reads == 4
+    print("✅ Stale snapshots are revalidated")
+
+
+def test_legacy_role_fallback():
+    """Users without a role field keep the is_admin fallback"""
+    user = SessionUser.from_user_data('admin@example.com', {'is_admin': True, 'oauth_provider': 'google'})
+    assert user.has_admin_privileges() and user.oauth_user and user.is_email_verified()
+    assert SessionUser.from_snapshot(user.snapshot()).role == 'admin'
+    print("✅ Role fallback preserved")
+
+
+if __name__ == "__main__":
+    test_snapshot_skips_database()
+    test_revalidation()
+    test_legacy_role_fallback()
+    print("\n🎉 All session user tests passed!")
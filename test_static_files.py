@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the static file middleware
+"""
+
+import os
+import sys
+import gzip
+import tempfile
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from utils.cache_busting import CacheBuster
+from utils.static_files import StaticFiles, accepted_encodings
+
+SCRIPT = b'function hello() { return "hello"; }\n' * 100
+
+
+def _app(mode='index', **kwargs):
+    static_dir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(static_dir, 'dist'))
+    with open(os.path.join(static_dir, 'script.js'), 'wb') as f:
+        f.write(SCRIPT)
+    with open(os.path.join(static_dir, 'dist', 'app.abc.js'), 'wb') as f:
+        f.write(SCRIPT)
+    with open(os.path.join(static_dir, 'dist', 'app.abc.js.br'), 'wb') as f:
+        f.write(b'brotli bytes')
+    with open(os.path.join(static_dir, 'dist', 'app.abc.js.gz'), 'wb') as f:
+        f.write(gzip.compress(SCRIPT))
+
+    app = Flask(__name__, static_folder=static_dir, static_url_path='/static')
+    buster = CacheBuster(app)
+    calls = []
+
+    @app.before_request
+    def count():
+        calls.append(1)
+
+    app.wsgi_app = StaticFiles(app.wsgi_app, static_dir, mode=mode,
+                               cache_headers=buster.static_cache_headers, **kwargs)
+    return app, static_dir, calls
+
+
+def test_accept_encoding():
+    """Accept-Encoding is parsed with q=0 exclusions"""
+    print("Testing Accept-Encoding parsing...")
+    assert accepted_encodings('gzip, deflate, br') == {'gzip', 'deflate', 'br'}
+    assert accepted_encodings('br;q=0, gzip;q=0.8') == {'gzip'}
+    assert accepted_encodings(None) == set()
+    print("✅ Accept-Encoding parsed")
+
+
+def test_negotiation():
+    """Precompressed variants are chosen by Accept-Encoding; Flask is not involved"""
+    print("Testing negotiation...")
+    app, static_dir, calls = _app()
+    client = app.test_client()
+
+    response = client.get('/static/dist/app.abc.js', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br' and response.data == b'brotli bytes'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+    response = client.get('/static/dist/app.abc.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip' and gzip.decompress(response.data) == SCRIPT
+
+    response = client.get('/static/dist/app.abc.js')
+    assert 'Content-Encoding' not in response.headers and response.data == SCRIPT
+    assert response.headers['Content-Type'].startswith(('application/javascript', 'text/javascript'))
+
+    # Files the build did not compress are gzipped in memory
+    response = client.get('/static/script.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip' and gzip.decompress(response.data) == SCRIPT
+    assert calls == []
+    print("✅ Variants negotiated")
+
+
+def test_conditional_and_fallthrough():
+    """Matching ETags get 304; unknown paths and other methods reach Flask"""
+    print("Testing conditional requests...")
+    app, static_dir, calls = _app()
+    client = app.test_client()
+    etag = client.get('/static/script.js').headers['ETag']
+    response = client.get('/static/script.js', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert client.get('/static/missing.js').status_code == 404
+    assert len(calls) == 1
+    print("✅ 304s served and misses passed on")
+
+
+def test_accel_redirect():
+    """In x-accel-redirect mode only headers are sent; nginx reads the file"""
+    print("Testing X-Accel-Redirect...")
+    app, static_dir, calls = _app(mode='x-accel-redirect', accel_prefix='/internal-static')
+    response = app.test_client().get('/static/dist/app.abc.js', headers={'Accept-Encoding': 'br'})
+    assert response.headers['X-Accel-Redirect'] == '/internal-static/dist/app.abc.js.br'
+    assert response.headers['Content-Encoding'] == 'br' and response.data == b''
+    # No in-memory variants: nginx cannot redirect to them
+    response = app.test_client().get('/static/script.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['X-Accel-Redirect'] == '/internal-static/script.js'
+    print("✅ X-Accel-Redirect sent")
+
+
+def test_autorefresh():
+    """With autorefresh, changed and new files are picked up"""
+    print("Testing autorefresh...")
+    app, static_dir, calls = _app(autorefresh=True)
+    client = app.test_client()
+    with open(os.path.join(static_dir, 'new.css'), 'w') as f:
+        f.write('body { color: red; }')
+    assert client.get('/static/new.css').data == b'body { color: red; }'
+    with open(os.path.join(static_dir, 'new.css'), 'w') as f:
+        f.write('body { color: blue; }')
+    os.utime(os.path.join(static_dir, 'new.css'), (1, 1))
+    assert client.get('/static/new.css').data == b'body { color: blue; }'
+    assert client.get('/static/../../etc/passwd').status_code == 404
+    print("✅ Autorefresh works")
+
+
+if __name__ == "__main__":
+    test_accept_encoding()
+    test_negotiation()
+    test_conditional_and_fallthrough()
+    test_accel_redirect()
+    test_autorefresh()
+    print("\n🎉 All static file tests passed!")
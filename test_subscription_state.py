@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for the subscription state store
+"""
+
+import os
+import sys
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stripe
+from services.subscription_state import SubscriptionStateStore
+from test_helpers import use_database
+
+
+class FakeSubscription(dict):
+    def __init__(self, email, plan_type, subscription_id):
+        super().__init__(metadata={'user_email': email, 'plan_type': plan_type}, customer='cus_1')
+        self.id = subscription_id
+
+
+class FakeSubscriptionList:
+    def __init__(self, subscriptions):
+        self.subscriptions = subscriptions
+
+    def auto_paging_iter(self):
+        return iter(self.subscriptions)
+
+
+def test_plan_from_state():
+    """Stripe's mirrored state wins; unverified paid plans are flagged"""
+    print("Testing plan resolution...")
+    plan = SubscriptionStateStore.plan_from_state
+    assert plan({}) == ('free', 'Free Plan')
+    assert plan({'planType': 'basic', 'status': 'active'}) == ('basic', 'Basic Plan')
+    assert plan({'planType': 'basic', 'status': 'active', 'syncIssue': True}) == ('basic', 'Basic Plan (Verify Billing)')
+    assert plan({'planType': 'free', 'stripeStatus': 'active', 'stripePlanType': 'professional'}) == \
+        ('professional', 'Professional Plan')
+    assert plan({'planType': 'free', 'status': 'canceled', 'stripeStatus': 'canceled'}) == ('free', 'Free Plan')
+    print("✅ Plans resolved locally")
+
+
+def test_webhook_record_and_reconcile():
+    """Webhooks mirror Stripe state; the reconciler flags and clears differences"""
+    print("Testing webhook mirroring and reconciliation...")
+    database = use_database()
+    store = SubscriptionStateStore(reconcile_interval=0)
+    database.update({
+        'users/paid@example,com/email': 'paid@example.com',
+        'users/stale@example,com/email': 'stale@example.com',
+        'users/stale@example,com/subscription': {'planType': 'basic', 'status': 'active'},
+        'users/free@example,com/email': 'free@example.com',
+    })
+
+    store.record('paid@example.com', 'professional', 'active', 'sub_1', 'cus_1')
+    assert store.current_plan('paid@example.com') == ('professional', 'Professional Plan')
+    assert store.current_plan('stale@example.com') == ('basic', 'Basic Plan')
+
+    original_list = stripe.Subscription.list
+    stripe.Subscription.list = staticmethod(
+        lambda **kwargs: FakeSubscriptionList([FakeSubscription('paid@example.com', 'professional', 'sub_1')]))
+    try:
+        stats = store.reconcile(page_size=2)
+        assert stats == {'checked': 3, 'stripe_active': 1, 'sync_issues': 1, 'updated': 1}
+        assert store.current_plan('stale@example.com') == ('basic', 'Basic Plan (Verify Billing)')
+        assert store.reconcile(page_size=2)['updated'] == 0
+
+        # A missed cancellation webhook is picked up
+        stripe.Subscription.list = staticmethod(lambda **kwargs: FakeSubscriptionList([]))
+        store.reconcile(page_size=2)
+        assert store.current_plan('paid@example.com') == ('free', 'Free Plan')
+    finally:
+        stripe.Subscription.list = original_list
+    print("✅ Reconciler diffs Firebase against Stripe")
+
+
+def test_scheduler_restarts_after_fork():
+    """A scheduler started before a fork (preload_app) is started again in the child"""
+    print("Testing scheduler across fork...")
+    import threading
+    read_fd, write_fd = os.pipe()
+    store = SubscriptionStateStore(reconcile_interval=60)
+    ran_in = []
+    ran = threading.Event()
+
+    def run_scheduler():
+        ran_in.append(os.getpid())
+        ran.set()
+
+    store._run_scheduler = run_scheduler
+    secret_key = os.environ.get('STRIPE_SECRET_KEY')
+    os.environ['STRIPE_SECRET_KEY'] = secret_key or 'sk_test'
+    store.start_scheduler()  # the preloading master
+    assert ran.wait(2) and ran_in == [os.getpid()]
+    store.start_scheduler()  # no second thread in the same process
+    assert ran_in == [os.getpid()]
+
+    pid = os.fork()
+    if pid == 0:
+        # Forked worker: its first request starts the scheduler
+        ran.clear()
+        store.start_scheduler()
+        ok = ran.wait(2) and ran_in[-1] == os.getpid()
+        os.write(write_fd, b'1' if ok else b'0')
+        os._exit(0)
+    os.waitpid(pid, 0)
+    if secret_key is None:
+        del os.environ['STRIPE_SECRET_KEY']
+    assert os.read(read_fd, 1) == b'1'
+    os.close(read_fd)
+    os.close(write_fd)
+    print("✅ Scheduler runs in the forked worker")
+
+
+if __name__ == "__main__":
+    test_plan_from_state()
+    test_webhook_record_and_reconcile()
+    test_scheduler_restarts_after_fork()
+    print("\n🎉 All subscription state tests passed!")
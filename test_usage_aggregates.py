@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script for per-user usage aggregates
+"""
+
+import os
+import sys
+from collections import OrderedDict
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.firebase_models import FirebaseModel, HistoryBody, Transcription, Translation, UsageAggregate, User
+import rebuild_usage_aggregates
+
+
+class FakeDatabase:
+    """In-memory Realtime Database tree that understands server increments"""
+
+    def __init__(self):
+        self.tree = {}
+        self.updates = 0
+
+    def _node(self, path, create=False):
+        node = self.tree
+        for part in [p for p in path.split('/') if p]:
+            if part not in node:
+                if not create:
+                    return None
+                node[part] = {}
+            node = node[part]
+        return node
+
+    def update(self, values):
+        self.updates += 1
+        for path, value in values.items():
+            parent_path, _, name = path.rpartition('/')
+            parent = self._node(parent_path, create=True)
+            if isinstance(value, dict) and '.sv' in value:
+                server_value = value['.sv']
+                value = parent.get(name, 0) + server_value['increment'] if isinstance(server_value, dict) else 0
+            parent[name] = value
+
+    def child(self, path):
+        return FakeRef(self, path)
+
+
+class FakeRef:
+    def __init__(self, database, path):
+        self.database = database
+        self.path = path
+        self.start = self.first = None
+
+    def get(self, shallow=False):
+        node = self.database._node(self.path)
+        if node is None or not isinstance(node, dict):
+            return node
+        rows = sorted(node.items())
+        if self.start is not None:
+            rows = [row for row in rows if row[0] >= self.start]
+        if self.first is not None:
+            rows = rows[:self.first]
+        return OrderedDict((key, True if shallow else value) for key, value in rows)
+
+    def set(self, value):
+        self.database.update({self.path: value})
+
+    def order_by_key(self):
+        return self
+
+    def start_at(self, key):
+        self.start = key
+        return self
+
+    def limit_to_first(self, n):
+        self.first = n
+        return self
+
+
+def _use_database():
+    database = FakeDatabase()
+    for model in (FirebaseModel, HistoryBody, UsageAggregate, User):
+        model.get_root = staticmethod(lambda: database)
+        model.get_ref = staticmethod(database.child)
+    return database
+
+
+def test_saves_increment_aggregate():
+    """Each history write bumps the user's aggregate in the same update"""
+    print("Testing write-time aggregation...")
+    database = _use_database()
+    Transcription.save('user@example.com', 'hello world', 'en', 'gemini-2.5-flash', 3.0)
+    Transcription.save('user@example.com', 'again', 'en', 'gemini-2.5-flash', 1.0)
+    Translation.save('user@example.com', 'hola', 'hello', 'es', 'en', 'gemini-2.5-flash')
+    assert database.updates == 3
+
+    aggregate = UsageAggregate.get_all()['user@example,com']
+    assert aggregate['email'] == 'user@example.com'
+    assert aggregate['transcription_count'] == 2 and aggregate['transcription_chars'] == 16
+    assert aggregate['translation_count'] == 1 and aggregate['translation_chars'] == 5
+    assert aggregate['last_activity'] > 0
+    print("✅ Aggregates updated on write")
+
+
+def test_rebuild_matches_history():
+    """The rebuild command recomputes aggregates, including legacy inline entries"""
+    print("Testing aggregate rebuild...")
+    database = _use_database()
+    for i in range(7):
+        Transcription.save('user@example.com', 'x' * (i + 1), 'en', 'gemini-2.5-flash')
+    # A legacy entry written before metadata and aggregates existed
+    database.update({'translations/user@example,com/-legacy': {
+        'translated_text': 'legacy', 'timestamp': '2025-01-01T00:00:00'}})
+    database.update({'users/user@example,com/username': 'someone'})
+
+    expected = UsageAggregate.get_all()['user@example,com']
+    aggregate = rebuild_usage_aggregates.compute_aggregate('user@example,com', batch_size=3)
+    assert aggregate['transcription_count'] == 7 and aggregate['transcription_chars'] == 28
+    assert aggregate['transcription_chars'] == expected['transcription_chars']
+    assert aggregate['translation_count'] == 1 and aggregate['translation_chars'] == 6
+    assert aggregate['username'] == 'someone'
+    print("✅ Rebuild matches history")
+
+
+def test_dashboard_lists_every_user():
+    """The admin usage page is built from the aggregates and a shallow read of user IDs"""
+    print("Testing admin usage dashboard...")
+    import routes.admin as admin_routes
+
+    database = _use_database()
+    User.create('someone', 'user@example.com')
+    User.create('idle', 'idle@example.com')
+    # An account from before aggregates existed, with no history
+    database.update({'users/legacy@example,com': {'username': 'legacy', 'email': 'legacy@example.com'}})
+    Transcription.save('user@example.com', 'hello world', 'en', 'gemini-2.5-flash', 3.0)
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("The dashboard must not read user records")
+
+    originals = (admin_routes.session, admin_routes.render_template, User.__dict__['iter_users'])
+    admin_routes.session = {'special_admin_auth': True}
+    admin_routes.render_template = lambda template, **context: context
+    User.iter_users = staticmethod(no_scan)
+    try:
+        user_data = admin_routes.user_usage()['user_data']
+    finally:
+        admin_routes.session, admin_routes.render_template, User.iter_users = originals
+
+    assert user_data['user@example.com']['username'] == 'someone'
+    assert user_data['user@example.com']['transcription_count'] == 1
+    assert user_data['idle@example.com']['username'] == 'idle'
+    assert user_data['idle@example.com']['total_operations'] == 0
+    assert user_data['legacy@example.com']['total_operations'] == 0
+
+    # The rebuild backfills names for accounts that predate the aggregates
+    aggregate = rebuild_usage_aggregates.compute_aggregate('legacy@example,com', batch_size=10)
+    assert aggregate['username'] == 'legacy'
+    print("✅ Dashboard lists every user")
+
+
+if __name__ == "__main__":
+    test_saves_increment_aggregate()
+    test_rebuild_matches_history()
+    test_dashboard_lists_every_user()
+    print("\n🎉 All usage aggregate tests passed!")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process usage statistics engine
+"""
+
+import os
+import sys
+import time
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.firebase_models import FirebaseModel, User
+from services.usage_statistics_service import UsageStatisticsService
+from test_helpers import FakeDatabase, FakeRef
+
+
+class CountingRef(FakeRef):
+    """FakeRef that counts reads"""
+
+    reads = 0
+
+    def get(self, shallow=False):
+        CountingRef.reads += 1
+        return super().get(shallow)
+
+
+def _user(plan, minutes, reset_date):
+    return {
+        'subscription': {'planType': plan},
+        'usage': {'currentPeriod': {'transcriptionMinutes': minutes, 'translationWords': 100,
+                                    'resetDate': reset_date}},
+        'billing': {'payAsYouGo': {'credits': 5}},
+    }
+
+
+def _use_database():
+    database = FakeDatabase()
+    for model in (FirebaseModel, User):
+        model.get_ref = staticmethod(lambda path: CountingRef(database, path))
+    CountingRef.reads = 0
+    return database
+
+
+def test_plan_data_is_cached():
+    """Plan limits are read once per TTL, including plans that do not exist"""
+    print("Testing plan cache...")
+    database = _use_database()
+    database.update({'subscriptionPlans/basic': {'transcriptionMinutes': 280}})
+    statistics = UsageStatisticsService()
+    for _ in range(5):
+        assert statistics.get_plan_data('basic') == {'transcriptionMinutes': 280}
+        assert statistics.get_plan_data('missing') is None
+    assert CountingRef.reads == 2
+
+    statistics.invalidate_plans()
+    statistics.get_plan_data('basic')
+    assert CountingRef.reads == 3
+    print("✅ Plan data served from cache")
+
+
+def test_statistics_update_incrementally():
+    """Statistics are built once, then kept current from observed snapshots"""
+    print("Testing incremental statistics...")
+    database = _use_database()
+    future = int(time.time() * 1000) + 86400000
+    database.update({
+        'users/a@example,com': _user('free', 10, 0),
+        'users/b@example,com': _user('basic', 20, future),
+        'users/c@example,com': _user('professional', 30, future + 1),
+    })
+    statistics = UsageStatisticsService()
+    stats = statistics.get_statistics()
+    assert stats['totalUsers'] == 3
+    assert stats['currentPeriodUsage']['transcriptionMinutes'] == 60
+    assert stats['currentPeriodUsage']['translationWords'] == 300
+    assert stats['planDistribution'] == {'free': 1, 'basic': 1, 'professional': 1}
+    assert stats['usersNeedingReset'] == 1 and stats['nextResetDate'] == future
+
+    reads = CountingRef.reads
+    statistics.observe('a@example,com', _user('basic', 45, future))
+    statistics.observe('d@example,com', _user('free', 5, future))
+    stats = statistics.get_statistics()
+    assert CountingRef.reads == reads
+    assert stats['totalUsers'] == 4
+    assert stats['currentPeriodUsage']['transcriptionMinutes'] == 100
+    assert stats['planDistribution'] == {'free': 1, 'basic': 2, 'professional': 1}
+    assert stats['usersNeedingReset'] == 0
+
+    statistics.invalidate()
+    assert statistics.get_statistics()['totalUsers'] == 3
+    assert CountingRef.reads > reads
+    print("✅ Statistics updated without rescanning users")
+
+
+def test_records_without_email_are_skipped():
+    """A user record with no email does not stop the rebuild"""
+    print("Testing records without email...")
+    database = _use_database()
+    database.update({
+        'users/a@example,com': _user('free', 10, 0),
+        'users/legacy-record': _user('basic', 20, 0),
+    })
+    stats = UsageStatisticsService().get_statistics()
+    assert stats['totalUsers'] == 1
+    assert stats['currentPeriodUsage']['transcriptionMinutes'] == 10
+    print("✅ Records without email skipped")
+
+
+def test_workers_converge():
+    """Two workers that saw different snapshots agree once their interval passes"""
+    print("Testing convergence between workers...")
+    database = _use_database()
+    future = int(time.time() * 1000) + 86400000
+    database.update({
+        'users/a@example,com': _user('free', 10, future),
+        'users/b@example,com': _user('basic', 20, future),
+    })
+    first = UsageStatisticsService(rebuild_interval=0.2)
+    second = UsageStatisticsService(rebuild_interval=0.2)
+    assert first.get_statistics() == second.get_statistics()
+
+    # A usage change that only the first worker reads back
+    database.update({'users/a@example,com': _user('professional', 40, future)})
+    first.observe('a@example,com', _user('professional', 40, future))
+    assert first.get_statistics() != second.get_statistics()
+
+    time.sleep(0.3)
+    expected = UsageStatisticsService().get_statistics()
+    assert first.get_statistics() == second.get_statistics() == expected
+    assert expected['currentPeriodUsage']['transcriptionMinutes'] == 60
+    print("✅ Workers converge after the rebuild interval")
+
+
+if __name__ == "__main__":
+    test_plan_data_is_cached()
+    test_statistics_update_incrementally()
+    test_records_without_email_are_skipped()
+    test_workers_converge()
+    print("\n🎉 All usage statistics tests passed!")
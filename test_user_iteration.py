@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for paginated user iteration
+"""
+
+import os
+import sys
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.firebase_models import User
+from test_helpers import FakeDatabase, FakeRef
+
+
+class CountingRef(FakeRef):
+    """FakeRef that records how many user records each query returns"""
+
+    pages = []
+
+    def get(self, shallow=False):
+        result = super().get(shallow)
+        if isinstance(result, dict) and not shallow:
+            CountingRef.pages.append(len(result))
+        return result
+
+
+def _install_users(count):
+    database = FakeDatabase()
+    for i in range(count):
+        database.update({f'users/user{i:03d}@example,com': {
+            'username': f'user{i}',
+            'role': 'normal_user',
+            'usage': {'currentPeriod': {'transcriptionMinutes': i}},
+            'billing': {'payAsYouGo': {'credits': 5}},
+        }})
+    User.get_ref = staticmethod(lambda path: CountingRef(database, path))
+    CountingRef.pages = []
+    return database
+
+
+def test_iter_users_pages_every_user_once():
+    """Users are yielded in bounded pages without repeats"""
+    print("Testing paged user iteration...")
+    _install_users(23)
+    users = list(User.iter_users(batch_size=5))
+    emails = [user['email'] for user in users]
+    assert len(emails) == 23 and len(set(emails)) == 23
+    assert emails[0] == 'user000@example.com'
+    assert max(CountingRef.pages) <= 6
+    print(f"✅ {len(users)} users over {len(CountingRef.pages)} queries")
+
+
+def test_field_projection():
+    """Only requested fields (plus email) are kept"""
+    print("Testing field projection...")
+    _install_users(3)
+    users = User.get_all_users(fields=User.LISTING_FIELDS)
+    assert users[0] == {'username': 'user0', 'role': 'normal_user', 'email': 'user000@example.com'}
+    assert all('usage' not in user and 'billing' not in user for user in users)
+    assert list(User.iter_user_ids()) == ['user000@example,com', 'user001@example,com', 'user002@example,com']
+    print("✅ Nested usage and billing data dropped")
+
+
+if __name__ == "__main__":
+    test_iter_users_pages_every_user_once()
+    test_field_projection()
+    print("\n🎉 All user iteration tests passed!")
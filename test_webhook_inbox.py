@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the webhook inbox
+"""
+
+import os
+import sys
+import json
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('STRIPE_SECRET_KEY', 'sk_test_inbox')
+
+from services.payment_service import PaymentService
+from services.user_account_service import UserAccountService
+from services.webhook_inbox import WebhookInbox
+from test_helpers import use_database
+
+
+def _inbox(results):
+    """Inbox without a worker thread whose handler returns `results` in turn"""
+    inbox = WebhookInbox()
+    inbox._worker_pid = os.getpid()
+    calls = []
+
+    def handler(event):
+        calls.append(event['id'])
+        return results.pop(0)
+    inbox.set_handler(handler)
+    return inbox, calls
+
+
+def _payload(event_id):
+    return json.dumps({'id': event_id, 'type': 'invoice.payment_succeeded', 'data': {'object': {}}})
+
+
+def test_redelivery_is_ignored():
+    """An event ID is recorded and processed once"""
+    print("Testing idempotent recording...")
+    database = use_database()
+    inbox, calls = _inbox([{'success': True}])
+    assert inbox.record('evt_1', 'invoice.payment_succeeded', _payload('evt_1'))
+    assert not inbox.record('evt_1', 'invoice.payment_succeeded', _payload('evt_1'))
+
+    inbox.process('evt_1')
+    inbox.process('evt_1')
+    assert calls == ['evt_1']
+    event = database.tree['webhook_events']['evt_1']
+    assert event['status'] == 'done' and 'payload' not in event
+    print("✅ Redeliveries ignored")
+
+
+def test_retries_with_backoff():
+    """Failed handlers are retried when due, and give up after MAX_ATTEMPTS"""
+    print("Testing retries...")
+    database = use_database()
+    inbox, calls = _inbox([{'error': 'smtp down'}, {'success': True}])
+    inbox.record('evt_2', 'invoice.payment_succeeded', _payload('evt_2'))
+
+    inbox.process('evt_2')
+    event = database.tree['webhook_events']['evt_2']
+    assert event['status'] == 'pending' and event['lastError'] == 'smtp down'
+    assert inbox.sweep() == []  # Not due yet
+    inbox.process('evt_2')
+    assert calls == ['evt_2']
+
+    event['nextAttemptAt'] = 0
+    assert inbox.sweep() == ['evt_2']
+    inbox.process('evt_2')
+    assert calls == ['evt_2', 'evt_2']
+    assert database.tree['webhook_events']['evt_2']['status'] == 'done'
+
+    inbox, calls = _inbox([{'error': 'bad'}] * WebhookInbox.MAX_ATTEMPTS)
+    inbox.record('evt_3', 'invoice.payment_succeeded', _payload('evt_3'))
+    for _ in range(WebhookInbox.MAX_ATTEMPTS):
+        database.tree['webhook_events']['evt_3']['nextAttemptAt'] = 0
+        inbox.process('evt_3')
+    assert database.tree['webhook_events']['evt_3']['status'] == 'failed'
+    assert len(calls) == WebhookInbox.MAX_ATTEMPTS
+    print("✅ Retries and give-up work")
+
+
+def test_confirmation_email_claimed_once():
+    """Only one handler run may send an invoice's confirmation email"""
+    print("Testing confirmation email claim...")
+    database = use_database()
+    UserAccountService.get_ref = staticmethod(database.child)
+    service = PaymentService()
+    assert service._claim_confirmation_email('user@example.com', 'in_1')
+    assert not service._claim_confirmation_email('user@example.com', 'in_1')
+    service._release_confirmation_email('user@example.com', 'in_1')
+    assert service._claim_confirmation_email('user@example.com', 'in_1')
+    print("✅ Email claimed once")
+
+
+def test_abandoned_confirmation_email_is_taken_over():
+    """A claim whose worker died is taken over once its lease expires"""
+    print("Testing confirmation email takeover...")
+    database = use_database()
+    UserAccountService.get_ref = staticmethod(database.child)
+    service = PaymentService()
+    assert service._claim_confirmation_email('user@example.com', 'in_1')
+    # The worker dies here: the claim is never released or marked sent
+    assert not service._claim_confirmation_email('user@example.com', 'in_1')
+
+    ref = service._confirmation_email_ref('user@example.com', 'in_1')
+    ref.set({'state': 'sending', 'until': 1})
+    assert service._claim_confirmation_email('user@example.com', 'in_1')
+    assert ref.get()['until'] > 1
+
+    ref.set('sent')
+    assert not service._claim_confirmation_email('user@example.com', 'in_1')
+    print("✅ Expired claim taken over")
+
+
+if __name__ == "__main__":
+    test_redelivery_is_ignored()
+    test_retries_with_backoff()
+    test_confirmation_email_claimed_once()
+    test_abandoned_confirmation_email_is_taken_over()
+    print("\n🎉 All webhook inbox tests passed!")
@@ -6,8 +6,11 @@ This module provides functions to count tokens for different AI models:
 - Google Gemini models
 """
 
-import tiktoken
 import logging
+from utils.lazy_import import LazyModule
+
+# tiktoken loads BPE tables on import; defer it until a count is requested
+tiktoken = LazyModule('tiktoken')
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,99 @@
+"""
+Bounded pool for blocking work (FFmpeg subprocesses, Gemini uploads).
+
+Under the default ``gthread`` gunicorn profile every request already runs on
+its own OS thread and a worker runs at most GUNICORN_THREADS of them, so
+blocking calls are executed inline, unbounded, exactly as before. Under the
+``gevent`` profile (see gunicorn_config.py) the same calls
+that are not socket-based (Gemini uploads through non-patched clients) are
+handed to the gevent hub's native thread pool so that a single greenlet does
+not stall every other request in the worker. FFmpeg subprocesses are already
+cooperative once gevent has patched ``subprocess`` and only need bounding,
+because hundreds of greenlets could otherwise start one each.
+"""
+
+import os
+import logging
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of blocking operations running at once in a gevent worker
+BLOCKING_POOL_SIZE = int(os.environ.get('BLOCKING_POOL_SIZE', 4))
+
+# Created at import time, i.e. after gevent has patched threading in a gevent worker
+_semaphore = threading.BoundedSemaphore(BLOCKING_POOL_SIZE)
+_gevent_pool = None
+_gevent_pool_lock = threading.Lock()
+
+
+def gevent_active():
+    """Return True when the current process has been monkey-patched by gevent."""
+    try:
+        from gevent import monkey
+        return monkey.is_module_patched('socket')
+    except ImportError:
+        return False
+
+
+def _get_gevent_pool():
+    """Lazily create the gevent native thread pool used for offloading."""
+    global _gevent_pool
+    if _gevent_pool is None:
+        with _gevent_pool_lock:
+            if _gevent_pool is None:
+                from gevent.threadpool import ThreadPool
+                _gevent_pool = ThreadPool(BLOCKING_POOL_SIZE)
+                logger.info(f"Created gevent blocking pool with {BLOCKING_POOL_SIZE} threads")
+    return _gevent_pool
+
+
+def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking callable without starving other requests.
+
+    Args:
+        func: Callable to execute
+        *args: Positional arguments for the callable
+        **kwargs: Keyword arguments for the callable
+
+    Returns:
+        Whatever the callable returns (exceptions are re-raised in the caller)
+    """
+    if gevent_active():
+        # The gevent ThreadPool is already bounded; the calling greenlet yields
+        # to the hub until the native thread completes.
+        return _get_gevent_pool().apply(func, args, kwargs)
+
+    return func(*args, **kwargs)
+
+
+def run_subprocess(cmd, **kwargs):
+    """
+    Drop-in replacement for ``subprocess.run``, bounded by the pool size under gevent.
+
+    gevent patches ``subprocess`` so waiting on the child already yields to the
+    hub; only the number of simultaneous FFmpeg processes needs limiting.
+    gthread workers are already bounded by their thread count.
+
+    Args:
+        cmd: Command list passed to subprocess.run
+        **kwargs: Keyword arguments passed to subprocess.run
+
+    Returns:
+        subprocess.CompletedProcess
+    """
+    if not gevent_active():
+        return subprocess.run(cmd, **kwargs)
+
+    with _semaphore:
+        return subprocess.run(cmd, **kwargs)
+
+
+def get_pool_stats():
+    """Return a small dict describing the pool configuration."""
+    return {
+        'mode': 'gevent' if gevent_active() else 'threaded',
+        'size': BLOCKING_POOL_SIZE
+    }
@@ -3,13 +3,29 @@ Cache busting utilities for VocalLocal Flask application.
 
 This module provides utilities for implementing cache-busting strategies
 to ensure users always get the latest version of static assets.
+
+In production, build_assets.py writes content-hashed copies of the static
+assets and a manifest (static/dist/manifest.json). The manifest is loaded once
+at startup and versioned URLs point at the hashed copies, which are cached by
+browsers for a year without revalidation. Groups of tags wrapped in
+{% call asset_bundle('<name>') %} render as a single tag for the built bundle.
+Without a manifest (development), versions fall back to file modification
+times and bundle blocks render their original tags.
 """
 
 import os
+import json
 import hashlib
+import logging
 import time
 from functools import lru_cache
 from flask import current_app, url_for
+from markupsafe import Markup, escape
+
+logger = logging.getLogger(__name__)
+
+# Written by build_assets.py, relative to the static folder
+MANIFEST_PATH = os.path.join('dist', 'manifest.json')
 
 
 class CacheBuster:
@@ -20,6 +36,9 @@ class CacheBuster:
         self._file_versions = {}
         self._last_check = {}
         self.check_interval = 300  # Check for file changes every 5 minutes
+        self._manifest = {}  # original path -> hashed path (relative to the static folder)
+        self._hashes = {}  # original path -> content hash
+        self._bundles = {}  # bundle name -> hashed path
         
         if app is not None:
             self.init_app(app)
@@ -27,16 +46,70 @@ class CacheBuster:
     def init_app(self, app):
         """Initialize the cache buster with Flask app."""
         self.app = app
-        
+
+        if app.static_folder:
+            self.load_manifest(os.path.join(app.static_folder, MANIFEST_PATH))
+
         # Add template global function
         app.jinja_env.globals['versioned_url_for'] = self.versioned_url_for
         app.jinja_env.globals['static_version'] = self.get_file_version
+        app.jinja_env.globals['asset_bundle'] = self.asset_bundle
         
         # Configure cache control headers
         @app.after_request
         def add_cache_headers(response):
             return self.add_cache_control_headers(response)
     
+    def load_manifest(self, path):
+        """
+        Load the asset manifest written by build_assets.py.
+
+        Args:
+            path (str): Path of manifest.json
+
+        Returns:
+            int: Number of hashed assets (0 if there is no usable manifest)
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            self._manifest = dict(manifest['assets'])
+            self._hashes = dict(manifest.get('hashes', {}))
+            self._bundles = dict(manifest.get('bundles', {}))
+            logger.info(f"Loaded asset manifest with {len(self._manifest)} hashed assets "
+                        f"and {len(self._bundles)} bundles")
+        except FileNotFoundError:
+            self._manifest, self._hashes, self._bundles = {}, {}, {}
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable asset manifest {path}: {str(e)}")
+            self._manifest, self._hashes, self._bundles = {}, {}, {}
+        return len(self._manifest)
+
+    def get_asset_path(self, filename):
+        """Hashed path of a static file from the manifest, or None if it is not in it."""
+        return self._manifest.get(filename)
+
+    def asset_bundle(self, name, caller):
+        """
+        Render a bundle block: one tag for the built bundle, or the block's own tags.
+
+        Used as {% call asset_bundle('index.js') %} <script ...> ... {% endcall %}.
+
+        Args:
+            name (str): Bundle name; its extension (.js or .css) selects the tag
+            caller: The block body, rendered when there is no built bundle
+
+        Returns:
+            Markup: HTML for the page
+        """
+        path = self._bundles.get(name)
+        if not path:
+            return caller()
+        url = escape(url_for('static', filename=path))
+        if name.endswith('.css'):
+            return Markup(f'<link rel="stylesheet" href="{url}">')
+        return Markup(f'<script src="{url}"></script>')
+
     def get_file_version(self, filename):
         """
         Get version string for a static file based on modification time.
@@ -50,6 +123,10 @@ class CacheBuster:
         if not filename:
             return str(int(time.time()))
 
+        # Built assets are versioned by content
+        if filename in self._hashes:
+            return self._hashes[filename]
+
         # Force refresh for critical files to ensure latest version is served
         critical_files = [
             'script.js',
@@ -132,61 +209,85 @@ class CacheBuster:
         """
         if endpoint == 'static':
             filename = values.get('filename')
-            if filename:
+            if filename in self._manifest:
+                # The hashed name is the version; no query string needed
+                values['filename'] = self._manifest[filename]
+            elif filename:
                 version = self.get_file_version(filename)
                 values['v'] = version
         
         return url_for(endpoint, **values)
     
-    def add_cache_control_headers(self, response):
+    def static_cache_headers(self, request_path, query_string=''):
         """
-        Add appropriate cache control headers to responses.
-        
+        Cache headers for a static file response.
+
+        Also used by the static file middleware (utils/static_files.py), which
+        answers static requests before they reach Flask.
+
         Args:
-            response: Flask response object
-            
+            request_path (str): Request path (/static/...)
+            query_string (str): Raw query string
+
         Returns:
-            Flask response object with cache headers
+            dict: Header name -> value
         """
-        # Get the request path
-        try:
-            from flask import request
-            request_path = request.path
-        except:
-            return response
-        
-        # Static files with version parameter - cache for 1 year
-        if '/static/' in request_path and 'v=' in request.query_string.decode():
-            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
-            response.headers['Expires'] = time.strftime(
+        headers = {}
+        # Content-hashed build output and static files with version parameter - cache for 1 year
+        if (request_path.startswith('/static/dist/') and not request_path.endswith('/manifest.json')) or (
+                '/static/' in request_path and 'v=' in query_string):
+            headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            headers['Expires'] = time.strftime(
                 '%a, %d %b %Y %H:%M:%S GMT',
                 time.gmtime(time.time() + 31536000)
             )
 
         # Critical CSS/JS files without version - force revalidation
-        elif '/static/' in request_path and any(critical in request_path for critical in [
+        elif any(critical in request_path for critical in [
             'styles.css', 'script.js', 'auth.css', 'auth.js', 'common.js',
             'bilingual-conversation.js', 'usage-validation.js', 'usage-enforcement.js',
             'usage-tracking-free.js', 'plan-access-control.js', 'language-preferences.js',
             'payment.js', 'cache-manager.js', 'mobile-nav.js', 'navigation.js',
             'dashboard.js', 'home.js', 'history.js', 'profile.js', 'try_it_free.js'
         ]):
-            response.headers['Cache-Control'] = 'no-cache, must-revalidate'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
-            response.headers['Last-Modified'] = time.strftime(
+            headers['Cache-Control'] = 'no-cache, must-revalidate'
+            headers['Pragma'] = 'no-cache'
+            headers['Expires'] = '0'
+            headers['Last-Modified'] = time.strftime(
                 '%a, %d %b %Y %H:%M:%S GMT',
                 time.gmtime()
             )
 
         # Other static files without version - cache for 1 hour
-        elif '/static/' in request_path:
-            response.headers['Cache-Control'] = 'public, max-age=3600'
-            response.headers['Expires'] = time.strftime(
+        else:
+            headers['Cache-Control'] = 'public, max-age=3600'
+            headers['Expires'] = time.strftime(
                 '%a, %d %b %Y %H:%M:%S GMT',
                 time.gmtime(time.time() + 3600)
             )
+        return headers
+
+    def add_cache_control_headers(self, response):
+        """
+        Add appropriate cache control headers to responses.
         
+        Args:
+            response: Flask response object
+            
+        Returns:
+            Flask response object with cache headers
+        """
+        # Get the request path
+        try:
+            from flask import request
+            request_path = request.path
+        except:
+            return response
+        
+        # Static files
+        if '/static/' in request_path:
+            response.headers.update(self.static_cache_headers(request_path, request.query_string.decode()))
+
         # HTML pages - no cache or short cache
         elif request_path.endswith('.html') or request_path == '/':
             response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
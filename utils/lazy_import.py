@@ -0,0 +1,70 @@
+"""
+Deferred imports for heavy SDKs.
+
+`google.generativeai` pulls in gRPC, protobuf and the google-api-core stack and
+takes longer to import than the rest of the app combined. Services reference
+it through a LazyModule so that the import (and `genai.configure`) happen on
+the first real Gemini call instead of at boot, which keeps gunicorn worker
+recycles and deploy cold starts short.
+"""
+
+import os
+import importlib
+import importlib.util
+import threading
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name, on_import=None):
+        """
+        Args:
+            name: Dotted module name to import
+            on_import: Optional callable invoked once with the imported module
+        """
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_import:
+                        self._on_import(module)
+                    self._module = module
+        return self._module
+
+    @property
+    def is_loaded(self):
+        """True once the underlying module has been imported."""
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule '{self._name}' ({state})>"
+
+
+def module_available(name):
+    """Check whether a module can be imported without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _configure_gemini(module):
+    """Configure the Gemini SDK once, right after it is imported."""
+    api_key = os.getenv('GEMINI_API_KEY')
+    if api_key:
+        module.configure(api_key=api_key, transport=os.getenv('GEMINI_TRANSPORT') or None)
+
+
+# Shared, lazily imported and configured Gemini SDK
+genai = LazyModule('google.generativeai', on_import=_configure_gemini)
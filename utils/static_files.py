@@ -0,0 +1,243 @@
+"""
+Static file serving for VocalLocal.
+
+Every /static/ request used to go through Flask: routing, the session and
+user loading hooks, send_from_directory and the after_request handlers, on the
+same gunicorn threads that run transcriptions, and without compression.
+StaticFiles is WSGI middleware placed in front of the Flask app that answers
+static requests itself from an index of the static folder built at startup
+(path, size, type, ETag and compressed variants of each file), so a hit is a
+dict lookup. It negotiates Accept-Encoding: the .br and .gz files written by
+build_assets.py are used where they exist, and other text files are gzipped
+once into memory. Cache headers follow CacheBuster's policy.
+
+STATIC_SERVING selects how the body is sent:
+    index             The worker sends it (wsgi.file_wrapper, i.e. sendfile() under gunicorn)
+    x-accel-redirect  nginx sends it: the response only carries X-Accel-Redirect
+                      with STATIC_ACCEL_PREFIX and the file's path under the static folder
+    x-sendfile        Apache/lighttpd send it: X-Sendfile with the absolute path
+    flask             No middleware; Flask serves static files as before
+
+Paths that are not in the index fall through to Flask.
+"""
+import os
+import gzip
+import logging
+import mimetypes
+from wsgiref.handlers import format_date_time
+
+logger = logging.getLogger(__name__)
+
+MODES = ('index', 'x-accel-redirect', 'x-sendfile')
+
+# Content types worth compressing when the build did not
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+# Larger files are not compressed into memory at startup
+MEMORY_COMPRESS_MAX_BYTES = 1024 * 1024
+# Encodings in order of preference, with the suffix of their precompressed file
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+SECURITY_HEADERS = (
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'SAMEORIGIN'),
+    ('X-XSS-Protection', '1; mode=block'),
+)
+
+
+class _Variant:
+    """One representation of a static file: the file itself or a compressed copy."""
+
+    def __init__(self, encoding, path=None, data=None, mtime=None):
+        self.encoding = encoding
+        self.path = path  # on disk, or None for an in-memory body
+        self.data = data
+        if path:
+            stat = os.stat(path)
+            self.size, self.mtime = stat.st_size, stat.st_mtime
+        else:
+            # Same ETag in every worker: an in-memory body takes its source file's time
+            self.size, self.mtime = len(data), mtime
+        self.etag = f'"{int(self.mtime):x}-{self.size:x}{"-" + encoding if encoding else ""}"'
+
+
+class _Entry:
+    """Index entry of a static file."""
+
+    def __init__(self, path, content_type, variants):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime
+        self.content_type = content_type
+        self.variants = variants  # encoding ('br', 'gzip', None) -> _Variant
+        self.last_modified = format_date_time(self.mtime)
+
+
+def accepted_encodings(header):
+    """Content codings a client accepts, from its Accept-Encoding header."""
+    accepted = set()
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticFiles:
+    """WSGI middleware serving the static folder from an in-memory index."""
+
+    def __init__(self, app, static_dir, prefix='/static/', mode='index', accel_prefix='/protected-static/',
+                 cache_headers=None, autorefresh=False, skip=('.gz', '.br')):
+        """
+        Index the static folder.
+
+        Args:
+            app: The WSGI application to pass other requests to
+            static_dir: Static folder
+            prefix: URL prefix of static files
+            mode: 'index', 'x-accel-redirect' or 'x-sendfile' (STATIC_SERVING)
+            accel_prefix: nginx internal location mapped to the static folder (STATIC_ACCEL_PREFIX)
+            cache_headers: Called with (request path, query string); returns cache headers as a dict
+            autorefresh: Re-read files changed since startup (development)
+            skip: Suffixes of files that are not served directly
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown static serving mode: {mode}")
+        self.app = app
+        self.static_dir = os.path.abspath(static_dir)
+        self.prefix = prefix
+        self.mode = mode
+        self.accel_prefix = accel_prefix.rstrip('/') + '/'
+        self.cache_headers = cache_headers or (lambda path, query: {'Cache-Control': 'public, max-age=3600'})
+        self.autorefresh = autorefresh
+        self.skip = tuple(skip)
+        self.files = {}
+        self.index()
+
+    def index(self):
+        """(Re)build the index; returns the number of files."""
+        files = {}
+        for root, dirs, names in os.walk(self.static_dir):
+            dirs.sort()
+            for name in sorted(names):
+                if name.endswith(self.skip):
+                    continue
+                path = os.path.join(root, name)
+                url_path = os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+                try:
+                    files[url_path] = self._entry(path)
+                except OSError as e:
+                    logger.warning(f"Not indexing static file {url_path}: {str(e)}")
+        self.files = files
+        logger.info(f"Indexed {len(files)} static files ({self.mode})")
+        return len(files)
+
+    def _entry(self, path):
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        variants = {None: _Variant(None, path)}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                variants[encoding] = _Variant(encoding, path + suffix)
+
+        identity = variants[None]
+        # Compress text files the build did not, unless the body is redirected to the front-end server
+        if ('gzip' not in variants and self.mode == 'index' and content_type.startswith(COMPRESSIBLE_TYPES)
+                and 0 < identity.size <= MEMORY_COMPRESS_MAX_BYTES):
+            with open(path, 'rb') as f:
+                data = f.read()
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                variants['gzip'] = _Variant('gzip', data=compressed, mtime=identity.mtime)
+        return _Entry(path, content_type, variants)
+
+    def _lookup(self, url_path):
+        entry = self.files.get(url_path)
+        if self.autorefresh and not url_path.endswith(self.skip):
+            path = os.path.join(self.static_dir, *url_path.split('/'))
+            try:
+                changed = entry is None or os.stat(path).st_mtime != entry.mtime
+            except OSError:
+                self.files.pop(url_path, None)
+                return None
+            if changed and os.path.isfile(path) and os.path.realpath(path).startswith(self.static_dir + os.sep):
+                entry = self.files[url_path] = self._entry(path)
+        return entry
+
+    def __call__(self, environ, start_response):
+        path_info = environ.get('PATH_INFO', '')
+        if not path_info.startswith(self.prefix) or environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            return self.app(environ, start_response)
+        entry = self._lookup(path_info[len(self.prefix):])
+        if entry is None:
+            return self.app(environ, start_response)
+        return self.serve(entry, environ, start_response)
+
+    def serve(self, entry, environ, start_response):
+        """Respond with the best representation of an indexed file."""
+        accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING'))
+        variant = next((entry.variants[encoding] for encoding, _ in ENCODINGS
+                        if encoding in entry.variants and encoding in accepted), entry.variants[None])
+
+        headers = dict(self.cache_headers(environ.get('PATH_INFO', ''), environ.get('QUERY_STRING', '')))
+        headers.update({'Content-Type': entry.content_type, 'ETag': variant.etag,
+                        'Last-Modified': entry.last_modified})
+        if len(entry.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if variant.encoding:
+            headers['Content-Encoding'] = variant.encoding
+        headers = list(headers.items()) + list(SECURITY_HEADERS)
+
+        if variant.etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+
+        if self.mode != 'index' and variant.path:
+            # The front-end server reads the file; the worker only sends headers
+            relative = os.path.relpath(variant.path, self.static_dir).replace(os.sep, '/')
+            if self.mode == 'x-accel-redirect':
+                headers.append(('X-Accel-Redirect', self.accel_prefix + relative))
+            else:
+                headers.append(('X-Sendfile', variant.path))
+            start_response('200 OK', headers)
+            return []
+
+        headers.append(('Content-Length', str(variant.size)))
+        if environ.get('REQUEST_METHOD') == 'HEAD' or variant.data is not None:
+            start_response('200 OK', headers)
+            return [] if environ.get('REQUEST_METHOD') == 'HEAD' else [variant.data]
+        try:
+            f = open(variant.path, 'rb')
+        except OSError:
+            # Removed since it was indexed
+            self.files.pop(environ.get('PATH_INFO', '')[len(self.prefix):], None)
+            return self.app(environ, start_response)
+        start_response('200 OK', headers)
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper:
+            return file_wrapper(f, 64 * 1024)
+        return _FileIterator(f)
+
+
+class _FileIterator:
+    """Reads a file in blocks when the server has no wsgi.file_wrapper."""
+
+    def __init__(self, f, block_size=64 * 1024):
+        self.f = f
+        self.block_size = block_size
+
+    def __iter__(self):
+        while True:
+            block = self.f.read(self.block_size)
+            if not block:
+                break
+            yield block
+
+    def close(self):
+        self.f.close()